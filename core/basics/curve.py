@@ -17,7 +17,7 @@ import numpy as np
 from scipy import interpolate
 
 # Import astronomical modules
-from astropy.units import spectral
+from astropy.units import spectral, Unit
 
 # Import the relevant PTS classes and modules
 from .table import SmartTable
@@ -421,7 +421,7 @@ class WavelengthCurve(Curve):
 
         # Create conversion info
         if conversion_info is None: conversion_info = dict()
-        conversion_info["wavelengths"] = self.wavelengths()
+        if unit is not None: conversion_info["wavelengths"] = self.wavelengths(unit="micron", asarray=True) * Unit("micron")
 
         # Create and return
         if asarray: return arrays.plain_array(self[self.value_name], unit=unit, array_unit=self.column_unit(self.value_name),
@@ -638,19 +638,117 @@ class SmartTable(Table):
         for i in range(len(values)):
 
             if values[i] is not None: new_values.append(values[i])
-            else:
-                colname = self.colnames[i]
-                if self.is_string_type(colname): new_values.append("")
-                elif self.is_real_type(colname): new_values.append(0.)
-                elif self.is_integer_type(colname): new_values.append(0)
-                elif self.is_boolean_type(colname): new_values.append(False)
-                else: raise ValueError("Unknown column type for '" + colname + "'")
+            else: new_values.append(self._default_value(self.colnames[i]))
 
         # Add the row
         super(SmartTable, self).add_row(new_values, mask=mask)
 
     # -----------------------------------------------------------------
 
+    def _default_value(self, colname):
+
+        """
+        This function returns the value that is set for masked entries of the column
+        :param colname:
+        :return:
+        """
+
+        if self.is_string_type(colname): return ""
+        elif self.is_real_type(colname): return 0.
+        elif self.is_integer_type(colname): return 0
+        elif self.is_boolean_type(colname): return False
+        else: raise ValueError("Unknown column type for '" + colname + "'")
+
+    # -----------------------------------------------------------------
+
+    def _column_values(self, index, values):
+
+        """
+        This function strips the units and converts the lists of the values for the column with the given index
+        (as _strip_units and _convert_lists for a row), calculating the conversion factor only once for each unit
+        :param index:
+        :param values:
+        :return:
+        """
+
+        column_type = self.column_info[index][1]
+        column_unit = self.column_info[index][2]
+
+        factors = dict()
+        converted_values = []
+
+        for value in values:
+
+            # Quantity: convert to the column unit
+            if hasattr(value, "unit"):
+
+                assert column_unit is not None
+
+                if value.unit not in factors:
+                    if isinstance(value.unit, PhotometricUnit): factors[value.unit] = value.unit.conversion_factor(column_unit)
+                    else: factors[value.unit] = value.unit.to(column_unit)
+
+                converted_value = value.value * factors[value.unit]
+
+            # List: convert to string
+            elif isinstance(value, list):
+
+                if len(value) == 0: converted_value = None
+                elif column_type == str: converted_value = ",".join(map(str, value))
+                else: raise ValueError("Cannot have a list element in the column that is not of string type")
+
+            else: converted_value = value
+
+            converted_values.append(converted_value)
+
+        # Return the converted values
+        return converted_values
+
+    # -----------------------------------------------------------------
+
+    def add_rows(self, columns):
+
+        """
+        This function adds rows to the table, given the values for each column (in the order of the columns).
+        The columns are extended at once, instead of row by row as with add_row.
+        :param columns:
+        :return:
+        """
+
+        # Setup if necessary
+        if len(self.colnames) == 0: self.setup()
+
+        # Check the number of columns and rows
+        if len(columns) != len(self.colnames): raise ValueError("The number of columns (" + str(len(columns)) + ") does not match the number of columns of the table (" + str(len(self.colnames)) + ")")
+        nrows = len(columns[0]) if len(columns) > 0 else 0
+        if any(len(values) != nrows for values in columns): raise ValueError("The columns do not have the same length")
+        if nrows == 0: return
+
+        new_columns = []
+        for index, colname in enumerate(self.colnames):
+
+            # Strip units and convert lists
+            values = self._column_values(index, columns[index])
+
+            # Create mask, set masked values to have a default value
+            mask = [value is None for value in values]
+            default = self._default_value(colname)
+            values = [default if value is None else value for value in values]
+
+            # Create the extended column (strings are resized to the longest value)
+            column = self[colname]
+            if self.is_string_type(colname): data = np.array(values, dtype=str)
+            else: data = np.array(values, dtype=column.dtype)
+            data = np.concatenate((np.ma.getdata(column), data))
+            mask = np.concatenate((np.ma.getmaskarray(column), mask))
+            new_columns.append(MaskedColumn(data=data, mask=mask, name=colname, unit=column.unit, description=column.description))
+
+        # Replace the columns
+        self.remove_columns(list(self.colnames))
+        self.add_columns(new_columns)
+
+    # -----------------------------------------------------------------
+
     def column_type(self, column_name):
 
         """
@@ -26,6 +26,7 @@ from ..units.parsing import parse_unit as u
 from ..filter.filter import parse_filter
 from ..tools import arrays
 from ..simulation import textfile
+from ..simulation import sidecar
 
 # -----------------------------------------------------------------
 
@@ -227,7 +228,8 @@ class SED(WavelengthCurve):
         # Load the column data
         if contribution not in contributions_index: raise ValueError("Wrong value for 'contribution': should be 'total', 'direct', 'scattered', 'dust', 'dustscattered' or 'transparent'")
         columns = (0, contributions_index[contribution])
-        wavelength_column, photometry_column = np.loadtxt(path, dtype=float, unpack=True, skiprows=skiprows, usecols=columns)
+        if skiprows == 0: wavelength_column, photometry_column = sidecar.load_columns(path, usecols=columns)
+        else: wavelength_column, photometry_column = np.loadtxt(path, dtype=float, unpack=True, skiprows=skiprows, usecols=columns)
 
         # Get column units
         wavelength_unit = units[0]
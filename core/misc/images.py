@@ -19,7 +19,7 @@ from collections import defaultdict
 from ..basics.log import log
 from ..tools import filesystem as fs
 from ..filter.filter import parse_filter
-from ...magic.core.kernel import ConvolutionKernel
+from ...magic.convolution.cache import prepared_kernel_from_file
 from ...magic.core.datacube import DataCube
 from ...magic.basics.coordinatesystem import CoordinateSystem
 from ...magic.core.remote import RemoteDataCube
@@ -783,18 +783,18 @@ class ObservedImageMaker(Configurable):
                 # Check whether the pixelscale is defined
                 if self.images[instr_name][filter_name].pixelscale is None: raise ValueError("Pixelscale of the '" + filter_name + "' image of the '" + instr_name + "' datacube is not defined, convolution not possible")
 
+                # Get the frame
+                frame = self.images[instr_name][filter_name]
+
                 # Debugging
                 log.debug("Loading the convolution kernel for the '" + filter_name + "' filter ...")
 
-                # Load the kernel
-                kernel = ConvolutionKernel.from_file(self.kernel_paths[filter_name])
+                # Get the kernel, prepared for the pixelscale of the frame (only loaded and prepared once for all instruments)
+                kernel = prepared_kernel_from_file(self.kernel_paths[filter_name], frame.pixelscale)
 
                 # Debugging
                 log.debug("Convolving the '" + filter_name + "' image of the '" + instr_name + "' instrument ...")
 
-                # Get the frame
-                frame = self.images[instr_name][filter_name]
-
                 # Convert into remote frame if necessary
                 if self.remote_convolve_threshold is not None and isinstance(frame, Frame) and frame.data_size > self.remote_convolve_threshold:
 
@@ -13,17 +13,187 @@
 #  - AWAT column text format
 #  - DOLAG column text format
 #
+#  - ULB column text format (gas particles only)
+#
 # There is a separate function for star and gas particles, for each format.
 # The arguments for each function are:
 #  - infile: the name of the input file in foreign format
 #  - outfile: the name of the output file in SKIRT6 format (file is overwritten)
+#  - binary: if True, also write the converted particles to a binary file in numpy format (with the same name as
+#    the output file, but with the extension ".npy"); default is False
+#
+# The input file is read and converted in chunks of particles, so that large files are never held in memory
+# as a whole. The binary file is accompanied by a key file (with the same name as the binary file, but with the
+# additional extension ".key") that records the absolute path, size and modification time of the input file, the
+# converter, and the size and modification time of the output file. If a binary file is requested and the key
+# matches the input file and the converter, the particles are taken from the existing binary file instead of parsing
+# the input file. The function load_particles() returns the converted particles from the binary file if its key
+# matches the output file, and from the text file otherwise.
 
 # -----------------------------------------------------------------
 
 # Import standard modules
+import os.path
+import itertools
 import math as math
 import numpy as np
 
+# -----------------------------------------------------------------
+#  Shared conversion machinery
+# -----------------------------------------------------------------
+
+## The number of particles that are read, converted and written at once
+chunksize = 1000000
+
+## The column descriptions of the SKIRT6 star and gas particle formats
+starcolumns = "x(pc) y(pc) z(pc) h(pc) M(Msun) Z(0-1) t(yr)"
+gascolumns = "x(pc) y(pc) z(pc) h(pc) M(Msun) Z(0-1)"
+
+## This function returns the name of the binary file that accompanies the specified SKIRT6 particle file.
+def binaryfile(outfile):
+    return os.path.splitext(outfile)[0] + ".npy"
+
+## This function returns the name of the key file that accompanies the binary file of the specified SKIRT6 particle file.
+def keyfile(outfile):
+    return binaryfile(outfile) + ".key"
+
+## This function returns the part of the key of a binary file that identifies the specified input file and converter,
+# as a dictionary of strings.
+def inputkey(infile, converter):
+    size, mtime = os.path.getsize(infile), os.path.getmtime(infile)
+    return { 'infile': os.path.abspath(infile), 'insize': str(size), 'inmtime': repr(mtime), 'converter': converter }
+
+## This function returns the part of the key of a binary file that identifies the specified SKIRT6 particle file,
+# as a dictionary of strings.
+def outputkey(outfile):
+    size, mtime = os.path.getsize(outfile), os.path.getmtime(outfile)
+    return { 'outsize': str(size), 'outmtime': repr(mtime) }
+
+## This function returns the key of the binary file of the specified SKIRT6 particle file as a dictionary of strings,
+# or None if the binary file or its key file does not exist or cannot be read.
+def readkey(outfile):
+    if not os.path.isfile(binaryfile(outfile)): return None
+    try:
+        with open(keyfile(outfile), 'r') as fid:
+            return dict(line.rstrip('\n').split(' = ', 1) for line in fid if ' = ' in line)
+    except IOError:
+        return None
+
+## This function returns True if the specified key contains all items of the specified (partial) key.
+def matchkey(key, partialkey):
+    return key is not None and all(key.get(name) == value for name, value in partialkey.items())
+
+## This function writes the key of the binary file of the specified SKIRT6 particle file, converted from the specified
+# input file with the specified converter.
+def writekey(outfile, infile, converter):
+    key = inputkey(infile, converter)
+    key.update(outputkey(outfile))
+    with open(keyfile(outfile), 'w') as fid:
+        for name in sorted(key): fid.write(name + ' = ' + key[name] + '\n')
+
+## This function yields the particles in the specified column text file in chunks, each chunk being a 2D array
+# with a row for each particle and a column for each of the specified column indices (all columns if None).
+# Empty lines and lines starting with '#' are skipped.
+def readchunks(infile, usecols=None, chunksize=chunksize):
+    with open(infile, 'r') as fid:
+        lines = (line for line in fid if line.strip() and not line.lstrip().startswith('#'))
+        while True:
+            chunk = list(itertools.islice(lines, chunksize))
+            if len(chunk) == 0: return
+            ncols = len(chunk[0].split())
+            data = np.fromstring(" ".join(chunk), sep=" ")
+            if data.size != len(chunk)*ncols:
+                raise ValueError("Particle file " + infile + " has lines with a varying number of columns")
+            data = data.reshape((len(chunk), ncols))
+            yield data if usecols is None else data[:,usecols]
+
+## This function yields the converted particles in the specified binary file in chunks.
+def readbinarychunks(binfile, chunksize=chunksize):
+    data = np.load(binfile, mmap_mode='r')
+    for start in range(0, len(data), chunksize):
+        yield np.array(data[start:start+chunksize])
+
+## This function writes the specified 2D array of particles to an open SKIRT6 text file, in the same format as
+# np.savetxt with format "%1.9g", but formatting the complete chunk at once.
+def writetext(fid, data):
+    if len(data) == 0: return
+    rowformat = " ".join(["%1.9g"]*data.shape[1])
+    fid.write(("\n".join([rowformat]*len(data)) + "\n") % tuple(data.ravel()))
+
+## This function writes the header of a binary particle file (in numpy format) for the specified number of particles
+# and columns. The header has the same length for any number of particles, so that it can be rewritten at the end.
+def writebinaryheader(fid, nparticles, ncolumns):
+    np.lib.format.write_array_header_1_0(fid, { 'descr': np.lib.format.dtype_to_descr(np.dtype('<f8')),
+                                                'fortran_order': False, 'shape': (nparticles, ncolumns) })
+
+## This function converts the particles in the specified input file to the SKIRT6 format, chunk by chunk.
+# The arguments are:
+#  - infile, outfile, binary: as described for the format-specific functions
+#  - usecols: the indices of the input columns that are used (all columns if None)
+#  - transform: a function that takes the used input columns as arrays and returns the output columns
+#  - stars: True for star particles, False for gas particles
+#  - source: the name of the foreign format, for the header of the output file
+def convert(infile, outfile, usecols, transform, stars, source, binary=False):
+    columns = starcolumns if stars else gascolumns
+    ncolumns = len(columns.split())
+    binfile = binaryfile(outfile)
+    converter = source + (" stars" if stars else " gas")
+
+    # if a binary file is requested, get the converted particles from the existing binary file if it was created
+    # from the same input file with the same converter; otherwise convert the input file
+    reuse = binary and matchkey(readkey(outfile), inputkey(infile, converter))
+    if reuse:
+        chunks = readbinarychunks(binfile)
+    else:
+        chunks = (np.column_stack(transform(*chunk.T)) for chunk in readchunks(infile, usecols))
+        if os.path.isfile(keyfile(outfile)): os.remove(keyfile(outfile))
+
+    bid = None
+    fid = open(outfile, 'w')
+    try:
+        fid.write('# SPH ' + ('Star' if stars else 'Gas') + ' Particles\n')
+        fid.write('# Converted from ' + source + ' output format into SKIRT6 format\n')
+        fid.write('# Columns contain: ' + columns + '\n')
+
+        if binary and not reuse:
+            bid = open(binfile + ".tmp", 'wb')
+            writebinaryheader(bid, 0, ncolumns)
+            headersize = bid.tell()
+
+        # convert and write the particles chunk by chunk
+        nparticles = 0
+        for data in chunks:
+            writetext(fid, data)
+            if bid is not None: bid.write(data.astype('<f8').tobytes())
+            nparticles += len(data)
+
+        # complete the binary file with the actual number of particles
+        if bid is not None:
+            bid.seek(0)
+            writebinaryheader(bid, nparticles, ncolumns)
+            if bid.tell() != headersize: raise ValueError("Unexpected size of the binary particle file header")
+            bid.close()
+            bid = None
+            os.rename(binfile + ".tmp", binfile)
+    finally:
+        fid.close()
+        if bid is not None:
+            bid.close()
+            os.remove(binfile + ".tmp")
+
+    # record the input file, the converter and the output file for the binary file
+    if binary: writekey(outfile, infile, converter)
+
+## This function returns the particles in the specified SKIRT6 particle file as a 2D array, with a row for each particle
+# and a column for each of the SKIRT6 columns. If the accompanying binary file exists and its key matches the SKIRT6
+# file, the particles are loaded from the binary file (memory-mapped, read-only); otherwise the text file is parsed.
+def load_particles(outfile):
+    key = readkey(outfile)
+    if key is not None and (not os.path.isfile(outfile) or matchkey(key, outputkey(outfile))):
+        return np.load(binaryfile(outfile), mmap_mode='r')
+    chunks = list(readchunks(outfile))
+    return np.vstack(chunks) if len(chunks) > 0 else np.zeros((0,0))
+
 # -----------------------------------------------------------------
 #  EAGLE column text format
 # -----------------------------------------------------------------
@@ -31,26 +201,16 @@ import numpy as np
 ## EAGLE star particles:
 # - incoming:  x(kpc) y(kpc) z(kpc) t(yr) h(kpc) Z(0-1) M(Msun)
 # - outgoing:  x(pc) y(pc) z(pc) h(pc) M(Msun) Z(0-1) t(yr)
-def convert_stars_EAGLE(infile, outfile):
-    x,y,z,t,h,Z,M = np.loadtxt(infile, unpack=True)
-    fid = open(outfile, 'w')
-    fid.write('# SPH Star Particles\n')
-    fid.write('# Converted from EAGLE SKIRT5 output format into SKIRT6 format\n')
-    fid.write('# Columns contain: x(pc) y(pc) z(pc) h(pc) M(Msun) Z(0-1) t(yr)\n')
-    np.savetxt(fid, np.transpose((x*1e3,y*1e3,z*1e3,h*1e3,M,Z,t)), fmt="%1.9g")
-    fid.close()
+def convert_stars_EAGLE(infile, outfile, binary=False):
+    convert(infile, outfile, None, lambda x,y,z,t,h,Z,M: (x*1e3,y*1e3,z*1e3,h*1e3,M,Z,t),
+            True, "EAGLE SKIRT5", binary)
 
 ## EAGLE gas particles:
 # - incoming:  x(kpc) y(kpc) z(kpc) SFR(?) h(kpc) Z(0-1) M(Msun)
 # - outgoing:  x(pc) y(pc) z(pc) h(pc) M(Msun) Z(0-1)
-def convert_gas_EAGLE(infile, outfile):
-    x,y,z,SFR,h,Z,M = np.loadtxt(infile, unpack=True)
-    fid = open(outfile, 'w')
-    fid.write('# SPH Gas Particles\n')
-    fid.write('# Converted from EAGLE SKIRT5 output format into SKIRT6 format\n')
-    fid.write('# Columns contain: x(pc) y(pc) z(pc) h(pc) M(Msun) Z(0-1)\n')
-    np.savetxt(fid, np.transpose((x*1e3,y*1e3,z*1e3,h*1e3,M,Z)), fmt="%1.9g")
-    fid.close()
+def convert_gas_EAGLE(infile, outfile, binary=False):
+    convert(infile, outfile, None, lambda x,y,z,SFR,h,Z,M: (x*1e3,y*1e3,z*1e3,h*1e3,M,Z),
+            False, "EAGLE SKIRT5", binary)
 
 # -----------------------------------------------------------------
 #  AWAT column text format
@@ -60,34 +220,25 @@ def convert_gas_EAGLE(infile, outfile):
 # - incoming:  x y z vx vy vz M ms0 mzHe mzC mzN mzO mzNe mzMg mzSi mzFe mzZ Z ts id flagfd rho h ...
 # -    units:  x,y,z,h (100kpc); M (1e12 Msun); ts(0.471Gyr) with t = (1Gyr-ts)
 # - outgoing:  x(pc) y(pc) z(pc) h(pc) M(Msun) Z(0-1) t(yr)
-def convert_stars_AWAT(infile, outfile):
-    x,y,z,M,Z,ts,h = np.loadtxt(infile, usecols=(0,1,2,6,17,18,22), unpack=True)
-    fid = open(outfile, 'w')
-    fid.write('# SPH Star Particles\n')
-    fid.write('# Converted from AWAT output format into SKIRT6 format\n')
-    fid.write('# Columns contain: x(pc) y(pc) z(pc) h(pc) M(Msun) Z(0-1) t(yr)\n')
-    np.savetxt(fid, np.transpose((x*1e5,y*1e5,z*1e5,h*1e5,M*1e12,Z,1e9-ts*0.471e9)), fmt="%1.9g")
-    fid.close()
+def convert_stars_AWAT(infile, outfile, binary=False):
+    convert(infile, outfile, (0,1,2,6,17,18,22),
+            lambda x,y,z,M,Z,ts,h: (x*1e5,y*1e5,z*1e5,h*1e5,M*1e12,Z,1e9-ts*0.471e9),
+            True, "AWAT", binary)
 
 ## AWAT gas particles:
 # - incoming:  x y z vx vy vz M rho u mzHe mzC mzN mzO mzNe mzMg mzSi mzFe mzZ id flagfd h myu nhp Temp ...
 # -    units:  x,y,z,h (100kpc); M (1e12 Msun); mzZ (Msun) so that Z=mzZ/(M*1e12)
 # - outgoing:  x(pc) y(pc) z(pc) h(pc) M(Msun) Z(0-1)
-def convert_gas_AWAT(infile, outfile):
-    x,y,z,M,mzZ,h = np.loadtxt(infile, usecols=(0,1,2,6,17,20), unpack=True)
-    fid = open(outfile, 'w')
-    fid.write('# SPH Gas Particles\n')
-    fid.write('# Converted from AWAT output format into SKIRT6 format\n')
-    fid.write('# Columns contain: x(pc) y(pc) z(pc) h(pc) M(Msun) Z(0-1)\n')
-    np.savetxt(fid, np.transpose((x*1e5,y*1e5,z*1e5,h*1e5,M*1e12,mzZ/(M*1e12))), fmt="%1.9g")
-    fid.close()
+def convert_gas_AWAT(infile, outfile, binary=False):
+    convert(infile, outfile, (0,1,2,6,17,20),
+            lambda x,y,z,M,mzZ,h: (x*1e5,y*1e5,z*1e5,h*1e5,M*1e12,mzZ/(M*1e12)),
+            False, "AWAT", binary)
 
 # -----------------------------------------------------------------
 #  DOLAG column text format
 # -----------------------------------------------------------------
 
 # return the age of a star (in yr) given the universe expansion factor when the star was born (in range 0-1)
-@np.vectorize
 def age(R):
     H0 = 2.3e-18
     OmegaM0 = 0.27
@@ -96,7 +247,6 @@ def age(R):
     return T0 - (2./3./H0/np.sqrt(1-OmegaM0)) * np.arcsinh(np.sqrt( (1/OmegaM0-1)*R**3 )) / yr
 
 # return the radius of a particle (in kpc) given its mass (in Msun) and density (in Msun/kpc3)
-@np.vectorize
 def radius(M,rho):
     return (M/rho*3/4/math.pi*64)**(1./3.)
 
@@ -104,27 +254,19 @@ def radius(M,rho):
 # - incoming:  id x y z vx vy vz M R
 # -    units:  x,y,z (kpc); M (Msun); R (0-1); assume Z=0.02 & h=1kpc; calculate t(R)
 # - outgoing:  x(pc) y(pc) z(pc) h(pc) M(Msun) Z(0-1) t(yr)
-def convert_stars_DOLAG(infile, outfile):
-    x,y,z,M,R = np.loadtxt(infile, usecols=(1,2,3,7,8), unpack=True)
-    fid = open(outfile, 'w')
-    fid.write('# SPH Star Particles\n')
-    fid.write('# Converted from DOLAG output format into SKIRT6 format\n')
-    fid.write('# Columns contain: x(pc) y(pc) z(pc) h(pc) M(Msun) Z(0-1) t(yr)\n')
-    np.savetxt(fid, np.transpose((x*1e3,y*1e3,z*1e3,np.ones_like(x)*1e3,M,np.ones_like(x)*0.02,age(R))), fmt="%1.9g")
-    fid.close()
+def convert_stars_DOLAG(infile, outfile, binary=False):
+    convert(infile, outfile, (1,2,3,7,8),
+            lambda x,y,z,M,R: (x*1e3,y*1e3,z*1e3,np.ones_like(x)*1e3,M,np.ones_like(x)*0.02,age(R)),
+            True, "DOLAG", binary)
 
 ## DOLAG gas particles:
 # - incoming:  id x y z vx vy vz M rho T cf u sfr
 # -    units:  x,y,z (kpc); M (Msun); assume Z=0.02; calculate h(M,rho)
 # - outgoing:  x(pc) y(pc) z(pc) h(pc) M(Msun) Z(0-1)
-def convert_gas_DOLAG(infile, outfile):
-    x,y,z,M,rho = np.loadtxt(infile, usecols=(1,2,3,7,8), unpack=True)
-    fid = open(outfile, 'w')
-    fid.write('# SPH Gas Particles\n')
-    fid.write('# Converted from DOLAG output format into SKIRT6 format\n')
-    fid.write('# Columns contain: x(pc) y(pc) z(pc) h(pc) M(Msun) Z(0-1)\n')
-    np.savetxt(fid, np.transpose((x*1e3,y*1e3,z*1e3,radius(M,rho)*1e3,M,np.ones_like(x)*0.02)), fmt="%1.9g")
-    fid.close()
+def convert_gas_DOLAG(infile, outfile, binary=False):
+    convert(infile, outfile, (1,2,3,7,8),
+            lambda x,y,z,M,rho: (x*1e3,y*1e3,z*1e3,radius(M,rho)*1e3,M,np.ones_like(x)*0.02),
+            False, "DOLAG", binary)
 
 # -----------------------------------------------------------------
 #  ULB column text format
@@ -134,16 +276,12 @@ def convert_gas_DOLAG(infile, outfile):
 # - incoming:  x y z M h rho vx vy vz ...
 # -    units:  x,y,z,h (100AU); M (Msun)
 # - outgoing:  x(pc) y(pc) z(pc) h(pc) M(Msun) Z(0-1)
-def convert_gas_ULB(infile, outfile):
+def convert_gas_ULB(infile, outfile, binary=False):
     PARSEC = 3.08568e16   # 1 parsec (in m)
     AU = 1.496e11         # 1 AU (in m)
     CONV = (100. * AU) / PARSEC
-    x,y,z,M,h = np.loadtxt(infile, usecols=(0,1,2,3,4), unpack=True)
-    fid = open(outfile, 'w')
-    fid.write('# SPH Gas Particles\n')
-    fid.write('# Converted from ULB output format into SKIRT6 format\n')
-    fid.write('# Columns contain: x(pc) y(pc) z(pc) h(pc) M(Msun) Z(0-1)\n')
-    np.savetxt(fid, np.transpose((x*CONV,y*CONV,z*CONV,5*h*CONV,M,np.zeros_like(M)+0.02)), fmt="%1.9g")  # inflated h!
-    fid.close()
+    convert(infile, outfile, (0,1,2,3,4),
+            lambda x,y,z,M,h: (x*CONV,y*CONV,z*CONV,5*h*CONV,M,np.zeros_like(M)+0.02),  # inflated h!
+            False, "ULB", binary)
 
 # -----------------------------------------------------------------
@@ -0,0 +1,285 @@
+#!/usr/bin/env python
+# -*- coding: utf8 -*-
+# *****************************************************************
+# **       PTS -- Python Toolkit for working with SKIRT          **
+# **       © Astronomical Observatory, Ghent University          **
+# *****************************************************************
+
+## \package pts.core.simulation.sidecar Contains functions to load SKIRT text output tables through cached binary sidecar files.
+#
+# The first time a SKIRT text table (e.g. a _ds_abs.dat, _ds_isrf.dat, _sed.dat or _wavelengths.dat file) is loaded,
+# its columns are parsed with a chunked text parser and written to a hidden binary sidecar next to the text file:
+# a .npy file with the column data (one contiguous row per column) and a .npz file with the column names, the units
+# and the size and modification time of the text file. Later loads memory-map the .npy file instead of re-parsing the
+# text, as long as the size and modification time of the text file have not changed.
+
+# -----------------------------------------------------------------
+
+# Ensure Python 3 compatibility
+from __future__ import absolute_import, division, print_function
+
+# Import standard modules
+import os
+import itertools
+import numpy as np
+
+# Import the relevant PTS classes and modules
+from ..tools import filesystem as fs
+from ..basics.log import log
+
+# -----------------------------------------------------------------
+
+# The number of lines that are parsed at once by the text parser
+chunk_nlines = 100000
+
+# The extensions of the sidecar files
+data_extension = "npy"
+header_extension = "npz"
+
+# -----------------------------------------------------------------
+
+def data_path_for(path):
+
+    """
+    This function returns the path of the binary data sidecar for the text file with the given path
+    :param path:
+    :return:
+    """
+
+    directory, name = fs.directory_and_name(path)
+    return fs.join(directory, "." + name + "." + data_extension)
+
+# -----------------------------------------------------------------
+
+def header_path_for(path):
+
+    """
+    This function returns the path of the header sidecar for the text file with the given path
+    :param path:
+    :return:
+    """
+
+    directory, name = fs.directory_and_name(path)
+    return fs.join(directory, "." + name + "." + header_extension)
+
+# -----------------------------------------------------------------
+
+def split_column_header(line):
+
+    """
+    This function splits a '# column N: description (unit)' header line into the description and the unit string
+    :param line:
+    :return:
+    """
+
+    description_and_unit = line.split(": ", 1)[1].strip()
+
+    if "(" in description_and_unit and ")" in description_and_unit:
+        description = description_and_unit.split(" (")[0]
+        unit = description_and_unit.split(" (")[1].split(")")[0]
+    else:
+        description = description_and_unit
+        unit = None
+
+    # Return
+    return description, unit
+
+# -----------------------------------------------------------------
+
+def parse_header(path):
+
+    """
+    This function reads only the header of the text file and returns the column descriptions and unit strings
+    :param path:
+    :return:
+    """
+
+    descriptions = []
+    units = []
+
+    with open(path, 'r') as fh:
+
+        for line in fh:
+
+            # We are no longer at the header
+            if not line.startswith("#"): break
+
+            # Not a column description
+            if not line.startswith("# column "): continue
+
+            description, unit = split_column_header(line)
+            descriptions.append(description)
+            units.append(unit)
+
+    # Return
+    return descriptions, units
+
+# -----------------------------------------------------------------
+
+def parse_text(path, skiprows=0):
+
+    """
+    This function parses the numerical data of a SKIRT text file in chunks of lines.
+    It returns a 2D array with one contiguous row per column of the file.
+    :param path:
+    :param skiprows:
+    :return:
+    """
+
+    chunks = []
+    ncolumns = None
+
+    with open(path, 'r') as fh:
+
+        # Skip rows
+        for _ in range(skiprows): next(fh)
+
+        while True:
+
+            # Read the next chunk of lines
+            lines = list(itertools.islice(fh, chunk_nlines))
+            if len(lines) == 0: break
+
+            # Remove comment and empty lines
+            lines = [line for line in lines if line.strip() and not line.lstrip().startswith("#")]
+            if len(lines) == 0: continue
+
+            # Determine the number of columns from the first data line
+            if ncolumns is None: ncolumns = len(lines[0].split())
+
+            # Parse all values of the chunk at once
+            values = np.fromstring(" ".join(lines), dtype=float, sep=" ")
+            if values.size != len(lines) * ncolumns: raise IOError("The number of columns in '" + path + "' is not consistent")
+
+            # Add the chunk
+            chunks.append(values.reshape((len(lines), ncolumns)))
+
+    # No data
+    if len(chunks) == 0: return np.empty((0, 0))
+
+    # Combine the chunks and make the columns contiguous
+    return np.ascontiguousarray(np.concatenate(chunks).T)
+
+# -----------------------------------------------------------------
+
+def has_valid_sidecar(path):
+
+    """
+    This function checks whether the text file has a sidecar that corresponds to its current size and modification time
+    :param path:
+    :return:
+    """
+
+    data_path = data_path_for(path)
+    header_path = header_path_for(path)
+    if not fs.is_file(data_path) or not fs.is_file(header_path): return False
+
+    size, mtime = fs.file_signature(path)
+
+    try:
+        with np.load(header_path) as header: return int(header["size"]) == size and float(header["mtime"]) == mtime
+    except (IOError, ValueError, KeyError): return False
+
+# -----------------------------------------------------------------
+
+def write_sidecar(path, data, descriptions, units):
+
+    """
+    This function writes the binary sidecar files for the text file with the given path
+    :param path:
+    :param data:
+    :param descriptions:
+    :param units:
+    :return:
+    """
+
+    data_path = data_path_for(path)
+    header_path = header_path_for(path)
+    size, mtime = fs.file_signature(path)
+
+    # Unit strings ('' for columns without unit)
+    unit_strings = [unit if unit is not None else "" for unit in units]
+
+    try:
+
+        # Write to temporary paths first so that concurrent readers never see partial files
+        temp_data_path = data_path + ".tmp." + str(os.getpid())
+        temp_header_path = header_path + ".tmp." + str(os.getpid())
+
+        with open(temp_data_path, 'wb') as fh: np.save(fh, data)
+        with open(temp_header_path, 'wb') as fh: np.savez(fh, descriptions=np.array(descriptions, dtype=str), units=np.array(unit_strings, dtype=str), size=size, mtime=mtime)
+
+        # Move into place, the header last because it validates the data
+        os.rename(temp_data_path, data_path)
+        os.rename(temp_header_path, header_path)
+
+    # E.g. output directory not writable: caching is only an optimization
+    except (IOError, OSError) as e: log.debug("Could not write the binary sidecar for '" + path + "': " + str(e))
+
+# -----------------------------------------------------------------
+
+def remove_sidecar(path):
+
+    """
+    This function removes the sidecar files of the text file with the given path
+    :param path:
+    :return:
+    """
+
+    for sidecar_path in (data_path_for(path), header_path_for(path)):
+        if fs.is_file(sidecar_path): fs.remove_file(sidecar_path)
+
+# -----------------------------------------------------------------
+
+def load(path, cache=True, mmap=True):
+
+    """
+    This function loads the columns, the column descriptions and the unit strings of a SKIRT text file,
+    using (and creating) the binary sidecar if cache is enabled
+    :param path:
+    :param cache:
+    :param mmap:
+    :return:
+    """
+
+    # Load from the sidecar
+    if cache and has_valid_sidecar(path):
+
+        # Debugging
+        log.debug("Loading '" + fs.name(path) + "' from its binary sidecar ...")
+
+        with np.load(header_path_for(path)) as header:
+            descriptions = [str(description) for description in header["descriptions"]]
+            units = [str(unit) if unit else None for unit in header["units"]]
+
+        data = np.load(data_path_for(path), mmap_mode="r" if mmap else None)
+        return data, descriptions, units
+
+    # Parse the text file
+    descriptions, units = parse_header(path)
+    data = parse_text(path)
+
+    # Write the sidecar for the next time
+    if cache: write_sidecar(path, data, descriptions, units)
+
+    # Return
+    return data, descriptions, units
+
+# -----------------------------------------------------------------
+
+def load_columns(path, usecols=None, cache=True, mmap=True):
+
+    """
+    This function loads (a selection of) the columns of a SKIRT text file as a 2D array with one row per column
+    :param path:
+    :param usecols:
+    :param cache:
+    :param mmap:
+    :return:
+    """
+
+    data, descriptions, units = load(path, cache=cache, mmap=mmap)
+    if usecols is None: return data
+    else: return data[list(usecols)]
+
+# -----------------------------------------------------------------
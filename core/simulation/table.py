@@ -13,10 +13,10 @@
 from __future__ import absolute_import, division, print_function
 
 # Import standard modules
-import numpy as np
+from astropy.table import Table
 
 # Import the relevant PTS classes and modules
-from ..tools import tables
+from . import sidecar
 
 # -----------------------------------------------------------------
 
@@ -37,55 +37,31 @@ class SkirtTable(object):
     # -----------------------------------------------------------------
 
     @classmethod
-    def from_file(cls, path):
+    def from_file(cls, path, cache=True):
 
         """
         This function ...
         :param path:
+        :param cache: use (and create) the binary sidecar of the text file
         :return:
         """
 
-        columns = np.loadtxt(path, unpack=True)
+        # Load the columns, descriptions and units
+        columns, descriptions, units = sidecar.load(path, cache=cache)
 
+        # Check the header
         number_of_columns = len(columns)
+        if len(descriptions) != number_of_columns: raise IOError("Column names and units of " + str(number_of_columns) + " columns not found in file header")
 
-        data = []
-        names = []
-        units = dict()
+        # Determine the column names
+        names = [description.capitalize() for description in descriptions]
 
-        with open(path) as table_file:
+        # Create the table, without copying the (memory-mapped) columns
+        table = Table(data=list(columns), names=names, masked=True, copy=False)
 
-            for i in range(number_of_columns):
-
-                line = table_file.next()
-                column_number = i + 1
-
-                if "column " + str(column_number) not in line:
-
-                    if i != 0: raise IOError("Column name and unit of column " + str(i+1) + " not found in file header")
-                    else:
-
-                        # Determine offset
-                        while "column" not in line:
-                            line = table_file.next()
-
-                name_and_unit = line.split(": ")[1].split("\n")[0]
-                if "(" in name_and_unit and ")" in name_and_unit:
-                    name = name_and_unit.split(" (")[0].capitalize()
-                    unit = name_and_unit.split(" (")[1].split(")")[0]
-                else:
-                    name = name_and_unit.capitalize()
-                    unit = None
-
-                data.append(columns[i])
-                names.append(name)
-
-                if unit is not None: units[name] = unit
-
-        table = tables.new(data, names)
-
-        for column_name in units:
-            table[column_name].unit = units[column_name]
+        # Set the units
+        for name, unit in zip(names, units):
+            if unit is not None: table[name].unit = unit
 
         return table
 
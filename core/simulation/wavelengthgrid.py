@@ -20,6 +20,7 @@ from astropy.table import Table
 from ...core.tools import tables
 from ...core.tools import arrays
 from ...core.tools.stringify import stringify_list_fancy
+from . import sidecar
 
 # -----------------------------------------------------------------
 
@@ -219,12 +220,13 @@ class WavelengthGrid(object):
         # Create a new class instance
         grid = cls()
 
-        # Load the table
-        table = tables.from_file(path, format="ascii")
+        # Load the wavelengths and deltas
+        wavelengths, deltas = sidecar.load_columns(path, usecols=(0, 1))
 
-        # Set the column names and units
-        table.rename_column("col1", "Wavelength")
-        table.rename_column("col2", "Delta")
+        # Create the table, set the column names and units
+        table = Table()
+        table["Wavelength"] = wavelengths
+        table["Delta"] = deltas
         table["Wavelength"].unit = "micron"
         table["Delta"].unit = "micron"
 
@@ -0,0 +1,333 @@
+#!/usr/bin/env python
+# -*- coding: utf8 -*-
+# *****************************************************************
+# **       PTS -- Python Toolkit for working with SKIRT          **
+# **       © Astronomical Observatory, Ghent University          **
+# *****************************************************************
+
+# Ensure Python 3 compatibility
+from __future__ import absolute_import, division, print_function
+
+# Import standard modules
+import os
+
+# Import the relevant PTS classes and modules
+from pts.core.test.implementation import TestImplementation
+from pts.core.basics.log import log
+from pts.core.tools import filesystem as fs
+from pts.core.tools import introspection
+
+# -----------------------------------------------------------------
+
+description = "testing the persistent command registry and its invalidation when the commands change"
+
+# -----------------------------------------------------------------
+
+# The lines of the commands.dat files
+commands_lines = ["# Command | Configuration | Path | Configuration method | Description",
+                  "# Fitting",
+                  "fit | fit.py | fitting.Fitter | cmdline | fit the model",
+                  "explore | explore.py | fitting.Explorer | interactive | explore the parameter space",
+                  "",
+                  "show | show.py | show.Shower | cmdline | show the results"]
+
+# -----------------------------------------------------------------
+
+class CommandRegistryTest(TestImplementation):
+
+    """
+    This class ...
+    """
+
+    def __init__(self, *args, **kwargs):
+
+        """
+        This function ...
+        :param kwargs:
+        """
+
+        # Call the constructor of the base class
+        super(CommandRegistryTest, self).__init__(*args, **kwargs)
+
+        # The 'do' directory and the subproject directories
+        self.do_path = None
+        self.subproject_paths = dict()
+
+        # The number of times the scripts have been scanned
+        self.nscans = 0
+
+        # The original attributes of the introspection module
+        self.original = dict()
+
+    # -----------------------------------------------------------------
+
+    def run(self, **kwargs):
+
+        """
+        This function ...
+        :param kwargs:
+        :return:
+        """
+
+        # 1. Call the setup function
+        self.setup(**kwargs)
+
+        try:
+
+            # 2. Test building the registry
+            self.test_build()
+
+            # 3. Test that the registry can't be changed by callers
+            self.test_copy()
+
+            # 4. Test loading the registry file
+            self.test_load()
+
+            # 5. Test the invalidation of the registry
+            self.test_invalidation()
+
+        # Restore the introspection module
+        finally:
+            for name in self.original: setattr(introspection, name, self.original[name])
+
+    # -----------------------------------------------------------------
+
+    def setup(self, **kwargs):
+
+        """
+        This function ...
+        :param kwargs:
+        :return:
+        """
+
+        # Call the setup function of the base class
+        super(CommandRegistryTest, self).setup(**kwargs)
+
+        # Create the 'do' directories with the scripts
+        self.do_path = fs.create_directory_in(self.path, "do")
+        for subproject, names in (("core", ["list", "status"]), ("modeling", ["setup", "fit_sed"])):
+            fs.create_directory_in(self.do_path, subproject)
+            for name in names: self.write_script(subproject, name)
+            self.write_script(subproject, "__init__")
+
+        # Create the subproject directories with the tables of configurable commands
+        for subproject in ("core", "modeling"):
+            self.subproject_paths[subproject] = fs.create_directory_in(self.path, subproject)
+        self.write_table("modeling", commands_lines)
+
+        # Use the test directories
+        for name in ("pts_do_dir", "subprojects", "pts_subproject_dir", "command_registry_path", "command_registry", "scan_scripts"): self.original[name] = getattr(introspection, name)
+        introspection.pts_do_dir = self.do_path
+        introspection.subprojects = ["core", "modeling"]
+        introspection.pts_subproject_dir = lambda subproject: self.subproject_paths[subproject]
+        introspection.command_registry_path = fs.join(self.path, "commands.json")
+        introspection.command_registry = None
+        introspection.scan_scripts = self.scan_scripts
+
+    # -----------------------------------------------------------------
+
+    def scan_scripts(self):
+
+        """
+        This function scans the scripts, counting the number of scans
+        :return:
+        """
+
+        self.nscans += 1
+        return self.original["scan_scripts"]()
+
+    # -----------------------------------------------------------------
+
+    def write_script(self, subproject, name):
+
+        """
+        This function ...
+        :param subproject:
+        :param name:
+        :return:
+        """
+
+        with open(fs.join(self.do_path, subproject, name + ".py"), "w") as script: script.write("#!/usr/bin/env python\n")
+
+    # -----------------------------------------------------------------
+
+    def write_table(self, subproject, lines):
+
+        """
+        This function ...
+        :param subproject:
+        :param lines:
+        :return:
+        """
+
+        with open(fs.join(self.subproject_paths[subproject], "commands.dat"), "w") as table: table.write("\n".join(lines) + "\n")
+
+    # -----------------------------------------------------------------
+
+    def touch(self, path):
+
+        """
+        This function sets the modification time of a file or directory later, so that a change is detected also
+        on file systems with a coarse time resolution
+        :param path:
+        :return:
+        """
+
+        modification_time = os.stat(path).st_mtime + 10.
+        os.utime(path, (modification_time, modification_time))
+
+    # -----------------------------------------------------------------
+
+    def check_strings(self, value):
+
+        """
+        This function checks that all strings in the registry are of type str
+        :param value:
+        :return:
+        """
+
+        if isinstance(value, dict):
+            for key in value:
+                self.check_strings(key)
+                self.check_strings(value[key])
+        elif isinstance(value, (list, tuple)):
+            for item in value: self.check_strings(item)
+        elif introspection.types.is_string_type(value): assert type(value) is str, repr(value)
+
+    # -----------------------------------------------------------------
+
+    def test_build(self):
+
+        """
+        This function ...
+        :return:
+        """
+
+        # Inform the user
+        log.info("Testing building the registry ...")
+
+        registry = introspection.get_command_registry()
+
+        # The scripts
+        assert self.nscans == 1
+        assert introspection.get_scripts() == [("modeling", "fit_sed.py"), ("core", "list.py"), ("modeling", "setup.py"), ("core", "status.py")]
+
+        # The tables
+        tables = introspection.get_arguments_tables()
+        assert list(tables.keys()) == ["modeling"]
+        assert tables["modeling"]["Command"] == ["fit", "explore", "show"]
+        assert tables["modeling"]["Configuration method"] == ["cmdline", "interactive", "cmdline"]
+        assert tables["modeling"]["Title"] == ["Fitting", "Fitting", None]
+
+        # The registry is written, and only scanned once
+        assert fs.is_file(introspection.command_registry_path)
+        assert self.nscans == 1
+        self.check_strings(registry)
+
+    # -----------------------------------------------------------------
+
+    def test_copy(self):
+
+        """
+        This function ...
+        :return:
+        """
+
+        # Inform the user
+        log.info("Testing that the registry can't be changed by callers ...")
+
+        registry = introspection.get_command_registry()
+        expected = introspection.get_command_registry()
+        assert registry == expected and registry is not expected
+
+        # Change the returned registry
+        registry["scripts"].append(("core", "removed.py"))
+        registry["tables"]["modeling"]["Command"][0] = "changed"
+        del registry["tables"]["modeling"]
+
+        # The registry is not changed
+        assert introspection.get_command_registry() == expected
+        assert introspection.get_arguments_tables()["modeling"]["Command"][0] == "fit"
+        scripts = introspection.get_scripts()
+        scripts.pop()
+        assert introspection.get_scripts() == expected["scripts"]
+        assert self.nscans == 1
+
+    # -----------------------------------------------------------------
+
+    def test_load(self):
+
+        """
+        This function ...
+        :return:
+        """
+
+        # Inform the user
+        log.info("Testing loading the registry file ...")
+
+        expected = introspection.get_command_registry()
+
+        # Load the registry file (as in a new process)
+        introspection.command_registry = None
+        registry = introspection.get_command_registry()
+
+        # The registry is not scanned again, and the same as the scanned registry (with the same string types)
+        assert self.nscans == 1
+        assert registry == expected
+        self.check_strings(registry)
+        for script in registry["scripts"]: assert isinstance(script, tuple)
+
+    # -----------------------------------------------------------------
+
+    def test_invalidation(self):
+
+        """
+        This function ...
+        :return:
+        """
+
+        # Inform the user
+        log.info("Testing the invalidation of the registry ...")
+
+        # Add a script
+        self.write_script("core", "add")
+        self.touch(fs.join(self.do_path, "core"))
+        assert ("core", "add.py") in introspection.get_scripts()
+        assert self.nscans == 2
+
+        # Remove a script
+        fs.remove_file(fs.join(self.do_path, "modeling", "setup.py"))
+        self.touch(fs.join(self.do_path, "modeling"))
+        assert ("modeling", "setup.py") not in introspection.get_scripts()
+        assert self.nscans == 3
+
+        # Add a 'do' directory
+        fs.create_directory_in(self.do_path, "magic")
+        self.write_script("magic", "sources")
+        self.touch(self.do_path)
+        assert ("magic", "sources.py") in introspection.get_scripts()
+        assert self.nscans == 4
+
+        # Change a table
+        self.write_table("modeling", commands_lines + ["plot | plot.py | plot.Plotter | cmdline | plot the results"])
+        self.touch(fs.join(self.subproject_paths["modeling"], "commands.dat"))
+        assert introspection.get_arguments_tables()["modeling"]["Command"] == ["fit", "explore", "show", "plot"]
+
+        # Add a table
+        self.write_table("core", ["status | status.py | status.Status | cmdline | show the status"])
+        assert introspection.get_arguments_tables()["core"]["Command"] == ["status"]
+
+        # The changes are also detected when the registry is loaded from the file
+        self.write_script("core", "another")
+        self.touch(fs.join(self.do_path, "core"))
+        introspection.command_registry = None
+        nscans = self.nscans
+        assert ("core", "another.py") in introspection.get_scripts()
+        assert self.nscans == nscans + 1
+
+        # Nothing changed: not scanned again
+        introspection.command_registry = None
+        introspection.get_command_registry()
+        assert self.nscans == nscans + 1
+
+# -----------------------------------------------------------------
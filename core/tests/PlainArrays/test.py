@@ -0,0 +1,244 @@
+#!/usr/bin/env python
+# -*- coding: utf8 -*-
+# *****************************************************************
+# **       PTS -- Python Toolkit for working with SKIRT          **
+# **       © Astronomical Observatory, Ghent University          **
+# *****************************************************************
+
+# Ensure Python 3 compatibility
+from __future__ import absolute_import, division, print_function
+
+# Import standard modules
+import numpy as np
+
+# Import astronomical modules
+from astropy.table import Column, MaskedColumn
+from astropy.units import Unit, spectral
+
+# Import the relevant PTS classes and modules
+from pts.core.test.implementation import TestImplementation
+from pts.core.basics.log import log
+from pts.core.tools import arrays
+from pts.core.units.parsing import parse_unit as u
+from pts.core.units.parsing import parse_quantity as q
+
+# -----------------------------------------------------------------
+
+description = "testing the vectorized conversion of table columns to plain arrays against the element-wise conversion"
+
+# -----------------------------------------------------------------
+
+class PlainArraysTest(TestImplementation):
+
+    """
+    This class ...
+    """
+
+    def __init__(self, *args, **kwargs):
+
+        """
+        This function ...
+        :param kwargs:
+        """
+
+        # Call the constructor of the base class
+        super(PlainArraysTest, self).__init__(*args, **kwargs)
+
+        # The number of values
+        self.nvalues = 50
+
+        # The values, the masked values and the wavelengths
+        self.values = None
+        self.masked = None
+        self.wavelengths = None
+
+    # -----------------------------------------------------------------
+
+    def run(self, **kwargs):
+
+        """
+        This function ...
+        :param kwargs:
+        :return:
+        """
+
+        # 1. Call the setup function
+        self.setup(**kwargs)
+
+        # 2. Test conversions with one conversion factor
+        self.test_constant()
+
+        # 3. Test conversions with a conversion factor for each wavelength
+        self.test_wavelengths()
+
+        # 4. Test conversions of non-photometric units
+        self.test_other()
+
+        # 5. Test the mask of values that are not requested
+        self.test_mask()
+
+    # -----------------------------------------------------------------
+
+    def setup(self, **kwargs):
+
+        """
+        This function ...
+        :param kwargs:
+        :return:
+        """
+
+        # Call the setup function of the base class
+        super(PlainArraysTest, self).setup(**kwargs)
+
+        np.random.seed(35)
+
+        # Create the values
+        self.values = np.random.uniform(1e-3, 1e3, size=self.nvalues)
+        self.masked = np.zeros(self.nvalues, dtype=bool)
+        self.masked[[0, 7, 8, 31]] = True
+        self.wavelengths = np.logspace(-1, 3, self.nvalues) * Unit("micron")
+
+    # -----------------------------------------------------------------
+
+    def columns(self, unit):
+
+        """
+        This function returns columns with the values in the given unit: without and with masked values
+        :param unit:
+        :return:
+        """
+
+        yield Column(self.values, unit=unit)
+        yield MaskedColumn(self.values, mask=self.masked, unit=unit)
+
+    # -----------------------------------------------------------------
+
+    def check(self, from_unit, to_unit, rtol=1e-12, **kwargs):
+
+        """
+        This function checks the vectorized conversion of columns against the element-wise conversion
+        :param from_unit:
+        :param to_unit:
+        :param rtol:
+        :param kwargs:
+        :return:
+        """
+
+        for column in self.columns(from_unit):
+
+            # Convert the whole column at once
+            values = arrays.plain_array(column, unit=to_unit, **kwargs)
+
+            # Convert each element
+            expected = np.array(arrays.array_as_list(column, unit=to_unit, add_unit=False, masked_value=float("nan"), **kwargs))
+
+            # Compare
+            assert values.shape == expected.shape
+            assert np.array_equal(np.isnan(values), np.isnan(expected))
+            valid = np.logical_not(np.isnan(expected))
+            assert np.allclose(values[valid], expected[valid], rtol=rtol, atol=0.)
+
+            # Masked values are NaN
+            if hasattr(column, "mask"):
+                if "mask" not in kwargs: assert np.array_equal(np.isnan(values), self.masked)
+                assert np.all(np.isnan(values[self.masked[np.logical_not(kwargs.get("mask", np.zeros(self.nvalues, dtype=bool)))]]))
+
+    # -----------------------------------------------------------------
+
+    def test_constant(self):
+
+        """
+        This function ...
+        :return:
+        """
+
+        # Inform the user
+        log.info("Testing conversions with one conversion factor ...")
+
+        # Same unit
+        self.check(u("Jy"), u("Jy"))
+
+        # Same spectral density type
+        self.check(u("Jy"), u("mJy"))
+        self.check(u("W/m2/micron"), u("erg/s/cm2/nm"))
+        self.check(u("MJy/sr"), u("Jy"), conversion_info={"pixelscale": q("2 arcsec")})
+        self.check(u("W/micron"), u("W/m2/micron"), conversion_info={"distance": q("3.6 Mpc")})
+
+        # Wavelengths that are not needed
+        self.check(u("Jy"), u("mJy"), conversion_info={"wavelengths": self.wavelengths})
+        self.check(u("W/m2/micron"), u("Lsun/micron/kpc2"), conversion_info={"wavelengths": self.wavelengths})
+
+        # One wavelength for all values
+        self.check(u("W/m2/micron"), u("Jy"), conversion_info={"wavelength": q("3.6 micron")})
+
+    # -----------------------------------------------------------------
+
+    def test_wavelengths(self):
+
+        """
+        This function ...
+        :return:
+        """
+
+        # Inform the user
+        log.info("Testing conversions with a conversion factor for each wavelength ...")
+
+        conversion_info = {"wavelengths": self.wavelengths}
+
+        # Between spectral density types
+        self.check(u("W/m2/micron"), u("Jy"), conversion_info=conversion_info)
+        self.check(u("W/m2/micron"), u("W/m2/Hz"), conversion_info=conversion_info)
+        self.check(u("W/m2/micron"), u("W/m2", density=True), conversion_info=conversion_info, density=True)
+        self.check(u("W/micron"), u("Jy"), conversion_info={"wavelengths": self.wavelengths, "distance": q("3.6 Mpc")})
+
+    # -----------------------------------------------------------------
+
+    def test_other(self):
+
+        """
+        This function ...
+        :return:
+        """
+
+        # Inform the user
+        log.info("Testing conversions of non-photometric units ...")
+
+        # Lengths
+        self.check(Unit("micron"), Unit("nm"))
+        self.check(Unit("pc"), Unit("km"))
+
+        # With equivalencies
+        self.check(Unit("micron"), Unit("Hz"), equivalencies=spectral())
+
+        # Masked values of integer columns
+        column = MaskedColumn(np.arange(self.nvalues), mask=self.masked, unit="pc")
+        values = arrays.plain_array(column, unit="pc")
+        assert np.array_equal(np.isnan(values), self.masked)
+        assert np.array_equal(values[np.logical_not(self.masked)], np.arange(self.nvalues)[np.logical_not(self.masked)])
+
+    # -----------------------------------------------------------------
+
+    def test_mask(self):
+
+        """
+        This function ...
+        :return:
+        """
+
+        # Inform the user
+        log.info("Testing the mask of values that are not requested ...")
+
+        # Mask the first values (including the first wavelength) and some others
+        mask = np.zeros(self.nvalues, dtype=bool)
+        mask[:5] = True
+        mask[[20, 21, 31]] = True
+
+        self.check(u("Jy"), u("mJy"), mask=mask)
+        self.check(u("W/m2/micron"), u("Jy"), conversion_info={"wavelengths": self.wavelengths}, mask=mask)
+        self.check(u("W/m2/micron"), u("W/m2", density=True), conversion_info={"wavelengths": self.wavelengths}, density=True, mask=mask)
+
+        # All values masked
+        values = arrays.plain_array(Column(self.values, unit=u("W/m2/micron")), unit=u("Jy"), conversion_info={"wavelengths": self.wavelengths}, mask=np.ones(self.nvalues, dtype=bool))
+        assert len(values) == 0
+
+# -----------------------------------------------------------------
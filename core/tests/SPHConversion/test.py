@@ -0,0 +1,268 @@
+#!/usr/bin/env python
+# -*- coding: utf8 -*-
+# *****************************************************************
+# **       PTS -- Python Toolkit for working with SKIRT          **
+# **       © Astronomical Observatory, Ghent University          **
+# *****************************************************************
+
+# Ensure Python 3 compatibility
+from __future__ import absolute_import, division, print_function
+
+# Import standard modules
+import os
+import numpy as np
+
+# Import the relevant PTS classes and modules
+from pts.core.test.implementation import TestImplementation
+from pts.core.basics.log import log
+from pts.core.tools import filesystem as fs
+from pts.core.prep import sphconvert
+
+# -----------------------------------------------------------------
+
+description = "testing the conversion of SPH particle files and the reuse of their binary files"
+
+# -----------------------------------------------------------------
+
+class SPHConversionTest(TestImplementation):
+
+    """
+    This class ...
+    """
+
+    def __init__(self, *args, **kwargs):
+
+        """
+        This function ...
+        :param kwargs:
+        """
+
+        # Call the constructor of the base class
+        super(SPHConversionTest, self).__init__(*args, **kwargs)
+
+        # The paths of the input files and of the output file
+        self.a_path = None
+        self.b_path = None
+        self.out_path = None
+
+        # The columns of the input files
+        self.a_data = None
+        self.b_data = None
+
+        # The number of input files that are parsed
+        self.nparsed = 0
+
+        # The original function to read the input files
+        self.readchunks = None
+
+    # -----------------------------------------------------------------
+
+    def run(self, **kwargs):
+
+        """
+        This function ...
+        :param kwargs:
+        :return:
+        """
+
+        # 1. Call the setup function
+        self.setup(**kwargs)
+
+        try:
+
+            # 2. Test the first conversion
+            self.test_first()
+
+            # 3. Test the reuse of the binary file
+            self.test_reuse()
+
+            # 4. Test the conversion of other input files and with other converters
+            self.test_other()
+
+            # 5. Test the conversion without binary file
+            self.test_text()
+
+        # Restore the function to read the input files
+        finally: sphconvert.readchunks = self.readchunks
+
+    # -----------------------------------------------------------------
+
+    def setup(self, **kwargs):
+
+        """
+        This function ...
+        :param kwargs:
+        :return:
+        """
+
+        # Call the setup function of the base class
+        super(SPHConversionTest, self).setup(**kwargs)
+
+        # Set the paths
+        self.a_path = fs.join(self.path, "a.txt")
+        self.b_path = fs.join(self.path, "b.txt")
+        self.out_path = fs.join(self.path, "out.dat")
+
+        # Count the input files that are parsed
+        self.readchunks = sphconvert.readchunks
+
+        def readchunks(infile, usecols=None, chunksize=sphconvert.chunksize):
+            if infile != self.out_path: self.nparsed += 1
+            return self.readchunks(infile, usecols, chunksize)
+
+        sphconvert.readchunks = readchunks
+
+        # Write the input files (in EAGLE SKIRT5 format, with the same number of particles): x y z t/SFR h Z M
+        random = np.random.RandomState(45)
+        self.a_data = random.uniform(0.1, 10., size=(25, 7))
+        self.b_data = random.uniform(0.1, 10., size=(25, 7))
+        self.write_input(self.a_path, self.a_data, 1000000000)
+        self.write_input(self.b_path, self.b_data, 1000000000)
+
+    # -----------------------------------------------------------------
+
+    def write_input(self, path, data, mtime):
+
+        """
+        This function writes an input file with the given particles and sets its modification time
+        :param path:
+        :param data:
+        :param mtime:
+        :return:
+        """
+
+        with open(path, "w") as fh:
+            for row in data: fh.write(" ".join(["%.6f"] * len(row)) % tuple(row) + "\n")
+
+        os.utime(path, (mtime, mtime))
+
+    # -----------------------------------------------------------------
+
+    def expected(self, data, stars):
+
+        """
+        This function returns the converted particles for the given input particles
+        :param data:
+        :param stars:
+        :return:
+        """
+
+        x, y, z, t, h, Z, M = np.round(data, 6).T
+        if stars: return np.column_stack((x*1e3, y*1e3, z*1e3, h*1e3, M, Z, t))
+        else: return np.column_stack((x*1e3, y*1e3, z*1e3, h*1e3, M, Z))
+
+    # -----------------------------------------------------------------
+
+    def check(self, data, stars, binary=True):
+
+        """
+        This function checks the output file and the particles loaded from the binary file (or the output file)
+        :param data:
+        :param stars:
+        :param binary:
+        :return:
+        """
+
+        expected = self.expected(data, stars)
+
+        # The output file
+        with open(self.out_path) as fh: header = [line for line in fh if line.startswith("#")]
+        assert header[0] == ("# SPH Star Particles\n" if stars else "# SPH Gas Particles\n")
+        assert np.allclose(np.loadtxt(self.out_path), expected, rtol=1e-8)
+
+        # The loaded particles
+        loaded = sphconvert.load_particles(self.out_path)
+        assert isinstance(loaded, np.memmap) == binary
+        assert np.allclose(loaded, expected, rtol=1e-8)
+
+    # -----------------------------------------------------------------
+
+    def test_first(self):
+
+        """
+        This function ...
+        :return:
+        """
+
+        # Inform the user
+        log.info("Testing the first conversion ...")
+
+        sphconvert.convert_stars_EAGLE(self.a_path, self.out_path, binary=True)
+        assert self.nparsed == 1
+        assert fs.is_file(sphconvert.binaryfile(self.out_path))
+        assert fs.is_file(sphconvert.keyfile(self.out_path))
+        self.check(self.a_data, stars=True)
+
+    # -----------------------------------------------------------------
+
+    def test_reuse(self):
+
+        """
+        This function ...
+        :return:
+        """
+
+        # Inform the user
+        log.info("Testing the reuse of the binary file ...")
+
+        # The same input file and converter: the binary file is used (and not rewritten)
+        binary_mtime = fs.file_signature(sphconvert.binaryfile(self.out_path))[1]
+        os.utime(sphconvert.binaryfile(self.out_path), (binary_mtime - 100, binary_mtime - 100))
+        sphconvert.convert_stars_EAGLE(self.a_path, self.out_path, binary=True)
+        assert self.nparsed == 1
+        assert fs.file_signature(sphconvert.binaryfile(self.out_path))[1] == binary_mtime - 100
+        self.check(self.a_data, stars=True)
+
+    # -----------------------------------------------------------------
+
+    def test_other(self):
+
+        """
+        This function ...
+        :return:
+        """
+
+        # Inform the user
+        log.info("Testing the conversion of other input files and with other converters ...")
+
+        # Another input file, older than the binary file
+        sphconvert.convert_stars_EAGLE(self.b_path, self.out_path, binary=True)
+        assert self.nparsed == 2
+        self.check(self.b_data, stars=True)
+
+        # Another converter for the same input file
+        sphconvert.convert_gas_EAGLE(self.b_path, self.out_path, binary=True)
+        assert self.nparsed == 3
+        self.check(self.b_data, stars=False)
+
+        # The input file is changed, but not its size
+        changed = self.b_data.copy()
+        changed[:, 6] = changed[::-1, 6]
+        self.write_input(self.b_path, changed, 1000000010)
+        sphconvert.convert_gas_EAGLE(self.b_path, self.out_path, binary=True)
+        assert self.nparsed == 4
+        self.check(changed, stars=False)
+
+        # The same input file and converter again
+        sphconvert.convert_gas_EAGLE(self.b_path, self.out_path, binary=True)
+        assert self.nparsed == 4
+        self.check(changed, stars=False)
+
+    # -----------------------------------------------------------------
+
+    def test_text(self):
+
+        """
+        This function ...
+        :return:
+        """
+
+        # Inform the user
+        log.info("Testing the conversion without binary file ...")
+
+        # The existing binary file is not used, and not loaded for the new output file
+        sphconvert.convert_stars_EAGLE(self.a_path, self.out_path)
+        assert self.nparsed == 5
+        self.check(self.a_data, stars=True, binary=False)
+
+# -----------------------------------------------------------------
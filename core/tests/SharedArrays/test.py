@@ -0,0 +1,257 @@
+#!/usr/bin/env python
+# -*- coding: utf8 -*-
+# *****************************************************************
+# **       PTS -- Python Toolkit for working with SKIRT          **
+# **       © Astronomical Observatory, Ghent University          **
+# *****************************************************************
+
+# Ensure Python 3 compatibility
+from __future__ import absolute_import, division, print_function
+
+# Import standard modules
+import os
+import tempfile
+import numpy as np
+
+# Import the relevant PTS classes and modules
+from pts.core.test.implementation import TestImplementation
+from pts.core.basics.log import log
+from pts.core.tools import filesystem as fs
+from pts.core.tools import parallelization
+from pts.core.tools.parallelization import ParallelTarget, SharedArray
+
+# -----------------------------------------------------------------
+
+description = "testing the large arrays that are passed to and from ParallelTarget workers through shared files"
+
+# -----------------------------------------------------------------
+
+class SharedArraysTest(TestImplementation):
+
+    """
+    This class ...
+    """
+
+    def __init__(self, *args, **kwargs):
+
+        """
+        This function ...
+        :param kwargs:
+        """
+
+        # Call the constructor of the base class
+        super(SharedArraysTest, self).__init__(*args, **kwargs)
+
+        # The large and the small array
+        self.array = None
+        self.small = None
+
+        # The original directory for the shared files
+        self.shared_base_path = None
+
+    # -----------------------------------------------------------------
+
+    def run(self, **kwargs):
+
+        """
+        This function ...
+        :param kwargs:
+        :return:
+        """
+
+        # 1. Call the setup function
+        self.setup(**kwargs)
+
+        try:
+
+            # 2. Test the shared references
+            self.test_references()
+
+            # 3. Test the parallel execution with shared files
+            self.test_parallel()
+
+            # 4. Test a failing task
+            self.test_failure()
+
+            # 5. Test the temporary directory when there is no shared memory
+            self.test_fallback()
+
+        # Restore the directory for the shared files
+        finally: parallelization.shared_base_path = self.shared_base_path
+
+    # -----------------------------------------------------------------
+
+    def setup(self, **kwargs):
+
+        """
+        This function ...
+        :param kwargs:
+        :return:
+        """
+
+        # Call the setup function of the base class
+        super(SharedArraysTest, self).setup(**kwargs)
+
+        # Create the arrays: the large array is above the threshold for sharing
+        random = np.random.RandomState(4)
+        self.array = random.normal(size=(600, 400))
+        self.small = random.normal(size=(10, 10))
+        assert parallelization.is_shareable(self.array)
+        assert not parallelization.is_shareable(self.small)
+
+        self.shared_base_path = parallelization.shared_base_path
+
+    # -----------------------------------------------------------------
+
+    def shared_directories(self):
+
+        """
+        This function returns the directories for shared files that currently exist
+        :return:
+        """
+
+        directory = parallelization.shared_base_path if parallelization.shared_base_path is not None else tempfile.gettempdir()
+        return set(name for name in os.listdir(directory) if name.startswith("pts_shared_"))
+
+    # -----------------------------------------------------------------
+
+    def test_references(self):
+
+        """
+        This function ...
+        :return:
+        """
+
+        # Inform the user
+        log.info("Testing the shared references ...")
+
+        # The data is restored exactly, mapped copy-on-write: changes don't reach the file
+        reference = SharedArray.from_object(self.array, self.path)
+        restored = reference.restore()
+        assert restored.dtype == self.array.dtype and np.array_equal(restored, self.array)
+        restored[:] = 0.
+        assert np.array_equal(reference.restore(), self.array)
+        assert np.array_equal(np.load(reference.path), self.array)
+
+        # Non-contiguous arrays
+        reference = SharedArray.from_object(self.array[::2, ::3], self.path)
+        assert np.array_equal(reference.restore(), self.array[::2, ::3])
+
+        # References that are removed when they are restored (the outputs) load the data in memory
+        reference = SharedArray.from_object(self.array, self.path, remove=True)
+        restored = reference.restore()
+        assert not fs.is_file(reference.path)
+        assert not isinstance(restored, np.memmap) and np.array_equal(restored, self.array)
+
+        # Small arrays are not shared, the same object is shared only once
+        cache = dict()
+        assert parallelization.share(self.small, self.path, cache=cache) is self.small
+        reference = parallelization.share(self.array, self.path, cache=cache)
+        assert isinstance(reference, SharedArray)
+        assert parallelization.share(self.array, self.path, cache=cache) is reference
+
+    # -----------------------------------------------------------------
+
+    def check_parallel(self):
+
+        """
+        This function runs tasks with shared files and checks the outputs and the removal of the files
+        :return:
+        """
+
+        directories = self.shared_directories()
+
+        with ParallelTarget(np.copyto, 2, shared=True) as copy_target:
+
+            assert copy_target.shared_path is not None
+            shared_path = copy_target.shared_path
+
+            # The worker changes its argument: the change stays private, as with pickled arguments
+            output = copy_target(self.array, 0.)
+            output.request()
+            assert len(os.listdir(shared_path)) == 1
+            assert np.array_equal(np.load(fs.join(shared_path, os.listdir(shared_path)[0])), self.array)
+
+        with ParallelTarget(np.negative, 2, shared=True) as target:
+
+            # Large and small arguments, the same large argument twice, and large outputs
+            outputs = [target(self.array), target(self.small), target(self.array)]
+            for output in outputs: output.request()
+
+        assert np.array_equal(outputs[0].output, -self.array)
+        assert np.array_equal(outputs[1].output, -self.small)
+        assert np.array_equal(outputs[2].output, -self.array)
+        assert np.all(self.array != 0.)
+
+        # The shared files and directories are removed
+        assert not fs.is_directory(shared_path)
+        assert self.shared_directories() == directories
+
+        # Return the directory that was used
+        return shared_path
+
+    # -----------------------------------------------------------------
+
+    def test_parallel(self):
+
+        """
+        This function ...
+        :return:
+        """
+
+        # Inform the user
+        log.info("Testing the parallel execution with shared files ...")
+
+        # Check
+        shared_path = self.check_parallel()
+        if parallelization.shared_base_path is not None: assert fs.directory_of(shared_path) == parallelization.shared_base_path
+
+        # Without shared files (the default), the same outputs
+        with ParallelTarget(np.negative, 2) as target:
+            assert not target.shared and target.shared_path is None
+            output = target(self.array)
+            output.request()
+        assert np.array_equal(output.output, -self.array)
+
+    # -----------------------------------------------------------------
+
+    def test_failure(self):
+
+        """
+        This function ...
+        :return:
+        """
+
+        # Inform the user
+        log.info("Testing a failing task ...")
+
+        directories = self.shared_directories()
+
+        # The exception is raised when the output is requested, the files are removed
+        try:
+            with ParallelTarget(np.reshape, 2, shared=True) as target:
+                output = target(self.array, (7,))
+                output.request()
+        except ValueError: pass
+        else: raise AssertionError("A ValueError was expected")
+
+        assert self.shared_directories() == directories
+
+    # -----------------------------------------------------------------
+
+    def test_fallback(self):
+
+        """
+        This function ...
+        :return:
+        """
+
+        # Inform the user
+        log.info("Testing the temporary directory when there is no shared memory ...")
+
+        # Use the temporary directory
+        parallelization.shared_base_path = None
+        shared_path = self.check_parallel()
+        assert fs.directory_of(shared_path) == tempfile.gettempdir()
+
+# -----------------------------------------------------------------
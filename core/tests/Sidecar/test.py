@@ -0,0 +1,196 @@
+#!/usr/bin/env python
+# -*- coding: utf8 -*-
+# *****************************************************************
+# **       PTS -- Python Toolkit for working with SKIRT          **
+# **       © Astronomical Observatory, Ghent University          **
+# *****************************************************************
+
+# Ensure Python 3 compatibility
+from __future__ import absolute_import, division, print_function
+
+# Import standard modules
+import os
+import numpy as np
+
+# Import the relevant PTS classes and modules
+from pts.core.test.implementation import TestImplementation
+from pts.core.basics.log import log
+from pts.core.tools import filesystem as fs
+from pts.core.simulation import sidecar
+
+# -----------------------------------------------------------------
+
+description = "testing the binary sidecar files of SKIRT text tables"
+
+# -----------------------------------------------------------------
+
+class SidecarTest(TestImplementation):
+
+    """
+    This class ...
+    """
+
+    def __init__(self, *args, **kwargs):
+
+        """
+        This function ...
+        :param kwargs:
+        """
+
+        # Call the constructor of the base class
+        super(SidecarTest, self).__init__(*args, **kwargs)
+
+        # The path of the text table
+        self.table_path = None
+
+        # The columns of the table
+        self.data = None
+
+    # -----------------------------------------------------------------
+
+    def run(self, **kwargs):
+
+        """
+        This function ...
+        :param kwargs:
+        :return:
+        """
+
+        # 1. Call the setup function
+        self.setup(**kwargs)
+
+        # 2. Test the first load (parsing and writing the sidecar)
+        self.test_first_load()
+
+        # 3. Test loading from the sidecar
+        self.test_cached_load()
+
+        # 4. Test the rebuild after the text file has changed
+        self.test_rebuild()
+
+    # -----------------------------------------------------------------
+
+    def setup(self, **kwargs):
+
+        """
+        This function ...
+        :param kwargs:
+        :return:
+        """
+
+        # Call the setup function of the base class
+        super(SidecarTest, self).setup(**kwargs)
+
+        # Set the path of the table
+        self.table_path = fs.join(self.path, "test_ds_isrf.dat")
+
+    # -----------------------------------------------------------------
+
+    def write_table(self, data, mtime):
+
+        """
+        This function writes a SKIRT text table with the given columns and sets its modification time
+        :param data:
+        :param mtime:
+        :return:
+        """
+
+        with open(self.table_path, "w") as fh:
+            fh.write("# column 1: wavelength (micron)\n")
+            fh.write("# column 2: mean intensity (W/m2/micron/sr)\n")
+            fh.write("# column 3: index\n")
+            for row in data.T: fh.write("%.6e %.6e %.6e\n" % tuple(row))
+
+        os.utime(self.table_path, (mtime, mtime))
+
+    # -----------------------------------------------------------------
+
+    def check_load(self, data):
+
+        """
+        This function loads the table and checks the columns, descriptions and units
+        :param data:
+        :return:
+        """
+
+        loaded, descriptions, units = sidecar.load(self.table_path)
+
+        assert np.allclose(loaded, data, rtol=1e-6)
+        assert descriptions == ["wavelength", "mean intensity", "index"]
+        assert units == ["micron", "W/m2/micron/sr", None]
+
+        # The sidecar is up to date
+        assert sidecar.has_valid_sidecar(self.table_path)
+
+    # -----------------------------------------------------------------
+
+    def test_first_load(self):
+
+        """
+        This function ...
+        :return:
+        """
+
+        # Inform the user
+        log.info("Testing the first load ...")
+
+        # Write the table
+        self.data = np.array([np.linspace(0.1, 1000., 250), np.linspace(1., 2., 250), np.arange(250.)])
+        self.write_table(self.data, 1000000000)
+
+        # No sidecar yet
+        assert not sidecar.has_valid_sidecar(self.table_path)
+
+        # Load and check
+        self.check_load(self.data)
+        assert fs.is_file(sidecar.data_path_for(self.table_path))
+        assert fs.is_file(sidecar.header_path_for(self.table_path))
+
+    # -----------------------------------------------------------------
+
+    def test_cached_load(self):
+
+        """
+        This function ...
+        :return:
+        """
+
+        # Inform the user
+        log.info("Testing the load from the sidecar ...")
+
+        # The sidecar is used (and not rewritten)
+        sidecar_mtime = fs.file_signature(sidecar.data_path_for(self.table_path))[1]
+        self.check_load(self.data)
+        assert fs.file_signature(sidecar.data_path_for(self.table_path))[1] == sidecar_mtime
+
+        # Without mmap
+        loaded = sidecar.load_columns(self.table_path, usecols=[0, 2], mmap=False)
+        assert np.allclose(loaded, self.data[[0, 2]], rtol=1e-6)
+
+    # -----------------------------------------------------------------
+
+    def test_rebuild(self):
+
+        """
+        This function ...
+        :return:
+        """
+
+        # Inform the user
+        log.info("Testing the rebuild of the sidecar after the table has changed ...")
+
+        # Change the values (but not the size of the file) and the modification time
+        changed = self.data.copy()
+        changed[1] *= 3.
+        self.write_table(changed, 1000000010)
+
+        # The sidecar is no longer valid
+        assert not sidecar.has_valid_sidecar(self.table_path)
+
+        # The new values are loaded and the sidecar is rebuilt
+        self.check_load(changed)
+
+        # Load again from the rebuilt sidecar
+        self.check_load(changed)
+
+# -----------------------------------------------------------------
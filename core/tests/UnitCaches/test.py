@@ -0,0 +1,276 @@
+#!/usr/bin/env python
+# -*- coding: utf8 -*-
+# *****************************************************************
+# **       PTS -- Python Toolkit for working with SKIRT          **
+# **       © Astronomical Observatory, Ghent University          **
+# *****************************************************************
+
+# Ensure Python 3 compatibility
+from __future__ import absolute_import, division, print_function
+
+# Import astronomical modules
+from astropy.units import Unit, CompositeUnit
+
+# Import the relevant PTS classes and modules
+from pts.core.test.implementation import TestImplementation
+from pts.core.basics.log import log
+from pts.core.units import parsing
+from pts.core.units import unit as units
+from pts.core.units.unit import PhotometricUnit
+from pts.core.units.parsing import parse_unit as u
+from pts.core.units.parsing import parse_quantity as q
+from pts.magic.basics.pixelscale import Pixelscale
+
+# -----------------------------------------------------------------
+
+description = "testing the caches of parsed units and photometric conversion factors"
+
+# -----------------------------------------------------------------
+
+# The unit strings that are parsed
+unit_strings = ["W", "W/m2", "W/micron", "W/m2/micron", "W/m2/micron/sr", "Jy", "MJy/sr", "erg/s/cm2/Hz", "Lsun", "Lsun/micron"]
+
+# -----------------------------------------------------------------
+
+class UnitCachesTest(TestImplementation):
+
+    """
+    This class ...
+    """
+
+    class Filter(object):
+
+        """
+        This class is a filter with only a name and a pivot wavelength
+        """
+
+        def __init__(self, name, pivot):
+            self.name = name
+            self.pivot = pivot
+
+        def __str__(self): return self.name
+
+    # -----------------------------------------------------------------
+
+    def __init__(self, *args, **kwargs):
+
+        """
+        This function ...
+        :param kwargs:
+        """
+
+        # Call the constructor of the base class
+        super(UnitCachesTest, self).__init__(*args, **kwargs)
+
+        # The conversions: from unit, to unit and the conversion parameters
+        self.conversions = None
+
+    # -----------------------------------------------------------------
+
+    def run(self, **kwargs):
+
+        """
+        This function ...
+        :param kwargs:
+        :return:
+        """
+
+        # 1. Call the setup function
+        self.setup(**kwargs)
+
+        # 2. Test the cache of parsed units
+        self.test_parsing()
+
+        # 3. Test the cache of conversion factors
+        self.test_conversions()
+
+        # 4. Test units with the same string but different flags or scales
+        self.test_units()
+
+        # 5. Test filters with the same name but different pivot wavelengths
+        self.test_filters()
+
+    # -----------------------------------------------------------------
+
+    def setup(self, **kwargs):
+
+        """
+        This function ...
+        :param kwargs:
+        :return:
+        """
+
+        # Call the setup function of the base class
+        super(UnitCachesTest, self).setup(**kwargs)
+
+        # Start with empty caches
+        parsing.clear_parsed_units()
+        units.clear_conversion_factors()
+
+        wavelength = q("2 micron")
+        distance = q("3.6 Mpc")
+
+        # Set the conversions
+        self.conversions = []
+        self.conversions.append(("W/m2/micron", "Jy", dict(wavelength=wavelength)))
+        self.conversions.append(("W/m2/micron", "W/m2/Hz", dict(wavelength=wavelength)))
+        self.conversions.append(("W/m2/micron", "W/m2", dict(wavelength=wavelength, density=True)))
+        self.conversions.append(("W/m2/micron", "Jy", dict(wavelength=q("3.6 micron"))))
+        self.conversions.append(("MJy/sr", "Jy", dict(pixelscale=Pixelscale(q("2 arcsec")))))
+        self.conversions.append(("MJy/sr", "Jy", dict(pixelscale=Pixelscale(q("1.5 arcsec")))))
+        self.conversions.append(("Lsun/micron", "Jy", dict(wavelength=wavelength, distance=distance)))
+        self.conversions.append(("Lsun/micron", "Jy", dict(wavelength=wavelength, distance=q("10 Mpc"))))
+        self.conversions.append(("W/m2/micron", "Jy", dict(fltr=self.Filter("Band", wavelength))))
+
+    # -----------------------------------------------------------------
+
+    def test_parsing(self):
+
+        """
+        This function ...
+        :return:
+        """
+
+        # Inform the user
+        log.info("Testing the cache of parsed units ...")
+
+        for string in unit_strings:
+            for density in (False, True):
+
+                uncached = parsing.parse_unit_no_cache(string, density=density)
+
+                # Parse without and with the unit in the cache
+                for _ in range(2):
+
+                    cached = u(string, density=density)
+                    assert cached == uncached
+                    assert cached.to_string() == uncached.to_string()
+                    assert getattr(cached, "density", None) == getattr(uncached, "density", None)
+                    assert getattr(cached, "brightness", None) == getattr(uncached, "brightness", None)
+
+                # The parsed unit is shared
+                assert u(string, density=density) is u(string, density=density)
+
+        # Photometric units
+        for string in unit_strings:
+
+            uncached = PhotometricUnit(string, density=True)
+            cached = parsing.parse_photometric_unit(string, density=True)
+            assert cached == uncached and cached.density == uncached.density and cached.brightness == uncached.brightness
+            assert parsing.parse_photometric_unit(string, density=True) is cached
+
+        # Clearing
+        cached = u("Jy")
+        parsing.clear_parsed_units()
+        assert len(parsing.parsed_units) == 0
+        assert u("Jy") is not cached and u("Jy") == cached
+
+    # -----------------------------------------------------------------
+
+    def test_conversions(self):
+
+        """
+        This function ...
+        :return:
+        """
+
+        # Inform the user
+        log.info("Testing the cache of conversion factors ...")
+
+        # Calculate all factors without the cache
+        factors = [u(from_unit).calculate_conversion_factor(to_unit, **parameters) for from_unit, to_unit, parameters in self.conversions]
+
+        # Calculate without and with the factors in the cache
+        units.clear_conversion_factors()
+        for _ in range(2):
+            for (from_unit, to_unit, parameters), factor in zip(self.conversions, factors):
+                assert u(from_unit).conversion_factor(to_unit, **parameters) == factor
+
+        # Every conversion has its own factor in the cache
+        for from_unit, to_unit, parameters in self.conversions:
+            key = units.conversion_key(u(from_unit), to_unit, (parameters.get("density", False), False, False, False), parameters.get("wavelength"), None,
+                                       parameters.get("distance"), None, parameters.get("fltr"), parameters.get("pixelscale"))
+            assert key in units.conversion_factors
+
+        # Array-valued parameters are not cached
+        assert units.conversion_key(u("W/m2/micron"), "Jy", (False, False, False, False), q("2 micron") * [1., 2., 3.], None, None, None, None, None) is None
+
+    # -----------------------------------------------------------------
+
+    def test_units(self):
+
+        """
+        This function ...
+        :return:
+        """
+
+        # Inform the user
+        log.info("Testing units with the same string but different flags or scales ...")
+
+        wavelength = q("2 micron")
+        distance = q("3.6 Mpc")
+
+        # The same unit string as a neutral density (nu * F_nu) and as an integrated quantity
+        for string in ("W/m2", "Lsun"):
+
+            units.clear_conversion_factors()
+
+            assert u(string, density=True).density
+            assert not u(string).density
+
+            # The neutral density can be converted to a spectral density, after which the integrated quantity still
+            # cannot be converted
+            factor = u(string, density=True).conversion_factor("Jy", wavelength=wavelength, distance=distance)
+            assert factor == u(string, density=True).calculate_conversion_factor("Jy", wavelength=wavelength, distance=distance)
+            try: u(string).conversion_factor("Jy", wavelength=wavelength, distance=distance)
+            except ValueError: pass
+            else: raise AssertionError("The conversion factor of the neutral density is used for the integrated quantity")
+
+        # The same target unit string with different flags
+        units.clear_conversion_factors()
+        factor = u("W/m2/micron").conversion_factor("W/m2", wavelength=wavelength, density=True)
+        assert factor == u("W/m2/micron").calculate_conversion_factor("W/m2", wavelength=wavelength, density=True)
+        try: u("W/m2/micron").conversion_factor("W/m2", wavelength=wavelength)
+        except ValueError: pass
+        else: raise AssertionError("The conversion factor to the neutral density is used for the integrated quantity")
+
+        # Units of which the scales only differ beyond the precision of the unit string
+        units.clear_conversion_factors()
+        first = PhotometricUnit(CompositeUnit(1.33426e-14, [Unit("Lsun"), Unit("Hz"), Unit("Mpc")], [1, -1, -2]))
+        second = PhotometricUnit(CompositeUnit(1.33426e-14 * 1.0000001, [Unit("Lsun"), Unit("Hz"), Unit("Mpc")], [1, -1, -2]))
+        assert first.to_string() == second.to_string()
+        assert first.conversion_factor("Jy") == first.calculate_conversion_factor("Jy")
+        assert second.conversion_factor("Jy") == second.calculate_conversion_factor("Jy")
+        assert first.conversion_factor("Jy") != second.conversion_factor("Jy")
+
+    # -----------------------------------------------------------------
+
+    def test_filters(self):
+
+        """
+        This function ...
+        :return:
+        """
+
+        # Inform the user
+        log.info("Testing filters with the same name but different pivot wavelengths ...")
+
+        units.clear_conversion_factors()
+
+        # Two filters with the same name
+        first = self.Filter("Band", q("2 micron"))
+        second = self.Filter("Band", q("3.6 micron"))
+        assert str(first) == str(second)
+
+        # The factors correspond to the pivot wavelengths
+        factor_first = u("W/m2/micron").conversion_factor("Jy", fltr=first)
+        factor_second = u("W/m2/micron").conversion_factor("Jy", fltr=second)
+        assert factor_first != factor_second
+        assert factor_first == u("W/m2/micron").calculate_conversion_factor("Jy", wavelength=q("2 micron"))
+        assert factor_second == u("W/m2/micron").calculate_conversion_factor("Jy", wavelength=q("3.6 micron"))
+        assert u("W/m2/micron").conversion_factor("Jy", fltr=first) == factor_first
+
+        # A filter with the same pivot wavelength as the first
+        assert u("W/m2/micron").conversion_factor("Jy", fltr=self.Filter("Other", q("2 micron"))) == factor_first
+
+# -----------------------------------------------------------------
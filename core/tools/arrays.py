@@ -150,6 +150,9 @@ def array_as_list(array, add_unit=True, unit=None, masked_value=None, array_unit
         conversion_info = copy.deepcopy(conversion_info)
         del conversion_info["wavelengths"]
 
+    # No wavelengths
+    else: wavelengths = None
+
     #print(wavelengths)
 
     # Initialize a list to contain the column values
@@ -229,7 +232,9 @@ def array_as_list(array, add_unit=True, unit=None, masked_value=None, array_unit
 def plain_array(column, unit=None, array_unit=None, conversion_info=None, density=False, brightness=False, equivalencies=None, mask=None):
 
     """
-    This function ...
+    This function returns the values of a column as a plain array (with masked values set to NaN), converted to the
+    given unit. The conversion is applied to the whole column at once: with one conversion factor, or with one
+    factor per wavelength if the 'wavelengths' are specified in the conversion info.
     :param column:
     :param unit:
     :param array_unit:
@@ -241,8 +246,96 @@ def plain_array(column, unit=None, array_unit=None, conversion_info=None, densit
     :return:
     """
 
-    return np.array(array_as_list(column, unit=unit, add_unit=False, masked_value=float('nan'), array_unit=array_unit,
-                                  conversion_info=conversion_info, density=density, brightness=brightness,
-                                  equivalencies=equivalencies, mask=mask))
+    # Get array unit if not passed to this function
+    if array_unit is None and hasattr(column, "unit"): array_unit = column.unit
+
+    # Parse the unit
+    if unit is not None: unit = parse_unit(unit, density=density, brightness=brightness)
+
+    # Check the units
+    if array_unit is None and unit is not None: raise ValueError("Cannot determine the unit of the column so values cannot be converted to " + str(unit))
+    if array_unit is not None and unit is None: raise ValueError("You cannot know which units the values are going to be if you don't specifiy the target unit and you put add_unit to False")
+
+    # Get the values
+    values = np.array(np.ma.getdata(column))
+
+    # Not numerical: use the element-wise conversion
+    if values.dtype.kind not in "biuf":
+        return np.array(array_as_list(column, unit=unit, add_unit=False, masked_value=float('nan'), array_unit=array_unit,
+                                      conversion_info=conversion_info, density=density, brightness=brightness,
+                                      equivalencies=equivalencies, mask=mask))
+
+    # Set masked values to NaN
+    masked = np.ma.getmaskarray(column) if hasattr(column, "mask") else None
+    if masked is not None and np.any(masked):
+        values = values.astype(float)
+        values[masked] = float('nan')
+
+    # Convert
+    if unit is not None and unit != array_unit: values = convert_values(values, array_unit, unit, conversion_info=conversion_info, equivalencies=equivalencies, mask=mask)
+
+    # Leave out the values that are not requested
+    if mask is not None: values = values[np.logical_not(np.asarray(mask, dtype=bool))]
+
+    # Return the values
+    return values
+
+# -----------------------------------------------------------------
+
+def convert_values(values, from_unit, to_unit, conversion_info=None, equivalencies=None, mask=None):
+
+    """
+    This function converts an array of values from one unit to another, as array_as_list does for each element
+    :param values:
+    :param from_unit:
+    :param to_unit:
+    :param conversion_info:
+    :param equivalencies:
+    :param mask: values that don't need to be converted
+    :return:
+    """
+
+    # Import
+    from astropy.units import Quantity
+    from ..units.unit import PhotometricUnit
+    from ..units.parsing import parse_photometric_unit
+
+    # With equivalencies or for non-photometric units, use the conversion of astropy (which is vectorized)
+    if equivalencies is not None: return from_unit.to(to_unit, values, equivalencies=equivalencies)
+    if not isinstance(from_unit, PhotometricUnit): return from_unit.to(to_unit, values)
+
+    # Get the conversion properties (as used by PhotometricQuantity.to)
+    if conversion_info is None: conversion_info = dict()
+    names = ["density", "wavelength", "frequency", "distance", "solid_angle", "fltr", "pixelscale"]
+    properties = dict((name, conversion_info[name]) for name in names if name in conversion_info)
+    wavelengths = conversion_info.get("wavelengths", None)
+
+    # One conversion factor for all values
+    if wavelengths is None: return values * from_unit.conversion_factor(to_unit, **properties)
+
+    # Determine the power of the wavelength with which the conversion factor scales: converting a wavelength density
+    # to a neutral density multiplies by the wavelength, converting a frequency density to a neutral density multiplies
+    # by the frequency (inversely proportional to the wavelength)
+    powers = {"wavelength": 1, "frequency": -1, "neutral": 0, None: 0}
+    to_photometric_unit = parse_photometric_unit(to_unit, density=properties.get("density", False))
+    power = powers[from_unit.spectral_density_type] - powers[to_photometric_unit.spectral_density_type]
+
+    # The conversion does not depend on the wavelength: one conversion factor for all values
+    if power == 0:
+        properties.pop("wavelength", None)
+        return values * from_unit.conversion_factor(to_unit, **properties)
+
+    # Determine the values that have to be converted
+    valid = np.ones(len(values), dtype=bool) if mask is None else np.logical_not(np.asarray(mask, dtype=bool))
+    if not np.any(valid): return values * 1.
+
+    # Calculate the conversion factor for one wavelength, and scale it with the wavelength for the other values
+    wavelengths = Quantity(wavelengths)
+    reference = wavelengths[np.argmax(valid)]
+    properties["wavelength"] = reference
+    factor = from_unit.conversion_factor(to_unit, **properties)
+    factors = np.ones(len(values))
+    factors[valid] = factor * np.asarray((wavelengths[valid] / reference).to("").value, dtype=float)**power
+    return values * factors
 
 # -----------------------------------------------------------------
@@ -1517,8 +1517,8 @@ def read_lines(path):
     # Open the file
     with open(path, 'r') as fh:
 
-        # Loop over the lines, cut off the end-of-line characters
-        for line in fh.readlines(): yield line[:-1]
+        # Loop over the lines (without reading the whole file in memory), cut off the end-of-line characters
+        for line in fh: yield line[:-1]
 
 # -----------------------------------------------------------------
 
@@ -1894,6 +1894,19 @@ def creation_date(filepath):
 
 # -----------------------------------------------------------------
 
+def file_signature(filepath):
+
+    """
+    This function returns a (size, modification time) tuple that changes whenever the file is rewritten
+    :param filepath:
+    :return:
+    """
+
+    stat = os.stat(filepath)
+    return stat.st_size, stat.st_mtime
+
+# -----------------------------------------------------------------
+
 def reverse_readline(filename, buf_size=8192):
 
     """a generator that returns the lines of a file in reverse order"""
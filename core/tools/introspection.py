@@ -14,6 +14,9 @@
 from __future__ import absolute_import, division, print_function
 
 # Import standard modules
+import os
+import copy
+import json
 import getpass
 import traceback
 from os import devnull
@@ -1746,6 +1749,17 @@ def which_module(subpackage, name):
 
 def get_scripts():
 
+    """
+    This function returns the scripts in the 'do' subpackage, from the command registry
+    :return:
+    """
+
+    return get_command_registry()["scripts"]
+
+# -----------------------------------------------------------------
+
+def scan_scripts():
+
     """
     This function ...
     :return:
@@ -1915,6 +1929,17 @@ def get_argument_table(subproject):
 
 def get_arguments_tables():
 
+    """
+    This function returns the tables of configurable commands of the subprojects, from the command registry
+    :return:
+    """
+
+    return get_command_registry()["tables"]
+
+# -----------------------------------------------------------------
+
+def scan_arguments_tables():
+
     """
     This function ...
     :return:
@@ -1938,6 +1963,98 @@ def get_arguments_tables():
 
 # -----------------------------------------------------------------
 
+# The path of the command registry file (the scripts and the tables of configurable commands)
+command_registry_path = fs.join(pts_temp_dir, "commands.json")
+
+# The command registry in memory
+command_registry = None
+
+# -----------------------------------------------------------------
+
+def get_command_registry_signature():
+
+    """
+    This function returns the modification times of the 'do' directories (which change when scripts are added,
+    removed or renamed) and the sizes and modification times of the commands.dat files
+    :return:
+    """
+
+    signature = [[pts_do_dir, os.stat(pts_do_dir).st_mtime]]
+    for name in sorted(os.listdir(pts_do_dir)):
+        path = fs.join(pts_do_dir, name)
+        if os.path.isdir(path): signature.append([path, os.stat(path).st_mtime])
+
+    for subproject in subprojects:
+        table_path = fs.join(pts_subproject_dir(subproject), "commands.dat")
+        if os.path.isfile(table_path): signature.append([table_path] + list(fs.file_signature(table_path)))
+
+    return signature
+
+# -----------------------------------------------------------------
+
+def get_command_registry():
+
+    """
+    This function returns the command registry: the scripts and the tables of configurable commands. The registry is
+    kept in a file, which is only rebuilt (by scanning the 'do' directories and parsing the commands.dat files) when
+    scripts are added or removed or the tables have changed.
+    :return:
+    """
+
+    global command_registry
+
+    signature = get_command_registry_signature()
+
+    # In memory and up to date (return a copy, so that callers can't change the registry)
+    if command_registry is not None and command_registry["signature"] == signature: return copy.deepcopy(command_registry)
+
+    # Load the registry file
+    registry = None
+    if os.path.isfile(command_registry_path):
+        try:
+            with open(command_registry_path, "r") as registry_file: registry = json.load(registry_file)
+        except (IOError, ValueError): registry = None
+
+    # Registry file is up to date
+    if registry is not None and registry["signature"] == signature:
+        registry = normalize_strings(registry)
+        registry["scripts"] = [tuple(script) for script in registry["scripts"]]
+
+    # Rebuild the registry
+    else:
+
+        registry = {"signature": signature, "scripts": scan_scripts(), "tables": scan_arguments_tables()}
+
+        # Write the registry file (replacing the file at once, so that other processes never read a partial file)
+        temp_path = command_registry_path + "." + str(os.getpid()) + ".tmp"
+        try:
+            with open(temp_path, "w") as registry_file: json.dump(registry, registry_file)
+            os.rename(temp_path, command_registry_path)
+        except (IOError, OSError):
+            if os.path.isfile(temp_path): os.remove(temp_path)
+
+    # Keep the registry in memory
+    command_registry = registry
+    return copy.deepcopy(registry)
+
+# -----------------------------------------------------------------
+
+def normalize_strings(value):
+
+    """
+    This function converts the strings in a value loaded from JSON (unicode strings under Python 2) to str,
+    so that the loaded command registry is the same as the scanned one
+    :param value:
+    :return:
+    """
+
+    if isinstance(value, dict): return dict((normalize_strings(key), normalize_strings(item)) for key, item in value.items())
+    elif isinstance(value, list): return [normalize_strings(item) for item in value]
+    elif sys.version_info[0] < 3 and isinstance(value, unicode): return value.encode("utf8")
+    else: return value
+
+# -----------------------------------------------------------------
+
 def skip_module(name, path=None):
 
     """
@@ -13,7 +13,13 @@
 from __future__ import absolute_import, division, print_function
 
 # Import standard modules
+import os
+import copy
+import atexit
+import shutil
+import tempfile
 import psutil
+import numpy as np
 
 # Import astronomical modules
 from astropy.units import Unit
@@ -37,18 +43,244 @@ except ImportError:
 
 # -----------------------------------------------------------------
 
+# Arrays smaller than this number of bytes are simply pickled instead of being passed through a shared file
+shared_threshold = 1024**2
+
+# Directory for the shared files: in memory (/dev/shm) if possible
+shared_base_path = "/dev/shm" if os.path.isdir("/dev/shm") and os.access("/dev/shm", os.W_OK) else None
+
+# -----------------------------------------------------------------
+
+# The process pools that are kept alive to be reused, per number of processes
+pools = dict()
+
+# -----------------------------------------------------------------
+
+def get_pool(nprocesses):
+
+    """
+    This function returns a process pool with the given number of processes, reusing a previously created pool if possible
+    :param nprocesses:
+    :return:
+    """
+
+    if nprocesses not in pools: pools[nprocesses] = Pool(processes=nprocesses)
+    return pools[nprocesses]
+
+# -----------------------------------------------------------------
+
+def close_pools():
+
+    """
+    This function closes and joins all the reusable process pools
+    :return:
+    """
+
+    for nprocesses in list(pools.keys()):
+        pool = pools.pop(nprocesses)
+        pool.close()
+        pool.join()
+
+# -----------------------------------------------------------------
+
+# Close the pools when the command is finished
+atexit.register(close_pools)
+
+# -----------------------------------------------------------------
+
+class SharedArray(object):
+
+    """
+    This class is a picklable stand-in for an array, or an object that keeps its data in a '_data' array (such as
+    Frame, Mask and SegmentationMap), of which the data has been written to a file in shared memory or in the
+    temporary directory. The receiving process maps the file instead of unpickling a copy of the data.
+    """
+
+    def __init__(self, obj, path, remove=False):
+
+        """
+        The constructor ...
+        :param obj: the array or object
+        :param path: the path of the .npy file with the data
+        :param remove: remove the file as soon as the data is restored (loading the data in memory)
+        """
+
+        self.path = path
+        self.remove = remove
+
+        # Keep a shallow copy of the object without its data
+        if isinstance(obj, np.ndarray): self.shell = None
+        else:
+            self.shell = copy.copy(obj)
+            self.shell._data = None
+
+    # -----------------------------------------------------------------
+
+    @classmethod
+    def from_object(cls, obj, directory, remove=False):
+
+        """
+        This function writes the data of the object to a new file in the given directory
+        :param obj:
+        :param directory:
+        :param remove:
+        :return:
+        """
+
+        # Get the data
+        data = obj if isinstance(obj, np.ndarray) else obj._data
+
+        # Write the data
+        handle, path = tempfile.mkstemp(suffix=".npy", dir=directory)
+        with os.fdopen(handle, 'wb') as fh: np.save(fh, np.ascontiguousarray(data))
+
+        # Create the reference
+        return cls(obj, path, remove=remove)
+
+    # -----------------------------------------------------------------
+
+    def restore(self):
+
+        """
+        This function rebuilds the array or object. Data that is not removed is mapped copy-on-write,
+        so that changes made by the receiving process stay private, as with pickled arguments.
+        :return:
+        """
+
+        # Load the data
+        if self.remove:
+            data = np.load(self.path)
+            os.remove(self.path)
+        else: data = np.load(self.path, mmap_mode="c")
+
+        # Rebuild the object
+        if self.shell is None: return data
+        obj = self.shell
+        obj._data = data
+        return obj
+
+# -----------------------------------------------------------------
+
+def is_shareable(obj, threshold=None):
+
+    """
+    This function checks whether the object is a large array or is backed by a large array
+    :param obj:
+    :param threshold:
+    :return:
+    """
+
+    if threshold is None: threshold = shared_threshold
+
+    if isinstance(obj, np.ndarray): data = obj
+    else: data = getattr(obj, "_data", None)
+
+    # Object arrays cannot be mapped
+    return isinstance(data, np.ndarray) and data.dtype != object and data.nbytes >= threshold
+
+# -----------------------------------------------------------------
+
+def share(obj, directory, remove=False, cache=None):
+
+    """
+    This function replaces an object by a shared reference if it is backed by a large array
+    :param obj:
+    :param directory:
+    :param remove:
+    :param cache: dictionary of already shared objects (by id)
+    :return:
+    """
+
+    if not is_shareable(obj): return obj
+
+    # Already shared
+    if cache is not None and id(obj) in cache: return cache[id(obj)]
+
+    # Create the reference
+    reference = SharedArray.from_object(obj, directory, remove=remove)
+    if cache is not None: cache[id(obj)] = reference
+    return reference
+
+# -----------------------------------------------------------------
+
+def restore(obj):
+
+    """
+    This function rebuilds the object if it is a shared reference
+    :param obj:
+    :return:
+    """
+
+    return obj.restore() if isinstance(obj, SharedArray) else obj
+
+# -----------------------------------------------------------------
+
+def share_output(output, directory):
+
+    """
+    This function shares the large arrays of the output of a target (or of the items of an output tuple)
+    :param output:
+    :param directory:
+    :return:
+    """
+
+    if isinstance(output, tuple): return tuple(share(item, directory, remove=True) for item in output)
+    else: return share(output, directory, remove=True)
+
+# -----------------------------------------------------------------
+
+def restore_output(output):
+
+    """
+    This function rebuilds the output of a target that was shared with share_output
+    :param output:
+    :return:
+    """
+
+    if isinstance(output, tuple): return tuple(restore(item) for item in output)
+    else: return restore(output)
+
+# -----------------------------------------------------------------
+
+def call_with_shared(target, directory, args, kwargs):
+
+    """
+    This function is executed in the worker processes: it rebuilds the shared arguments, calls the target
+    and shares the large arrays of the output
+    :param target:
+    :param directory:
+    :param args:
+    :param kwargs:
+    :return:
+    """
+
+    # Rebuild the arguments
+    args = [restore(arg) for arg in args]
+    kwargs = dict((key, restore(value)) for key, value in kwargs.items())
+
+    # Call the target
+    output = target(*args, **kwargs)
+
+    # Share the output
+    return share_output(output, directory)
+
+# -----------------------------------------------------------------
+
 class ParallelTarget(object):
 
     """
     This function ...
     """
 
-    def __init__(self, target, nprocesses):
+    def __init__(self, target, nprocesses, shared=False, reuse=False):
 
         """
         This function ...
         :param target:
         :param nprocesses:
+        :param shared: pass large arrays (and frames, masks and segmentation maps) through shared files instead of pickling them
+        :param reuse: reuse the process pool of previous parallel blocks with the same number of processes (the workers
+                      then persist between blocks, so only use this for targets that don't keep global state)
         """
 
         # Set the target
@@ -57,6 +289,10 @@ class ParallelTarget(object):
         # Get the process pool
         self.nprocesses = nprocesses
 
+        # Flags
+        self.shared = shared
+        self.reuse = reuse
+
         # The number of tasks
         self.ntasks = 0
 
@@ -66,6 +302,13 @@ class ParallelTarget(object):
         # The process pool
         self.pool = None
 
+        # The pending outputs
+        self.pending = []
+
+        # The directory for the shared files, and the references to the already shared objects
+        self.shared_path = None
+        self.shared_objects = dict()
+
     # -----------------------------------------------------------------
 
     def __enter__(self):
@@ -81,11 +324,20 @@ class ParallelTarget(object):
         # Reset the number of tasks
         self.ntasks = 0
 
+        # Reset the pending outputs and shared objects
+        self.pending = []
+        self.shared_objects = dict()
+
         # Initialize the process pool if required
         if self.nprocesses > 1:
-            self.pool = Pool(processes=self.nprocesses)
+
+            # Get or create the pool
+            self.pool = get_pool(self.nprocesses) if self.reuse else Pool(processes=self.nprocesses)
             self.nprocesses = self.pool._processes # make sure nprocesses is set
 
+            # Create the directory for the shared files
+            if self.shared: self.shared_path = tempfile.mkdtemp(prefix="pts_shared_", dir=shared_base_path)
+
         # Return ourselves
         return self
 
@@ -104,10 +356,21 @@ class ParallelTarget(object):
         self.ntasks += 1
 
         # Launch
-        if self.pool is not None:
+        if self.pool is not None and self.shared:
+
+            # Share the large arguments
+            args = tuple(share(arg, self.shared_path, cache=self.shared_objects) for arg in args)
+            kwargs = dict((key, share(value, self.shared_path, cache=self.shared_objects)) for key, value in kwargs.items())
+
+            result = self.pool.apply_async(call_with_shared, args=(self.target, self.shared_path, args, kwargs), callback=self.complete)
+            output = PendingOutput(result, shared=True)
+            self.pending.append(output)
+
+        elif self.pool is not None:
 
             result = self.pool.apply_async(self.target, args=tuple(args), kwds=kwargs, callback=self.complete)
             output = PendingOutput(result)
+            self.pending.append(output)
 
         else:
 
@@ -152,10 +415,20 @@ class ParallelTarget(object):
             #print(traceback)
 
         # Close and join the process pool
-        if self.pool is not None:
+        if self.pool is not None and not self.reuse:
             self.pool.close()
             self.pool.join()
 
+        # Reused pool: wait for the tasks of this block to finish
+        elif self.pool is not None:
+            for output in self.pending: output.wait()
+
+        # Remove the shared files (the output files are removed when they are restored)
+        if self.shared_path is not None:
+            for output in self.pending: output.request_safe()
+            shutil.rmtree(self.shared_path, ignore_errors=True)
+            self.shared_path = None
+
 # -----------------------------------------------------------------
 
 class PendingOutput(object):
@@ -164,15 +437,29 @@ class PendingOutput(object):
     This function ...
     """
 
-    def __init__(self, result):
+    def __init__(self, result, shared=False):
 
         """
         This function ...
         :param result:
+        :param shared: the output is passed through shared files
         """
 
         self.result = result
+        self.shared = shared
         self.output = None
+        self.requested = False
+
+    # -----------------------------------------------------------------
+
+    def wait(self):
+
+        """
+        This function ...
+        :return:
+        """
+
+        self.result.wait()
 
     # -----------------------------------------------------------------
 
@@ -183,7 +470,23 @@ class PendingOutput(object):
         :return:
         """
 
+        if self.requested: return
         self.output = self.result.get()
+        if self.shared: self.output = restore_output(self.output)
+        self.requested = True
+
+    # -----------------------------------------------------------------
+
+    def request_safe(self):
+
+        """
+        This function requests the output, but doesn't raise the exception of a failed task (it is raised when the
+        output is requested again)
+        :return:
+        """
+
+        if not self.result.ready() or not self.result.successful(): return
+        self.request()
 
     # -----------------------------------------------------------------
 
@@ -194,7 +497,7 @@ class PendingOutput(object):
         :return:
         """
 
-        if self.output is None: self.request()
+        self.request()
         for item in self.output: yield item
 
     # -----------------------------------------------------------------
@@ -207,7 +510,7 @@ class PendingOutput(object):
         :return:
         """
 
-        if self.output is None: self.request()
+        self.request()
         return self.output[item]
 
 # -----------------------------------------------------------------
@@ -430,3 +430,28 @@ class memoize_method(object):
 # assert Test.inc_add(t, 2) != Test.inc_add(t, 2)
 
 # -----------------------------------------------------------------
+
+class hybridmethod(object):
+
+    """combine any number of objects, invoked on the class or on one of them
+
+    This class is meant to be used as a decorator of methods that take the class
+    as their first argument (like a classmethod) and any number of objects. If the
+    method is invoked on an instance, the instance is the first of these objects:
+    class Obj(object):
+        @hybridmethod
+        def combine(cls, *args):
+            return cls(sum(args))
+    Obj.combine(a, b, c) # combines a, b and c
+    a.combine(b, c) # combines a, b and c
+    """
+
+    def __init__(self, func):
+        self.func = func
+
+    def __get__(self, obj, objtype=None):
+        if obj is None:
+            return partial(self.func, objtype)
+        return partial(self.func, type(obj), obj)
+
+# -----------------------------------------------------------------
@@ -22,6 +22,48 @@ from .utils import clean_unit_string
 
 # -----------------------------------------------------------------
 
+# The units that have been parsed from strings, by the string and the flags (units are immutable, so they can be shared)
+parsed_units = dict()
+
+# The maximum number of parsed units that are kept
+max_nparsed_units = 10000
+
+# -----------------------------------------------------------------
+
+def get_parsed_unit(key, parse):
+
+    """
+    This function returns the unit for the given key from the cache of parsed units, or parses and adds it
+    :param key:
+    :param parse:
+    :return:
+    """
+
+    if key in parsed_units: return parsed_units[key]
+
+    # Parse
+    unit = parse()
+
+    # Add to the cache
+    if len(parsed_units) >= max_nparsed_units: parsed_units.clear()
+    parsed_units[key] = unit
+
+    # Return the unit
+    return unit
+
+# -----------------------------------------------------------------
+
+def clear_parsed_units():
+
+    """
+    This function clears the cache of parsed units
+    :return:
+    """
+
+    parsed_units.clear()
+
+# -----------------------------------------------------------------
+
 def parse_unit(argument, density=False, brightness=False, density_strict=False, brightness_strict=False):
 
     """
@@ -34,6 +76,28 @@ def parse_unit(argument, density=False, brightness=False, density_strict=False,
     :return:
     """
 
+    # Unit strings are parsed only once
+    if types.is_string_type(argument):
+        key = ("unit", argument, density, brightness, density_strict, brightness_strict)
+        return get_parsed_unit(key, lambda: parse_unit_no_cache(argument, density=density, brightness=brightness, density_strict=density_strict, brightness_strict=brightness_strict))
+
+    # Parse
+    return parse_unit_no_cache(argument, density=density, brightness=brightness, density_strict=density_strict, brightness_strict=brightness_strict)
+
+# -----------------------------------------------------------------
+
+def parse_unit_no_cache(argument, density=False, brightness=False, density_strict=False, brightness_strict=False):
+
+    """
+    This function ...
+    :param argument:
+    :param density:
+    :param brightness:
+    :param density_strict:
+    :param brightness_strict:
+    :return:
+    """
+
     from .unit import PhotometricUnit
 
     try: unit = PhotometricUnit(argument, density=density, brightness=brightness, density_strict=density_strict, brightness_strict=brightness_strict)
@@ -58,6 +122,11 @@ def parse_photometric_unit(argument, density=False, brightness=False, density_st
 
     from .unit import PhotometricUnit
 
+    # Unit strings are parsed only once
+    if types.is_string_type(argument):
+        key = ("photometric", argument, density, brightness, density_strict, brightness_strict)
+        return get_parsed_unit(key, lambda: PhotometricUnit(argument, density=density, brightness=brightness, density_strict=density_strict, brightness_strict=brightness_strict))
+
     unit = PhotometricUnit(argument, density=density, brightness=brightness, density_strict=density_strict, brightness_strict=brightness_strict)
     return unit
 
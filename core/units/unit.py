@@ -26,7 +26,7 @@ from astropy import constants
 from ...magic.basics.pixelscale import Pixelscale
 from .quantity import PhotometricQuantity
 from .utils import analyse_unit, divide_units_reverse, clean_unit_string, get_physical_type, interpret_physical_type
-from .parsing import parse_unit, parse_quantity
+from .parsing import parse_unit, parse_quantity, parse_photometric_unit
 from ..tools import types
 from ..basics.log import log
 
@@ -103,6 +103,94 @@ wavelength_times_frequency = speed_of_light
 
 # -----------------------------------------------------------------
 
+# The conversion factors that have been calculated, by the units and the conversion parameters
+conversion_factors = dict()
+
+# The maximum number of conversion factors that are kept
+max_nconversion_factors = 10000
+
+# -----------------------------------------------------------------
+
+def unit_key(unit):
+
+    """
+    This function returns a hashable key for a unit (or unit string)
+    :param unit:
+    :return:
+    """
+
+    if types.is_string_type(unit): return unit
+    elif isinstance(unit, PhotometricUnit): return "photometric", composition_key(unit), unit.density, unit.brightness
+    elif isinstance(unit, UnitBase): return "unit", composition_key(unit)
+    else: raise ValueError("Not a unit")
+
+# -----------------------------------------------------------------
+
+def composition_key(unit):
+
+    """
+    This function returns a hashable key for the scale, the bases and the powers of a unit
+    (the unit string rounds the scale, so different units can have the same string)
+    :param unit:
+    :return:
+    """
+
+    return float(unit.scale), tuple(base.to_string() for base in unit.bases), tuple(unit.powers)
+
+# -----------------------------------------------------------------
+
+def parameter_key(value):
+
+    """
+    This function returns a hashable key for a conversion parameter (quantity, string, pixelscale or filter)
+    :param value:
+    :return:
+    """
+
+    if value is None: return None
+    elif types.is_string_type(value): return value
+    elif isinstance(value, Pixelscale): return "pixelscale", parameter_key(value.x), parameter_key(value.y)
+    elif isinstance(value, Quantity):
+        if not value.isscalar: raise ValueError("Not a scalar")
+        return float(value.value), value.unit.to_string()
+    elif hasattr(value, "pivot"): return "filter", parameter_key(value.pivot)
+    else: raise ValueError("Cannot create a key for " + str(type(value)))
+
+# -----------------------------------------------------------------
+
+def conversion_key(from_unit, to_unit, flags, wavelength, frequency, distance, solid_angle, fltr, pixelscale):
+
+    """
+    This function returns the key of a conversion in the table of conversion factors, or None if the conversion
+    cannot be cached (e.g. for array-valued parameters)
+    :param from_unit:
+    :param to_unit:
+    :param flags:
+    :param wavelength:
+    :param frequency:
+    :param distance:
+    :param solid_angle:
+    :param fltr:
+    :param pixelscale:
+    :return:
+    """
+
+    try: return (unit_key(from_unit), unit_key(to_unit), flags) + tuple(parameter_key(value) for value in (wavelength, frequency, distance, solid_angle, fltr, pixelscale))
+    except (ValueError, TypeError, AttributeError): return None
+
+# -----------------------------------------------------------------
+
+def clear_conversion_factors():
+
+    """
+    This function clears the table of conversion factors
+    :return:
+    """
+
+    conversion_factors.clear()
+
+# -----------------------------------------------------------------
+
 class PhotometricUnit(CompositeUnit):
 
     """
@@ -1042,8 +1130,48 @@ class PhotometricUnit(CompositeUnit):
         :return:
         """
 
+        # Determine the key for the table of conversion factors
+        key = conversion_key(self, to_unit, (density, brightness, brightness_strict, density_strict), wavelength, frequency, distance, solid_angle, fltr, pixelscale)
+
+        # Already calculated
+        if key is not None and key in conversion_factors: return conversion_factors[key]
+
+        # Calculate the factor
+        factor = self.calculate_conversion_factor(to_unit, density=density, wavelength=wavelength, frequency=frequency,
+                                                  distance=distance, solid_angle=solid_angle, fltr=fltr, pixelscale=pixelscale,
+                                                  brightness=brightness, brightness_strict=brightness_strict, density_strict=density_strict)
+
+        # Add to the table
+        if key is not None:
+            if len(conversion_factors) >= max_nconversion_factors: conversion_factors.clear()
+            conversion_factors[key] = factor
+
+        # Return the factor
+        return factor
+
+    # -----------------------------------------------------------------
+
+    def calculate_conversion_factor(self, to_unit, density=False, wavelength=None, frequency=None, distance=None, solid_angle=None,
+                                    fltr=None, pixelscale=None, brightness=False, brightness_strict=False, density_strict=False):
+
+        """
+        This function ...
+        :param to_unit:
+        :param density:
+        :param wavelength:
+        :param frequency:
+        :param distance:
+        :param solid_angle:
+        :param fltr:
+        :param pixelscale:
+        :param brightness:
+        :param brightness_strict:
+        :param density_strict:
+        :return:
+        """
+
         # Parse "to unit"
-        to_unit = PhotometricUnit(to_unit, density=density, brightness=brightness, brightness_strict=brightness_strict, density_strict=density_strict)
+        to_unit = parse_photometric_unit(to_unit, density=density, brightness=brightness, brightness_strict=brightness_strict, density_strict=density_strict)
 
         # Determine wavelength and frequency
         if wavelength is not None:
@@ -0,0 +1,85 @@
+#!/usr/bin/env python
+# -*- coding: utf8 -*-
+# *****************************************************************
+# **       PTS -- Python Toolkit for working with SKIRT          **
+# **       © Astronomical Observatory, Ghent University          **
+# *****************************************************************
+
+## \package pts.do.developer.benchmark_units Time the parsing of units and the common photometric conversions,
+#  without (cold) and with (warm) the caches of parsed units and conversion factors.
+
+# -----------------------------------------------------------------
+
+# Ensure Python 3 compatibility
+from __future__ import absolute_import, division, print_function
+
+# Import standard modules
+import timeit
+
+# Import the relevant PTS classes and modules
+from pts.core.tools import formatting as fmt
+from pts.core.basics.configuration import ConfigurationDefinition
+from pts.core.basics.configuration import parse_arguments
+from pts.core.units.parsing import parse_unit as u
+from pts.core.units.parsing import parse_quantity as q
+from pts.core.units.parsing import clear_parsed_units
+from pts.core.units.unit import clear_conversion_factors
+from pts.magic.basics.pixelscale import Pixelscale
+
+# -----------------------------------------------------------------
+
+# Create the configuration
+definition = ConfigurationDefinition()
+definition.add_optional("number", "positive_integer", "number of calls per timing", 1000)
+definition.add_optional("repeat", "positive_integer", "number of timings (the best is reported)", 3)
+
+# Parse
+config = parse_arguments("benchmark_units", definition)
+
+# -----------------------------------------------------------------
+
+wavelength = q("3.6 micron")
+distance = q("3.6 Mpc")
+pixelscale = Pixelscale(q("1.5 arcsec"))
+
+jy = u("Jy")
+w_micron = u("W/micron")
+mjy_sr = u("MJy/sr")
+
+# The benchmarks
+benchmarks = [("parse 'W/m2/micron'", lambda: u("W/m2/micron")),
+              ("parse 'MJy/sr'", lambda: u("MJy/sr")),
+              ("Jy -> W/m2/micron (wavelength)", lambda: jy.conversion_factor("W/m2/micron", wavelength=wavelength)),
+              ("W/micron -> Lsun", lambda: w_micron.conversion_factor("Lsun", wavelength=wavelength)),
+              ("MJy/sr -> Jy (pixelscale)", lambda: mjy_sr.conversion_factor("Jy", pixelscale=pixelscale)),
+              ("W/micron -> Jy (distance)", lambda: w_micron.conversion_factor("Jy", wavelength=wavelength, distance=distance))]
+
+# -----------------------------------------------------------------
+
+def cold(function):
+
+    """
+    This function ...
+    :param function:
+    :return:
+    """
+
+    clear_parsed_units()
+    clear_conversion_factors()
+    function()
+
+# -----------------------------------------------------------------
+
+print("")
+
+for name, function in benchmarks:
+
+    # Time without and with the caches
+    cold_time = min(timeit.repeat(lambda: cold(function), number=config.number, repeat=config.repeat)) / config.number
+    warm_time = min(timeit.repeat(function, number=config.number, repeat=config.repeat)) / config.number
+
+    print(" - " + fmt.blue + name + fmt.reset + ": " + "%.2f" % (cold_time * 1e6) + " µs (cold), " + "%.2f" % (warm_time * 1e6) + " µs (warm), speedup " + "%.1f" % (cold_time / warm_time))
+
+print("")
+
+# -----------------------------------------------------------------
@@ -59,8 +59,10 @@ from pts.eagle import performer
 # -----------------------------------------------------------------
 
 # Get appropriate callback for given stage
+batchcallback = None
 if stage == "extract":
     from pts.eagle.extractor import extract as callback
+    from pts.eagle.extractor import extract_batch as batchcallback
     chunksize = 20
 if stage == "simulate":
     from pts.eagle.simulator import simulate as callback
@@ -75,7 +77,7 @@ if stage == "store":
 # Perform according to requested mode
 log.info("Performing {} in {} mode ...".format(stage, mode))
 if mode == "loop":
-    performer.loop(callback, stage, float(eval(argum)), chunksize)
+    performer.loop(callback, stage, float(eval(argum)), chunksize, batchcallback)
 if mode == "force":
     performer.force(callback, stage, argum)
 log.info("Finished performing.")
@@ -21,17 +21,56 @@ from pts.core.tools import introspection
 from pts.core.tools import time
 from pts.core.tools import filesystem as fs
 from .commandline import start_and_clear
-from pts.modeling.welcome import welcome as welcome_modeling
-from pts.magic.welcome import welcome as welcome_magic
-from pts.evolve.welcome import welcome as welcome_evolve
-from pts.dustpedia.welcome import welcome as welcome_dustpedia
-from pts.core.basics.configuration import create_configuration
-from pts.modeling.setup import setup as setup_modeling, finish as finish_modeling
-from pts.magic.setup import setup as setup_magic, finish as finish_magic
-from pts.evolve.setup import setup as setup_evolve, finish as finish_evolve
-from pts.dustpedia.setup import setup as setup_dustpedia, finish as finish_dustpedia
 from pts.do.commandline import show_all_available, show_possible_matches, print_welcome
-from pts.core.basics.filemonitor import FileMonitor
+
+# -----------------------------------------------------------------
+
+# The subprojects with welcome, setup and finish functions (these are only imported when a command of the subproject
+# is run, because importing the subprojects makes the startup of every command slow)
+subprojects_with_setup = ["modeling", "magic", "evolve", "dustpedia"]
+
+# -----------------------------------------------------------------
+
+def welcome(subproject):
+
+    """
+    This function shows the welcome message of the subproject
+    :param subproject:
+    :return:
+    """
+
+    if subproject not in subprojects_with_setup: return
+    importlib.import_module("pts." + subproject + ".welcome").welcome()
+
+# -----------------------------------------------------------------
+
+def setup(subproject, command_name, cwd):
+
+    """
+    This function calls the setup function of the subproject
+    :param subproject:
+    :param command_name:
+    :param cwd:
+    :return:
+    """
+
+    if subproject not in subprojects_with_setup: return
+    importlib.import_module("pts." + subproject + ".setup").setup(command_name, cwd)
+
+# -----------------------------------------------------------------
+
+def finish(subproject, command_name, cwd):
+
+    """
+    This function calls the finish function of the subproject
+    :param subproject:
+    :param command_name:
+    :param cwd:
+    :return:
+    """
+
+    if subproject not in subprojects_with_setup: return
+    importlib.import_module("pts." + subproject + ".setup").finish(command_name, cwd)
 
 # -----------------------------------------------------------------
 
@@ -172,10 +211,7 @@ def run_configurable(table_matches, args, tables):
     leftover_arguments = sys.argv[1:]
 
     # Welcome message
-    if subproject == "modeling": welcome_modeling()
-    elif subproject == "magic": welcome_magic()
-    elif subproject == "dustpedia": welcome_dustpedia()
-    elif subproject == "evolve": welcome_evolve()
+    welcome(subproject)
 
     # Get the configuration definition
     definition = introspection.get_configuration_definition_pts_not_yet_in_pythonpath(configuration_module_path)
@@ -187,6 +223,7 @@ def run_configurable(table_matches, args, tables):
     if configuration_method == "interactive" and len(leftover_arguments) > 0: raise ValueError("Arguments on the command-line are not supported by default for this command. Run with pts --arguments to change this behaviour.")
 
     # Create the configuration
+    from pts.core.basics.configuration import create_configuration
     config = create_configuration(definition, command_name, description, configuration_method)
 
     ## SAVE THE CONFIG if requested
@@ -200,10 +237,7 @@ def run_configurable(table_matches, args, tables):
         config.saveto(config_cache_path)
 
     # Setup function
-    if subproject == "modeling": setup_modeling(command_name, fs.cwd())
-    elif subproject == "magic": setup_magic(command_name, fs.cwd())
-    elif subproject == "dustpedia": setup_dustpedia(command_name, fs.cwd())
-    elif subproject == "evolve": setup_evolve(command_name, fs.cwd())
+    setup(subproject, command_name, fs.cwd())
 
     # Initialize the logger
     log = initialize_pts(config, remote=args.remote, command_name=command_name)
@@ -218,10 +252,7 @@ def run_configurable(table_matches, args, tables):
     else: run_locally(exact_command_name, module_path, class_name, config, args.input_files, args.output_files, args.output, log)
 
     # Finish function
-    if subproject == "modeling": finish_modeling(command_name, fs.cwd())
-    elif subproject == "magic": finish_magic(command_name, fs.cwd())
-    elif subproject == "dustpedia": finish_dustpedia(command_name, fs.cwd())
-    elif subproject == "evolve": finish_evolve(command_name, fs.cwd())
+    finish(subproject, command_name, fs.cwd())
 
 # -----------------------------------------------------------------
 
@@ -240,6 +271,7 @@ def initialize_pts(config, remote=None, command_name=None):
 
     # Initialize the file monitor
     if log.is_debug():
+        from pts.core.basics.filemonitor import FileMonitor
         monitor = FileMonitor(short=True)
         monitor.patch()
 
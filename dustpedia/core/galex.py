@@ -38,7 +38,7 @@ from ...magic.tools import mosaicing
 from ...core.tools.parallelization import ParallelTarget
 from ...magic.misc import chrisfuncs
 from ...magic.basics.coordinatesystem import CoordinateSystem
-from ...magic.core.frame import Frame, sum_frames, sum_frames_quadratically
+from ...magic.core.frame import Frame
 from ...core.basics.configuration import print_mapping
 from ...core.tools import stringify
 from ...core.tools.formatting import print_files_in_list, print_files_in_path, print_directories_in_path
@@ -1940,9 +1940,11 @@ def combine_frames_and_error_maps(image_names_for_mosaic, temp_rebinned_path, te
     rebin_header = Header.fromtextfile(header_path)
     wcs = CoordinateSystem(rebin_header)
 
-    primary_frames = []
-    error_frames = []
-    weight_frames = []
+    # Running sums of the weighted frames, of the squared weighted error maps and of the weights:
+    # the tiles are added one at a time, so that only one tile is in memory at any time
+    primary_sum = None
+    error_sum = None
+    normalization = None
 
     for image_name in image_names_for_mosaic:
 
@@ -1973,20 +1975,25 @@ def combine_frames_and_error_maps(image_names_for_mosaic, temp_rebinned_path, te
         errors_weighted[mask] = 0.0
         weights[mask] = 0.0
 
-        # Add to the list
-        primary_frames.append(frame_weighted)
-        error_frames.append(errors_weighted)
-        weight_frames.append(weights)
+        # Add to the running sums
+        if normalization is None:
+            primary_sum = np.array(frame_weighted.data, dtype=float)
+            error_sum = np.array(errors_weighted.data, dtype=float)**2
+            normalization = np.array(weights.data, dtype=float)
+        else:
+            primary_sum += frame_weighted.data
+            error_sum += errors_weighted.data**2
+            normalization += weights.data
 
-    #  Calculate denominator for weighted average (mosaicing)
-    normalization = sum_frames(*weight_frames)
+    # No tiles
+    if normalization is None: raise RuntimeError("No tiles to combine into the mosaic")
 
     # CALCULATE THE MOSAIC FRAME IN COUNTS/S
-    mosaic_frame = sum_frames(*primary_frames) / normalization
+    mosaic_frame = Frame(primary_sum / normalization)
     mosaic_frame.wcs = wcs
 
     # CALCULATE THE MOSAIC ERROR MAP IN COUNTS/S
-    mosaic_errormap = sum_frames_quadratically(*error_frames) / normalization
+    mosaic_errormap = Frame(np.sqrt(error_sum) / normalization)
     mosaic_errormap.wcs = wcs
 
     ## DONE
@@ -33,7 +33,7 @@ from ...magic.basics.coordinate import SkyCoordinate
 from ...magic.tools import mosaicing
 from ...core.filter.broad import BroadBandFilter
 from ...core.tools import formatting as fmt
-from ...magic.core.frame import Frame, sum_frames, sum_frames_quadratically
+from ...magic.core.frame import Frame
 from ...core.tools.parallelization import ParallelTarget
 from ...core.basics.configuration import print_mapping
 from ...core.tools.formatting import print_files_in_path, print_directories_in_path
@@ -1143,19 +1143,15 @@ def create_mosaic(band, rebinned_path, rebin_wcs, mosaics_path):
     # BUT BECAUSE d[x,y]_i = 0 for field that doesn't overlap in pixel [x,y], we can replace the sum from i=0 to n_overlapping_frames[x,y]
     # to a sum over ALL FIELDS; the contribution of the other fields will just be zero
 
-    primary_frames = []
-    error_frames = []
-    n_overlapping_frames = []
+    # Running sums of the frames, of the squared noise maps and of the footprints: the fields are added one at a time,
+    # so that only one field is in memory at any time
+    primary_sum = None
+    error_sum = None
+    n_overlapping = None
 
     # Loop over the images in the 'rebinned' directory
     for path, name in fs.files_in_path(rebinned_path, extension="fits", returns=["path", "name"]):
 
-        # Determine the path to the footprint
-        # footprint_path = fs.join(footprints_path, name + ".fits")
-
-        # Open the footprint
-        # footprint = Frame.from_file(footprint_path)
-
         # Open the image
         image = Image.from_file(path)
 
@@ -1170,20 +1166,25 @@ def create_mosaic(band, rebinned_path, rebin_wcs, mosaics_path):
         a.replace_nans(0.0)
         b.replace_nans(0.0)
 
-        # Add to the list
-        primary_frames.append(a)
-        error_frames.append(b)
-        n_overlapping_frames.append(footprint)
+        # Add to the running sums (n_overlapping[x,y] = 2D ARRAY !)
+        if n_overlapping is None:
+            primary_sum = np.array(a.data, dtype=float)
+            error_sum = np.array(b.data, dtype=float)**2
+            n_overlapping = np.array(footprint.data, dtype=float)
+        else:
+            primary_sum += a.data
+            error_sum += b.data**2
+            n_overlapping += footprint.data
 
-    # Calculate n_overlapping_frames array
-    n_overlapping = sum_frames(*n_overlapping_frames)  # = n_overlapping_frames[x,y] = 2D ARRAY !
+    # No fields
+    if n_overlapping is None: raise RuntimeError("No rebinned " + band + " band fields in '" + rebinned_path + "' to combine into the mosaic")
 
     # CALCULATE THE MOSAIC FRAME IN NANOMAGGIES
-    mosaic_frame = sum_frames(*primary_frames) / n_overlapping
+    mosaic_frame = Frame(primary_sum / n_overlapping)
     mosaic_frame.wcs = rebin_wcs
 
     # CALCULATE THE MOSAIC ERROR MAP IN NANOMAGGIES
-    mosaic_errormap = sum_frames_quadratically(*error_frames) / n_overlapping
+    mosaic_errormap = Frame(np.sqrt(error_sum) / n_overlapping)
     mosaic_errormap.wcs = rebin_wcs
 
     # SAVE THE MOSAIC IN NANOMAGGIES
@@ -0,0 +1,257 @@
+#!/usr/bin/env python
+# -*- coding: utf8 -*-
+# *****************************************************************
+# **       PTS -- Python Toolkit for working with SKIRT          **
+# **       © Astronomical Observatory, Ghent University          **
+# *****************************************************************
+
+# Ensure Python 3 compatibility
+from __future__ import absolute_import, division, print_function
+
+# Import standard modules
+import numpy as np
+
+# Import astronomical modules
+from astropy.io.fits import Header
+
+# Import the relevant PTS classes and modules
+from pts.core.test.implementation import TestImplementation
+from pts.core.basics.log import log
+from pts.core.tools import filesystem as fs
+from pts.magic.basics.coordinatesystem import CoordinateSystem
+from pts.magic.core.frame import Frame, sum_frames, sum_frames_quadratically
+from pts.magic.core.image import Image
+from pts.dustpedia.core import galex, sdss
+
+# -----------------------------------------------------------------
+
+description = "testing the GALEX and SDSS mosaics of synthetic tiles against the sums of all tiles at once"
+
+# -----------------------------------------------------------------
+
+class MosaicingTest(TestImplementation):
+
+    """
+    This class ...
+    """
+
+    def __init__(self, *args, **kwargs):
+
+        """
+        This function ...
+        :param kwargs:
+        """
+
+        # Call the constructor of the base class
+        super(MosaicingTest, self).__init__(*args, **kwargs)
+
+        # The shape of the tiles and the number of tiles
+        self.shape = (30, 40)
+        self.ntiles = 4
+
+        # The header and coordinate system of the tiles
+        self.header = None
+        self.wcs = None
+
+        # The random generator
+        self.random = None
+
+    # -----------------------------------------------------------------
+
+    def run(self, **kwargs):
+
+        """
+        This function ...
+        :param kwargs:
+        :return:
+        """
+
+        # 1. Call the setup function
+        self.setup(**kwargs)
+
+        # 2. Test the GALEX mosaic
+        self.test_galex()
+
+        # 3. Test the SDSS mosaic
+        self.test_sdss()
+
+    # -----------------------------------------------------------------
+
+    def setup(self, **kwargs):
+
+        """
+        This function ...
+        :param kwargs:
+        :return:
+        """
+
+        # Call the setup function of the base class
+        super(MosaicingTest, self).setup(**kwargs)
+
+        # Create the header
+        self.header = Header()
+        self.header["NAXIS"] = 2
+        self.header["NAXIS1"] = self.shape[1]
+        self.header["NAXIS2"] = self.shape[0]
+        self.header["CTYPE1"] = "RA---TAN"
+        self.header["CTYPE2"] = "DEC--TAN"
+        self.header["CRVAL1"] = 150.
+        self.header["CRVAL2"] = 20.
+        self.header["CRPIX1"] = 20.
+        self.header["CRPIX2"] = 15.
+        self.header["CDELT1"] = -1e-3
+        self.header["CDELT2"] = 1e-3
+        self.wcs = CoordinateSystem(self.header)
+
+        self.random = np.random.RandomState(46)
+
+    # -----------------------------------------------------------------
+
+    def create_coverage(self):
+
+        """
+        This function returns a mask of the pixels covered by a tile, a random rectangle within the frame
+        :return:
+        """
+
+        covered = np.zeros(self.shape, dtype=bool)
+        y_min, x_min = self.random.randint(0, 10), self.random.randint(0, 10)
+        covered[y_min:y_min + self.random.randint(15, 25), x_min:x_min + self.random.randint(20, 35)] = True
+        return covered
+
+    # -----------------------------------------------------------------
+
+    def create_frame(self, data):
+
+        """
+        This function ...
+        :param data:
+        :return:
+        """
+
+        frame = Frame(data)
+        frame.wcs = self.wcs
+        return frame
+
+    # -----------------------------------------------------------------
+
+    def check(self, frame, expected):
+
+        """
+        This function compares the given frame with the expected frame
+        :param frame:
+        :param expected:
+        :return:
+        """
+
+        assert frame.shape == expected.shape
+        assert np.allclose(frame.data, expected.data, rtol=1e-10, equal_nan=True)
+
+    # -----------------------------------------------------------------
+
+    def test_galex(self):
+
+        """
+        This function ...
+        :return:
+        """
+
+        # Inform the user
+        log.info("Testing the GALEX mosaic ...")
+
+        rebinned_path = fs.create_directory_in(self.path, "galex_rebinned")
+        mosaic_path = fs.create_directory_in(self.path, "galex_mosaic")
+        header_path = fs.join(self.path, "header.txt")
+        self.header.totextfile(header_path)
+
+        # Create the rebinned tiles (in counts/s/sr), error maps and weight maps (NaN outside the tile)
+        names = []
+        primary_frames = []
+        error_frames = []
+        weight_frames = []
+        for index in range(self.ntiles):
+
+            covered = self.create_coverage()
+            frame = self.create_frame(np.where(covered, self.random.uniform(0., 10., self.shape), np.nan))
+            errors = self.create_frame(np.where(covered, self.random.uniform(0.1, 1., self.shape), np.nan))
+            weights = self.create_frame(np.where(covered, self.random.uniform(0.5, 2., self.shape), np.nan))
+
+            name = "tile" + str(index)
+            frame.saveto(fs.join(rebinned_path, name + ".fits"))
+            errors.saveto(fs.join(rebinned_path, name + "_error.fits"))
+            weights.saveto(fs.join(rebinned_path, name + "_weight.fits"))
+            names.append(name)
+
+            # The weighted frames in counts/s, as they are combined
+            pixelsr = frame.pixelarea.to("sr").value
+            frame_weighted = self.create_frame(np.where(covered, frame.data * weights.data * pixelsr, 0.))
+            errors_weighted = self.create_frame(np.where(covered, errors.data / weights.data * pixelsr, 0.))
+            primary_frames.append(frame_weighted)
+            error_frames.append(errors_weighted)
+            weight_frames.append(self.create_frame(np.where(covered, weights.data, 0.)))
+
+        # Combine
+        path, error_path = galex.combine_frames_and_error_maps(names, rebinned_path, mosaic_path, header_path)
+
+        # Compare with the sums of all tiles at once
+        normalization = sum_frames(*weight_frames)
+        self.check(Frame.from_file(path), sum_frames(*primary_frames) / normalization)
+        self.check(Frame.from_file(error_path), sum_frames_quadratically(*error_frames) / normalization)
+
+        # No tiles
+        try: galex.combine_frames_and_error_maps([], rebinned_path, mosaic_path, header_path)
+        except RuntimeError: pass
+        else: raise AssertionError("Combining no tiles did not raise an error")
+
+    # -----------------------------------------------------------------
+
+    def test_sdss(self):
+
+        """
+        This function ...
+        :return:
+        """
+
+        # Inform the user
+        log.info("Testing the SDSS mosaic ...")
+
+        rebinned_path = fs.create_directory_in(self.path, "sdss_rebinned")
+        mosaics_path = fs.create_directory_in(self.path, "sdss_mosaics")
+
+        # Create the rebinned fields (in nanomaggies, NaN outside the field) with their noise maps and footprints
+        primary_frames = []
+        error_frames = []
+        footprints = []
+        for index in range(self.ntiles):
+
+            covered = self.create_coverage()
+            footprint = self.create_frame(covered.astype(float))
+            primary = self.create_frame(np.where(covered, self.random.uniform(0., 10., self.shape), np.nan))
+            noise = self.create_frame(np.where(covered, self.random.uniform(0.1, 1., self.shape), np.nan))
+
+            image = Image()
+            image.add_frame(primary, "primary")
+            image.add_frame(noise, "noise")
+            image.add_frame(footprint, "footprint")
+            image.saveto(fs.join(rebinned_path, "field" + str(index) + ".fits"))
+
+            primary_frames.append(self.create_frame(np.where(covered, primary.data, 0.)))
+            error_frames.append(self.create_frame(np.where(covered, noise.data, 0.)))
+            footprints.append(footprint)
+
+        # Create the mosaic
+        sdss.create_mosaic("r", rebinned_path, self.wcs, mosaics_path)
+
+        # Compare with the sums of all fields at once
+        mosaic = Image.from_file(fs.join(mosaics_path, "mosaic_nanomaggy.fits"))
+        n_overlapping = sum_frames(*footprints)
+        self.check(mosaic.frames["primary"], sum_frames(*primary_frames) / n_overlapping)
+        self.check(mosaic.frames["errors"], sum_frames_quadratically(*error_frames) / n_overlapping)
+
+        # No fields
+        empty_path = fs.create_directory_in(self.path, "sdss_empty")
+        try: sdss.create_mosaic("r", empty_path, self.wcs, mosaics_path)
+        except RuntimeError: pass
+        else: raise AssertionError("Creating a mosaic without fields did not raise an error")
+
+# -----------------------------------------------------------------
@@ -36,6 +36,7 @@
 # -----------------------------------------------------------------
 
 import os.path
+import collections
 import numpy as np
 import h5py
 import read_eagle       # EAGLE-specific package by must be seperately installed
@@ -56,59 +57,115 @@ from .skirtrun import SkirtRun
 # identifier of the galaxy in the public EAGLE database. The file format is as described for SKIRT SPH import.
 # In addition, the function creates a text file named "SIM_GID_info.txt", which contains relevant statistics
 # including particle numbers and various total masses. The contents is documented in the file.
+#
+# Only the particles of the galaxy's subhalo that lie within the (2*250kpc)^3 physical volume about its center of
+# potential are used. The snapshot reader returns the particles in all hash cells that overlap with this volume;
+# the particles of these cells outside of the volume are discarded.
 def extract(record):
+    extract_batch([record])
+
+# -----------------------------------------------------------------
+
+## This function extracts information relevant for SKIRT from the EAGLE output for each of the galaxies described
+# by the specified SKIRT-runs database records, exactly as the extract() function does for a single record.
+# The records are grouped per snapshot. Each snapshot is opened only once: the regions about all of its galaxies
+# are selected together, each particle dataset is read only once, and the particles are then split over the
+# galaxies on their group and subgroup numbers.
+def extract_batch(records):
+
+    # group the records per snapshot (keeping the order of the records)
+    snapshots = collections.OrderedDict()
+    for record in records:
+        snapshots.setdefault((record["eaglesim"], record["snaptag"]), []).append(record)
+
+    for (eaglesim, snaptag), snaprecords in snapshots.items():
+
+        # open snapshot and read relevant field attributes
+        sfn = snapfilename(eaglesim, snaptag)
+        snapshot = read_eagle.EagleSnapshot(sfn)
+        params = fieldAttrs(sfn, "Header")
+        params.update(fieldAttrs(sfn, "Constants"))
+        params.update(fieldAttrs(sfn, "RuntimePars"))
+        hubbleparam = params["HubbleParam"]
+        expansionfactor = params["ExpansionFactor"]
+
+        # specify (2*250kpc)^3 physical volume about each galaxy centre
+        delta = 0.25 * hubbleparam / expansionfactor
+        for record in snaprecords:
+            copx, copy, copz = centerOfPotential(record, hubbleparam)
+            snapshot.select_region(copx-delta, copx+delta, copy-delta, copy+delta, copz-delta, copz+delta)
+
+        # read star and gas particle information for all galaxies, and index the particles on their subhalo
+        stars = readParticles(snapshot, 4, starFields)
+        gas = readParticles(snapshot, 0, gasFields)
+        starindex = subhaloIndex(stars)
+        gasindex = subhaloIndex(gas)
+
+        # extract each galaxy
+        for record in snaprecords:
+            center = centerOfPotential(record, hubbleparam)
+            sdat = selectSubhalo(stars, starindex, record, center, delta, params["BoxSize"])
+            gdat = selectSubhalo(gas, gasindex, record, center, delta, params["BoxSize"])
+            exportGalaxy(record, sdat, gdat, params)
+
+# -----------------------------------------------------------------
+
+## The names of the star and gas particle fields, and of the corresponding snapshot datasets
+starFields = [ ('r', "Coordinates"), ('h', "SmoothingLength"), ('im', "InitialMass"), ('m', "Mass"),
+               ('v', "Velocity"), ('Z', "SmoothedMetallicity"), ('born', "StellarFormationTime"),
+               ('rho_born', "BirthDensity") ]
+gasFields = [ ('r', "Coordinates"), ('h', "SmoothingLength"), ('m', "Mass"), ('v', "Velocity"),
+              ('Z', "SmoothedMetallicity"), ('T', "Temperature"), ('rho', "Density"), ('sfr', "StarFormationRate") ]
+
+## This private helper function returns the center of potential of the galaxy described by the specified
+# SKIRT-runs database record, in snapshot units
+def centerOfPotential(record, hubbleparam):
+    return record["copx"] * hubbleparam, record["copy"] * hubbleparam, record["copz"] * hubbleparam
+
+## This private helper function reads the specified fields, and the group and subgroup numbers, of the particles
+# of the given type in the selected region(s) of the snapshot into a python dictionary.
+def readParticles(snapshot, parttype, fields):
+    data = { }
+    data['groupnr'] = snapshot.read_dataset(parttype, "GroupNumber")
+    data['subgroupnr'] = snapshot.read_dataset(parttype, "SubGroupNumber")
+    for key, dataset in fields:
+        data[key] = snapshot.read_dataset(parttype, dataset)
+    return data
+
+## This private helper function returns the sorted subhalo keys (combining group and subgroup number) of the
+# particles in the given dictionary, and the indices that sort the particles on these keys. The sort is stable,
+# so that the particles of a subhalo stay in the order in which they were read.
+def subhaloIndex(data):
+    keys = data['groupnr'].astype(np.int64) * 2**32 + data['subgroupnr'].astype(np.int64)
+    order = np.argsort(keys, kind="mergesort")
+    return keys[order], order
+
+## This private helper function returns a python dictionary with the data of the particles in the given dictionary
+# that belong to the subhalo of the galaxy described by the specified SKIRT-runs database record, and that lie
+# within the region with the given half size about the given center (taking the periodic boundaries into account)
+def selectSubhalo(data, index, record, center, delta, boxsize):
+    keys, order = index
+    key = int(record["groupnr"]) * 2**32 + int(record["subgroupnr"])
+    indices = order[np.searchsorted(keys, key, side="left"):np.searchsorted(keys, key, side="right")]
+    offsets = data['r'][indices] - np.array(center)
+    offsets -= boxsize * np.round(offsets / boxsize)
+    indices = indices[(np.abs(offsets) <= delta).all(axis=1)]
+    return dict((key, data[key][indices]) for key in data if key not in ('groupnr', 'subgroupnr'))
 
-    # ---- get the particle data
+# -----------------------------------------------------------------
 
-    # initialise star and gas dictionaries
-    sdat        = {}
-    gdat        = {}
+## This private helper function exports the star and gas particle data of a single galaxy, read from the snapshot
+# with the given field attributes, as described for the extract() function.
+def exportGalaxy(record, sdat, gdat, params):
+
+    # initialise young star and HII region dictionaries
     yngstars    = {}
     hiiregions  = {}
 
-    # open snapshot and read relevant field attributes
-    sfn = snapfilename(record["eaglesim"], record["snaptag"])
-    snapshot = read_eagle.EagleSnapshot(sfn)
-    params = fieldAttrs(sfn, "Header")
-    params.update(fieldAttrs(sfn, "Constants"))
-    params.update(fieldAttrs(sfn, "RuntimePars"))
     hubbleparam = params["HubbleParam"]
     expansionfactor = params["ExpansionFactor"]
     schmidtparams = schmidtParameters(params)
 
-    # convert center of potential to snapshot units
-    copx = record["copx"] * hubbleparam
-    copy = record["copy"] * hubbleparam
-    copz = record["copz"] * hubbleparam
-
-    # specify (2*250kpc)^3 physical volume about galaxy centre
-    delta = 0.25 * hubbleparam / expansionfactor
-    snapshot.select_region(copx-delta, copx+delta, copy-delta, copy+delta, copz-delta, copz+delta)
-
-    # read star particle informaton
-    insubhalo = (snapshot.read_dataset(4, "GroupNumber") == record["groupnr"]) & \
-                (snapshot.read_dataset(4, "SubGroupNumber") == record["subgroupnr"])
-    sdat['r']        = snapshot.read_dataset(4, "Coordinates") [insubhalo]
-    sdat['h']        = snapshot.read_dataset(4, "SmoothingLength") [insubhalo]
-    sdat['im']       = snapshot.read_dataset(4, "InitialMass") [insubhalo]
-    sdat['m']        = snapshot.read_dataset(4, "Mass") [insubhalo]
-    sdat['v']        = snapshot.read_dataset(4, "Velocity") [insubhalo]
-    sdat['Z']        = snapshot.read_dataset(4, "SmoothedMetallicity") [insubhalo]
-    sdat['born']     = snapshot.read_dataset(4, "StellarFormationTime") [insubhalo]
-    sdat['rho_born'] = snapshot.read_dataset(4, "BirthDensity") [insubhalo]
-
-    # read gas particle informaton
-    insubhalo = (snapshot.read_dataset(0, "GroupNumber") == record["groupnr"]) & \
-                (snapshot.read_dataset(0, "SubGroupNumber") == record["subgroupnr"])
-    gdat['r']        = snapshot.read_dataset(0, "Coordinates") [insubhalo]
-    gdat['h']        = snapshot.read_dataset(0, "SmoothingLength") [insubhalo]
-    gdat['m']        = snapshot.read_dataset(0, "Mass") [insubhalo]
-    gdat['v']        = snapshot.read_dataset(0, "Velocity") [insubhalo]
-    gdat['Z']        = snapshot.read_dataset(0, "SmoothedMetallicity") [insubhalo]
-    gdat['T']        = snapshot.read_dataset(0, "Temperature") [insubhalo]
-    gdat['rho']      = snapshot.read_dataset(0, "Density") [insubhalo]
-    gdat['sfr']      = snapshot.read_dataset(0, "StarFormationRate") [insubhalo]
-
     # convert units
     sdat['r']        = periodicCorrec(sdat['r'], params["BoxSize"])
     sdat['r']        = toparsec(sdat['r'], hubbleparam, expansionfactor)
@@ -216,8 +273,9 @@ def extract(record):
     # set the "standard" constant covering fraction (see Camps+ 2016)
     f_PDR = 0.1
 
-    # seed the random generator so that a consistent pseudo-random sequence is used for each particular galaxy
-    np.random.seed(int(record["galaxyid"]))
+    # create a random generator seeded so that a consistent pseudo-random sequence is used for each particular galaxy
+    # (independently of the other galaxies that are extracted in the same process)
+    rng = np.random.RandomState(int(record["galaxyid"]))
 
     # define HII region age constants (in years)
     young_age = 1e8     # 100 Myr  --> particles below this age are resampled
@@ -259,7 +317,7 @@ def extract(record):
         # calculate SFR at birth of young star particles in M_sun / yr
         sdat['sfr']       = getSFR(sdat['rho_born'], sdat['im'], schmidtparams)
 
-        ms, ts, idxs, mdiffs = stochResamp(sdat['sfr'], sdat['im'])
+        ms, ts, idxs, mdiffs = stochResamp(sdat['sfr'], sdat['im'], rng)
         isinfant = ts < infant_age
 
         if (~isinfant).any():
@@ -287,7 +345,7 @@ def extract(record):
             # using SKIRT's standard smoothing kernel mass/size normalization: rho = 8/pi * M/h^3;
             # and randomly shift the positions of the HII regions within a similarly enlarged range
             hiiregions['h_mapp'] = (10*ms[isinfant] / (np.pi/8 * sdat['rho_born'][idxs][isinfant] * densconv))**(1/3.)
-            stochShiftPos(hiiregions['r'], hiiregions['h'], hiiregions['h_mapp'])
+            stochShiftPos(hiiregions['r'], hiiregions['h'], hiiregions['h_mapp'], rng)
 
             # append to MAPPINGSIII array
             mapstars = np.concatenate((mapstars, np.column_stack([hiiregions['r'], hiiregions['h_mapp'], hiiregions['SFR'],
@@ -317,7 +375,7 @@ def extract(record):
         for k in gdat.keys():
             gdat[k] = gdat[k][issf].copy()
 
-        ms, ts, idxs, mdiffs = stochResamp(gdat['sfr'], gdat['m'])
+        ms, ts, idxs, mdiffs = stochResamp(gdat['sfr'], gdat['m'], rng)
         isinfant = ts < infant_age
 
         if (~isinfant).any():
@@ -345,7 +403,7 @@ def extract(record):
             # using SKIRT's standard smoothing kernel mass/size normalization: rho = 8/pi * M/h^3;
             # and randomly shift the positions of the HII regions within a similarly enlarged range
             hiiregions['h_mapp'] = (10*ms[isinfant] / (np.pi/8 * gdat['rho'][idxs][isinfant] * densconv))**(1/3.)
-            stochShiftPos(hiiregions['r'], hiiregions['h'], hiiregions['h_mapp'])
+            stochShiftPos(hiiregions['r'], hiiregions['h'], hiiregions['h_mapp'], rng)
 
             # append to MAPPINGSIII array
             mapstars = np.concatenate((mapstars, np.column_stack([hiiregions['r'], hiiregions['h_mapp'], hiiregions['SFR'],
@@ -719,6 +777,7 @@ def getPtot(rho, schmidtpars):
 # Inputs:
 #  - sfr: star formation rate in solar masses per yr
 #  - m_gas: particle mass in solar masses
+#  - rng: the random generator (the numpy.random module or a numpy.random.RandomState instance)
 #
 # Outputs:
 #  - nested arrays with a list of subparticles for each parent input particle:
@@ -728,44 +787,39 @@ def getPtot(rho, schmidtpars):
 #  - mdiffs: mass of parent particles locked up in new stars; this can be subtracted from the parent gas
 #            particles for mass conservation
 #
-def stochResamp(sfr, m_gas):
-
-    # mass resampling parameters (see Kennicutt & Evans 2012 section 2.5)
-    m_min = 700         # minimum mass of sub-particle in M_solar
-    m_max = 1e6         # maximum mass of sub-particle in M_solar
-    alpha = 1.8         # exponent of power-law mass function
-    alpha1 = 1. - alpha
+# The sub-particles are generated for all parents at once with segmented array operations (in chunks to limit the
+# memory usage) rather than in a loop over the parent particles, and are listed in the order of their parents.
+#
+def stochResamp(sfr, m_gas, rng=np.random):
 
     # age resampling parameters
     thresh_age = 1e8    # period over which to resample in yr (100 Myr)
 
-    # initialise lists for output
-    ms   = [[]]
-    ts   = [[]]
-    idxs = [[]]
-    mdiffs = []
+    # maximum number of candidate sub-particles generated in a single pass
+    maxsamples = 2**22
 
-    # for each parent particle, determine the star-forming sub-particles
-    for i in range(sfr.size):
-        sfri = sfr[i]
-        mi = m_gas[i]
+    sfr = np.asarray(sfr, dtype=float)
+    m_gas = np.asarray(m_gas, dtype=float)
 
-        # determine the maximum number of sub-particles based on the minimum sub-particle mass
-        N = int(max(1,np.ceil(mi/m_min)))
+    # initialise lists for output
+    ms   = [np.zeros(0)]
+    ts   = [np.zeros(0)]
+    idxs = [np.zeros(0, dtype=int)]
+    mdiffs = np.zeros(sfr.size)
 
-        # generate random sub-particle masses from a power-law distribution between min and max values
-        X = np.random.random(N)
-        m = (m_min**alpha1 + X*(m_max**alpha1-m_min**alpha1))**(1./alpha1)
+    # process the parent particles in consecutive chunks with a limited number of candidate sub-particles
+    Ks = stochBatchSizes(m_gas)
+    chunkids = (np.cumsum(Ks) - Ks) // maxsamples
+    for chunkid in np.unique(chunkids):
+        parents = np.where(chunkids == chunkid)[0]
+        mi = m_gas[parents]
 
-        # limit and normalize the list of sub-particles to the total mass of the parent
-        mlim = m[np.cumsum(m)<=mi]
-        if len(mlim)<1: mlim = m[:1]
-        m = mi/mlim.sum() * mlim
-        N = len(m)
+        # generate the sub-particle masses and the index (within the chunk) of their parent
+        m, parent = stochMasses(mi, rng)
 
         # generate random decay lookback time for each sub-particle
-        X = np.random.random(N)               # X in range (0,1]
-        t = thresh_age + mi/sfri * np.log(1-X)
+        X = rng.random_sample(m.size)           # X in range (0,1]
+        t = thresh_age + (mi/sfr[parents])[parent] * np.log(1-X)
 
         # determine mask for sub-particles that form stars by present day
         issf = t > 0.
@@ -773,19 +827,85 @@ def stochResamp(sfr, m_gas):
         # add star-forming sub-particles to the output lists
         ms.append(m[issf])
         ts.append(t[issf])
-        idxs.append([i]*np.count_nonzero(issf))
-        mdiffs.append(m[issf].sum())
+        idxs.append(parents[parent[issf]])
+        mdiffs[parents] = np.bincount(parent[issf], weights=m[issf], minlength=parents.size)
 
-    # convert sub-particle lists into numpy arrays
+    # concatenate the sub-particles of all chunks
     ms     = np.hstack(ms)
     ts     = np.hstack(ts)
     idxs   = np.hstack(idxs).astype(int)
-    mdiffs = np.array(mdiffs)
 
     return ms, ts, idxs, mdiffs
 
 # -----------------------------------------------------------------
 
+# mass resampling parameters (see Kennicutt & Evans 2012 section 2.5)
+stochMinMass = 700      # minimum mass of sub-particle in M_solar
+stochMaxMass = 1e6      # maximum mass of sub-particle in M_solar
+stochAlpha = 1.8        # exponent of power-law mass function
+
+## This private helper function returns, for each of the given parent masses, the number of candidate sub-particles
+# generated at once: about twice the expected number of sub-particles needed to reach the parent mass, limited
+# to the maximum number of sub-particles based on the minimum sub-particle mass.
+def stochBatchSizes(m_gas):
+    alpha1 = 1. - stochAlpha
+    alpha2 = 2. - stochAlpha
+    meanmass = alpha1/alpha2 * (stochMaxMass**alpha2 - stochMinMass**alpha2) / (stochMaxMass**alpha1 - stochMinMass**alpha1)
+    N = np.maximum(1, np.ceil(m_gas/stochMinMass)).astype(int)
+    return np.minimum(N, np.ceil(2.*m_gas/meanmass).astype(int) + 4)
+
+## This private helper function draws the sub-particle masses for the parent particles with the given masses,
+# from a power-law distribution between the minimum and maximum sub-particle mass. For each parent, the masses
+# are drawn until their cumulative sum exceeds the parent mass (or until the maximum number of sub-particles
+# based on the minimum sub-particle mass has been drawn). The sub-particles that fit within the parent mass
+# (and at least the first one) are kept and normalized to the parent mass. Rather than looping over the parents,
+# the masses are drawn in a few rounds of segmented array operations; each round draws more candidates for the
+# parents that have not yet reached their mass. The function returns the sub-particle masses and the indices of
+# their parents, ordered on parent.
+def stochMasses(m_gas, rng):
+    alpha1 = 1. - stochAlpha
+    Nmax = np.maximum(1, np.ceil(m_gas/stochMinMass)).astype(int)
+    Ks = stochBatchSizes(m_gas)
+
+    ms = []
+    parents = []
+    drawn = np.zeros(m_gas.size, dtype=int)     # number of candidates drawn for each parent
+    total = np.zeros(m_gas.size)                # cumulative mass of the candidates drawn for each parent
+    active = np.arange(m_gas.size)              # the parents that have not yet reached their mass
+    while active.size > 0:
+        N = np.minimum(Ks[active], Nmax[active] - drawn[active])
+
+        # determine the parent and the rank within the parent of each candidate
+        parent = np.repeat(active, N)
+        starts = np.cumsum(N) - N
+        rank = drawn[parent] + np.arange(N.sum()) - np.repeat(starts, N)
+
+        # generate random sub-particle masses from a power-law distribution between min and max values
+        X = rng.random_sample(parent.size)
+        m = (stochMinMass**alpha1 + X*(stochMaxMass**alpha1-stochMinMass**alpha1))**(1./alpha1)
+
+        # determine the cumulative mass of each candidate within its parent, and keep the candidates within the parent mass
+        cumm = np.cumsum(m)
+        cumm += np.repeat(total[active] - (cumm[starts] - m[starts]), N)
+        keep = (cumm <= m_gas[parent]) | (rank == 0)
+        ms.append(m[keep])
+        parents.append(parent[keep])
+
+        # the parents that have not reached their mass nor their maximum number of candidates need another round
+        drawn[active] += N
+        total[active] = cumm[starts + N - 1]
+        active = active[(total[active] <= m_gas[active]) & (drawn[active] < Nmax[active])]
+
+    # order the sub-particles on parent (the rounds keep the order within each parent) and normalize the masses
+    parents = np.hstack(parents)
+    order = np.argsort(parents, kind="mergesort")
+    m = np.hstack(ms)[order]
+    parents = parents[order]
+    m *= (m_gas / np.bincount(parents, weights=m, minlength=m_gas.size))[parents]
+    return m, parents
+
+# -----------------------------------------------------------------
+
 ## This private helper function randomly shifts the positions of HII region sub-particles
 # within the smoothing sphere of their parent.
 #
@@ -793,8 +913,9 @@ def stochResamp(sfr, m_gas):
 #  - r: parent positions; updated by this function to the shifted positions
 #  - h: the smoothing lengths of the parents
 #  - h_mapp: the smoothing lengths of the sub-particles
+#  - rng: the random generator (the numpy.random module or a numpy.random.RandomState instance)
 #
-def stochShiftPos(r, h, h_mapp):
+def stochShiftPos(r, h, h_mapp, rng=np.random):
     # the offset sampling smoothing length is determined so that in the limit of infinite particles,
     # the light distribution is the same as the parent particle kernel;
     # assuming Gaussian kernels this means h_sampling**2 + h_mapp**2 = h**2.
@@ -802,8 +923,8 @@ def stochShiftPos(r, h, h_mapp):
 
     # sample the offset from a scaled gaussian that resembles a cubic spline kernel
     # (see the documentation of the SPHDustDistribution class in SKIRT)
-    r[:,0] += h_sampling * np.random.normal(scale=0.29, size=h_sampling.shape)
-    r[:,1] += h_sampling * np.random.normal(scale=0.29, size=h_sampling.shape)
-    r[:,2] += h_sampling * np.random.normal(scale=0.29, size=h_sampling.shape)
+    r[:,0] += h_sampling * rng.normal(scale=0.29, size=h_sampling.shape)
+    r[:,1] += h_sampling * rng.normal(scale=0.29, size=h_sampling.shape)
+    r[:,2] += h_sampling * rng.normal(scale=0.29, size=h_sampling.shape)
 
 # -----------------------------------------------------------------
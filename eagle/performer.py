@@ -38,7 +38,11 @@ from .skirtrun import runids_in_range
 # The callback function is passed a single argument containing the SKIRT-run database record
 # to be handled. This record offers dictionary-style access to the database fields.
 #
-def loop(callback, stage, runtime, chunksize=1):
+# If a batch callback function is provided, it is invoked instead of the callback function, once for each
+# chunk of records, and it is passed the list of records in the chunk. This allows work that is shared
+# between records (such as reading a snapshot) to be performed only once per chunk.
+#
+def loop(callback, stage, runtime, chunksize=1, batchcallback=None):
     # loop until runtime has been surpassed
     starttime = time.time()
     while (time.time()-starttime)<runtime:
@@ -54,9 +58,13 @@ def loop(callback, stage, runtime, chunksize=1):
 
         try:
             # invoke the callback function
-            for record in chunkrecords:
-                log.info("Processing {} for SKIRT-run {}...".format(stage, record['runid']))
-                callback(record)
+            if batchcallback is not None:
+                log.info("Processing {} for SKIRT-runs {}...".format(stage, ",".join(str(record['runid']) for record in chunkrecords)))
+                batchcallback(chunkrecords)
+            else:
+                for record in chunkrecords:
+                    log.info("Processing {} for SKIRT-run {}...".format(stage, record['runid']))
+                    callback(record)
 
             # set the runstatus of the database records to 'succeeded'
             db = Database()
@@ -0,0 +1,454 @@
+#!/usr/bin/env python
+# -*- coding: utf8 -*-
+# *****************************************************************
+# **       PTS -- Python Toolkit for working with SKIRT          **
+# **       © Astronomical Observatory, Ghent University          **
+# *****************************************************************
+
+# Ensure Python 3 compatibility
+from __future__ import absolute_import, division, print_function
+
+# Import standard modules
+import sys
+import types
+import numpy as np
+import h5py
+
+# Import the relevant PTS classes and modules
+from pts.core.test.implementation import TestImplementation
+from pts.core.basics.log import log
+from pts.core.tools import filesystem as fs
+
+# The EAGLE-specific package that reads the snapshots is replaced by a stand-in for the synthetic snapshot of this
+# test, so that the extractor can also be imported where the package is not installed
+try: import read_eagle
+except ImportError: sys.modules["read_eagle"] = types.ModuleType("read_eagle")
+from pts.eagle import extractor
+
+# -----------------------------------------------------------------
+
+description = "testing the extraction of a batch of EAGLE galaxies from a synthetic snapshot against separate extractions"
+
+# -----------------------------------------------------------------
+
+class ExtractionTest(TestImplementation):
+
+    """
+    This class ...
+    """
+
+    # The number of cells of the hash grid along each axis of the box
+    ncells = 4
+
+    class Snapshot(object):
+
+        """
+        This class is a stand-in for the EagleSnapshot class of the read_eagle package: it selects the particles in the
+        cells of a hash grid that overlap with the selected regions, so that particles outside the regions are read too
+        """
+
+        def __init__(self, filename):
+            self.filename = filename
+            with h5py.File(filename, "r") as snapshot: self.boxsize = snapshot["Header"].attrs["BoxSize"]
+            self.selected = np.zeros((ExtractionTest.ncells,) * 3, dtype=bool)
+
+        def select_region(self, xmin, xmax, ymin, ymax, zmin, zmax):
+            cellsize = self.boxsize / ExtractionTest.ncells
+            ranges = [np.arange(int(np.floor(low / cellsize)), int(np.floor(high / cellsize)) + 1) % ExtractionTest.ncells
+                      for low, high in [(xmin, xmax), (ymin, ymax), (zmin, zmax)]]
+            self.selected[np.ix_(*ranges)] = True
+
+        def read_dataset(self, parttype, name):
+            with h5py.File(self.filename, "r") as snapshot:
+                group = snapshot["PartType" + str(parttype)]
+                cells = (group["Coordinates"][:] // (self.boxsize / ExtractionTest.ncells)).astype(int) % ExtractionTest.ncells
+                return group[name][:][self.selected[cells[:, 0], cells[:, 1], cells[:, 2]]]
+
+    # -----------------------------------------------------------------
+
+    def __init__(self, *args, **kwargs):
+
+        """
+        This function ...
+        :param kwargs:
+        """
+
+        # Call the constructor of the base class
+        super(ExtractionTest, self).__init__(*args, **kwargs)
+
+        # The box size, Hubble parameter and half size of the extracted regions, in snapshot units
+        self.boxsize = 10.
+        self.hubbleparam = 0.7
+        self.delta = 0.25 * self.hubbleparam
+
+        # The galaxy records
+        self.records = None
+
+        # The number of star and gas particles of each galaxy within its region
+        self.nstars = dict()
+        self.ngas = dict()
+
+        # The particles passed to the export, for each galaxy and each extraction
+        self.exported = dict()
+
+        # The original snapshot reader, configuration and export function
+        self.original = None
+
+    # -----------------------------------------------------------------
+
+    def run(self, **kwargs):
+
+        """
+        This function ...
+        :param kwargs:
+        :return:
+        """
+
+        # 1. Call the setup function
+        self.setup(**kwargs)
+
+        try:
+
+            # 2. Create the snapshot
+            self.create_snapshot()
+
+            # 3. Extract the galaxies separately and as a batch
+            self.extract()
+
+            # 4. Test the selected particles
+            self.test_particles()
+
+            # 5. Test the exported files
+            self.test_files()
+
+            # 6. Test the selection of the particles of a single galaxy
+            self.test_single()
+
+            # 7. Test the selection of the particles of a subhalo
+            self.test_selection()
+
+        # Restore the snapshot reader, configuration and export function
+        finally: self.restore()
+
+    # -----------------------------------------------------------------
+
+    def setup(self, **kwargs):
+
+        """
+        This function ...
+        :param kwargs:
+        :return:
+        """
+
+        # Call the setup function of the base class
+        super(ExtractionTest, self).setup(**kwargs)
+
+        # Remember the snapshot reader, configuration and export function
+        self.original = (getattr(extractor.read_eagle, "EagleSnapshot", None), extractor.config.eagledata_path,
+                         extractor.config.results_path, extractor.exportGalaxy)
+
+        # Use the stand-in snapshot reader and the test directory
+        extractor.read_eagle.EagleSnapshot = self.Snapshot
+        extractor.config.eagledata_path = {"Synthetic": self.path}
+
+        # Record the particles that are passed to the export
+        def export_galaxy(record, sdat, gdat, params):
+            self.exported[(record["galaxyid"], extractor.config.results_path)] = (dict((key, sdat[key].copy()) for key in sdat),
+                                                                                 dict((key, gdat[key].copy()) for key in gdat))
+            self.original[3](record, sdat, gdat, params)
+
+        extractor.exportGalaxy = export_galaxy
+
+        # The first galaxy lies against the periodic boundary of the box, the second in the middle of the box
+        self.records = [self.create_record(1, 1, 0, (0.02, 4.5, 4.5)), self.create_record(2, 2, 0, (6.5, 6.5, 6.5))]
+
+    # -----------------------------------------------------------------
+
+    def restore(self):
+
+        """
+        This function ...
+        :return:
+        """
+
+        if self.original is None: return
+        if self.original[0] is None: del extractor.read_eagle.EagleSnapshot
+        else: extractor.read_eagle.EagleSnapshot = self.original[0]
+        extractor.config.eagledata_path, extractor.config.results_path, extractor.exportGalaxy = self.original[1:]
+
+    # -----------------------------------------------------------------
+
+    def create_record(self, galaxyid, groupnr, subgroupnr, center):
+
+        """
+        This function creates a SKIRT-runs database record for the galaxy with the given center (in snapshot units)
+        :param galaxyid:
+        :param groupnr:
+        :param subgroupnr:
+        :param center:
+        :return:
+        """
+
+        return {"runid": galaxyid, "eaglesim": "Synthetic", "snaptag": 28, "galaxyid": galaxyid, "groupnr": groupnr,
+                "subgroupnr": subgroupnr, "copx": center[0] / self.hubbleparam, "copy": center[1] / self.hubbleparam,
+                "copz": center[2] / self.hubbleparam}
+
+    # -----------------------------------------------------------------
+
+    def create_particles(self, random, stars):
+
+        """
+        This function creates the star or gas particles of the galaxies, particles of another subhalo in the same
+        group, and particles of the galaxies outside of their regions, both in the same cells of the hash grid as the
+        regions and in the cells selected for the other galaxy
+        :param random:
+        :param stars:
+        :return:
+        """
+
+        positions = []
+        groupnrs = []
+        subgroupnrs = []
+        counts = self.nstars if stars else self.ngas
+
+        for index, record in enumerate(self.records):
+
+            center = np.array([record["copx"], record["copy"], record["copz"]]) * self.hubbleparam
+            other = self.records[1 - index]
+            other_center = np.array([other["copx"], other["copy"], other["copz"]]) * self.hubbleparam
+
+            # Within the region
+            count = 80 if stars else 60
+            positions.append(center + random.normal(scale=0.01, size=(count, 3)))
+            groupnrs.append(np.full(count, record["groupnr"]))
+            subgroupnrs.append(np.full(count, record["subgroupnr"]))
+            counts[record["galaxyid"]] = count
+
+            # Another subhalo of the same group
+            positions.append(center + random.normal(scale=0.01, size=(10, 3)))
+            groupnrs.append(np.full(10, record["groupnr"]))
+            subgroupnrs.append(np.full(10, record["subgroupnr"] + 1))
+
+            # Outside of the region, in the cells of its own region and in the cells of the region of the other galaxy
+            positions.append(center + np.array([0., 1.1 * self.delta, 0.]) + random.uniform(0., 0.01, size=(5, 3)))
+            positions.append(other_center + random.normal(scale=0.01, size=(5, 3)))
+            groupnrs.append(np.full(10, record["groupnr"]))
+            subgroupnrs.append(np.full(10, record["subgroupnr"]))
+
+        # Shuffle the particles
+        positions = np.concatenate(positions) % self.boxsize
+        order = random.permutation(len(positions))
+        return positions[order], np.concatenate(groupnrs)[order], np.concatenate(subgroupnrs)[order]
+
+    # -----------------------------------------------------------------
+
+    def create_snapshot(self):
+
+        """
+        This function ...
+        :return:
+        """
+
+        # Inform the user
+        log.info("Creating the synthetic snapshot ...")
+
+        random = np.random.RandomState(43)
+
+        # Create the directory and the file
+        path = fs.join(self.path, "particledata_028_z000p000")
+        fs.create_directory(path)
+        snapshot = h5py.File(fs.join(path, "eagle_subfind_particles_028_z000p000.0.hdf5"), "w")
+
+        # The attributes
+        attributes = {
+            "Header": {"HubbleParam": self.hubbleparam, "ExpansionFactor": 1., "BoxSize": self.boxsize},
+            "Constants": {"CM_PER_MPC": 3.085678e24, "GAMMA": 5. / 3., "GRAVITY": 6.672e-8, "BOLTZMANN": 1.3806e-16,
+                          "PROTONMASS": 1.6726e-24, "SOLAR_MASS": 1.989e33, "SEC_PER_YEAR": 3.155e7},
+            "RuntimePars": {"EOS_Jeans_GammaEffective": 4. / 3., "InitAbundance_Hydrogen": 0.752,
+                            "SF_SchmidtLawHighDensThresh_HpCM3": 1e3, "EOS_NormPhysDens_HpCM3": 0.1,
+                            "SF_SchmidtLawCoeff_MSUNpYRpKPC2": 1.515e-4, "SF_SchmidtLawExponent": 1.4,
+                            "SF_SchmidtLawHighDensExponent": 2., "EOS_Jeans_TempNorm_K": 8000.}}
+        for name in attributes:
+            group = snapshot.create_group(name)
+            for key in attributes[name]: group.attrs[key] = attributes[name][key]
+
+        # The old star particles
+        positions, groupnrs, subgroupnrs = self.create_particles(random, stars=True)
+        nparticles = len(positions)
+        group = snapshot.create_group("PartType4")
+        group["Coordinates"] = positions
+        group["GroupNumber"] = groupnrs
+        group["SubGroupNumber"] = subgroupnrs
+        group["SmoothingLength"] = random.uniform(0.001, 0.002, nparticles)
+        group["InitialMass"] = random.uniform(1e-5, 2e-5, nparticles)
+        group["Mass"] = group["InitialMass"][:] * 0.8
+        group["Velocity"] = random.normal(scale=100., size=(nparticles, 3))
+        group["SmoothedMetallicity"] = random.uniform(0.01, 0.03, nparticles)
+        group["StellarFormationTime"] = random.uniform(0.2, 0.8, nparticles)
+        group["BirthDensity"] = random.uniform(1e6, 1e8, nparticles)
+
+        # The gas particles, partly star forming
+        positions, groupnrs, subgroupnrs = self.create_particles(random, stars=False)
+        nparticles = len(positions)
+        group = snapshot.create_group("PartType0")
+        group["Coordinates"] = positions
+        group["GroupNumber"] = groupnrs
+        group["SubGroupNumber"] = subgroupnrs
+        group["SmoothingLength"] = random.uniform(0.001, 0.002, nparticles)
+        group["Mass"] = random.uniform(1e-5, 1e-4, nparticles)
+        group["Velocity"] = random.normal(scale=100., size=(nparticles, 3))
+        group["SmoothedMetallicity"] = random.uniform(0.01, 0.03, nparticles)
+        group["Temperature"] = random.uniform(1e3, 1e5, nparticles)
+        group["Density"] = random.uniform(1e6, 1e8, nparticles)
+        group["StarFormationRate"] = np.where(random.uniform(size=nparticles) < 0.3, random.uniform(1e-3, 1e-2, nparticles), 0.)
+
+        snapshot.close()
+
+    # -----------------------------------------------------------------
+
+    def extract(self):
+
+        """
+        This function ...
+        :return:
+        """
+
+        # Inform the user
+        log.info("Extracting the galaxies separately and as a batch ...")
+
+        # Separately
+        extractor.config.results_path = fs.join(self.path, "separate")
+        for record in self.records: extractor.extract(record)
+
+        # As a batch
+        extractor.config.results_path = fs.join(self.path, "batch")
+        extractor.extract_batch(self.records)
+
+    # -----------------------------------------------------------------
+
+    def test_particles(self):
+
+        """
+        This function ...
+        :return:
+        """
+
+        # Inform the user
+        log.info("Testing the selected particles ...")
+
+        for record in self.records:
+
+            center = np.array([record["copx"], record["copy"], record["copz"]]) * self.hubbleparam
+            separate = self.exported[(record["galaxyid"], fs.join(self.path, "separate"))]
+            batch = self.exported[(record["galaxyid"], fs.join(self.path, "batch"))]
+
+            for sdat, gdat in [separate, batch]:
+
+                # Only the particles of the subhalo within the region about the center
+                assert len(sdat["m"]) == self.nstars[record["galaxyid"]]
+                assert len(gdat["m"]) == self.ngas[record["galaxyid"]]
+                for data in [sdat, gdat]:
+                    offsets = data["r"] - center
+                    offsets -= self.boxsize * np.round(offsets / self.boxsize)
+                    assert (np.abs(offsets) <= self.delta).all()
+
+            # The same particles, in the same order
+            for separate_data, batch_data in zip(separate, batch):
+                assert sorted(separate_data.keys()) == sorted(batch_data.keys())
+                for key in separate_data: assert np.array_equal(separate_data[key], batch_data[key]), key
+
+    # -----------------------------------------------------------------
+
+    def test_files(self):
+
+        """
+        This function ...
+        :return:
+        """
+
+        # Inform the user
+        log.info("Testing the exported files ...")
+
+        for record in self.records:
+            for suffix in ["info.txt", "stars.dat", "gas.dat", "hii.dat"]:
+
+                filename = "Synthetic_" + str(record["galaxyid"]) + "_" + suffix
+                paths = [fs.join(extractor.SkirtRun(record["runid"], alternate_results_path=fs.join(self.path, kind)).inpath(), filename)
+                         for kind in ["separate", "batch"]]
+                with open(paths[0]) as separate, open(paths[1]) as batch: assert separate.read() == batch.read(), filename
+
+            # Particles were exported
+            assert len(np.loadtxt(paths[0], ndmin=2)) > 0
+
+    # -----------------------------------------------------------------
+
+    def test_single(self):
+
+        """
+        This function ...
+        :return:
+        """
+
+        # Inform the user
+        log.info("Testing the selection of the particles of a single galaxy ...")
+
+        snapshot = h5py.File(fs.join(self.path, "particledata_028_z000p000", "eagle_subfind_particles_028_z000p000.0.hdf5"), "r")
+
+        for record in self.records:
+
+            center = np.array([record["copx"], record["copy"], record["copz"]]) * self.hubbleparam
+            separate = self.exported[(record["galaxyid"], fs.join(self.path, "separate"))]
+
+            for parttype, data in [(4, separate[0]), (0, separate[1])]:
+
+                # Select all particles of the subhalo within the region from the snapshot (in the order of the file)
+                group = snapshot["PartType" + str(parttype)]
+                positions = group["Coordinates"][:]
+                offsets = positions - center
+                offsets -= self.boxsize * np.round(offsets / self.boxsize)
+                selected = (group["GroupNumber"][:] == record["groupnr"]) & (group["SubGroupNumber"][:] == record["subgroupnr"]) & (np.abs(offsets) <= self.delta).all(axis=1)
+
+                # Exactly these particles, in the same order
+                assert np.array_equal(data["r"], positions[selected])
+                assert np.array_equal(data["h"], group["SmoothingLength"][:][selected])
+
+        snapshot.close()
+
+    # -----------------------------------------------------------------
+
+    def test_selection(self):
+
+        """
+        This function ...
+        :return:
+        """
+
+        # Inform the user
+        log.info("Testing the selection of the particles of a subhalo ...")
+
+        # Particles of the subhalo: within the region, on its border, across the periodic boundary and outside; and
+        # particles of another subhalo of the same group and of another group
+        positions = np.array([[0.125, 5., 5.], [0.375, 5., 5.], [9.9375, 5., 5.], [9.8125, 5., 5.], [0.125, 5.5, 5.],
+                              [0.125, 5., 4.875], [0.125, 5., 5.], [0.125, 5., 5.]])
+        groupnrs = np.array([3, 3, 3, 3, 3, 3, 3, 4])
+        subgroupnrs = np.array([1, 1, 1, 1, 1, 1, 2, 1])
+        data = {"r": positions, "m": np.arange(8.), "groupnr": groupnrs, "subgroupnr": subgroupnrs}
+
+        # Select
+        record = {"groupnr": 3, "subgroupnr": 1}
+        selected = extractor.selectSubhalo(data, extractor.subhaloIndex(data), record, (0.125, 5., 5.), 0.25, 10.)
+
+        # The particles within the region (including its border and across the boundary), in their original order
+        assert sorted(selected.keys()) == ["m", "r"]
+        assert np.array_equal(selected["m"], [0., 1., 2., 5.])
+        assert np.array_equal(selected["r"], positions[[0, 1, 2, 5]])
+
+        # No particles of the subhalo within the region
+        selected = extractor.selectSubhalo(data, extractor.subhaloIndex(data), record, (5., 5., 5.), 0.25, 10.)
+        assert len(selected["m"]) == 0 and selected["r"].shape == (0, 3)
+
+        # A subhalo without particles
+        selected = extractor.selectSubhalo(data, extractor.subhaloIndex(data), {"groupnr": 5, "subgroupnr": 0}, (0.125, 5., 5.), 0.25, 10.)
+        assert len(selected["m"]) == 0
+
+# -----------------------------------------------------------------
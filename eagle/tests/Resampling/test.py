@@ -0,0 +1,264 @@
+#!/usr/bin/env python
+# -*- coding: utf8 -*-
+# *****************************************************************
+# **       PTS -- Python Toolkit for working with SKIRT          **
+# **       © Astronomical Observatory, Ghent University          **
+# *****************************************************************
+
+# Ensure Python 3 compatibility
+from __future__ import absolute_import, division, print_function
+
+# Import standard modules
+import sys
+import types
+import numpy as np
+
+# Import the relevant PTS classes and modules
+from pts.core.test.implementation import TestImplementation
+from pts.core.basics.log import log
+
+# The EAGLE-specific package that reads the snapshots is not used by this test, so that the extractor can also be
+# imported where the package is not installed
+try: import read_eagle
+except ImportError: sys.modules["read_eagle"] = types.ModuleType("read_eagle")
+from pts.eagle import extractor
+
+# -----------------------------------------------------------------
+
+description = "testing the vectorized stochastic resampling of star-forming particles against the per-particle resampling"
+
+# -----------------------------------------------------------------
+
+class ResamplingTest(TestImplementation):
+
+    """
+    This class ...
+    """
+
+    def __init__(self, *args, **kwargs):
+
+        """
+        This function ...
+        :param kwargs:
+        """
+
+        # Call the constructor of the base class
+        super(ResamplingTest, self).__init__(*args, **kwargs)
+
+        # The masses (in solar masses) and star formation rates (in solar masses per year) of the parent particles
+        self.masses = None
+        self.sfrs = None
+
+    # -----------------------------------------------------------------
+
+    def run(self, **kwargs):
+
+        """
+        This function ...
+        :param kwargs:
+        :return:
+        """
+
+        # 1. Call the setup function
+        self.setup(**kwargs)
+
+        # 2. Test the sub-particle masses
+        self.test_masses()
+
+        # 3. Test the resampling
+        self.test_resampling()
+
+        # 4. Test the distributions against the per-particle resampling
+        self.test_distributions()
+
+    # -----------------------------------------------------------------
+
+    def setup(self, **kwargs):
+
+        """
+        This function ...
+        :param kwargs:
+        :return:
+        """
+
+        # Call the setup function of the base class
+        super(ResamplingTest, self).setup(**kwargs)
+
+        rng = np.random.RandomState(44)
+
+        # Parents below the minimum sub-particle mass, of a few sub-particles and of the typical EAGLE gas mass
+        self.masses = np.hstack([rng.uniform(100., 700., 200), rng.uniform(700., 2e4, 500), rng.uniform(1e6, 2e6, 1000), [1e7, 5e7]])
+        self.sfrs = self.masses / rng.uniform(2e7, 5e8, self.masses.size)
+
+    # -----------------------------------------------------------------
+
+    def resample(self, sfr, m_gas, rng):
+
+        """
+        This function resamples the parent particles one by one, as stochResamp did before it was vectorized
+        :param sfr:
+        :param m_gas:
+        :param rng:
+        :return:
+        """
+
+        alpha1 = 1. - extractor.stochAlpha
+        thresh_age = 1e8
+
+        ms = [[]]
+        ts = [[]]
+        idxs = [[]]
+        mdiffs = []
+        nsubparticles = []
+
+        for i in range(sfr.size):
+            sfri = sfr[i]
+            mi = m_gas[i]
+
+            N = int(max(1, np.ceil(mi / extractor.stochMinMass)))
+
+            X = rng.random_sample(N)
+            m = (extractor.stochMinMass**alpha1 + X * (extractor.stochMaxMass**alpha1 - extractor.stochMinMass**alpha1))**(1. / alpha1)
+
+            mlim = m[np.cumsum(m) <= mi]
+            if len(mlim) < 1: mlim = m[:1]
+            m = mi / mlim.sum() * mlim
+            N = len(m)
+            nsubparticles.append(N)
+
+            X = rng.random_sample(N)
+            t = thresh_age + mi / sfri * np.log(1 - X)
+
+            issf = t > 0.
+            ms.append(m[issf])
+            ts.append(t[issf])
+            idxs.append([i] * np.count_nonzero(issf))
+            mdiffs.append(m[issf].sum())
+
+        return np.hstack(ms), np.hstack(ts), np.hstack(idxs).astype(int), np.array(mdiffs), np.array(nsubparticles)
+
+    # -----------------------------------------------------------------
+
+    def test_masses(self):
+
+        """
+        This function ...
+        :return:
+        """
+
+        # Inform the user
+        log.info("Testing the sub-particle masses ...")
+
+        m, parents = extractor.stochMasses(self.masses, np.random.RandomState(1))
+
+        # The sub-particles are ordered on parent, and each parent has at least one
+        assert np.all(np.diff(parents) >= 0)
+        counts = np.bincount(parents, minlength=self.masses.size)
+        assert np.all(counts >= 1)
+
+        # The mass of each parent is conserved
+        assert np.allclose(np.bincount(parents, weights=m, minlength=self.masses.size), self.masses, rtol=1e-12, atol=0.)
+
+        # Parents below the minimum sub-particle mass have one sub-particle, the other parents have at most the maximum
+        # number of sub-particles
+        assert np.all(counts[self.masses <= extractor.stochMinMass] == 1)
+        assert np.all(counts <= np.maximum(1, np.ceil(self.masses / extractor.stochMinMass)))
+
+        # The sub-particle masses are only scaled up to the parent mass (except for a single sub-particle heavier than
+        # its parent), so they are at least the minimum mass
+        single = (counts == 1)[parents]
+        assert np.all(m[~single] >= extractor.stochMinMass * (1. - 1e-12))
+
+        # The same random sequence gives the same sub-particles
+        m_again, parents_again = extractor.stochMasses(self.masses, np.random.RandomState(1))
+        assert np.array_equal(m, m_again) and np.array_equal(parents, parents_again)
+
+    # -----------------------------------------------------------------
+
+    def test_resampling(self):
+
+        """
+        This function ...
+        :return:
+        """
+
+        # Inform the user
+        log.info("Testing the resampling ...")
+
+        ms, ts, idxs, mdiffs = extractor.stochResamp(self.sfrs, self.masses, np.random.RandomState(2))
+
+        # The sub-particles are star-forming, ordered on parent, and younger than the resampling period
+        assert ms.size == ts.size == idxs.size
+        assert np.all(np.diff(idxs) >= 0)
+        assert np.all(ts > 0.) and np.all(ts <= 1e8)
+
+        # The mass locked up in new stars is the mass of the star-forming sub-particles, and at most the parent mass
+        assert mdiffs.size == self.masses.size
+        assert np.allclose(mdiffs, np.bincount(idxs, weights=ms, minlength=self.masses.size), rtol=1e-12, atol=0.)
+        assert np.all(mdiffs <= self.masses * (1. + 1e-12))
+
+        # The same random sequence gives the same sub-particles
+        again = extractor.stochResamp(self.sfrs, self.masses, np.random.RandomState(2))
+        for values, values_again in zip((ms, ts, idxs, mdiffs), again): assert np.array_equal(values, values_again)
+
+        # No parents
+        ms, ts, idxs, mdiffs = extractor.stochResamp(np.zeros(0), np.zeros(0), np.random.RandomState(2))
+        assert ms.size == ts.size == idxs.size == mdiffs.size == 0
+
+    # -----------------------------------------------------------------
+
+    def test_distributions(self):
+
+        """
+        This function ...
+        :return:
+        """
+
+        # Inform the user
+        log.info("Testing the distributions against the per-particle resampling ...")
+
+        # Resample each parent many times
+        nrepeats = 20
+        sfrs = np.tile(self.sfrs, nrepeats)
+        masses = np.tile(self.masses, nrepeats)
+
+        ms, ts, idxs, mdiffs = extractor.stochResamp(sfrs, masses, np.random.RandomState(3))
+        m, parents = extractor.stochMasses(masses, np.random.RandomState(4))
+        counts = np.bincount(parents, minlength=masses.size)
+        ms_before, ts_before, idxs_before, mdiffs_before, counts_before = self.resample(sfrs, masses, np.random.RandomState(5))
+
+        # The number of sub-particles per parent
+        for selection in (masses <= 2e4, masses >= 1e6):
+            assert abs(np.mean(counts[selection]) / np.mean(counts_before[selection]) - 1.) < 0.02
+            assert abs(np.std(counts[selection]) / np.std(counts_before[selection]) - 1.) < 0.1
+
+        # The sub-particle masses, ages and the mass locked up in new stars
+        assert self.same_distribution(ms, ms_before)
+        assert self.same_distribution(ts, ts_before)
+        assert self.same_distribution(mdiffs / masses, mdiffs_before / masses)
+        assert abs(ms.size / ms_before.size - 1.) < 0.02
+
+        # The distributions of the sub-particles of the typical EAGLE gas particles
+        typical = (masses >= 1e6)
+        assert self.same_distribution(ms[typical[idxs]], ms_before[typical[idxs_before]])
+        assert self.same_distribution(mdiffs[typical] / masses[typical], mdiffs_before[typical] / masses[typical])
+
+    # -----------------------------------------------------------------
+
+    def same_distribution(self, values, other):
+
+        """
+        This function checks whether two samples have the same distribution with the two-sample Kolmogorov-Smirnov
+        test (at a significance level of 0.1%)
+        :param values:
+        :param other:
+        :return:
+        """
+
+        values = np.sort(values)
+        other = np.sort(other)
+        points = np.hstack([values, other])
+        statistic = np.max(np.abs(np.searchsorted(values, points, side="right") / values.size - np.searchsorted(other, points, side="right") / other.size))
+        return statistic < 1.95 * np.sqrt((values.size + other.size) / (values.size * other.size))
+
+# -----------------------------------------------------------------
@@ -17,6 +17,8 @@ import math
 import numpy as np
 from scipy import ndimage
 import copy
+import warnings
+import multiprocessing
 
 # Import astronomical modules
 from astropy.convolution import Gaussian2DKernel
@@ -36,6 +38,7 @@ from ...core.basics.log import log
 from ..region import tools as regions
 from ..basics.coordinate import PixelCoordinate
 from ..basics.stretch import PixelStretch
+from ...core.tools.parallelization import ParallelTarget
 
 # -----------------------------------------------------------------
 
@@ -400,6 +403,121 @@ def find_source(frame, ellipse, config, track_record=None, special=False):
 
 # -----------------------------------------------------------------
 
+# The maximum number of positions that are screened together in one vectorized pass
+max_nscreened_per_pass = 4096
+
+# -----------------------------------------------------------------
+
+def screen_positions(data, x_centers, y_centers, radius, factor, sigma_level=None, center_radius=None, nprocesses=1):
+
+    """
+    This function checks, for many positions at once, whether a source can be detected there. The box around each
+    position (the detection cutout) should not be zero or NaN everywhere, and if a sigma level is given, the maximum
+    within the center radius should exceed the (sigma-clipped) median of the annulus between the radius and the
+    outer radius (factor times the radius) by the sigma level times the standard deviation in the annulus.
+    :param data:
+    :param x_centers:
+    :param y_centers:
+    :param radius:
+    :param factor:
+    :param sigma_level:
+    :param center_radius:
+    :param nprocesses:
+    :return: boolean array
+    """
+
+    x_centers = np.asarray(x_centers, dtype=float)
+    y_centers = np.asarray(y_centers, dtype=float)
+
+    # Processes of a pool cannot create processes themselves
+    if nprocesses > 1 and multiprocessing.current_process().daemon: nprocesses = 1
+    nprocesses = max(min(nprocesses, len(x_centers) // max_nscreened_per_pass), 1)
+
+    # Screen locally
+    if nprocesses == 1: return screen_positions_local(data, x_centers, y_centers, radius, factor, sigma_level=sigma_level, center_radius=center_radius)
+
+    # Divide the positions over the processes
+    outputs = []
+    with ParallelTarget(screen_positions_local, nprocesses, shared=True) as target:
+        for indices in np.array_split(np.arange(len(x_centers)), nprocesses):
+            outputs.append(target(data, x_centers[indices], y_centers[indices], radius, factor, sigma_level=sigma_level, center_radius=center_radius))
+
+    for output in outputs: output.request()
+    return np.concatenate([output.output for output in outputs])
+
+# -----------------------------------------------------------------
+
+def screen_positions_local(data, x_centers, y_centers, radius, factor, sigma_level=None, center_radius=None):
+
+    """
+    This function ...
+    :param data:
+    :param x_centers:
+    :param y_centers:
+    :param radius:
+    :param factor:
+    :param sigma_level:
+    :param center_radius:
+    :return:
+    """
+
+    if center_radius is None: center_radius = radius
+    outer_radius = radius * factor
+    size = int(math.ceil(outer_radius))
+
+    result = np.zeros(len(x_centers), dtype=bool)
+
+    # Loop over the passes
+    for start in range(0, len(x_centers), max_nscreened_per_pass):
+
+        end = min(start + max_nscreened_per_pass, len(x_centers))
+
+        # Cut out the boxes
+        boxes, x_mins, y_mins = cropping.crop_stack(data, x_centers[start:end], y_centers[start:end], size, size)
+        valid = np.isfinite(boxes)
+
+        # The frame should not be zero or NaN everywhere in the box
+        nonempty = np.any(valid & (boxes != 0), axis=(1, 2))
+        if sigma_level is None:
+            result[start:end] = nonempty
+            continue
+
+        # Calculate the distances of the pixels to the positions
+        offsets = np.arange(2 * size + 1)
+        dx = x_mins[:, np.newaxis, np.newaxis] + offsets[np.newaxis, np.newaxis, :] - x_centers[start:end, np.newaxis, np.newaxis]
+        dy = y_mins[:, np.newaxis, np.newaxis] + offsets[np.newaxis, :, np.newaxis] - y_centers[start:end, np.newaxis, np.newaxis]
+        distances = np.sqrt(dx**2 + dy**2)
+
+        # Determine the annuli and the central regions
+        annuli = valid & (distances > radius) & (distances <= outer_radius)
+        centers = valid & (distances <= center_radius)
+
+        with warnings.catch_warnings():
+
+            # Ignore warnings for boxes without valid pixels in the annulus or the center
+            warnings.simplefilter("ignore")
+
+            # Calculate the background statistics in the annuli, with one sigma-clipping iteration
+            values = np.where(annuli, boxes, np.nan)
+            median = np.nanmedian(values, axis=(1, 2))
+            stddev = np.nanstd(values, axis=(1, 2))
+            values[np.abs(values - median[:, np.newaxis, np.newaxis]) > 3. * stddev[:, np.newaxis, np.newaxis]] = np.nan
+            median = np.nanmedian(values, axis=(1, 2))
+            stddev = np.nanstd(values, axis=(1, 2))
+
+            # Get the maxima in the central regions
+            maxima = np.nanmax(np.where(centers, boxes, np.nan), axis=(1, 2))
+
+        # Check whether the maxima are significant (without background statistics, this cannot be decided)
+        significant = maxima > median + sigma_level * stddev
+        undecided = np.logical_not(np.isfinite(median) & np.isfinite(stddev))
+        result[start:end] = nonempty & (significant | undecided)
+
+    # Return the result
+    return result
+
+# -----------------------------------------------------------------
+
 def find_source_segmentation(frame, ellipse, config, track_record=None, expansion_level=1, special=False, sigma_level=None):
 
     """
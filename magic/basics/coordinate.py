@@ -72,7 +72,8 @@ class PixelCoordinate(Position, Coordinate):
         :return:
         """
 
-        standard = SkyCoord(ra=coordinate.ra, dec=coordinate.dec)
+        # Keep the celestial frame of the coordinate (it is transformed to the frame of the WCS)
+        standard = SkyCoord(coordinate.frame)
         x, y = standard.to_pixel(wcs, origin=0, mode=mode)
         #x, y = super(SkyCoordinate, coordinate).to_pixel(wcs, origin=0, mode=mode)
         return cls(float(x), float(y), meta=coordinate.meta)
@@ -257,7 +258,8 @@ class SkyCoordinate(SkyCoord, Coordinate):
         :return:
         """
 
-        skycoordinate = super(SkyCoordinate, cls).from_pixel(coordinate.x, coordinate.y, wcs, origin=0, mode=mode)
+        # Transform from the celestial frame of the WCS (which can be non-equatorial) to ICRS
+        skycoordinate = super(SkyCoordinate, cls).from_pixel(coordinate.x, coordinate.y, wcs, origin=0, mode=mode).icrs
         return cls(ra=skycoordinate.ra.deg, dec=skycoordinate.dec.deg, unit="deg")
 
     # -----------------------------------------------------------------
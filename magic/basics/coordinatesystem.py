@@ -144,11 +144,24 @@ class CoordinateSystem(wcs.WCS):
         :return:
         """
 
-        # Get the header and flatten it (remove references to third axis)
-        header = fits.getheader(path)
+        return cls.from_fits_header(fits.getheader(path), path=path)
+
+    # -----------------------------------------------------------------
+
+    @classmethod
+    def from_fits_header(cls, header, path=None):
+
+        """
+        This function ...
+        :param header:
+        :param path:
+        :return:
+        """
+
+        # Flatten the header (remove references to third axis)
         header["NAXIS"] = 2
         if "NAXIS3" in header: del header["NAXIS3"]
-        for key in header:
+        for key in list(header.keys()):
             if "PLANE" in key: del header[key]
 
         # Create and return
@@ -461,6 +474,38 @@ class CoordinateSystem(wcs.WCS):
 
     # -----------------------------------------------------------------
 
+    @property
+    def cache_key(self):
+
+        """
+        This function returns a key that changes when the parameters of the coordinate system change
+        :return:
+        """
+
+        return tuple(self.wcs.crpix), tuple(self.wcs.crval), self.pixel_scale_matrix.tobytes(), tuple(self.wcs.ctype), getattr(self, "naxis1", None), getattr(self, "naxis2", None)
+
+    # -----------------------------------------------------------------
+
+    def get_cached(self, name, calculate):
+
+        """
+        This function returns the cached value with the given name, or calculates it with the given function.
+        The cached values are discarded when the parameters of the coordinate system change.
+        :param name:
+        :param calculate:
+        :return:
+        """
+
+        key = self.cache_key
+        cache = getattr(self, "_cached_values", None)
+        if cache is None or cache[0] != key:
+            cache = (key, dict())
+            self._cached_values = cache
+        if name not in cache[1]: cache[1][name] = calculate()
+        return cache[1][name]
+
+    # -----------------------------------------------------------------
+
     @property
     def pixelscale(self):
 
@@ -469,6 +514,18 @@ class CoordinateSystem(wcs.WCS):
         :return:
         """
 
+        # Return a copy of the cached pixelscale
+        return copy.copy(self.get_cached("pixelscale", self.calculate_pixelscale))
+
+    # -----------------------------------------------------------------
+
+    def calculate_pixelscale(self):
+
+        """
+        This function ...
+        :return:
+        """
+
         result = utils.proj_plane_pixel_scales(self)
 
         # returns: A vector (ndarray) of projection plane increments corresponding to each pixel side (axis).
@@ -975,6 +1032,17 @@ class CoordinateSystem(wcs.WCS):
         :return:
         """
 
+        return self.get_cached("orientation", self.calculate_orientation)
+
+    # -----------------------------------------------------------------
+
+    def calculate_orientation(self):
+
+        """
+        This function ...
+        :return:
+        """
+
         # Calculate the number of pixels in the x and y direction that corresponds one arcmin
         pix_x = (1. / self.pixelscale.x * u("arcmin")).to("").value
         pix_y = (1. / self.pixelscale.y * u("arcmin")).to("").value
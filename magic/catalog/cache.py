@@ -0,0 +1,443 @@
+#!/usr/bin/env python
+# -*- coding: utf8 -*-
+# *****************************************************************
+# **       PTS -- Python Toolkit for working with SKIRT          **
+# **       © Astronomical Observatory, Ghent University          **
+# *****************************************************************
+
+## \package pts.magic.catalog.cache Contains functions to query catalogs through a local cache of sky tiles.
+#
+# The sky is divided into declination bands of a fixed height, and each band into right ascension tiles of (about) the
+# same width on the sky. The rows of a catalog that lie in a tile are obtained once from the source (by default,
+# a cone search on Vizier around the tile) and are written to a binary file with one array per column in the PTS user
+# directory. A query for a region then only reads the tiles that overlap with it, so that the many overlapping queries
+# of the different bands and reruns don't query the remote service again. The source can be replaced (with set_source)
+# by a function that takes the rows from local files, for example.
+
+# -----------------------------------------------------------------
+
+# Ensure Python 3 functionality
+from __future__ import absolute_import, division, print_function
+
+# Import standard modules
+import os
+import math
+import numpy as np
+
+# Import astronomical modules
+from astropy.table import Table, MaskedColumn, vstack
+from astropy.units import Unit
+from astropy.coordinates import Angle
+
+# Import the relevant PTS classes and modules
+from ..tools import crossmatch
+from ...core.tools import filesystem as fs
+from ...core.tools import introspection
+from ...core.basics.log import log
+
+# -----------------------------------------------------------------
+
+# The height of the declination bands and the (approximate) width of the tiles on the sky, in degrees
+tile_size = 0.5
+
+# The number of declination bands
+nbands = int(round(180. / tile_size))
+
+# The tiles in memory, by catalog code and tile
+tiles = dict()
+
+# -----------------------------------------------------------------
+
+def vizier_source(code, ra, dec, radius):
+
+    """
+    This function queries the catalog with the given code on Vizier, for the rows within a radius around a position
+    :param code: the Vizier code of the catalog
+    :param ra: in degrees
+    :param dec: in degrees
+    :param radius: in degrees
+    :return: the table (without columns if there are no rows)
+    """
+
+    from astroquery.vizier import Vizier
+    from astropy.coordinates import SkyCoord
+
+    # Create a new Vizier object and set the row limit to -1 (unlimited). Also request the positions in degrees
+    # computed by Vizier, since the RAJ2000 and DEJ2000 columns of some catalogs are in sexagesimal notation
+    viz = Vizier(columns=["*", "_RAJ2000", "_DEJ2000"])
+    viz.ROW_LIMIT = -1
+
+    # Query Vizier and obtain the resulting table
+    center = SkyCoord(ra=ra, dec=dec, unit="deg", frame="fk5")
+    result = viz.query_region(center, radius=radius * Unit("deg"), catalog=code)
+
+    # Vizier sometimes returns no entries for specific values of the size of the region, while changing the value very
+    # slightly resolves the problem (see galaxies_in_box in magic/tools/catalogs)
+    if result is None or len(result) == 0:
+        result = viz.query_region(center, radius=radius * (1.0 + 1e-5) * Unit("deg"), catalog=code)
+
+    # Return the table. The query itself raises an exception if it fails, so no result means that there are no rows
+    if result is None or len(result) == 0: return Table(masked=True)
+    return result[0]
+
+# -----------------------------------------------------------------
+
+# The function that provides the rows of a tile (see vizier_source)
+source = vizier_source
+
+# -----------------------------------------------------------------
+
+def set_source(function):
+
+    """
+    This function sets the function that provides the rows of the tiles that are not yet in the cache
+    :param function: a function with the same arguments and return value as vizier_source, that raises an exception
+    when the rows cannot be obtained (None to use Vizier)
+    :return:
+    """
+
+    global source
+    source = function if function is not None else vizier_source
+
+# -----------------------------------------------------------------
+
+def positions(table):
+
+    """
+    This function returns the right ascension and declination of the rows of a table, in degrees. The positions
+    computed by Vizier (_RAJ2000 and _DEJ2000) are used if present, otherwise the RAJ2000 and DEJ2000 columns,
+    which are converted if they are in sexagesimal notation ('h:m:s' and 'd:m:s')
+    :param table:
+    :return: ra, dec
+    """
+
+    ra = np.zeros(len(table))
+    dec = np.zeros(len(table))
+
+    # The rows with the computed positions (tiles that were obtained from another source, or from the
+    # cache of an earlier version, don't have these columns)
+    if "_RAJ2000" in table.colnames and "_DEJ2000" in table.colnames:
+
+        computed = ~(np.ma.getmaskarray(table["_RAJ2000"]) | np.ma.getmaskarray(table["_DEJ2000"]))
+        ra[computed] = np.ma.getdata(table["_RAJ2000"])[computed]
+        dec[computed] = np.ma.getdata(table["_DEJ2000"])[computed]
+
+    else: computed = np.zeros(len(table), dtype=bool)
+
+    # The other rows
+    if not np.all(computed):
+
+        ra_values = np.ma.getdata(table["RAJ2000"])[~computed]
+        dec_values = np.ma.getdata(table["DEJ2000"])[~computed]
+
+        if ra_values.dtype.kind in "SUO": ra_values = Angle(ra_values.astype(str), unit="hourangle").degree
+        if dec_values.dtype.kind in "SUO": dec_values = Angle(dec_values.astype(str), unit="deg").degree
+
+        ra[~computed] = ra_values
+        dec[~computed] = dec_values
+
+    # Return the positions
+    return ra, dec
+
+# -----------------------------------------------------------------
+
+def cache_path():
+
+    """
+    This function returns the path of the directory with the cached tiles of all catalogs
+    :return:
+    """
+
+    return fs.join(introspection.pts_user_dir, "catalogs")
+
+# -----------------------------------------------------------------
+
+def catalog_path(code):
+
+    """
+    This function returns the path of the directory with the cached tiles of the catalog with the given code
+    :param code:
+    :return:
+    """
+
+    return fs.join(cache_path(), code.replace("/", "_"))
+
+# -----------------------------------------------------------------
+
+def tile_path(code, tile):
+
+    """
+    This function returns the path of the file of the given tile of a catalog
+    :param code:
+    :param tile: (band, index)
+    :return:
+    """
+
+    return fs.join(catalog_path(code), str(tile[0]) + "_" + str(tile[1]) + ".npz")
+
+# -----------------------------------------------------------------
+
+def band_declinations(band):
+
+    """
+    This function returns the lower and upper declination of the given band
+    :param band:
+    :return:
+    """
+
+    return -90. + band * tile_size, min(-90. + (band + 1) * tile_size, 90.)
+
+# -----------------------------------------------------------------
+
+def ntiles_in_band(band):
+
+    """
+    This function returns the number of tiles in the given band
+    :param band:
+    :return:
+    """
+
+    dec_min, dec_max = band_declinations(band)
+
+    # The declination closest to the equator determines the width of the band on the sky
+    if dec_min <= 0. <= dec_max: dec = 0.
+    else: dec = min(abs(dec_min), abs(dec_max))
+
+    return max(1, int(360. * math.cos(math.radians(dec)) / tile_size))
+
+# -----------------------------------------------------------------
+
+def tile_bounds(tile):
+
+    """
+    This function returns the range of right ascension and declination of the given tile
+    :param tile: (band, index)
+    :return: ra_min, ra_max, dec_min, dec_max in degrees
+    """
+
+    band, index = tile
+    width = 360. / ntiles_in_band(band)
+    dec_min, dec_max = band_declinations(band)
+    return index * width, (index + 1) * width, dec_min, dec_max
+
+# -----------------------------------------------------------------
+
+def get_tiles(ra, dec, ra_radius, dec_radius):
+
+    """
+    This function returns the tiles that overlap with a box on the sky
+    :param ra: the right ascension of the center, in degrees
+    :param dec: the declination of the center, in degrees
+    :param ra_radius: half of the width of the box on the sky, in degrees
+    :param dec_radius: half of the height of the box, in degrees
+    :return:
+    """
+
+    dec_min = max(dec - dec_radius, -90.)
+    dec_max = min(dec + dec_radius, 90.)
+
+    # Determine the range of right ascension: the box is widest (in right ascension) at the declination furthest from the equator
+    cos_dec = math.cos(math.radians(max(abs(dec_min), abs(dec_max))))
+    ra_half_range = ra_radius / cos_dec if cos_dec > 0 else 180.
+
+    first_band = max(int(math.floor((dec_min + 90.) / tile_size)), 0)
+    last_band = min(int(math.floor((dec_max + 90.) / tile_size)), nbands - 1)
+
+    result = []
+    for band in range(first_band, last_band + 1):
+
+        ntiles = ntiles_in_band(band)
+
+        # All right ascensions
+        if ra_half_range >= 180.: indices = range(ntiles)
+
+        # A range of right ascension (that can wrap around RA = 0)
+        else:
+            width = 360. / ntiles
+            first = int(math.floor((ra - ra_half_range) / width))
+            last = int(math.floor((ra + ra_half_range) / width))
+            indices = sorted(set(index % ntiles for index in range(first, last + 1)))
+
+        result.extend((band, index) for index in indices)
+
+    # Return the tiles
+    return result
+
+# -----------------------------------------------------------------
+
+def write_tile(table, path):
+
+    """
+    This function writes the rows of a tile to a binary file, with an array for the data and for the mask of each column
+    (replacing the file at once, so that other processes never read a partial file)
+    :param table:
+    :param path:
+    :return:
+    """
+
+    arrays = dict()
+    names = table.colnames
+    arrays["names"] = np.array(names, dtype=str)
+    arrays["units"] = np.array([str(table[name].unit) if table[name].unit is not None else "" for name in names], dtype=str)
+
+    for index, name in enumerate(names):
+
+        data = np.ma.getdata(table[name])
+        if data.dtype.kind == "O": data = data.astype(str)
+        arrays["data" + str(index)] = data
+        arrays["mask" + str(index)] = np.ma.getmaskarray(table[name])
+
+    temp_path = path[:-4] + "." + str(os.getpid()) + ".tmp.npz"
+
+    try:
+        np.savez(temp_path, **arrays)
+        os.rename(temp_path, path)
+    except (IOError, OSError):
+        log.warning("The catalog tile '" + path + "' could not be written")
+        if fs.is_file(temp_path): fs.remove_file(temp_path)
+
+# -----------------------------------------------------------------
+
+def read_tile(path):
+
+    """
+    This function reads the rows of a tile from its binary file
+    :param path:
+    :return: the table
+    """
+
+    with np.load(path, allow_pickle=False) as arrays:
+
+        columns = []
+        for index, (name, unit) in enumerate(zip(arrays["names"], arrays["units"])):
+            unit = Unit(str(unit), parse_strict="silent") if unit else None
+            columns.append(MaskedColumn(data=arrays["data" + str(index)], mask=arrays["mask" + str(index)], name=str(name), unit=unit))
+
+    # Return the table
+    return Table(columns, masked=True)
+
+# -----------------------------------------------------------------
+
+def fill_tile(code, tile, path):
+
+    """
+    This function obtains the rows of a tile from the source and writes them to the cache. A tile without rows is
+    written as well, so that it is not queried again. If the source fails, nothing is written.
+    :param code:
+    :param tile:
+    :param path:
+    :return: the table (None if the source failed)
+    """
+
+    ra_min, ra_max, dec_min, dec_max = tile_bounds(tile)
+
+    # Debugging
+    log.debug("Obtaining the rows of the " + code + " catalog for RA [" + str(ra_min) + ", " + str(ra_max) + "] and DEC [" + str(dec_min) + ", " + str(dec_max) + "] ...")
+
+    # Determine the center of the tile and the radius of the circle through its corners
+    ra = 0.5 * (ra_min + ra_max)
+    dec = 0.5 * (dec_min + dec_max)
+    corners = crossmatch.unit_vectors([ra_min, ra_min, ra_max, ra_max], [dec_min, dec_max, dec_min, dec_max])
+    radius = 1.01 * np.max(crossmatch.separation(corners, crossmatch.unit_vectors(ra, dec)))
+
+    # Query the source
+    try: table = source(code, ra, dec, radius)
+    except Exception as e:
+        log.warning("The rows of the " + code + " catalog could not be obtained for RA [" + str(ra_min) + ", " + str(ra_max) + "] and DEC [" + str(dec_min) + ", " + str(dec_max) + "]: " + str(e))
+        return None
+
+    # Keep the rows within the tile
+    if len(table) > 0:
+
+        ra_values, dec_values = positions(table)
+        ra_values = np.mod(ra_values, 360.)
+        upper = dec_values <= dec_max if dec_max == 90. else dec_values < dec_max
+        table = table[(ra_values >= ra_min) & (ra_values < ra_max) & (dec_values >= dec_min) & upper]
+
+    else: log.debug("No rows were obtained for this tile")
+
+    # Write the tile (also without rows)
+    fs.create_directory(fs.directory_of(path), recursive=True)
+    write_tile(table, path)
+
+    # Return the table
+    return table
+
+# -----------------------------------------------------------------
+
+def get_tile(code, tile):
+
+    """
+    This function returns the rows of a tile of the catalog, from memory, from the cache on disk or from the source.
+    If the source fails, the tile is not kept, so that it is obtained again by the next query.
+    :param code:
+    :param tile:
+    :return:
+    """
+
+    key = (code, tile)
+    if key in tiles: return tiles[key]
+
+    path = tile_path(code, tile)
+    if fs.is_file(path):
+
+        try: table = read_tile(path)
+        except (IOError, OSError, ValueError, KeyError):
+            log.warning("The catalog tile '" + path + "' could not be read")
+            table = fill_tile(code, tile, path)
+
+    else: table = fill_tile(code, tile, path)
+
+    # The source failed
+    if table is None: return Table(masked=True)
+
+    # Keep the tile in memory
+    tiles[key] = table
+    return table
+
+# -----------------------------------------------------------------
+
+def query_box(code, center, ra_span, dec_span):
+
+    """
+    This function returns the rows of the catalog with the given code within a box on the sky
+    :param code: the Vizier code of the catalog
+    :param center: the center of the box (with ra and dec)
+    :param ra_span: the width of the box on the sky
+    :param dec_span: the height of the box
+    :return: the table (without columns if there are no rows)
+    """
+
+    ra = center.ra.to("deg").value
+    dec = center.dec.to("deg").value
+    ra_radius = 0.5 * ra_span.to("deg").value
+    dec_radius = 0.5 * dec_span.to("deg").value
+
+    # Get the tiles that contain rows
+    tables = [get_tile(code, tile) for tile in get_tiles(ra, dec, ra_radius, dec_radius)]
+    tables = [table for table in tables if len(table) > 0]
+    if len(tables) == 0: return Table(masked=True)
+
+    # Combine the tiles
+    table = vstack(tables, join_type="outer", metadata_conflicts="silent") if len(tables) > 1 else tables[0].copy()
+
+    # Keep the rows within the box
+    ra_values, dec_values = positions(table)
+    ra_offsets = np.mod(ra_values - ra + 180., 360.) - 180.
+    inside = (np.abs(ra_offsets) * np.cos(np.radians(dec_values)) <= ra_radius) & (np.abs(dec_values - dec) <= dec_radius)
+
+    # Return the table
+    return table[inside]
+
+# -----------------------------------------------------------------
+
+def clear():
+
+    """
+    This function clears the tiles in memory
+    :return:
+    """
+
+    tiles.clear()
+
+# -----------------------------------------------------------------
@@ -495,31 +495,12 @@ class ExtendedSourceCatalog(SmartTable):
         :return: 
         """
 
-        # Initialize the region list
-        regions = PixelRegionList()
-
-        # Loop over the entries in the catalog
-        for index in range(len(self)):
-
-            # Get position
-            position = self.get_position(index)
-
-            # If the source falls outside of the frame, skip it
-            if check_in_wcs and not wcs.contains(position): continue
-
-            # Create the pixel region
-            region = self.create_pixel_region(index, wcs, default_radius=default_radius)
-
-            # Add the region
-            regions.append(region)
-
-            # If add point
-            if add_point:
-                region = self.create_pixel_point_region(index, wcs)
-                regions.append(region)
+        # Create the sky regions
+        default_sky_radius = default_radius * wcs.average_pixelscale
+        regions = self.create_region_list(check_in_wcs=wcs if check_in_wcs else None, default_radius=default_sky_radius, add_point=add_point)
 
-        # return the region list
-        return regions
+        # Convert all regions to pixel coordinates at once and return the region list
+        return PixelRegionList.from_sky(regions, wcs)
 
     # -----------------------------------------------------------------
 
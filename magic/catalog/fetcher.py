@@ -60,13 +60,10 @@ class CatalogFetcher(object):
         # Create catalog
         catalog = ExtendedSourceCatalog()
 
-        # Add entries
-        for index in range(len(name_column)):
-
-            catalog.add_entry(name_column[index], ra_column[index], dec_column[index], redshift_column[index], type_column[index],
-                              alternative_names_column[index], distance_column[index], inclination_column[index],
-                              d25_column[index], major_column[index], minor_column[index], pa_column[index],
-                              principal_column[index], companions_column[index], parent_column[index])
+        # Add the entries, all at once
+        catalog.add_rows([name_column, ra_column, dec_column, redshift_column, type_column, alternative_names_column,
+                          distance_column, inclination_column, d25_column, major_column, minor_column, pa_column,
+                          principal_column, companions_column, parent_column])
 
         # Return the catalog
         return catalog
@@ -101,14 +98,12 @@ class CatalogFetcher(object):
         # Create catalog
         catalog = PointSourceCatalog()
 
-        # Add entries
-        for index in range(len(catalog_column)):
-
-            # Debugging
-            log.info("Adding entry " + str(index+1) + " to the catalog ...")
+        # Debugging
+        log.debug("Adding " + str(len(catalog_column)) + " entries to the catalog ...")
 
-            catalog.add_entry(catalog_column[index], id_column[index], ra_column[index], dec_column[index],
-                              ra_error_column[index], dec_error_column[index], confidence_level_column[index])
+        # Add the entries, all at once
+        catalog.add_rows([catalog_column, id_column, ra_column, dec_column, ra_error_column, dec_error_column,
+                          confidence_level_column])
 
         # Return the catalog
         return catalog
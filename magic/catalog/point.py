@@ -385,7 +385,7 @@ class PointSourceCatalog(SmartTable):
         """
 
         # Initializ region list
-        regions = PixelRegionList()
+        regions = SkyRegionList()
 
         # Calculate radius in sky coordinates (degrees)
         sky_radius = radius * wcs.average_pixelscale
@@ -399,8 +399,8 @@ class PointSourceCatalog(SmartTable):
             # If the star fall outside of the frame, skip
             if check_in_wcs and not wcs.contains(position): continue
 
-            # Create pixel region
-            region = self.create_pixel_region(index, wcs, radius=sky_radius, color=color)
+            # Create sky region
+            region = self.create_region(index, radius=sky_radius, color=color)
 
             # Add the region
             regions.append(region)
@@ -411,8 +411,8 @@ class PointSourceCatalog(SmartTable):
                 region = self.create_point_region(index, color=color)
                 regions.append(region)
 
-        # Return the region list
-        return regions
+        # Convert all regions to pixel coordinates at once and return the region list
+        return PixelRegionList.from_sky(regions, wcs)
 
     # -----------------------------------------------------------------
 
@@ -21,6 +21,7 @@ from ..basics.vector import Position, Extent
 from ..region.rectangle import PixelRectangleRegion
 from ..basics.catalogcoverage import CatalogCoverage
 from ..tools import catalogs
+from ..tools import crossmatch
 from ...core.basics.configurable import Configurable
 from ...core.tools import introspection, tables
 from ...core.tools import filesystem as fs
@@ -256,7 +257,8 @@ class CatalogSynchronizer(Configurable):
             entry_id = int(old_stellar_catalog["Id"][j].split("/")[1])
             if entry_id > last_id: last_id = entry_id
 
-        encountered = [False] * len(old_stellar_catalog)
+        # Find the stars that match a star of the DustPedia catalog
+        matches = self.match_dustpedia_stars(old_stellar_catalog)
 
         import copy
         new_stellar_catalog = copy.deepcopy(old_stellar_catalog)
@@ -266,7 +268,7 @@ class CatalogSynchronizer(Configurable):
 
             # Skip stars already in the DustPedia catalog
             if self.stellar_catalog["Catalog"][i] == "DustPedia": continue
-            if self.matches_dustpedia_star(i, old_stellar_catalog, encountered): continue
+            if matches[i]: continue
 
             # Set the original ID, if the 'Catalog' entry is not masked
             if not self.stellar_catalog["Catalog"].mask[i]:
@@ -292,67 +294,68 @@ class CatalogSynchronizer(Configurable):
 
     # -----------------------------------------------------------------
 
-    def matches_dustpedia_star(self, i, old_stellar_catalog, encountered):
+    def match_dustpedia_stars(self, old_stellar_catalog):
 
         """
-        This function ...
-        :param i
+        This function determines, for each star in the stellar catalog, whether it matches a star of the (old)
+        DustPedia catalog. Every star of the DustPedia catalog can be matched only once, in the order of the stellar
+        catalog. Stars with an original catalog are matched on their original catalog and id, other stars are matched
+        on position, using a spatial index of the DustPedia stars without original catalog.
         :param old_stellar_catalog:
-        :param encountered:
         :return:
         """
 
-        # If an original catalog exists for this star
-        if not self.stellar_catalog["Catalog"].mask[i]:
+        encountered = [False] * len(old_stellar_catalog)
+        matches = [False] * len(self.stellar_catalog)
 
-            catalog_name = self.stellar_catalog["Catalog"][i]
-            star_id = self.stellar_catalog["Id"][i]
+        # The DustPedia stars by their original catalog and id, and the DustPedia stars without original catalog
+        original_ids = old_stellar_catalog["Original catalog and id"]
+        by_original_id = dict()
+        for j in range(len(old_stellar_catalog)):
+            if not original_ids.mask[j]: by_original_id.setdefault(original_ids[j], []).append(j)
+        without_original = np.array([j for j in range(len(old_stellar_catalog)) if original_ids.mask[j]], dtype=int)
+
+        # The stars that are cross-referenced on position: the stars without catalog (comparing a masked entry
+        # with a string gives a masked, false value)
+        positional = [i for i in range(len(self.stellar_catalog)) if self.stellar_catalog["Catalog"].mask[i]]
+
+        # Find the DustPedia stars without original catalog within the positional error of each of these stars
+        candidates = dict()
+        if len(positional) > 0 and len(without_original) > 0:
+
+            # Calculate the errors on the positions in degrees
+            old_errors = position_errors(old_stellar_catalog)
+            new_errors = position_errors(self.stellar_catalog)
+
+            # Query the spatial index
+            index = crossmatch.create_index(column_values(old_stellar_catalog["Right ascension"])[without_original], column_values(old_stellar_catalog["Declination"])[without_original])
+            ra = column_values(self.stellar_catalog["Right ascension"])[positional]
+            dec = column_values(self.stellar_catalog["Declination"])[positional]
+            neighbours = crossmatch.neighbours(index, ra, dec, new_errors[positional])
+
+            # The distance should also be smaller than the error on the old star's position
+            for i, ra_i, dec_i, indices in zip(positional, ra, dec, neighbours):
+                indices = without_original[indices]
+                if len(indices) == 0: continue
+                distances = crossmatch.separation(crossmatch.unit_vectors(column_values(old_stellar_catalog["Right ascension"])[indices], column_values(old_stellar_catalog["Declination"])[indices]), crossmatch.unit_vectors(ra_i, dec_i))
+                candidates[i] = indices[distances < old_errors[indices]]
+
+        # Loop over all entries in the stellar catalog
+        for i in range(len(self.stellar_catalog)):
 
             # Skip stars already in the DustPedia catalog
-            for j in range(len(old_stellar_catalog)):
+            if self.stellar_catalog["Catalog"][i] == "DustPedia": continue
 
-                if encountered[j]: continue
-                if old_stellar_catalog["Original catalog and id"].mask[j]: continue
-                if old_stellar_catalog["Original catalog and id"][j] == catalog_name + "//" + star_id:
-                    encountered[j] = True
-                    return True
+            # If an original catalog exists for this star, match on the original catalog and id
+            if not self.stellar_catalog["Catalog"].mask[i]:
+                original_id = self.stellar_catalog["Catalog"][i] + "//" + self.stellar_catalog["Id"][i]
+                matches[i] = crossmatch.first_unmatched(by_original_id.get(original_id, []), encountered) is not None
 
-        # Else (stars without original catalog), cross-reference with old catalog based on position
-        else:
+            # Else (stars without original catalog), cross-reference with old catalog based on position
+            else: matches[i] = crossmatch.first_unmatched(candidates.get(i, []), encountered) is not None
 
-            # Loop over the stars in the DustPedia catalog who have no original catalog either
-            for j in range(len(old_stellar_catalog)):
-
-                if encountered[j]: continue
-                if not old_stellar_catalog["Original catalog and id"].mask[j]: continue
-
-                # Calculate the distance between the star in the old catalog and the new star
-                old_position = Position(old_stellar_catalog["Right ascension"][j], old_stellar_catalog["Declination"][j])
-                new_position = Position(self.stellar_catalog["Right ascension"][i], self.stellar_catalog["Declination"][i])
-                distance = (old_position - new_position).norm
-
-                # Calculate the error on the star's position in the old catalog
-                old_error_ra_mas = old_stellar_catalog["Right ascension error"][j] * parse_unit("mas")
-                old_error_ra_deg = old_error_ra_mas.to("deg").value
-                old_error_dec_mas = old_stellar_catalog["Declination error"][j] * parse_unit("mas")
-                old_error_dec_deg = old_error_dec_mas.to("deg").value
-                old_error = Extent(old_error_ra_deg, old_error_dec_deg).norm
-
-                # Calculate the error on the star's position in the new catalog
-                new_error_ra_mas = self.stellar_catalog["Right ascension error"][i] * parse_unit("mas")
-                new_error_ra_deg = new_error_ra_mas.to("deg").value
-                new_error_dec_mas = self.stellar_catalog["Declination error"][i] * parse_unit("mas")
-                new_error_dec_deg = new_error_dec_mas.to("deg").value
-                new_error = Extent(new_error_ra_deg, new_error_dec_deg).norm
-
-                # If the distance is smaller than the error on the old star's position and the error on the
-                # new star's position, we have a match
-                if distance < old_error and distance < new_error:
-                    encountered[j] = True
-                    return True
-
-        # If no match is found, return False
-        return False
+        # Return the matches
+        return matches
 
     # -----------------------------------------------------------------
 
@@ -524,3 +527,31 @@ class CatalogSynchronizer(Configurable):
         return False
 
 # -----------------------------------------------------------------
+
+def column_values(column):
+
+    """
+    This function returns the values of a table column as a floating-point array (masked values are NaN)
+    :param column:
+    :return:
+    """
+
+    return np.ma.filled(np.ma.asarray(column, dtype=float), np.nan)
+
+# -----------------------------------------------------------------
+
+def position_errors(catalog):
+
+    """
+    This function returns the errors on the positions of the stars in the catalog (the norm of the errors on the
+    right ascension and declination, which are in mas), in degrees. Missing errors are zero.
+    :param catalog:
+    :return:
+    """
+
+    conversion = (1. * parse_unit("mas")).to("deg").value
+    ra_errors = np.nan_to_num(column_values(catalog["Right ascension error"])) * conversion
+    dec_errors = np.nan_to_num(column_values(catalog["Declination error"])) * conversion
+    return np.sqrt(ra_errors**2 + dec_errors**2)
+
+# -----------------------------------------------------------------
@@ -64,6 +64,9 @@ definition.sections["detection"].add_optional("background_outer_factor", "real",
 
 definition.sections["detection"].add_flag("always_subtract_background", "always subtract background")
 
+definition.sections["detection"].add_flag("bulk", "screen the positions of all sources at once, and only look for sources with significant emission at their position (faint sources can be skipped)", False)
+definition.sections["detection"].add_optional("nprocesses", "positive_integer", "number of processes for screening the source positions", 1)
+
 definition.sections["detection"].add_optional("convolution_fwhm", "real", "perform convolution, define the FWHM (in pixels) (for detection_method: 'peaks'", 10.0)
 
 definition.sections["detection"].add_section("debug", "debug")
@@ -89,6 +92,9 @@ definition.sections["fitting"].add_optional("fwhm_sigma_level", "real", "FWHM si
 
 definition.sections["fitting"].add_optional("upsample_factor", "real", "upsample factor", 1.0)
 
+definition.sections["fitting"].add_flag("batch", "fit Gaussian models to all sources with equal-size cutouts at once", True)
+definition.sections["fitting"].add_optional("nprocesses", "positive_integer", "number of processes for fitting the sources at once", 1)
+
 definition.sections["fitting"].add_section("debug", "debug")
 definition.sections["fitting"].sections["debug"].add_flag("model_offset", "model offset")
 definition.sections["fitting"].sections["debug"].add_flag("success", "success")
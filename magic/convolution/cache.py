@@ -0,0 +1,291 @@
+#!/usr/bin/env python
+# -*- coding: utf8 -*-
+# *****************************************************************
+# **       PTS -- Python Toolkit for working with SKIRT          **
+# **       © Astronomical Observatory, Ghent University          **
+# *****************************************************************
+
+## \package pts.magic.convolution.cache Contains functions to cache prepared convolution kernels and their Fourier transforms.
+#
+# Preparing a kernel (truncating, zooming to the pixelscale of the image, recentering and normalizing) is expensive
+# for the high-resolution Aniano kernels. Prepared kernels are therefore kept in memory and in the PTS kernels
+# directory, keyed by the identity of the original kernel (its file path, size and modification time, or a hash of
+# its data), the target pixelscale and the sigma level of the truncation. The Fourier transform of a prepared kernel
+# is cached per padded shape of the frames it is convolved with.
+
+# -----------------------------------------------------------------
+
+# Ensure Python 3 compatibility
+from __future__ import absolute_import, division, print_function
+
+# Import standard modules
+import hashlib
+import numpy as np
+from collections import OrderedDict
+
+# Import the relevant PTS classes and modules
+from .kernels import kernels_path
+from ...core.tools import filesystem as fs
+from ...core.basics.log import log
+
+# -----------------------------------------------------------------
+
+# The path to the directory with the prepared kernels (created when the first prepared kernel is saved)
+prepared_kernels_path = fs.join(kernels_path, "prepared")
+
+# -----------------------------------------------------------------
+
+# The prepared kernels in memory, by key
+prepared_kernels = dict()
+
+# The Fourier transforms of kernels, by kernel key and padded shape (least recently used are removed first)
+kernel_ffts = OrderedDict()
+
+# The maximum number of Fourier transforms that are kept in memory
+max_nffts = 16
+
+# -----------------------------------------------------------------
+
+def file_identity(path):
+
+    """
+    This function returns a string that identifies the current contents of the file with the given path
+    :param path:
+    :return:
+    """
+
+    size, mtime = fs.file_signature(path)
+    return fs.absolute_path(path) + ":" + str(size) + ":" + repr(mtime)
+
+# -----------------------------------------------------------------
+
+def kernel_identity(kernel):
+
+    """
+    This function returns a string that identifies the kernel
+    :param kernel:
+    :return:
+    """
+
+    # Kernel that was prepared through this module (and not a copy of it, which could have been modified)
+    key = getattr(kernel, "cache_key", None)
+    if key is not None and prepared_kernels.get(key) is kernel: return key
+
+    # Identify by the data (not by the path, because the kernel could have been modified after loading)
+    data_hash = hashlib.md5(np.ascontiguousarray(kernel.data).tobytes()).hexdigest()
+    return "data:" + data_hash + ":" + str(kernel.fwhm) + ":" + str(kernel.pixelscale)
+
+# -----------------------------------------------------------------
+
+def prepared_key(identity, pixelscale, sigma_level=10.0):
+
+    """
+    This function returns the key of the prepared kernel for the original kernel with the given identity
+    :param identity:
+    :param pixelscale:
+    :param sigma_level:
+    :return:
+    """
+
+    x = "%.6e" % pixelscale.x.to("arcsec").value
+    y = "%.6e" % pixelscale.y.to("arcsec").value
+    string = identity + "|" + x + "|" + y + "|" + repr(sigma_level)
+    return hashlib.md5(string.encode("utf8")).hexdigest()
+
+# -----------------------------------------------------------------
+
+def get_prepared_kernel(identity, pixelscale, load, sigma_level=10.0, disk=True):
+
+    """
+    This function returns the prepared kernel for the original kernel with the given identity.
+    The (possibly expensive) load function, which returns the original kernel, is only called if the prepared kernel
+    is not yet in memory or on disk. The returned kernel is shared and should not be modified.
+    :param identity:
+    :param pixelscale:
+    :param load:
+    :param sigma_level:
+    :param disk:
+    :return:
+    """
+
+    # Determine the key
+    key = prepared_key(identity, pixelscale, sigma_level)
+
+    # In memory
+    if key in prepared_kernels: return prepared_kernels[key]
+
+    # Determine the path for the prepared kernel
+    path = fs.join(prepared_kernels_path, key + ".fits")
+
+    kernel = None
+
+    # On disk
+    if disk and fs.is_file(path):
+
+        # Debugging
+        log.debug("Loading the prepared kernel from '" + path + "' ...")
+
+        from ..core.kernel import ConvolutionKernel  # Import here because the kernel module imports Frame, which imports this module (through convolution.tiled)
+        try: kernel = ConvolutionKernel.from_file(path)
+        except IOError:
+            log.warning("The prepared kernel file was probably damaged. Removing it and preparing the kernel again ...")
+            fs.remove_file(path)
+
+    # Load and prepare the kernel
+    if kernel is None or not kernel.prepared:
+
+        kernel = load()
+        if not kernel.prepared: kernel.prepare(pixelscale, sigma_level)
+
+        # Save the prepared kernel
+        if disk:
+            if not fs.is_directory(prepared_kernels_path): fs.create_directory(prepared_kernels_path, recursive=True)
+            kernel.saveto(path)
+
+    # Set the key and add to the prepared kernels in memory
+    kernel.cache_key = key
+    prepared_kernels[key] = kernel
+
+    # Return the prepared kernel
+    return kernel
+
+# -----------------------------------------------------------------
+
+def prepared_kernel(kernel, pixelscale, sigma_level=10.0, disk=True):
+
+    """
+    This function returns a prepared version of the given kernel (the kernel itself if it is already prepared)
+    :param kernel:
+    :param pixelscale:
+    :param sigma_level:
+    :param disk:
+    :return:
+    """
+
+    if kernel.prepared: return kernel
+    return get_prepared_kernel(kernel_identity(kernel), pixelscale, kernel.copy, sigma_level=sigma_level, disk=disk)
+
+# -----------------------------------------------------------------
+
+def prepared_kernel_from_file(path, pixelscale, sigma_level=10.0, disk=True, **kwargs):
+
+    """
+    This function returns the prepared kernel for the kernel file with the given path,
+    only reading the file if the prepared kernel is not cached
+    :param path:
+    :param pixelscale:
+    :param sigma_level:
+    :param disk:
+    :param kwargs: passed to ConvolutionKernel.from_file
+    :return:
+    """
+
+    from ..core.kernel import ConvolutionKernel  # Import here because the kernel module imports Frame, which imports this module (through convolution.tiled)
+    load = lambda: ConvolutionKernel.from_file(path, **kwargs)
+    return get_prepared_kernel(file_identity(path), pixelscale, load, sigma_level=sigma_level, disk=disk)
+
+# -----------------------------------------------------------------
+
+def clear():
+
+    """
+    This function clears the prepared kernels and Fourier transforms in memory
+    :return:
+    """
+
+    prepared_kernels.clear()
+    kernel_ffts.clear()
+
+# -----------------------------------------------------------------
+
+def fft_shape(shape, kernel_shape):
+
+    """
+    This function returns the padded shape for the convolution of an array with the given shape with a kernel,
+    for which no wrapping around occurs
+    :param shape:
+    :param kernel_shape:
+    :return:
+    """
+
+    try: from scipy.fftpack import next_fast_len
+    except ImportError: next_fast_len = lambda n: 2**int(np.ceil(np.log2(n)))
+
+    return tuple(next_fast_len(int(size + kernel_size - 1)) for size, kernel_size in zip(shape, kernel_shape))
+
+# -----------------------------------------------------------------
+
+def kernel_fft(kernel, shape):
+
+    """
+    This function returns the (real) Fourier transform of the kernel, zero-padded to the given shape and with the
+    kernel center moved to the origin
+    :param kernel:
+    :param shape:
+    :return:
+    """
+
+    shape = tuple(shape)
+    key = (kernel_identity(kernel), shape)
+
+    # Cached
+    if key in kernel_ffts:
+        kernel_ffts[key] = kernel_ffts.pop(key) # most recently used
+        return kernel_ffts[key]
+
+    # Pad the kernel and move its center to the origin
+    data = kernel.data
+    padded = np.zeros(shape)
+    padded[:data.shape[0], :data.shape[1]] = data
+    padded = np.roll(np.roll(padded, -(data.shape[0] // 2), axis=0), -(data.shape[1] // 2), axis=1)
+
+    # Calculate the transform
+    transform = np.fft.rfftn(padded)
+
+    # Add to the cache, remove the least recently used transform if necessary
+    kernel_ffts[key] = transform
+    if len(kernel_ffts) > max_nffts: kernel_ffts.popitem(last=False)
+
+    # Return the transform
+    return transform
+
+# -----------------------------------------------------------------
+
+def convolve_fft(data, kernel, interpolate_nan=True):
+
+    """
+    This function convolves the data with the kernel through FFTs, using the cached kernel transform.
+    Outside the data, the values are zero (as with boundary='fill' in astropy's convolve_fft). With interpolate_nan,
+    the result is normalized by the kernel weight of the valid pixels, so that NaNs are interpolated over, as in
+    astropy's convolve_fft. The kernel is not normalized.
+    :param data:
+    :param kernel:
+    :param interpolate_nan:
+    :return:
+    """
+
+    # Determine the padded shape
+    shape = fft_shape(data.shape, kernel.shape)
+    ny, nx = data.shape
+
+    # Get the kernel transform
+    transform = kernel_fft(kernel, shape)
+
+    # Set NaNs to zero
+    invalid = np.isnan(data) | np.isinf(data)
+    values = np.where(invalid, 0.0, data)
+
+    # Convolve
+    result = np.fft.irfftn(np.fft.rfftn(values, shape) * transform, shape)[:ny, :nx]
+
+    # Interpolate
+    if interpolate_nan:
+
+        weights = np.sum(kernel.data) - np.fft.irfftn(np.fft.rfftn(invalid.astype(float), shape) * transform, shape)[:ny, :nx]
+        with np.errstate(divide="ignore", invalid="ignore"): result /= weights
+        result[np.isclose(weights, 0.0)] = np.nan
+
+    # Return the result
+    return result
+
+# -----------------------------------------------------------------
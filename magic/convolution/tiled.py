@@ -0,0 +1,158 @@
+#!/usr/bin/env python
+# -*- coding: utf8 -*-
+# *****************************************************************
+# **       PTS -- Python Toolkit for working with SKIRT          **
+# **       © Astronomical Observatory, Ghent University          **
+# *****************************************************************
+
+## \package pts.magic.convolution.tiled Contains functions to convolve large frames tile by tile.
+#
+# The frame is divided into output tiles. Each tile is convolved from an input block that is the tile extended by half
+# the kernel size on every side (overlap-save), so that the result is identical to convolving the whole frame at once
+# (with zeros outside the frame), while only the FFT buffers for one block are needed at a time. All full tiles have
+# the same padded shape, so the kernel transform is calculated only once per process. The tiles can be convolved
+# in parallel.
+
+# -----------------------------------------------------------------
+
+# Ensure Python 3 compatibility
+from __future__ import absolute_import, division, print_function
+
+# Import standard modules
+import numpy as np
+import multiprocessing
+
+# Import the relevant PTS classes and modules
+from .cache import convolve_fft
+from ...core.basics.log import log
+from ...core.tools.parallelization import ParallelTarget, ncores
+
+# -----------------------------------------------------------------
+
+# Frames with more pixels than this are convolved tile by tile when the convolution mode is chosen automatically
+tiled_threshold = 4096 * 4096
+
+# The default size (number of pixels in x and y) of the output tiles
+default_tile_size = 2048
+
+# -----------------------------------------------------------------
+
+def needs_tiling(shape, kernel_shape=None):
+
+    """
+    This function decides whether a frame with the given shape should be convolved tile by tile
+    :param shape:
+    :param kernel_shape:
+    :return:
+    """
+
+    npixels = shape[0] * shape[1]
+    if kernel_shape is not None: npixels = (shape[0] + kernel_shape[0]) * (shape[1] + kernel_shape[1])
+    return npixels > tiled_threshold
+
+# -----------------------------------------------------------------
+
+def tile_ranges(size, tile_size):
+
+    """
+    This function returns the (start, stop) index ranges of the tiles along one axis
+    :param size:
+    :param tile_size:
+    :return:
+    """
+
+    return [(start, min(start + tile_size, size)) for start in range(0, size, tile_size)]
+
+# -----------------------------------------------------------------
+
+def convolve_block(block, kernel, y_offset, x_offset, ny, nx, interpolate_nan=True):
+
+    """
+    This function convolves an input block and returns the part that corresponds to the output tile
+    :param block:
+    :param kernel:
+    :param y_offset: the position of the output tile in the block
+    :param x_offset:
+    :param ny: the shape of the output tile
+    :param nx:
+    :param interpolate_nan:
+    :return:
+    """
+
+    result = convolve_fft(block, kernel, interpolate_nan=interpolate_nan)
+    return np.ascontiguousarray(result[y_offset:y_offset + ny, x_offset:x_offset + nx])
+
+# -----------------------------------------------------------------
+
+def convolve_tiled(data, kernel, tile_size=None, interpolate_nan=True, nprocesses=1):
+
+    """
+    This function convolves the data with the (prepared) kernel tile by tile
+    :param data:
+    :param kernel:
+    :param tile_size:
+    :param interpolate_nan:
+    :param nprocesses:
+    :return:
+    """
+
+    if tile_size is None: tile_size = default_tile_size
+
+    # Processes of a pool cannot create processes themselves
+    if nprocesses > 1 and multiprocessing.current_process().daemon: nprocesses = 1
+
+    # Determine the margins around the tiles
+    ysize, xsize = data.shape
+    y_margin = kernel.shape[0] // 2
+    x_margin = kernel.shape[1] // 2
+
+    # Determine the tiles
+    tiles = [(y_range, x_range) for y_range in tile_ranges(ysize, tile_size) for x_range in tile_ranges(xsize, tile_size)]
+
+    # Debugging
+    log.debug("Convolving a frame of " + str(xsize) + " x " + str(ysize) + " pixels in " + str(len(tiles)) + " tiles with " + str(nprocesses) + " process(es) ...")
+
+    # Initialize the output
+    result = np.empty(data.shape)
+
+    # Process the tiles in batches of nprocesses, so that only a limited number of blocks is in memory
+    for batch_start in range(0, len(tiles), nprocesses):
+
+        outputs = []
+
+        with ParallelTarget(convolve_block, nprocesses, shared=True, reuse=True) as target:
+
+            for (y_min, y_max), (x_min, x_max) in tiles[batch_start:batch_start + nprocesses]:
+
+                # Determine the input block (clipped at the frame edges, where the values are zero)
+                block_y_min = max(y_min - y_margin, 0)
+                block_y_max = min(y_max + y_margin, ysize)
+                block_x_min = max(x_min - x_margin, 0)
+                block_x_max = min(x_max + x_margin, xsize)
+                block = data[block_y_min:block_y_max, block_x_min:block_x_max]
+
+                # Convolve
+                output = target(block, kernel, y_min - block_y_min, x_min - block_x_min, y_max - y_min, x_max - x_min, interpolate_nan=interpolate_nan)
+                outputs.append(((y_min, y_max, x_min, x_max), output))
+
+        # Put the tiles in the result
+        for (y_min, y_max, x_min, x_max), output in outputs:
+            output.request()
+            result[y_min:y_max, x_min:x_max] = output.output
+
+    # Return the result
+    return result
+
+# -----------------------------------------------------------------
+
+def default_nprocesses():
+
+    """
+    This function returns the default number of processes for tiled convolution
+    :return:
+    """
+
+    try: return max(ncores(), 1)
+    except (TypeError, ValueError): return 1
+
+# -----------------------------------------------------------------
@@ -58,17 +58,18 @@ class DataCube(Image):
     # -----------------------------------------------------------------
 
     @classmethod
-    def from_file(cls, image_path, wavelength_grid):
+    def from_file(cls, image_path, wavelength_grid, lazy=False):
 
         """
         This function ...
         :param image_path:
         :param wavelength_grid:
+        :param lazy: keep the data memory-mapped, so that the frames are only read when they are touched
         :return:
         """
 
         # Call the corresponding base class function
-        datacube = super(DataCube, cls).from_file(image_path, always_call_first_primary=False, no_filter=True)
+        datacube = super(DataCube, cls).from_file(image_path, always_call_first_primary=False, no_filter=True, lazy=lazy)
 
         # Check wavelength grid size
         assert len(wavelength_grid) == datacube.nframes
@@ -24,15 +24,13 @@ from astropy.units import Quantity
 # Import the relevant PTS classes and modules
 from ...core.tools import filesystem as fs
 from .frame import Frame
-from .fits import get_frame_names, get_mask_names, get_plane_names
 from ...core.basics.log import log
 from .datacube import DataCube
 from .image import Image
 from .mask import Mask
-from ..basics.coordinatesystem import CoordinateSystem
 from ...core.basics.configurable import Configurable
 from ..region.list import SkyRegionList
-from ..tools import headers
+from . import headercatalog
 from .list import NamedImageList, NamedFrameList, FrameList, ImageList
 from ...core.tools import types
 from ...core.filter.filter import parse_filter
@@ -353,8 +351,7 @@ class DataSet(object):
         :return:
         """
 
-        header = self.get_header(name)
-        return headers.get_filter(name, header)
+        return headercatalog.get_filter(self.paths[name], name)
         #return self.get_frame(name).filter
 
     # -----------------------------------------------------------------
@@ -367,12 +364,7 @@ class DataSet(object):
         :return:
         """
 
-        header = self.get_header(name)
-        pixelscale = headers.get_pixelscale(header)
-        if pixelscale is None:
-            wcs = CoordinateSystem(header)
-            return wcs.pixelscale
-        else: return pixelscale
+        return headercatalog.get_pixelscale(self.paths[name])
 
     # -----------------------------------------------------------------
 
@@ -384,7 +376,7 @@ class DataSet(object):
         :return:
         """
 
-        return self.get_frame(name).wavelength
+        return headercatalog.get_wavelength(self.paths[name])
 
     # -----------------------------------------------------------------
 
@@ -396,8 +388,8 @@ class DataSet(object):
         :return:
         """
 
-        # Load the header and return it
-        return fits.getheader(self.paths[name])
+        # Get the header from the header catalog
+        return headercatalog.get_header(self.paths[name])
 
     # -----------------------------------------------------------------
 
@@ -1069,7 +1061,7 @@ class DataSet(object):
         :return:
         """
 
-        return CoordinateSystem.from_file(self.paths[name])
+        return headercatalog.get_wcs(self.paths[name])
 
     # -----------------------------------------------------------------
 
@@ -1431,8 +1423,7 @@ class DataSet(object):
         for name in self.paths:
 
             # Get the FWHM
-            header = self.get_header(name)
-            header_fwhm = headers.get_fwhm(header)
+            header_fwhm = headercatalog.get_fwhm(self.paths[name])
 
             if fwhm is None or header_fwhm < fwhm: fwhm = header_fwhm
 
@@ -1454,8 +1445,7 @@ class DataSet(object):
         for name in self.paths:
 
             # Get the FWHM
-            header = self.get_header(name)
-            header_fwhm = headers.get_fwhm(header)
+            header_fwhm = headercatalog.get_fwhm(self.paths[name])
 
             if fwhm is None or header_fwhm > fwhm: fwhm = header_fwhm
 
@@ -1489,8 +1479,7 @@ class DataSet(object):
         for name in self.paths:
 
             # Get the wavelength
-            header = self.get_header(name)
-            header_wavelength = headers.get_filter(name, header).pivot
+            header_wavelength = self.get_filter(name).pivot
 
             if wavelength is None or header_wavelength < wavelength: wavelength = header_wavelength
 
@@ -1512,8 +1501,7 @@ class DataSet(object):
         for name in self.paths:
 
             # Get the wavelength
-            header = self.get_header(name)
-            header_wavelength = headers.get_filter(name, header).pivot
+            header_wavelength = self.get_filter(name).pivot
 
             if wavelength is None or header_wavelength > wavelength: wavelength = header_wavelength
 
@@ -1633,7 +1621,7 @@ class DataSet(object):
 
         # Get the errors frame
         if name in self.error_paths: errors = Frame.from_file(self.error_paths[name])
-        elif "errors" in get_frame_names(self.paths[name]): errors = Frame.from_file(self.paths[name], plane="errors")
+        elif "errors" in headercatalog.get_plane_names(self.paths[name], "frame"): errors = Frame.from_file(self.paths[name], plane="errors")
         else: return None
 
         # Check if the error frame has to be masked
@@ -1876,7 +1864,7 @@ class DataSet(object):
         :return:
         """
 
-        return get_plane_names(self.paths[name])
+        return headercatalog.get_plane_names(self.paths[name])
 
     # -----------------------------------------------------------------
 
@@ -1888,7 +1876,7 @@ class DataSet(object):
         :return:
         """
 
-        return get_frame_names(self.paths[name])
+        return headercatalog.get_plane_names(self.paths[name], "frame")
 
     # -----------------------------------------------------------------
 
@@ -1900,7 +1888,7 @@ class DataSet(object):
         :return:
         """
 
-        return get_mask_names(self.paths[name])
+        return headercatalog.get_plane_names(self.paths[name], "mask")
 
     # -----------------------------------------------------------------
 
@@ -177,7 +177,70 @@ def get_info(path):
 
 # -----------------------------------------------------------------
 
-def load_frames(path, index=None, name=None, description=None, always_call_first_primary=True, rebin_to_wcs=False, hdulist_index=0, no_filter=False):
+def open_hdulist(path, lazy=False):
+
+    """
+    This function opens the HDU list of a FITS file. In lazy mode, the HDUs (headers) are only read when they are
+    accessed. The file is memory-mapped where possible (memmap is not forced, because astropy then refuses to read
+    scaled data, also through sections).
+    :param path:
+    :param lazy:
+    :return:
+    """
+
+    if lazy: return fits.open(path, lazy_load_hdus=True)
+    else: return fits.open(path)
+
+# -----------------------------------------------------------------
+
+def first_data_hdu_index(hdulist, lazy=False):
+
+    """
+    This function returns the index of the first HDU with data. In lazy mode, this is decided from the headers alone.
+    :param hdulist:
+    :param lazy:
+    :return:
+    """
+
+    for index, hdu in enumerate(hdulist):
+        if lazy and hdu.header.get("NAXIS", 0) > 0: return index
+        if not lazy and hdu.data is not None: return index
+
+    raise ValueError("The FITS file does not contain any data")
+
+# -----------------------------------------------------------------
+
+def is_scaled(header):
+
+    """
+    This function checks whether the data of an HDU is scaled (BSCALE, BZERO or BLANK), in which case astropy can't
+    give a view on the memory-mapped file but has to read and convert all of the data
+    :param header:
+    :return:
+    """
+
+    return header.get("BSCALE", 1) != 1 or header.get("BZERO", 0) != 0 or "BLANK" in header
+
+# -----------------------------------------------------------------
+
+def get_plane_data(hdu, index=None, lazy=False):
+
+    """
+    This function returns the data of an HDU, or of the plane with the given index. In lazy mode, this is a view on the
+    memory-mapped file, which is only read from disk when it is touched, or, for scaled data, only the requested plane
+    is read (through the section interface).
+    :param hdu:
+    :param index:
+    :param lazy:
+    :return:
+    """
+
+    if lazy and is_scaled(hdu.header): return hdu.section[index] if index is not None else hdu.section[:]
+    else: return hdu.data[index] if index is not None else hdu.data
+
+# -----------------------------------------------------------------
+
+def load_frames(path, index=None, name=None, description=None, always_call_first_primary=True, rebin_to_wcs=False, hdulist_index=0, no_filter=False, lazy=False):
 
     """
     This function ...
@@ -188,6 +251,8 @@ def load_frames(path, index=None, name=None, description=None, always_call_first
     :param always_call_first_primary:
     :param rebin_to_wcs:
     :param hdulist_index:
+    :param no_filter:
+    :param lazy: keep the data memory-mapped, so that the planes are only read when they are touched
     :return:
     """
 
@@ -206,13 +271,13 @@ def load_frames(path, index=None, name=None, description=None, always_call_first
     log.debug("Reading in file '" + path + "' ...")
 
     # Open the HDU list for the FITS file
-    hdulist = fits.open(path)
+    hdulist = open_hdulist(path, lazy=lazy)
 
     # Get the primary HDU
     hdu = hdulist[hdulist_index]
 
     # Check whether the data can be read
-    try: first_plane = hdu.data[0]
+    try: first_plane = get_plane_data(hdu, 0, lazy=lazy)
     except TypeError: raise DamagedFITSFileError("The FITS file is damaged", path=path)
 
     # Get the image header
@@ -291,7 +356,7 @@ def load_frames(path, index=None, name=None, description=None, always_call_first
             if plane_type == "frame":
 
                 # data, wcs=None, name=None, description=None, unit=None, zero_point=None, filter=None, sky_subtracted=False, fwhm=None
-                frame = Frame(hdu.data[i],
+                frame = Frame(get_plane_data(hdu, i, lazy=lazy),
                               wcs=wcs,
                               name=name,
                               description=description,
@@ -309,12 +374,12 @@ def load_frames(path, index=None, name=None, description=None, always_call_first
             elif plane_type == "mask":
 
                 #data, name=None, description=None
-                mask = Mask(hdu.data[i], name=name, description=description)
+                mask = Mask(get_plane_data(hdu, i, lazy=lazy), name=name, description=description)
                 masks[name] = mask
 
             elif plane_type == "segments":
 
-                segments_map = SegmentationMap(hdu.data[i], wcs=wcs, name=name, description=description)
+                segments_map = SegmentationMap(get_plane_data(hdu, i, lazy=lazy), wcs=wcs, name=name, description=description)
                 segments[name] = segments_map
 
             else: raise ValueError("Unrecognized type (must be frame, mask or segments)")
@@ -322,7 +387,7 @@ def load_frames(path, index=None, name=None, description=None, always_call_first
     else:
 
         # Sometimes, the 2D frame is embedded in a 3D array with shape (1, xsize, ysize)
-        if len(hdu.data.shape) == 3: hdu.data = hdu.data[0]
+        data = get_plane_data(hdu, 0 if original_header["NAXIS"] == 3 else None, lazy=lazy)
 
         if name is None: name = "primary"
         if description is None: description = "the primary signal map"
@@ -338,7 +403,7 @@ def load_frames(path, index=None, name=None, description=None, always_call_first
         if plane_type == "frame":
 
             # data, wcs=None, name=None, description=None, unit=None, zero_point=None, filter=None, sky_subtracted=False, fwhm=None
-            frame = Frame(hdu.data,
+            frame = Frame(data,
                           wcs=wcs,
                           name=name,
                           description=description,
@@ -358,14 +423,14 @@ def load_frames(path, index=None, name=None, description=None, always_call_first
         # Mask
         elif plane_type == "mask":
 
-            mask = Mask(hdu.data, name=name, description=description)
+            mask = Mask(data, name=name, description=description)
             # Add the mask
             masks[name] = mask
 
         # Segmentation map
         elif plane_type == "segments":
 
-            segments_map = SegmentationMap(hdu.data, wcs=wcs, name=name, description=description)
+            segments_map = SegmentationMap(data, wcs=wcs, name=name, description=description)
             # Add the segmentation map
             segments[name] = segments_map
 
@@ -373,7 +438,10 @@ def load_frames(path, index=None, name=None, description=None, always_call_first
         else: raise ValueError("Unrecognized type (must be frame or mask)")
 
     # Add meta information
-    for key in original_header: metadata[key.lower()] = original_header[key]
+    for key in original_header:
+        if key in encoding_keywords: continue
+        if isinstance(original_header[key], fits.header._HeaderCommentaryCards): continue
+        metadata[key.lower()] = original_header[key]
 
     # Close the FITS file
     hdulist.close()
@@ -384,12 +452,16 @@ def load_frames(path, index=None, name=None, description=None, always_call_first
 # -----------------------------------------------------------------
 
 wcs_keywords = ["RA", "DEC", "CD1_1", "CD1_2", "CD2_1", "CD2_2", "PC1_1", "PC1_2", "PC2_1", "PC2_2", "EQUINOX", "EPOCH", "WCSDIM", "NAXIS", "CRPIX1", "CRPIX2", "LONPOLE", "CTYPE2", "CTYPE1", "NAXIS1", "NAXIS2", "WCSAXES", "NAXIS3", "RADESYS", "CDELT1", "CDELT2", "LATPOLE", "CUNIT1", "CUNIT2", "CRVAL1", "CRVAL2"]
-other_ignore_keywords = ["ORIGIN", "BITPIX", "FILTER", "UNIT", "FWHM", "PHYSTYPE", "DISTANCE", "SIGUNIT", "PSFFLTR", "BUNIT"]
+other_ignore_keywords = ["ORIGIN", "BITPIX", "FILTER", "UNIT", "FWHM", "PHYSTYPE", "DISTANCE", "SIGUNIT", "PSFFLTR", "BUNIT", "BSCALE", "BZERO", "BLANK"]
+
+# The keywords that describe how the data is stored in the file (astropy removes or changes them when it reads scaled
+# data, which is not done in lazy mode)
+encoding_keywords = ["BITPIX", "BSCALE", "BZERO", "BLANK"]
 
 # -----------------------------------------------------------------
 
 def load_frame(cls, path, index=None, name=None, description=None, plane=None, hdulist_index=None, no_filter=False,
-               fwhm=None, add_meta=True, extra_meta=None, distance=None):
+               fwhm=None, add_meta=True, extra_meta=None, distance=None, lazy=False):
 
     """
     This function ...
@@ -405,6 +477,7 @@ def load_frame(cls, path, index=None, name=None, description=None, plane=None, h
     :param add_meta:
     :param extra_meta:
     :param distance:
+    :param lazy: keep the data memory-mapped, so that only the requested HDU and plane are read (when they are touched)
     :return:
     """
 
@@ -416,23 +489,10 @@ def load_frame(cls, path, index=None, name=None, description=None, plane=None, h
     metadata = dict()
 
     # Open the HDU list for the FITS file
-    hdulist = fits.open(path)
+    hdulist = open_hdulist(path, lazy=lazy)
 
     # Look for the first HDU with data
-    if hdulist_index is None:
-
-        #try:
-        _hdulist_index = 0
-        while True:
-
-            if hdulist[_hdulist_index].data is not None:
-                hdulist_index = _hdulist_index
-                break
-            _hdulist_index += 1
-
-        if hdulist_index is None: raise ValueError("The FITS file does not contain any data")
-        #except TypeError: # TypeError: buffer is too small for requested array
-        #    hdulist_index = 0
+    if hdulist_index is None: hdulist_index = first_data_hdu_index(hdulist, lazy=lazy)
 
     # Get the primary HDU
     hdu = hdulist[hdulist_index]
@@ -626,7 +686,7 @@ def load_frame(cls, path, index=None, name=None, description=None, plane=None, h
         if name is None: name = fs.name(path[:-5])
 
         # Create the frame
-        frame = cls(hdu.data[index],
+        frame = cls(get_plane_data(hdu, index, lazy=lazy),
                    wcs=wcs,
                    name=name,
                    description=description,
@@ -653,13 +713,13 @@ def load_frame(cls, path, index=None, name=None, description=None, plane=None, h
     else:
 
         # Sometimes, the 2D frame is embedded in a 3D array with shape (1, xsize, ysize)
-        if len(hdu.data.shape) == 3: hdu.data = hdu.data[0]
+        data = get_plane_data(hdu, 0 if header["NAXIS"] == 3 else None, lazy=lazy)
 
         # Get the name from the file path
         if name is None: name = fs.name(path[:-5])
 
         # Create the frame
-        frame = cls(hdu.data,
+        frame = cls(data,
                    wcs=wcs,
                    name=name,
                    description=description,
@@ -35,6 +35,7 @@ from ..region.rectangle import SkyRectangleRegion, PixelRectangleRegion
 from ..basics.coordinate import SkyCoordinate
 from ..basics.stretch import SkyStretch
 from ..tools import cropping
+from ..tools import rebinning
 from ...core.basics.log import log
 from ..basics.mask import Mask, MaskBase
 from ...core.tools import filesystem as fs
@@ -45,6 +46,7 @@ from ...core.filter.filter import parse_filter
 from .mask import Mask as newMask
 from .alpha import AlphaMask
 from ..convolution.kernels import get_fwhm, has_variable_fwhm
+from ..convolution.tiled import needs_tiling, convolve_tiled, default_nprocesses as tiled_nprocesses
 from ...core.tools import types
 from ...core.units.parsing import parse_unit as u
 from ..basics.vector import PixelShape
@@ -774,7 +776,7 @@ class Frame(NDDataArray):
 
     @classmethod
     def from_file(cls, path, index=None, name=None, description=None, plane=None, hdulist_index=None, no_filter=False,
-                  fwhm=None, add_meta=True, extra_meta=None, silent=False, distance=None):
+                  fwhm=None, add_meta=True, extra_meta=None, silent=False, distance=None, lazy=False):
 
         """
         This function ...
@@ -790,6 +792,7 @@ class Frame(NDDataArray):
         :param extra_meta:
         :param silent:
         :param distance:
+        :param lazy: keep the data memory-mapped (only the requested plane is read, when it is touched)
         :return:
         """
 
@@ -798,7 +801,7 @@ class Frame(NDDataArray):
 
         from ..core.fits import load_frame
         # PASS CLS TO ENSURE THIS CLASSMETHOD WORKS FOR ENHERITED CLASSES!!
-        try: return load_frame(cls, path, index, name, description, plane, hdulist_index, no_filter, fwhm, add_meta=add_meta, extra_meta=extra_meta, distance=distance)
+        try: return load_frame(cls, path, index, name, description, plane, hdulist_index, no_filter, fwhm, add_meta=add_meta, extra_meta=extra_meta, distance=distance, lazy=lazy)
         except TypeError: raise IOError("File is possibly damaged")
 
     # -----------------------------------------------------------------
@@ -1767,6 +1770,56 @@ class Frame(NDDataArray):
 
     # -----------------------------------------------------------------
 
+    def quality_statistics(self, region_or_mask):
+
+        """
+        This function returns the indicators of the quality of the frame (NaNs, infinities, zeroes, negative values and
+        constant values) for the complete frame and within the given region or mask, as all_nans, nnans_in,
+        is_constant_in, ... but with one pass over the data
+        :param region_or_mask:
+        :return: a dictionary
+        """
+
+        # Get mask
+        if isinstance(region_or_mask, PixelRegion): mask = region_or_mask.to_mask(self.xsize, self.ysize)
+        elif isinstance(region_or_mask, Mask): mask = region_or_mask
+        else: raise ValueError("Argument must be pixel region or mask")
+        inside = np.asarray(mask.data if hasattr(mask, "data") else mask, dtype=bool)
+
+        # Get the pixels that are NaN, infinity, zero and negative
+        nans = np.isnan(self._data)
+        infs = np.isinf(self._data)
+        zeroes = np.equal(self._data, zero_value)
+        negatives = np.less(self._data, zero_value)
+
+        statistics = dict()
+
+        # Complete frame
+        statistics["all_nans"] = bool(np.all(nans))
+        statistics["all_infs"] = bool(np.all(infs))
+        statistics["all_zeroes"] = bool(np.all(zeroes))
+        statistics["all_negatives"] = bool(np.all(negatives))
+        statistics["constant"] = not statistics["all_nans"] and bool(np.nanmax(self._data) == np.nanmin(self._data))
+
+        # Within the region or mask
+        values = self._data[inside]
+        statistics["npixels_in"] = int(np.sum(inside))
+        statistics["nnans_in"] = int(np.sum(nans[inside]))
+        statistics["ninfs_in"] = int(np.sum(infs[inside]))
+        statistics["nzeroes_in"] = int(np.sum(zeroes[inside]))
+        statistics["nnegatives_in"] = int(np.sum(negatives[inside]))
+        statistics["constant_in"] = statistics["nnans_in"] < statistics["npixels_in"] and bool(np.nanmax(values) == np.nanmin(values))
+
+        # Center pixel
+        center_value = self.center_value
+        statistics["center_nan"] = bool(np.isnan(center_value))
+        statistics["center_inf"] = bool(np.isinf(center_value))
+
+        # Return the statistics
+        return statistics
+
+    # -----------------------------------------------------------------
+
     @property
     def xsize(self): return self.shape.x
 
@@ -2081,13 +2134,18 @@ class Frame(NDDataArray):
 
     # -----------------------------------------------------------------
 
-    def convolve(self, kernel, allow_huge=True, fft=True):
+    def convolve(self, kernel, allow_huge=True, fft=True, cache=False, tiled=None, nprocesses=None, tile_size=None):
 
         """
         This function ...
         :param kernel:
         :param allow_huge:
         :param fft:
+        :param cache: use the cache of prepared kernels and kernel Fourier transforms (the FFT convolution is then done with
+                      the cached kernel transform instead of with astropy's convolve_fft)
+        :param tiled: convolve tile by tile with bounded memory (None: automatically for large frames)
+        :param nprocesses: the number of processes for tiled convolution (None: the number of cores)
+        :param tile_size: the size of the tiles for tiled convolution
         :return:
         """
 
@@ -2102,7 +2160,11 @@ class Frame(NDDataArray):
             return
 
         # Check whether the kernel is prepared
-        if not kernel.prepared:
+        if not kernel.prepared and cache:
+            log.warning("The convolution kernel is not prepared, getting a prepared copy ...")
+            from ..convolution.cache import prepared_kernel
+            kernel = prepared_kernel(kernel, self.pixelscale)
+        elif not kernel.prepared:
             log.warning("The convolution kernel is not prepared, creating a prepared copy ...")
             kernel = kernel.copy()
             kernel.prepare(self.pixelscale)
@@ -2113,8 +2175,17 @@ class Frame(NDDataArray):
         # Assert that the kernel is normalized
         if not kernel.normalized: raise RuntimeError("The kernel is not properly normalized: sum is " + repr(kernel.sum()) + " , difference from unity is " + repr(kernel.sum() - 1.0))
 
+        # Determine whether the convolution should be done tile by tile
+        if tiled is None: tiled = fft and needs_tiling(self.shape, kernel.shape)
+
         # Do the convolution on this frame
-        if fft: new_data = convolve_fft(self._data, kernel.data, normalize_kernel=False, interpolate_nan=True, allow_huge=allow_huge)
+        if tiled:
+            if nprocesses is None: nprocesses = tiled_nprocesses()
+            new_data = convolve_tiled(self._data, kernel, tile_size=tile_size, interpolate_nan=True, nprocesses=nprocesses)
+        elif fft and cache:
+            from ..convolution.cache import convolve_fft as convolve_fft_cached
+            new_data = convolve_fft_cached(self._data, kernel, interpolate_nan=True)
+        elif fft: new_data = convolve_fft(self._data, kernel.data, normalize_kernel=False, interpolate_nan=True, allow_huge=allow_huge)
         else: new_data = convolve(self._data, kernel.data, normalize_kernel=False)
 
         # Put back NaNs
@@ -2143,13 +2214,17 @@ class Frame(NDDataArray):
 
     # -----------------------------------------------------------------
 
-    def rebin(self, reference_wcs, exact=False, parallel=True):
+    def rebin(self, reference_wcs, exact=False, parallel=True, tiled=None, nprocesses=None, memmap=False, cache=False):
 
         """
         This function ...
         :param reference_wcs:
         :param exact:
         :param parallel:
+        :param tiled: rebin tile by tile with bounded memory (None: automatically for large frames)
+        :param nprocesses: the number of processes for tiled rebinning (None: the number of cores if parallel)
+        :param memmap: map the rebinned data to a temporary file
+        :param cache: cache the pixel coordinate mapping for tiled interpolation (see rebinning.clear)
         :return:
         """
 
@@ -2159,9 +2234,15 @@ class Frame(NDDataArray):
         # Check the unit
         #if self.unit is not None and not self.unit.is_per_pixelsize: raise ValueError("Cannot rebin a frame that is expressed per angular area. First convert the units.")
 
+        # Determine whether the rebinning should be done tile by tile
+        if tiled is None: tiled = rebinning.needs_tiling(self.shape, reference_wcs.shape)
+        if nprocesses is None: nprocesses = rebinning.default_nprocesses() if parallel and tiled else 1
+
         # Calculate rebinned data and footprint of the original image
-        if exact: new_data, footprint = reproject_exact((self._data, self.wcs), reference_wcs, shape_out=reference_wcs.shape, parallel=parallel)
-        else: new_data, footprint = reproject_interp((self._data, self.wcs), reference_wcs, shape_out=reference_wcs.shape)
+        if exact and not tiled: new_data, footprint = reproject_exact((self._data, self.wcs), reference_wcs, shape_out=reference_wcs.shape, parallel=parallel)
+        elif exact: new_data, footprint = rebinning.rebin(self._data, self.wcs, reference_wcs, exact=True, nprocesses=nprocesses, memmap=memmap)
+        elif not tiled: new_data, footprint = reproject_interp((self._data, self.wcs), reference_wcs, shape_out=reference_wcs.shape)
+        else: new_data, footprint = rebinning.rebin(self._data, self.wcs, reference_wcs, nprocesses=nprocesses, memmap=memmap, cache=cache)
 
         # Replace the data and WCS
         self._data = new_data
@@ -0,0 +1,313 @@
+#!/usr/bin/env python
+# -*- coding: utf8 -*-
+# *****************************************************************
+# **       PTS -- Python Toolkit for working with SKIRT          **
+# **       © Astronomical Observatory, Ghent University          **
+# *****************************************************************
+
+## \package pts.magic.core.headercatalog Contains functions to get the header information of FITS files through a persistent catalog.
+#
+# The first time the header of a FITS file is requested, a summary (the primary header, the shape, the names and types
+# of the planes and the wavelength) is written to a hidden catalog file in the directory of the FITS file, together with
+# the size and modification time of the file. Later requests (also from other processes) take the summary from the
+# catalog instead of opening the FITS file, as long as the size and modification time of the file have not changed.
+# The objects that are derived from the header (filters, pixelscales, units and coordinate systems) are kept in memory.
+
+# -----------------------------------------------------------------
+
+# Ensure Python 3 compatibility
+from __future__ import absolute_import, division, print_function
+
+# Import standard modules
+import os
+import copy
+import json
+
+# Import astronomical modules
+from astropy.io import fits
+
+# Import the relevant PTS classes and modules
+from ..tools import headers
+from ..basics.coordinatesystem import CoordinateSystem
+from ...core.tools import filesystem as fs
+from ...core.basics.log import log
+from ...core.units.parsing import parse_unit as u
+
+# -----------------------------------------------------------------
+
+# The name of the catalog file in each directory
+catalog_name = ".headers.json"
+
+# The summaries in memory, by absolute file path
+summaries = dict()
+
+# The objects derived from the headers, by absolute file path
+derived = dict()
+
+# -----------------------------------------------------------------
+
+def catalog_path_for(path):
+
+    """
+    This function returns the path of the catalog for the FITS file with the given path
+    :param path:
+    :return:
+    """
+
+    return fs.join(fs.directory_of(path), catalog_name)
+
+# -----------------------------------------------------------------
+
+def load_catalog(catalog_path):
+
+    """
+    This function loads the catalog with the given path (an empty catalog if it doesn't exist or can't be read)
+    :param catalog_path:
+    :return:
+    """
+
+    if not fs.is_file(catalog_path): return dict()
+
+    try:
+        with open(catalog_path, "r") as catalog_file: return json.load(catalog_file)
+    except (IOError, ValueError):
+        log.warning("The header catalog '" + catalog_path + "' could not be read")
+        return dict()
+
+# -----------------------------------------------------------------
+
+def write_catalog(catalog, catalog_path):
+
+    """
+    This function writes the catalog (replacing the file at once, so that other processes never read a partial file)
+    :param catalog:
+    :param catalog_path:
+    :return:
+    """
+
+    temp_path = catalog_path + "." + str(os.getpid()) + ".tmp"
+
+    try:
+        with open(temp_path, "w") as catalog_file: json.dump(catalog, catalog_file)
+        os.rename(temp_path, catalog_path)
+    except (IOError, OSError):
+        log.warning("The header catalog '" + catalog_path + "' could not be written")
+        if fs.is_file(temp_path): fs.remove_file(temp_path)
+
+# -----------------------------------------------------------------
+
+def create_summary(path, signature):
+
+    """
+    This function creates the summary of the FITS file with the given path
+    :param path:
+    :param signature:
+    :return:
+    """
+
+    # Read the header
+    header = fits.getheader(path)
+
+    # Get the names, descriptions and types of the planes
+    planes = [list(headers.get_frame_name_and_description(header, index, always_call_first_primary=False)) for index in range(headers.get_number_of_frames(header))]
+
+    # Get the shape
+    shape = [header[key] for key in ("NAXIS2", "NAXIS1") if key in header]
+
+    # Get the wavelength (as in Frame.from_file: the wavelength of the filter or the wavelength in the header)
+    fltr = headers.get_filter(fs.name(path[:-5]), header)
+    wavelength = fltr.wavelength if fltr is not None else headers.get_wavelength(header)
+    wavelength = wavelength.to("micron").value if wavelength is not None else None
+
+    # Create the summary
+    return {"size": signature[0], "mtime": signature[1], "header": header.tostring(), "planes": planes,
+            "shape": shape, "wavelength": wavelength}
+
+# -----------------------------------------------------------------
+
+def get_summary(path):
+
+    """
+    This function returns the summary of the FITS file with the given path
+    :param path:
+    :return:
+    """
+
+    path = fs.absolute_path(path)
+    size, mtime = fs.file_signature(path)
+
+    # In memory and up to date
+    summary = summaries.get(path)
+    if summary is not None and summary["size"] == size and summary["mtime"] == mtime: return summary
+
+    # The file has changed (or is new): remove the derived objects
+    derived.pop(path, None)
+
+    # Look in the catalog
+    catalog_path = catalog_path_for(path)
+    catalog = load_catalog(catalog_path)
+    filename = fs.name(path)
+    summary = catalog.get(filename)
+
+    # Not in the catalog or not up to date
+    if summary is None or summary["size"] != size or summary["mtime"] != mtime:
+
+        # Debugging
+        log.debug("Adding the header of '" + path + "' to the header catalog ...")
+
+        # Create the summary and write the catalog
+        summary = create_summary(path, (size, mtime))
+        catalog[filename] = summary
+        write_catalog(catalog, catalog_path)
+
+    # Keep the summary in memory
+    summaries[path] = summary
+    return summary
+
+# -----------------------------------------------------------------
+
+def get_derived(path, name, calculate):
+
+    """
+    This function returns an object derived from the header of the FITS file, calculating it only once for every
+    version of the file
+    :param path:
+    :param name:
+    :param calculate:
+    :return:
+    """
+
+    summary = get_summary(path)
+    objects = derived.setdefault(fs.absolute_path(path), dict())
+    if name not in objects: objects[name] = calculate(summary)
+    return objects[name]
+
+# -----------------------------------------------------------------
+
+def get_header(path):
+
+    """
+    This function returns (a copy of) the primary header of the FITS file
+    :param path:
+    :return:
+    """
+
+    return get_derived(path, "header", lambda summary: fits.Header.fromstring(summary["header"])).copy()
+
+# -----------------------------------------------------------------
+
+def get_shape(path):
+
+    """
+    This function returns the shape (number of pixels in y and x) of the FITS file
+    :param path:
+    :return:
+    """
+
+    return tuple(get_summary(path)["shape"])
+
+# -----------------------------------------------------------------
+
+def get_wavelength(path):
+
+    """
+    This function returns the wavelength of the image in the FITS file
+    :param path:
+    :return:
+    """
+
+    wavelength = get_summary(path)["wavelength"]
+    return wavelength * u("micron") if wavelength is not None else None
+
+# -----------------------------------------------------------------
+
+def get_plane_names(path, ptype=None):
+
+    """
+    This function returns the names and descriptions of the planes in the FITS file (as fits.get_plane_names)
+    :param path:
+    :param ptype:
+    :return:
+    """
+
+    return dict((name, description) for name, description, plane_type in get_summary(path)["planes"] if ptype is None or plane_type == ptype)
+
+# -----------------------------------------------------------------
+
+def get_filter(path, name):
+
+    """
+    This function returns the filter of the image in the FITS file, determined from the given name and the header
+    :param path:
+    :param name:
+    :return:
+    """
+
+    return get_derived(path, "filter:" + name, lambda summary: headers.get_filter(name, get_header(path)))
+
+# -----------------------------------------------------------------
+
+def get_pixelscale(path):
+
+    """
+    This function returns the pixelscale from the header of the FITS file (from the coordinate system if the header
+    does not specify it)
+    :param path:
+    :return:
+    """
+
+    def calculate(summary):
+        pixelscale = headers.get_pixelscale(get_header(path))
+        return pixelscale if pixelscale is not None else get_wcs(path).pixelscale
+
+    return copy.deepcopy(get_derived(path, "pixelscale", calculate))
+
+# -----------------------------------------------------------------
+
+def get_fwhm(path):
+
+    """
+    This function returns the FWHM from the header of the FITS file
+    :param path:
+    :return:
+    """
+
+    return get_derived(path, "fwhm", lambda summary: headers.get_fwhm(get_header(path)))
+
+# -----------------------------------------------------------------
+
+def get_unit(path):
+
+    """
+    This function returns the unit from the header of the FITS file
+    :param path:
+    :return:
+    """
+
+    return get_derived(path, "unit", lambda summary: headers.get_unit(get_header(path)))
+
+# -----------------------------------------------------------------
+
+def get_wcs(path):
+
+    """
+    This function returns (a copy of) the coordinate system of the FITS file
+    :param path:
+    :return:
+    """
+
+    return copy.deepcopy(get_derived(path, "wcs", lambda summary: CoordinateSystem.from_fits_header(get_header(path), path=path)))
+
+# -----------------------------------------------------------------
+
+def clear():
+
+    """
+    This function clears the summaries and derived objects in memory
+    :return:
+    """
+
+    summaries.clear()
+    derived.clear()
+
+# -----------------------------------------------------------------
@@ -23,6 +23,7 @@ from ..basics.layers import Layers
 from ..region.list import PixelRegionList
 from ..basics.mask import Mask
 from .mask import Mask as newMask
+from ..tools import rebinning
 from ...core.tools import filesystem as fs
 from ...core.basics.log import log
 from .frame import Frame, sum_frames
@@ -76,7 +77,7 @@ class Image(object):
     # -----------------------------------------------------------------
 
     @classmethod
-    def from_file(cls, path, name=None, always_call_first_primary=True, hdulist_index=0, no_filter=False):
+    def from_file(cls, path, name=None, always_call_first_primary=True, hdulist_index=0, no_filter=False, lazy=False):
 
         """
         This function ...
@@ -85,6 +86,7 @@ class Image(object):
         :param always_call_first_primary:
         :param hdulist_index:
         :param no_filter:
+        :param lazy: keep the data memory-mapped, so that the planes are only read when they are touched
         :return:
         """
 
@@ -98,7 +100,7 @@ class Image(object):
         image.path = path
 
         # Load the image frames
-        image.load_frames(path, always_call_first_primary=always_call_first_primary, hdulist_index=hdulist_index, no_filter=no_filter)
+        image.load_frames(path, always_call_first_primary=always_call_first_primary, hdulist_index=hdulist_index, no_filter=no_filter, lazy=lazy)
 
         # Return the image
         return image
@@ -1151,31 +1153,34 @@ class Image(object):
 
     # -----------------------------------------------------------------
 
-    def rebin(self, reference_wcs, exact=False, parallel=True):
+    def rebin(self, reference_wcs, exact=False, parallel=True, tiled=None, nprocesses=None):
 
         """
         This function ...
         :param reference_wcs:
         :param exact:
         :param parallel:
+        :param tiled:
+        :param nprocesses:
         """
 
         # Check whether the image has a WCS
-        if self.has_wcs: raise RuntimeError("Cannot rebin a frame without coordinate system")
+        if not self.has_wcs: raise RuntimeError("Cannot rebin an image without coordinate system")
 
         # Create a copy of the current wcs
         original_wcs = self.wcs.deepcopy()
 
         footprint = None
 
-        # Loop over all currently selected frames
+        # Loop over all currently selected frames (they share the coordinate system, so that the pixel coordinate mapping
+        # for tiled rebinning is calculated only once)
         for frame_name in self.frames:
 
             # Inform the user
             log.debug("Rebinning the " + frame_name + " frame ...")
 
             # Rebin this frame (the reference wcs is automatically set in the new frame)
-            footprint = self.frames[frame_name].rebin(reference_wcs, exact=exact, parallel=parallel)
+            footprint = self.frames[frame_name].rebin(reference_wcs, exact=exact, parallel=parallel, tiled=tiled, nprocesses=nprocesses, cache=True)
 
         # Loop over the masks
         for mask_name in self.masks:
@@ -1187,12 +1192,15 @@ class Image(object):
             mask_frame = Frame(self.masks[mask_name].astype(float), wcs=original_wcs)
 
             # Rebin the mask frame
-            footprint = mask_frame.rebin(reference_wcs, exact=exact, parallel=parallel)
+            footprint = mask_frame.rebin(reference_wcs, exact=exact, parallel=parallel, tiled=tiled, nprocesses=nprocesses, cache=True)
 
             # Return the rebinned mask
             # data, name, description
             self.masks[mask_name] = Mask(mask_frame > 0.5, name=self.masks[mask_name].name, description=self.masks[mask_name].description)
 
+        # Release the cached pixel coordinate mappings
+        rebinning.clear()
+
         # TODO: REBIN THE SEGMENTATION MAPS!!
 
         # If there was any frame or mask, we have footprint
@@ -1534,7 +1542,7 @@ class Image(object):
 
     # -----------------------------------------------------------------
 
-    def load_frames(self, path, index=None, name=None, description=None, always_call_first_primary=True, rebin_to_wcs=False, hdulist_index=0, no_filter=False, silent=False):
+    def load_frames(self, path, index=None, name=None, description=None, always_call_first_primary=True, rebin_to_wcs=False, hdulist_index=0, no_filter=False, silent=False, lazy=False):
 
         """
         This function ...
@@ -1547,6 +1555,7 @@ class Image(object):
         :param hdulist_index:
         :param no_filter:
         :param silent:
+        :param lazy:
         :return:
         """
 
@@ -1559,7 +1568,7 @@ class Image(object):
         # Load frames
         from . import fits as pts_fits
         frames, masks, segments, meta = pts_fits.load_frames(path, index, name, description, always_call_first_primary,
-                                                       rebin_to_wcs, hdulist_index, no_filter)
+                                                       rebin_to_wcs, hdulist_index, no_filter, lazy=lazy)
 
         # Set frames, masks and meta information
         for frame_name in frames: self.add_frame(frames[frame_name], frame_name, silent=True)
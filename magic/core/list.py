@@ -14,6 +14,7 @@ from __future__ import absolute_import, division, print_function
 
 # Import standard modules
 import numpy as np
+from functools import partial
 
 # Import the relevant PTS classes and modules
 from ...core.basics.log import log
@@ -32,6 +33,7 @@ from ...core.tools import filesystem as fs
 from ..convolution.aniano import AnianoKernels
 from ..convolution.matching import MatchingKernels
 from ..convolution.kernels import get_fwhm
+from ..convolution.cache import get_prepared_kernel, file_identity
 from ...core.tools import sequences, types
 from ...core.launch.pts import execute_pts_remote
 from ...core.remote.remote import Remote
@@ -1410,15 +1412,17 @@ class FrameList(FilterBasedList):
 
     # -----------------------------------------------------------------
 
-    def convolve_to_highest_fwhm(self, remote=None):
+    def convolve_to_highest_fwhm(self, remote=None, tiled=None, nprocesses=None):
 
         """
         This function ...
         :param remote:
+        :param tiled: convolve large frames tile by tile (None: automatically)
+        :param nprocesses: the number of processes for tiled convolution
         :return: 
         """
 
-        new_frames = convolve_to_highest_fwhm(*self.values, names=self.filter_names, remote=remote)
+        new_frames = convolve_to_highest_fwhm(*self.values, names=self.filter_names, remote=remote, tiled=tiled, nprocesses=nprocesses)
         self.remove_all()
         for frame in new_frames: self.append(frame)
 
@@ -1933,15 +1937,17 @@ class NamedFrameList(NamedList):
 
     # -----------------------------------------------------------------
 
-    def convolve_to_highest_fwhm(self, remote=None):
+    def convolve_to_highest_fwhm(self, remote=None, tiled=None, nprocesses=None):
 
         """
         This function ...
         :param remote:
+        :param tiled: convolve large frames tile by tile (None: automatically)
+        :param nprocesses: the number of processes for tiled convolution
         :return:
         """
 
-        new_frames = convolve_to_highest_fwhm(*self.values, names=self.names, remote=remote)
+        new_frames = convolve_to_highest_fwhm(*self.values, names=self.names, remote=remote, tiled=tiled, nprocesses=nprocesses)
         self.remove_all()
         for frame in new_frames: self.append(frame)
 
@@ -3081,6 +3087,10 @@ def convolve_to_highest_fwhm(*frames, **kwargs):
     # Get remote
     remote = kwargs.pop("remote", None)
 
+    # Get tiled convolution options
+    tiled = kwargs.pop("tiled", None)
+    nprocesses = kwargs.pop("nprocesses", None)
+
     # Check
     if len(frames) == 1:
 
@@ -3121,7 +3131,8 @@ def convolve_to_highest_fwhm(*frames, **kwargs):
     if names is not None: log.debug("The frame with the highest FWHM is the '" + names[highest_fwhm_index] + "' frame ...")
 
     # Convolve
-    return convolve_to_fwhm(*frames, names=names, fwhm=highest_fwhm, filter=highest_fwhm_filter, remote=remote)
+    if remote is not None: return convolve_to_fwhm(*frames, names=names, fwhm=highest_fwhm, filter=highest_fwhm_filter, remote=remote)
+    else: return convolve_to_fwhm(*frames, names=names, fwhm=highest_fwhm, filter=highest_fwhm_filter, tiled=tiled, nprocesses=nprocesses)
 
 # -----------------------------------------------------------------
 
@@ -3212,6 +3223,10 @@ def convolve_to_fwhm_local(*frames, **kwargs):
     highest_fwhm = kwargs.pop("fwhm")
     highest_fwhm_filter = kwargs.pop("filter")
 
+    # Get tiled convolution options
+    tiled = kwargs.pop("tiled", None)
+    nprocesses = kwargs.pop("nprocesses", None)
+
     # Get kernel services
     aniano = AnianoKernels()
     matching = MatchingKernels()
@@ -3245,7 +3260,13 @@ def convolve_to_fwhm_local(*frames, **kwargs):
             log.debug("Frame " + name + "is convolved to a PSF with FWHM = " + str(highest_fwhm) + " ...")
 
             # Get the kernel, either from aniano or from matching kernels
-            if aniano.has_kernel_for_filters(frame.psf_filter, highest_fwhm_filter): kernel = aniano.get_kernel(frame.psf_filter, highest_fwhm_filter, from_fwhm=frame.fwhm, to_fwhm=highest_fwhm)
+            if aniano.has_kernel_for_filters(frame.psf_filter, highest_fwhm_filter):
+
+                # Get the prepared kernel from the cache, the kernel is only loaded and prepared the first time
+                kernel_path = aniano.get_kernel_path(frame.psf_filter, highest_fwhm_filter, from_fwhm=frame.fwhm, to_fwhm=highest_fwhm)
+                load_kernel = partial(aniano.get_kernel, frame.psf_filter, highest_fwhm_filter, from_fwhm=frame.fwhm, to_fwhm=highest_fwhm)
+                kernel = get_prepared_kernel(file_identity(kernel_path), frame.pixelscale, load_kernel)
+
             else:
 
                 # Get from and to filter
@@ -3261,7 +3282,7 @@ def convolve_to_fwhm_local(*frames, **kwargs):
                 kernel = matching.get_kernel(from_filter, to_filter, frame.pixelscale, from_fwhm=from_fwhm, to_fwhm=to_fwhm)
 
             # Convolve with the kernel
-            convolved = frame.convolved(kernel)
+            convolved = frame.convolved(kernel, tiled=tiled, nprocesses=nprocesses)
 
             # Set the name
             if names is not None: convolved.name = names[index]
@@ -6,6 +6,10 @@
 # *****************************************************************
 
 ## \package pts.magic.core.mask Contains the Mask class.
+#
+# A mask can be stored in a bit-packed form (eight pixels per byte), see the pack and unpack functions of the Mask class.
+# A packed mask is unpacked into a boolean array as soon as its data is accessed. The union and intersection of masks
+# are calculated on the packed bits, and give a packed mask.
 
 # -----------------------------------------------------------------
 
@@ -17,12 +21,12 @@ import numpy as np
 
 # Import astronomical modules
 from astropy.io import fits
-from reproject import reproject_exact, reproject_interp
+from reproject import reproject_exact
 
 # Import the relevant PTS classes and modules
 from ...core.basics.log import log
+from ...core.tools.utils import hybridmethod
 from ..basics.mask import MaskBase
-from ..basics.mask import Mask as oldMask
 
 # -----------------------------------------------------------------
 
@@ -40,6 +44,10 @@ class Mask(MaskBase):
         :param kwargs:
         """
 
+        # The packed bits and the shape of the mask, if the mask is packed
+        self._packed = None
+        self._packed_shape = None
+
         # Call the constructor of the base class
         super(Mask, self).__init__(data, **kwargs)
 
@@ -49,10 +57,168 @@ class Mask(MaskBase):
         # The path
         self.path = None
 
+        # Pack
+        if kwargs.pop("packed", False): self.pack()
+
+    # -----------------------------------------------------------------
+
+    @classmethod
+    def from_packed(cls, packed, shape, **kwargs):
+
+        """
+        This function creates a (packed) mask from packed bits
+        :param packed:
+        :param shape:
+        :param kwargs:
+        :return:
+        """
+
+        mask = cls(np.zeros((0, 0), dtype=bool), **kwargs)
+        mask._array = None
+        mask._packed = packed
+        mask._packed_shape = tuple(shape)
+        return mask
+
+    # -----------------------------------------------------------------
+
+    @property
+    def _data(self):
+
+        """
+        This function returns the boolean data (unpacking the mask if it is packed)
+        :return:
+        """
+
+        if self._packed is not None: self.unpack()
+        return self._array
+
+    # -----------------------------------------------------------------
+
+    @_data.setter
+    def _data(self, value):
+
+        """
+        This function sets the boolean data (the mask is no longer packed)
+        :param value:
+        :return:
+        """
+
+        self._array = value
+        self._packed = None
+        self._packed_shape = None
+
+    # -----------------------------------------------------------------
+
+    @property
+    def packed(self):
+
+        """
+        This function returns whether the mask is packed
+        :return:
+        """
+
+        return self._packed is not None
+
+    # -----------------------------------------------------------------
+
+    def pack(self):
+
+        """
+        This function replaces the boolean data by packed bits (eight pixels per byte)
+        :return:
+        """
+
+        if self.packed: return
+        self._packed = np.packbits(self._array, axis=None)
+        self._packed_shape = self._array.shape
+        self._array = None
+
+    # -----------------------------------------------------------------
+
+    def unpack(self):
+
+        """
+        This function replaces the packed bits by the boolean data
+        :return:
+        """
+
+        if not self.packed: return
+        size = self._packed_shape[0] * self._packed_shape[1]
+        self._array = np.unpackbits(self._packed)[:size].view(bool).reshape(self._packed_shape)
+        self._packed = None
+        self._packed_shape = None
+
+    # -----------------------------------------------------------------
+
+    @property
+    def packed_data(self):
+
+        """
+        This function returns the packed bits of the mask (without packing the mask itself)
+        :return:
+        """
+
+        if self.packed: return self._packed
+        else: return np.packbits(self._array, axis=None)
+
+    # -----------------------------------------------------------------
+
+    @property
+    def shape(self):
+
+        """
+        This function returns the shape of the mask (without unpacking it)
+        :return:
+        """
+
+        if self.packed: return self._packed_shape
+        else: return self._array.shape
+
+    # -----------------------------------------------------------------
+
+    @property
+    def nbytes(self):
+
+        """
+        This function returns the number of bytes of the mask data
+        :return:
+        """
+
+        if self.packed: return self._packed.nbytes
+        else: return self._array.nbytes
+
+    # -----------------------------------------------------------------
+
+    @hybridmethod
+    def union(cls, *args):
+
+        """
+        This function returns the union of the given masks as a packed mask.
+        When invoked on a mask (mask.union(other)), the mask itself is the first of the masks.
+        :param args:
+        :return:
+        """
+
+        return combine_packed(np.bitwise_or, args, cls=cls)
+
+    # -----------------------------------------------------------------
+
+    @hybridmethod
+    def intersection(cls, *args):
+
+        """
+        This function returns the intersection of the given masks as a packed mask.
+        When invoked on a mask (mask.intersection(other)), the mask itself is the first of the masks.
+        :param args:
+        :return:
+        """
+
+        return combine_packed(np.bitwise_and, args, cls=cls)
+
     # -----------------------------------------------------------------
 
     @classmethod
-    def from_file(cls, path, index=None, plane=None, hdulist_index=None):
+    def from_file(cls, path, index=None, plane=None, hdulist_index=None, packed=False):
 
         """
         This function ...
@@ -60,6 +226,7 @@ class Mask(MaskBase):
         :param index:
         :param plane:
         :param hdulist_index:
+        :param packed:
         :return:
         """
 
@@ -79,6 +246,9 @@ class Mask(MaskBase):
         # Set the path
         mask.path = path
 
+        # Pack
+        if packed: mask.pack()
+
         # Return the mask
         return mask
 
@@ -135,20 +305,18 @@ class Mask(MaskBase):
         if not self.has_wcs: raise RuntimeError("Cannot rebin a mask without coordinate system")
 
         # Calculate rebinned data and footprint of the original image
-        if exact: new_data, footprint = reproject_exact((self._data.astype(int), self.wcs), reference_wcs, shape_out=reference_wcs.shape, parallel=parallel)
-        else: new_data, footprint = reproject_interp((self._data.astype(int), self.wcs), reference_wcs, shape_out=reference_wcs.shape)
-
-        #print(new_data)
-        #print(np.sum(np.isnan(new_data)))
-        #print(new_data > threshold)
+        if exact:
+            new_data, footprint = reproject_exact((self._data.astype(np.float32), self.wcs), reference_wcs, shape_out=reference_wcs.shape, parallel=parallel)
+            mask_data = np.logical_or(new_data > threshold, np.isnan(new_data))
 
-        #print(np.isnan(new_data))
-        mask_data = np.logical_or(new_data > threshold, np.isnan(new_data))
-        #print(mask_data)
+        # Interpolate the mask on the four neighbouring pixels, without converting it to floating point as a whole
+        else:
+            from ..tools import rebinning  # Import here because rebinning (indirectly) imports Frame, which imports Mask
+            mask_data, footprint = rebinning.rebin_mask(self._data, self.wcs, reference_wcs, threshold=threshold)
 
         # Replace the data and WCS
         self._data = mask_data
-        self._wcs = reference_wcs.copy()
+        self.wcs = reference_wcs.copy()
 
         # Return the footprint
         from .frame import Frame
@@ -256,8 +424,8 @@ class Mask(MaskBase):
 
         from .fits import write_frame  # Import here because io imports Mask
 
-        # Write to a FITS file
-        write_frame(self._data.astype(int), header, path)
+        # Write to a FITS file (one byte per pixel)
+        write_frame(self._data.astype(np.uint8), header, path)
 
         # Update the path
         if update_path: self.path = path
@@ -317,6 +485,46 @@ class Mask(MaskBase):
 
 # -----------------------------------------------------------------
 
+def packed_bits(mask):
+
+    """
+    This function returns the packed bits of a mask (of any type) or a boolean array
+    :param mask:
+    :return:
+    """
+
+    if isinstance(mask, Mask): return mask.packed_data
+    elif isinstance(mask, MaskBase): return np.packbits(mask.data, axis=None)
+    else: return np.packbits(np.asarray(mask, dtype=bool), axis=None)
+
+# -----------------------------------------------------------------
+
+def combine_packed(operation, masks, cls=None):
+
+    """
+    This function combines masks with a bitwise operation on their packed bits
+    :param operation: np.bitwise_or or np.bitwise_and
+    :param masks:
+    :param cls:
+    :return: a packed mask
+    """
+
+    if cls is None: cls = Mask
+
+    # Check the shapes (masks with different shapes can have the same number of packed bytes)
+    shape = np.shape(masks[0])
+    for mask in masks[1:]:
+        if np.shape(mask) != shape: raise ValueError("The masks have different shapes: " + str(shape) + " and " + str(np.shape(mask)))
+
+    # Combine, one byte for eight pixels
+    result = np.array(packed_bits(masks[0]))
+    for mask in masks[1:]: operation(result, packed_bits(mask), out=result)
+
+    # Create the mask
+    return cls.from_packed(result, shape)
+
+# -----------------------------------------------------------------
+
 def union(*args):
 
     """
@@ -329,14 +537,7 @@ def union(*args):
     # so for one mask, union = 0 + mask = mask
 
     if len(args) == 1: return Mask(args[0])
-
-    #arrays = [arg.data for arg in args]
-    arrays = []
-    for arg in args:
-        if isinstance(arg, MaskBase): arrays.append(arg.data)
-        elif isinstance(arg, oldMask): arrays.append(arg)
-        else: arrays.append(arg)
-    return Mask(np.sum(arrays, axis=0))
+    return combine_packed(np.bitwise_or, args)
 
 # -----------------------------------------------------------------
 
@@ -352,13 +553,6 @@ def intersection(*args):
     # so for one mask, intersection = 1 * mask = mask
 
     if len(args) == 1: return Mask(args[0])
-
-    #arrays = [arg.data for arg in args]
-    arrays = []
-    for arg in args:
-        if isinstance(arg, MaskBase): arrays.append(arg.data)
-        elif isinstance(arg, oldMask): arrays.append(arg)
-        else: arrays.append(arg)
-    return Mask(np.product(arrays, axis=0))
+    return combine_packed(np.bitwise_and, args)
 
 # -----------------------------------------------------------------
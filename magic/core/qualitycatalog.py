@@ -0,0 +1,127 @@
+#!/usr/bin/env python
+# -*- coding: utf8 -*-
+# *****************************************************************
+# **       PTS -- Python Toolkit for working with SKIRT          **
+# **       © Astronomical Observatory, Ghent University          **
+# *****************************************************************
+
+## \package pts.magic.core.qualitycatalog Contains functions to get the quality indicators of maps through a persistent catalog.
+#
+# The quality indicators of a FITS file (see Frame.quality_statistics) within a sky region, together with its FWHM and
+# pixelscale, are written to a hidden catalog file in the directory of the FITS file (as for the header catalog),
+# with the size and modification time of the file. Later requests take the indicators from the catalog instead of
+# loading and scanning the map, as long as the file has not changed.
+
+# -----------------------------------------------------------------
+
+# Ensure Python 3 compatibility
+from __future__ import absolute_import, division, print_function
+
+# Import the relevant PTS classes and modules
+from .frame import Frame
+from .headercatalog import load_catalog, write_catalog
+from ...core.tools import filesystem as fs
+from ...core.basics.log import log
+from ...core.units.parsing import parse_unit as u
+
+# -----------------------------------------------------------------
+
+# The name of the catalog file in each directory
+catalog_name = ".quality.json"
+
+# The entries in memory, by absolute file path
+entries = dict()
+
+# -----------------------------------------------------------------
+
+def catalog_path_for(path):
+
+    """
+    This function returns the path of the quality catalog for the FITS file with the given path
+    :param path:
+    :return:
+    """
+
+    return fs.join(fs.directory_of(path), catalog_name)
+
+# -----------------------------------------------------------------
+
+def get_entry(path, size, mtime):
+
+    """
+    This function returns the entry of the FITS file (from memory or from the catalog), or a new entry if there is none
+    for this version of the file
+    :param path:
+    :param size:
+    :param mtime:
+    :return:
+    """
+
+    # In memory and up to date
+    entry = entries.get(path)
+    if entry is not None and entry["size"] == size and entry["mtime"] == mtime: return entry
+
+    # Look in the catalog
+    entry = load_catalog(catalog_path_for(path)).get(fs.name(path))
+    if entry is not None and entry["size"] == size and entry["mtime"] == mtime: return entry
+
+    # New entry
+    return {"size": size, "mtime": mtime, "fwhm": None, "pixelscale": None, "statistics": dict()}
+
+# -----------------------------------------------------------------
+
+def get_quality(path, region):
+
+    """
+    This function returns the FWHM, the pixelscale and the quality indicators of the FITS file within the given sky
+    region, calculating them only once for every version of the file
+    :param path:
+    :param region: the sky region
+    :return: a dictionary
+    """
+
+    path = fs.absolute_path(path)
+    size, mtime = fs.file_signature(path)
+    entry = get_entry(path, size, mtime)
+    region_key = str(region)
+
+    # Not yet calculated for this region
+    if region_key not in entry["statistics"]:
+
+        # Debugging
+        log.debug("Adding the quality of '" + path + "' to the quality catalog ...")
+
+        # Load the map and calculate the indicators
+        frame = Frame.from_file(path)
+        fwhm = frame.fwhm
+        entry["fwhm"] = fwhm.to("arcsec").value if fwhm is not None else None
+        entry["pixelscale"] = frame.average_pixelscale.to("arcsec").value
+        entry["statistics"][region_key] = frame.quality_statistics(region.to_pixel(frame.wcs))
+
+        # Write the catalog
+        catalog_path = catalog_path_for(path)
+        catalog = load_catalog(catalog_path)
+        catalog[fs.name(path)] = entry
+        write_catalog(catalog, catalog_path)
+
+    # Keep the entry in memory
+    entries[path] = entry
+
+    # Create the result
+    quality = dict(entry["statistics"][region_key])
+    quality["fwhm"] = entry["fwhm"] * u("arcsec") if entry["fwhm"] is not None else None
+    quality["pixelscale"] = entry["pixelscale"] * u("arcsec")
+    return quality
+
+# -----------------------------------------------------------------
+
+def clear():
+
+    """
+    This function clears the entries in memory
+    :return:
+    """
+
+    entries.clear()
+
+# -----------------------------------------------------------------
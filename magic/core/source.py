@@ -118,12 +118,13 @@ class Source(object):
 
     # -----------------------------------------------------------------
 
-    def detect(self, frame, config):
+    def detect(self, frame, config, ellipse=None):
 
         """
         This function ...
         :param frame:
         :param config:
+        :param ellipse: the initial ellipse, if already created
         :return:
         """
 
@@ -132,8 +133,9 @@ class Source(object):
         track_record = None
 
         # Get the parameters of the circle
-        radius = PixelStretch(config.initial_radius, config.initial_radius)
-        ellipse = self.ellipse(frame.wcs, radius)
+        if ellipse is None:
+            radius = PixelStretch(config.initial_radius, config.initial_radius)
+            ellipse = self.ellipse(frame.wcs, radius)
 
         # Find a source
         self.detection = sources.find_source(frame, ellipse, config, track_record, special=self.special)
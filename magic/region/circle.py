@@ -17,7 +17,6 @@ import math
 
 # Import astronomical modules
 from astropy.units import Quantity, Unit
-from photutils.geometry import circular_overlap_grid
 from astropy.coordinates import frame_transform_graph
 
 # Import the relevant PTS classes and modules
@@ -182,17 +181,18 @@ class PixelCircleRegion(CircleRegion, PixelRegion):
     # -----------------------------------------------------------------
 
     @classmethod
-    def from_sky(cls, region, wcs):
+    def from_sky(cls, region, wcs, center=None):
 
         """
         This function ...
         :param region:
         :param wcs:
+        :param center: the center pixel coordinate, if already converted
         :return:
         """
 
         # Convert the center coordinate
-        center = PixelCoordinate.from_sky(region.center, wcs)
+        if center is None: center = PixelCoordinate.from_sky(region.center, wcs)
 
         # Convert the radius
         radius = (region.radius / wcs.average_pixelscale).to("").value
@@ -223,20 +223,12 @@ class PixelCircleRegion(CircleRegion, PixelRegion):
         :return:
         """
 
-        rel_center = self.center
-
-        x_min = - rel_center.x
-        x_max = x_size - rel_center.x
-        y_min = - rel_center.y
-        y_max = y_size - rel_center.y
-
-        fraction = circular_overlap_grid(x_min, x_max, y_min, y_max, x_size, y_size, self.radius, use_exact=0, subpixels=1)
-
-        #from ..tools import plotting
-        #plotting.plot_mask(fraction)
+        # Rasterize within the bounding box
+        from .rasterization import rasterize
+        data = rasterize([self], x_size, y_size)
 
         # Return a new mask
-        return Mask(fraction)
+        return Mask(data)
 
     # -----------------------------------------------------------------
 
@@ -294,17 +286,18 @@ class SkyCircleRegion(CircleRegion, SkyRegion):
     # -----------------------------------------------------------------
 
     @classmethod
-    def from_pixel(cls, region, wcs):
+    def from_pixel(cls, region, wcs, center=None):
 
         """
         This function ...
         :param region:
         :param wcs:
+        :param center: the center sky coordinate, if already converted
         :return:
         """
 
         # Convert the center coordinate to sky coordinate
-        center = SkyCoordinate.from_pixel(region.center, wcs)
+        if center is None: center = SkyCoordinate.from_pixel(region.center, wcs)
 
         # Convert the radius
         radius = region.radius * wcs.average_pixelscale
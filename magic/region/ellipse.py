@@ -17,8 +17,6 @@ import math
 
 # Import astronomical modules
 from astropy.coordinates import Angle
-from astropy.wcs import utils
-from photutils.geometry import elliptical_overlap_grid, circular_overlap_grid, rectangular_overlap_grid
 from astropy.coordinates import frame_transform_graph
 
 # Import the relevant PTS classes and modules
@@ -286,25 +284,21 @@ class PixelEllipseRegion(EllipseRegion, PixelRegion):
     # -----------------------------------------------------------------
 
     @classmethod
-    def from_sky(cls, region, wcs):
+    def from_sky(cls, region, wcs, center=None):
 
         """
         This function ...
         :param region:
         :param wcs:
+        :param center: the center pixel coordinate, if already converted
         :return:
         """
 
         # Get center pixel coordinate
-        center = region.center.to_pixel(wcs)
-
-        ## GET THE PIXELSCALE
-        result = utils.proj_plane_pixel_scales(wcs)
-        # returns: A vector (ndarray) of projection plane increments corresponding to each pixel side (axis).
-        # The units of the returned results are the same as the units of cdelt, crval, and cd for the celestial WCS
-        # and can be obtained by inquiring the value of cunit property of the input WCS WCS object.
-        x_pixelscale = result[0] * u("deg")
-        y_pixelscale = result[1] * u("deg")
+        if center is None: center = region.center.to_pixel(wcs)
+
+        ## GET THE PIXELSCALE (cached by a PTS coordinate system)
+        x_pixelscale, y_pixelscale = coordinates.pixelscales(wcs)
         # pixelscale = Extent(x_pixelscale, y_pixelscale)
 
         #print(region.semimajor)
@@ -418,41 +412,10 @@ class PixelEllipseRegion(EllipseRegion, PixelRegion):
         :return:
         """
 
-        rel_center = self.center
-
-        a = self.radius.x
-        b = self.radius.y
-
-        # theta in radians !
-        theta = self.angle.radian
-
-        x_min = - rel_center.x
-        x_max = x_size - rel_center.x
-        y_min = - rel_center.y
-        y_max = y_size - rel_center.y
-
-        # Calculate the mask
-        fraction = elliptical_overlap_grid(x_min, x_max, y_min, y_max, x_size, y_size, a, b, theta, use_exact=0, subpixels=1)
-
-        # xmin, xmax, ymin, ymax : float
-        #    Extent of the grid in the x and y direction.
-        # nx, ny : int
-        #    Grid dimensions.
-        # rx : float
-        #    The semimajor axis of the ellipse.
-        # ry : float
-        #    The semiminor axis of the ellipse.
-        # theta : float
-        #    The position angle of the semimajor axis in radians (counterclockwise).
-        # use_exact : 0 or 1
-        #    If set to 1, calculates the exact overlap, while if set to 0, uses a
-        #    subpixel sampling method with ``subpixel`` subpixels in each direction.
-        # subpixels : int
-        #    If ``use_exact`` is 0, each pixel is resampled by this factor in each
-        #    dimension. Thus, each pixel is divided into ``subpixels ** 2``
-        #    subpixels.
-
-        mask = Mask(fraction)
+        # Calculate the mask, only within the bounding box of the ellipse
+        # (a pixel is part of the ellipse if its center lies inside it)
+        from .rasterization import rasterize
+        mask = Mask(rasterize([self], x_size, y_size))
 
         # Return
         if invert: return mask.inverse()
@@ -528,25 +491,21 @@ class SkyEllipseRegion(EllipseRegion, SkyRegion):
     # -----------------------------------------------------------------
 
     @classmethod
-    def from_pixel(cls, region, wcs):
+    def from_pixel(cls, region, wcs, center=None):
 
         """
         This function ...
         :param region:
         :param wcs:
+        :param center: the center sky coordinate, if already converted
         :return:
         """
 
         # Get center sky coordinate
-        center = region.center.to_sky(wcs)
-
-        ## GET THE PIXELSCALE
-        result = utils.proj_plane_pixel_scales(wcs)
-        # returns: A vector (ndarray) of projection plane increments corresponding to each pixel side (axis).
-        # The units of the returned results are the same as the units of cdelt, crval, and cd for the celestial WCS
-        # and can be obtained by inquiring the value of cunit property of the input WCS WCS object.
-        x_pixelscale = result[0] * u("deg")
-        y_pixelscale = result[1] * u("deg")
+        if center is None: center = region.center.to_sky(wcs)
+
+        ## GET THE PIXELSCALE (cached by a PTS coordinate system)
+        x_pixelscale, y_pixelscale = coordinates.pixelscales(wcs)
         # pixelscale = Extent(x_pixelscale, y_pixelscale)
 
         semimajor = region.semimajor * x_pixelscale
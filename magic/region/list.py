@@ -37,6 +37,8 @@ from .rectangle import RectangleRegion, PixelRectangleRegion, SkyRectangleRegion
 from .polygon import PolygonRegion, PixelPolygonRegion, SkyPolygonRegion, PhysicalPolygonRegion
 from .text import TextRegion, PixelTextRegion, SkyTextRegion, PhysicalTextRegion
 from .composite import CompositeRegion, PixelCompositeRegion, SkyCompositeRegion, PhysicalCompositeRegion
+from .rasterization import rasterize
+from ..tools import coordinates
 from ...core.tools.strings import stripwhite_around
 from ...core.units.parsing import parse_unit as u
 from ...core.tools import types
@@ -1202,6 +1204,14 @@ def make_regular_region(specs):
 
 # -----------------------------------------------------------------
 
+# The sky shapes whose centers are converted to pixel coordinates all at once by PixelRegionList.from_sky
+batch_sky_types = (SkyPointRegion, SkyCircleRegion, SkyEllipseRegion, SkyRectangleRegion)
+
+# The pixel shapes whose centers are converted to sky coordinates all at once by PixelRegionList.to_sky
+batch_pixel_types = (PixelPointRegion, PixelCircleRegion, PixelEllipseRegion)
+
+# -----------------------------------------------------------------
+
 class RegionList(list):
 
     """
@@ -1626,7 +1636,41 @@ class PixelRegionList(RegionList):
         """
 
         new = cls()
-        for region in regions: new.append(region.to_pixel(wcs))
+
+        # Convert the centers of the points, circles, ellipses and rectangles with one WCS transformation for each
+        # celestial frame of the centers
+        frames = dict()
+        for index, region in enumerate(regions):
+            if not isinstance(region, batch_sky_types): continue
+            center = region if isinstance(region, SkyPointRegion) else region.center
+            frame = center.frame.replicate_without_data()
+            frames.setdefault(repr(frame), (frame, []))[1].append((index, center))
+
+        pixel_centers = dict()
+        for frame, centers in frames.values():
+            lon = [center.spherical.lon.to("deg").value for _, center in centers]
+            lat = [center.spherical.lat.to("deg").value for _, center in centers]
+            x, y = coordinates.sky_to_pixel(lon, lat, wcs, frame=frame)
+            for (index, center), x_center, y_center in zip(centers, x, y): pixel_centers[index] = (x_center, y_center, center)
+
+        # Create the pixel regions
+        for index, region in enumerate(regions):
+
+            # Center was converted
+            if index in pixel_centers:
+
+                x, y, center = pixel_centers[index]
+                if isinstance(region, SkyPointRegion): new.append(PixelPointRegion(float(x), float(y), meta=region.meta))
+                else:
+                    pixel_center = PixelCoordinate(float(x), float(y), meta=center.meta)
+                    if isinstance(region, SkyCircleRegion): new.append(PixelCircleRegion.from_sky(region, wcs, center=pixel_center))
+                    elif isinstance(region, SkyEllipseRegion): new.append(PixelEllipseRegion.from_sky(region, wcs, center=pixel_center))
+                    else: new.append(PixelRectangleRegion.from_sky(region, wcs, center=pixel_center))
+
+            # Other shapes
+            else: new.append(region.to_pixel(wcs))
+
+        # Return the new region list
         return new
 
     # -----------------------------------------------------------------
@@ -1803,31 +1847,53 @@ class PixelRegionList(RegionList):
         # Create a new SkyRegion
         region = SkyRegionList()
 
+        # Convert the centers of the points, circles and ellipses with one WCS transformation (to right ascension and
+        # declination, whatever the celestial frame of the WCS)
+        indices = [index for index, shape in enumerate(self) if isinstance(shape, batch_pixel_types)]
+        if len(indices) > 0:
+            x = [self[index].x if isinstance(self[index], PixelPointRegion) else self[index].center.x for index in indices]
+            y = [self[index].y if isinstance(self[index], PixelPointRegion) else self[index].center.y for index in indices]
+            ra, dec = coordinates.pixel_to_sky(x, y, wcs)
+            sky_centers = dict(zip(indices, zip(ra, dec)))
+        else: sky_centers = dict()
+
         # Add the shapes to the sky region
-        for shape in self: region.append(shape.to_sky(wcs))
+        for index, shape in enumerate(self):
+
+            # Center was converted
+            if index in sky_centers:
+
+                ra, dec = sky_centers[index]
+                if isinstance(shape, PixelPointRegion): region.append(SkyPointRegion(ra=ra * u("deg"), dec=dec * u("deg"), meta=shape.meta))
+                else:
+                    sky_center = SkyCoordinate(ra=ra, dec=dec, unit="deg")
+                    if isinstance(shape, PixelCircleRegion): region.append(SkyCircleRegion.from_pixel(shape, wcs, center=sky_center))
+                    else: region.append(SkyEllipseRegion.from_pixel(shape, wcs, center=sky_center))
+
+            # Other shapes
+            else: region.append(shape.to_sky(wcs))
 
         # Return the region
         return region
 
     # -----------------------------------------------------------------
 
-    def to_mask(self, x_size, y_size):
+    def to_mask(self, x_size, y_size, mode="center", subpixels=5):
 
         """
         This function ...
         :param x_size:
         :param y_size:
+        :param mode: 'center' (pixels with their center inside a shape), 'subpixel' or 'exact' (pixels that overlap with a shape)
+        :param subpixels:
         :return:
         """
 
-        # Create empty mask
-        mask = Mask.empty(x_size, y_size)
-
-        # Add each shape to the mask
-        for shape in self: mask += Mask.from_shape(shape, x_size, y_size)
+        # Rasterize all shapes at once, each only within its bounding box
+        data = rasterize(self, x_size, y_size, mode=mode, subpixels=subpixels)
 
         # Return the mask
-        return mask
+        return Mask(data)
 
     # -----------------------------------------------------------------
 
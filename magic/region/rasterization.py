@@ -0,0 +1,302 @@
+#!/usr/bin/env python
+# -*- coding: utf8 -*-
+# *****************************************************************
+# **       PTS -- Python Toolkit for working with SKIRT          **
+# **       © Astronomical Observatory, Ghent University          **
+# *****************************************************************
+
+## \package pts.magic.region.rasterization Contains functions to rasterize pixel regions into masks.
+#
+# The overlap of each shape with the pixel grid is only calculated within the bounding box of the shape, instead of
+# over the complete frame. In the default 'center' mode (a pixel belongs to a shape if its center lies inside it, as
+# with subpixel sampling with one subpixel), all circles, ellipses and rectangles of a region list are rasterized in
+# one vectorized pass. The 'subpixel' and 'exact' modes use the photutils overlap functions on the bounding boxes.
+# As in the to_mask functions of the shapes, pixel (i, j) covers the area [i, i+1] x [j, j+1] in pixel coordinates.
+
+# -----------------------------------------------------------------
+
+# Ensure Python 3 functionality
+from __future__ import absolute_import, division, print_function
+
+# Import standard modules
+import math
+import numpy as np
+
+# Import astronomical modules
+from photutils.geometry import circular_overlap_grid, elliptical_overlap_grid, rectangular_overlap_grid
+
+# -----------------------------------------------------------------
+
+# The rasterization modes
+modes = ["center", "subpixel", "exact"]
+
+# The maximum number of pixels (summed over the bounding boxes) that are evaluated at once in the vectorized pass
+max_npixels_per_pass = 2**23
+
+# -----------------------------------------------------------------
+
+def shape_parameters(shape):
+
+    """
+    This function returns the kind and the geometric parameters (center x, center y, semi-axis or half-size in x and y,
+    and angle in radians) of a circle, ellipse or rectangle, or None for other shapes
+    :param shape:
+    :return:
+    """
+
+    from .circle import PixelCircleRegion
+    from .ellipse import PixelEllipseRegion
+    from .rectangle import PixelRectangleRegion
+
+    if isinstance(shape, PixelCircleRegion): return "circle", shape.center.x, shape.center.y, shape.radius, shape.radius, 0.0
+    elif isinstance(shape, PixelEllipseRegion): return "ellipse", shape.center.x, shape.center.y, shape.radius.x, shape.radius.y, shape.angle.radian
+    elif isinstance(shape, PixelRectangleRegion): return "rectangle", shape.center.x, shape.center.y, shape.radius.x, shape.radius.y, shape.angle.to("radian").value
+    else: return None
+
+# -----------------------------------------------------------------
+
+def half_extent(kind, a, b, theta):
+
+    """
+    This function returns the half extent of a shape in the x and y direction
+    :param kind:
+    :param a:
+    :param b:
+    :param theta:
+    :return:
+    """
+
+    cos = np.abs(np.cos(theta))
+    sin = np.abs(np.sin(theta))
+
+    # Rectangles: the corners determine the extent
+    if kind == "rectangle": return a * cos + b * sin, a * sin + b * cos
+
+    # Ellipses (and circles)
+    else: return np.sqrt((a * cos)**2 + (b * sin)**2), np.sqrt((a * sin)**2 + (b * cos)**2)
+
+# -----------------------------------------------------------------
+
+def bounding_box(kind, x, y, a, b, theta, x_size, y_size):
+
+    """
+    This function returns the (x_min, x_max, y_min, y_max) pixel index ranges of the part of the frame that can
+    overlap with the shape (clipped to the frame), or None if the shape lies outside the frame
+    :param kind:
+    :param x:
+    :param y:
+    :param a:
+    :param b:
+    :param theta:
+    :param x_size:
+    :param y_size:
+    :return:
+    """
+
+    x_extent, y_extent = half_extent(kind, a, b, theta)
+
+    x_min = max(int(math.floor(x - x_extent)) - 1, 0)
+    x_max = min(int(math.ceil(x + x_extent)) + 1, x_size)
+    y_min = max(int(math.floor(y - y_extent)) - 1, 0)
+    y_max = min(int(math.ceil(y + y_extent)) + 1, y_size)
+
+    if x_min >= x_max or y_min >= y_max: return None
+    return x_min, x_max, y_min, y_max
+
+# -----------------------------------------------------------------
+
+def overlap_grid(kind, x, y, a, b, theta, box, use_exact=0, subpixels=1):
+
+    """
+    This function calculates the fraction of overlap of the shape with the pixels within the given bounding box
+    :param kind:
+    :param x:
+    :param y:
+    :param a:
+    :param b:
+    :param theta:
+    :param box:
+    :param use_exact:
+    :param subpixels:
+    :return:
+    """
+
+    x_min, x_max, y_min, y_max = box
+    nx = x_max - x_min
+    ny = y_max - y_min
+
+    # Extent of the grid relative to the shape center
+    rel_x_min = x_min - x
+    rel_x_max = x_max - x
+    rel_y_min = y_min - y
+    rel_y_max = y_max - y
+
+    if kind == "circle": return circular_overlap_grid(rel_x_min, rel_x_max, rel_y_min, rel_y_max, nx, ny, a, use_exact, subpixels)
+    elif kind == "ellipse": return elliptical_overlap_grid(rel_x_min, rel_x_max, rel_y_min, rel_y_max, nx, ny, a, b, theta, use_exact, subpixels)
+    elif kind == "rectangle": return rectangular_overlap_grid(rel_x_min, rel_x_max, rel_y_min, rel_y_max, nx, ny, 2. * a, 2. * b, theta, 0, subpixels)
+    else: raise ValueError("Invalid shape kind: '" + kind + "'")
+
+# -----------------------------------------------------------------
+
+def shape_fraction(shape, x_size, y_size, mode="center", subpixels=5):
+
+    """
+    This function returns the fraction of overlap of a circle, ellipse or rectangle with the pixels of a frame
+    :param shape:
+    :param x_size:
+    :param y_size:
+    :param mode:
+    :param subpixels:
+    :return:
+    """
+
+    fraction = np.zeros((y_size, x_size))
+    add_shapes(fraction, [shape_parameters(shape)], mode=mode, subpixels=subpixels, fractional=True)
+    return fraction
+
+# -----------------------------------------------------------------
+
+def add_shapes(data, parameters, mode="center", subpixels=5, fractional=False):
+
+    """
+    This function adds the shapes with the given parameters to the (boolean or fractional) data, in place
+    :param data:
+    :param parameters: list of (kind, x, y, a, b, theta)
+    :param mode:
+    :param subpixels:
+    :param fractional:
+    :return:
+    """
+
+    if mode not in modes: raise ValueError("Invalid rasterization mode: '" + mode + "'")
+
+    y_size, x_size = data.shape
+
+    # Vectorized
+    if mode == "center":
+        add_shapes_center(data, parameters, fractional=fractional)
+        return
+
+    # Loop over the shapes
+    for kind, x, y, a, b, theta in parameters:
+
+        # Get the bounding box
+        box = bounding_box(kind, x, y, a, b, theta, x_size, y_size)
+        if box is None: continue
+        x_min, x_max, y_min, y_max = box
+
+        # Calculate the overlap within the bounding box (rectangles have no exact mode in photutils)
+        use_exact = 1 if mode == "exact" and kind != "rectangle" else 0
+        fraction = overlap_grid(kind, x, y, a, b, theta, box, use_exact=use_exact, subpixels=subpixels)
+
+        # Accumulate
+        if fractional: np.maximum(data[y_min:y_max, x_min:x_max], fraction, out=data[y_min:y_max, x_min:x_max])
+        else: data[y_min:y_max, x_min:x_max] |= fraction > 0
+
+# -----------------------------------------------------------------
+
+def add_shapes_center(data, parameters, fractional=False):
+
+    """
+    This function adds the shapes to the data, where a pixel belongs to a shape if its center lies inside it.
+    All shapes are evaluated at once, on the pixels of their bounding boxes.
+    :param data:
+    :param parameters:
+    :param fractional:
+    :return:
+    """
+
+    if len(parameters) == 0: return
+    y_size, x_size = data.shape
+
+    # Get the bounding boxes
+    boxes = [bounding_box(kind, x, y, a, b, theta, x_size, y_size) for kind, x, y, a, b, theta in parameters]
+    indices = [index for index in range(len(parameters)) if boxes[index] is not None]
+    if len(indices) == 0: return
+
+    # Create the parameter arrays
+    rectangle = np.array([parameters[index][0] == "rectangle" for index in indices])
+    x = np.array([parameters[index][1] for index in indices], dtype=float)
+    y = np.array([parameters[index][2] for index in indices], dtype=float)
+    a = np.array([parameters[index][3] for index in indices], dtype=float)
+    b = np.array([parameters[index][4] for index in indices], dtype=float)
+    theta = np.array([parameters[index][5] for index in indices], dtype=float)
+    box_x_min = np.array([boxes[index][0] for index in indices])
+    box_y_min = np.array([boxes[index][2] for index in indices])
+    box_nx = np.array([boxes[index][1] - boxes[index][0] for index in indices])
+    box_ny = np.array([boxes[index][3] - boxes[index][2] for index in indices])
+    npixels = box_nx * box_ny
+
+    # Divide the shapes into groups with a limited total number of bounding box pixels
+    cumulative = np.cumsum(npixels)
+    group_ids = cumulative // max_npixels_per_pass
+    for group_id in np.unique(group_ids):
+
+        group = np.where(group_ids == group_id)[0]
+
+        # Determine, for every pixel in the bounding boxes, the shape it belongs to and its position in the box
+        counts = npixels[group]
+        shape_indices = np.repeat(group, counts)
+        starts = np.cumsum(counts) - counts
+        offsets = np.arange(np.sum(counts)) - np.repeat(starts, counts)
+        pixel_x = box_x_min[shape_indices] + offsets % box_nx[shape_indices]
+        pixel_y = box_y_min[shape_indices] + offsets // box_nx[shape_indices]
+
+        # Position of the pixel centers relative to the shape centers, in the frame of the shapes
+        dx = pixel_x + 0.5 - x[shape_indices]
+        dy = pixel_y + 0.5 - y[shape_indices]
+        cos = np.cos(theta[shape_indices])
+        sin = np.sin(theta[shape_indices])
+        u = dx * cos + dy * sin
+        v = - dx * sin + dy * cos
+
+        # Check whether the pixel centers are inside the shapes
+        shape_a = a[shape_indices]
+        shape_b = b[shape_indices]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            inside_ellipse = (u / shape_a)**2 + (v / shape_b)**2 < 1.
+        inside_rectangle = (np.abs(u) < shape_a) & (np.abs(v) < shape_b)
+        inside = np.where(rectangle[shape_indices], inside_rectangle, inside_ellipse)
+
+        # Set the pixels
+        data[pixel_y[inside], pixel_x[inside]] = 1. if fractional else True
+
+# -----------------------------------------------------------------
+
+def rasterize(shapes, x_size, y_size, mode="center", subpixels=5, fractional=False):
+
+    """
+    This function rasterizes a sequence of pixel shapes into one boolean (or, if fractional, floating-point) array
+    :param shapes:
+    :param x_size:
+    :param y_size:
+    :param mode: 'center', 'subpixel' or 'exact'
+    :param subpixels: the number of subpixels in each direction for the 'subpixel' mode
+    :param fractional: return the (maximal) fraction of overlap of each pixel with the shapes
+    :return:
+    """
+
+    data = np.zeros((y_size, x_size), dtype=float if fractional else bool)
+
+    parameters = []
+    for shape in shapes:
+
+        shape_parameters_i = shape_parameters(shape)
+
+        # Circle, ellipse or rectangle
+        if shape_parameters_i is not None: parameters.append(shape_parameters_i)
+
+        # Other shapes: use the mask of the shape itself
+        else:
+            other = shape.to_mask(x_size, y_size)
+            other = other.data if hasattr(other, "data") else np.asarray(other)
+            if fractional: np.maximum(data, other.astype(float), out=data)
+            else: data |= other.astype(bool)
+
+    # Add the circles, ellipses and rectangles
+    add_shapes(data, parameters, mode=mode, subpixels=subpixels, fractional=fractional)
+
+    # Return the data
+    return data
+
+# -----------------------------------------------------------------
@@ -18,9 +18,7 @@ import numpy as np
 # Import astronomical modules
 from astropy.coordinates import Angle
 from astropy.units import Quantity
-from photutils.geometry import elliptical_overlap_grid, circular_overlap_grid, rectangular_overlap_grid
 from astropy.coordinates import frame_transform_graph
-from astropy.wcs import utils
 
 # Import the relevant PTS classes and modules
 from .region import Region, PixelRegion, SkyRegion, PhysicalRegion
@@ -28,7 +26,6 @@ from ..basics.coordinate import PixelCoordinate, SkyCoordinate, PhysicalCoordina
 from ..basics.stretch import PixelStretch, SkyStretch, PhysicalStretch
 from ..basics.mask import Mask
 from .region import add_info, make_rectangle_template, coordsys_name_mapping
-from ...core.units.parsing import parse_unit as u
 from ..tools import coordinates
 
 # -----------------------------------------------------------------
@@ -419,25 +416,21 @@ class PixelRectangleRegion(RectangleRegion, PixelRegion):
     # -----------------------------------------------------------------
 
     @classmethod
-    def from_sky(cls, region, wcs):
+    def from_sky(cls, region, wcs, center=None):
 
         """
         This function ...
         :param region:
         :param wcs:
+        :param center: the center pixel coordinate, if already converted
         :return:
         """
 
         # Get center pixel coordinate
-        center = region.center.to_pixel(wcs)
+        if center is None: center = region.center.to_pixel(wcs)
 
-        ## GET THE PIXELSCALE
-        result = utils.proj_plane_pixel_scales(wcs)
-        # returns: A vector (ndarray) of projection plane increments corresponding to each pixel side (axis).
-        # The units of the returned results are the same as the units of cdelt, crval, and cd for the celestial WCS
-        # and can be obtained by inquiring the value of cunit property of the input WCS WCS object.
-        x_pixelscale = result[0] * u("deg")
-        y_pixelscale = result[1] * u("deg")
+        ## GET THE PIXELSCALE (cached by a PTS coordinate system)
+        x_pixelscale, y_pixelscale = coordinates.pixelscales(wcs)
 
         #semimajor = (region.semimajor / x_pixelscale).to("").value
         #semiminor = (region.semiminor / y_pixelscale).to("").value
@@ -572,20 +565,12 @@ class PixelRectangleRegion(RectangleRegion, PixelRegion):
 
         ## OTHER WAY
 
-        rel_center = self.center
-
-        x_min = - rel_center.x
-        x_max = x_size - rel_center.x
-        y_min = - rel_center.y
-        y_max = y_size - rel_center.y
-
-        width = 2. * self.radius.x
-        height = 2. * self.radius.y
-
-        fraction = rectangular_overlap_grid(x_min, x_max, y_min, y_max, x_size, y_size, width, height, self.angle.to("radian").value, 0, 1)
+        # Rasterize within the bounding box
+        from .rasterization import rasterize
+        data = rasterize([self], x_size, y_size)
 
         # Return the mask
-        return Mask(fraction)
+        return Mask(data)
 
     # -----------------------------------------------------------------
 
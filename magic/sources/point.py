@@ -21,13 +21,14 @@ from astropy.modeling.models import Gaussian2D
 # Import the relevant PTS classes and modules
 from ..basics.vector import Extent
 from ..region.list import PixelRegionList
-from ..basics.coordinate import SkyCoordinate
+from ..basics.coordinate import SkyCoordinate, PixelCoordinate
 from ..region.point import PixelPointRegion
 from ..region.circle import PixelCircleRegion
 from ..region.ellipse import PixelEllipseRegion
 from ..core.frame import Frame
 from ..core.detection import Detection
-from ..tools import statistics, fitting
+from ..tools import statistics, fitting, coordinates
+from ..analysis.sources import screen_positions
 from ...core.basics.configurable import Configurable
 from ...core.tools import tables, arrays
 from ...core.tools import filesystem as fs
@@ -493,17 +494,28 @@ class PointSourceFinder(Configurable):
         # Inform the user
         log.info("Detecting the sources ...")
 
-        # Loop over all sources
-        for source in self.sources:
+        # Get the sources that should be detected, and their pixel positions
+        sources = [source for source in self.sources if source is not None and not source.ignore]
+        x, y = self.source_positions(sources)
 
-            # Skip None
-            if source is None: continue
+        # Screen the positions of all sources at once, only the sources that can be detected are passed on
+        if self.config.detection.bulk and len(sources) > 0:
 
-            # If this sky object should be ignored, skip it
-            if source.ignore: continue
+            if self.config.detection.detection_method == "peaks": center_radius = self.config.detection.peak_offset_tolerance + 1.
+            else: center_radius = self.config.detection.initial_radius
+            sources, x, y = self.screen_sources(sources, x, y, sigma_level=self.config.detection.sigma_level, center_radius=center_radius)
+
+        # Set the radius of the circles
+        radius = PixelStretch(self.config.detection.initial_radius, self.config.detection.initial_radius)
+
+        # Loop over the sources
+        for source, x_center, y_center in zip(sources, x, y):
+
+            # Create the circle
+            ellipse = PixelEllipseRegion(PixelCoordinate(x_center, y_center), radius)
 
             # Find a source
-            try: source.detect(self.frame, self.config.detection)
+            try: source.detect(self.frame, self.config.detection, ellipse=ellipse)
             except Exception as e:
 
                 import traceback
@@ -523,6 +535,48 @@ class PointSourceFinder(Configurable):
 
     # -----------------------------------------------------------------
 
+    def source_positions(self, sources):
+
+        """
+        This function determines the pixel positions of the sources with one coordinate transformation
+        :param sources:
+        :return: the pixel x and y coordinates
+        """
+
+        if len(sources) == 0: return np.array([]), np.array([])
+
+        ra = [source.position.ra.to("deg").value for source in sources]
+        dec = [source.position.dec.to("deg").value for source in sources]
+        return coordinates.sky_to_pixel(ra, dec, self.frame.wcs)
+
+    # -----------------------------------------------------------------
+
+    def screen_sources(self, sources, x, y, sigma_level=None, center_radius=None):
+
+        """
+        This function checks for all sources at once whether they can be detected (see sources.screen_positions)
+        :param sources:
+        :param x: the pixel x coordinates of the sources
+        :param y: the pixel y coordinates of the sources
+        :param sigma_level:
+        :param center_radius:
+        :return: the sources that pass, and their pixel x and y coordinates
+        """
+
+        # Screen
+        passed = screen_positions(self.frame.data, x, y, self.config.detection.initial_radius,
+                                  self.config.detection.background_outer_factor, sigma_level=sigma_level,
+                                  center_radius=center_radius, nprocesses=self.config.detection.nprocesses)
+
+        # Debugging
+        log.debug(str(np.sum(passed)) + " out of " + str(len(sources)) + " sources passed the screening")
+
+        # Return the sources that passed
+        indices = np.where(passed)[0]
+        return [sources[index] for index in indices], x[indices], y[indices]
+
+    # -----------------------------------------------------------------
+
     def set_detections(self):
 
         """
@@ -533,18 +587,18 @@ class PointSourceFinder(Configurable):
         # Inform the user
         log.info("Setting the detections ...")
 
-        # Loop over all sources
-        for source in self.sources:
+        # Get the sources and their pixel positions
+        sources = [source for source in self.sources if source is not None and not source.ignore]
+        x, y = self.source_positions(sources)
 
-            # Skip None
-            if source is None: continue
+        # Set the radius of the circles
+        radius = PixelStretch(self.config.detection.initial_radius, self.config.detection.initial_radius)
 
-            # If this source should be ignored, skip it
-            if source.ignore: continue
+        # Loop over the sources
+        for source, x_center, y_center in zip(sources, x, y):
 
-            # Get the parameters of the circle
-            radius = PixelStretch(self.config.detection.initial_radius, self.config.detection.initial_radius)
-            ellipse = source.ellipse(self.frame.wcs, radius)
+            # Create the circle
+            ellipse = PixelEllipseRegion(PixelCoordinate(x_center, y_center), radius)
 
             # Create a source object
             detection = Detection.from_ellipse(self.frame, ellipse, self.config.detection.background_outer_factor)
@@ -560,6 +614,10 @@ class PointSourceFinder(Configurable):
 
         # Inform the user
         log.info("Fitting PSF profiles to the point sources ...")
+
+        # Initialize a list of the sources (and detections) to fit
+        to_fit = []
+
         # Loop over all sources in the list
         for source in self.sources:
 
@@ -582,33 +640,99 @@ class PointSourceFinder(Configurable):
             else: detection = None
 
             # Find a model, if detection was found
-            if source.has_detection or detection is not None: source.fit_model(self.config.fitting, detection)
+            if source.has_detection or detection is not None: to_fit.append((source, detection))
 
-        # If requested, perform sigma-clipping to the list of FWHM's to filter out outliers
-        if self.config.fitting.sigma_clip_fwhms and len(self.fwhms_pix_valid) > 0:
+        # Fit Gaussian models to all sources at once, the sources for which this fails are fitted one by one
+        if self.config.fitting.batch and self.config.fitting.model_names[0] == "Gaussian": to_fit = self.fit_psf_batched(to_fit)
+        for source, detection in to_fit: source.fit_model(self.config.fitting, detection)
 
-            #print(self.fwhms_pix)
-            mean, median, stddev = statistics.sigma_clipped_statistics(self.fwhms_pix_valid, self.config.fitting.fwhm_sigma_level)
-            lower = median - self.config.fitting.fwhm_sigma_level * stddev
-            upper = median + self.config.fitting.fwhm_sigma_level * stddev
+        # If requested, perform sigma-clipping to the list of FWHM's to filter out outliers
+        if self.config.fitting.sigma_clip_fwhms:
 
-            # Loop over all sources for which a model was found
-            for source in self.sources:
+            # Get the FWHM of the sources for which a model was found
+            with_model = [source for source in self.sources if source is not None and source.has_model]
+            fwhms = np.array([source.fwhm for source in with_model])
 
-                # Skip Nones
-                if source is None: continue
+            if len(fwhms) > 0:
 
-                # Ignore sources without model
-                if not source.has_model: continue
+                mean, median, stddev = statistics.sigma_clipped_statistics(fwhms, self.config.fitting.fwhm_sigma_level)
+                lower = median - self.config.fitting.fwhm_sigma_level * stddev
+                upper = median + self.config.fitting.fwhm_sigma_level * stddev
 
-                # Remove the model if its FWHM is clipped out
-                if source.fwhm > upper or source.fwhm < lower: source.model = None
+                # Remove the models with a FWHM that is clipped out
+                for index in np.where((fwhms > upper) | (fwhms < lower))[0]: with_model[index].psf_model = None
 
         # Inform the user
         if self.have_detection > 0: log.debug("Found a model for {0} out of {1} stars with a detection ({2:.2f}%)".format(self.have_model, self.have_detection, self.have_model/self.have_detection*100.0))
 
     # -----------------------------------------------------------------
 
+    def fit_psf_batched(self, to_fit):
+
+        """
+        This function fits Gaussian models to the background-subtracted cutouts of the sources, for all cutouts with
+        the same shape at once. It returns the sources (and detections) for which no valid model was found, which
+        have to be fitted one by one (with zooming in and other models).
+        :param to_fit: list of (source, detection) tuples
+        :return:
+        """
+
+        config = self.config.fitting
+
+        # Group the detections by the shape of their cutouts
+        groups = dict()
+        remaining = []
+        for source, detection in to_fit:
+
+            current = detection if detection is not None else source.detection
+
+            # If the box is too small, leave it to the fitting of the individual sources
+            if current.cutout.xsize < config.minimum_pixels or current.cutout.ysize < config.minimum_pixels:
+                remaining.append((source, detection))
+                continue
+
+            # Estimate the background
+            if not current.has_background: current.estimate_background(config.background_est_method, config.sigma_clip_background)
+
+            groups.setdefault(current.cutout.shape, []).append((source, detection, current))
+
+        # Fit the groups
+        for shape in groups:
+
+            group = groups[shape]
+
+            # Create the stacks of the cutouts and their initial centers
+            boxes = np.array([np.asarray(current.subtracted) for _, _, current in group])
+            positions = [current.center if config.use_center_or_peak == "center" else current.peak for _, _, current in group]
+            centers = np.array([[position.x - current.cutout.x_min, position.y - current.cutout.y_min] for position, (_, _, current) in zip(positions, group)])
+
+            # Fit
+            amplitudes, x_means, y_means, stddevs, converged = fitting.fit_2D_Gaussians(boxes, centers, nprocesses=config.nprocesses)
+
+            # Check the offsets of the models
+            offsets = np.sqrt((x_means - centers[:, 0])**2 + (y_means - centers[:, 1])**2)
+            valid = converged & (amplitudes >= 0) & (offsets <= config.max_model_offset) & np.isfinite(stddevs)
+
+            # Set the models
+            for index, (source, detection, current) in enumerate(group):
+
+                if not valid[index]:
+                    remaining.append((source, detection))
+                    continue
+
+                source.detection = current
+                source.psf_model = Gaussian2D(amplitude=amplitudes[index], x_mean=x_means[index] + current.cutout.x_min,
+                                              y_mean=y_means[index] + current.cutout.y_min, x_stddev=stddevs[index],
+                                              y_stddev=stddevs[index], theta=0.0)
+
+        # Debugging
+        log.debug("Fitted models to " + str(len(to_fit) - len(remaining)) + " out of " + str(len(to_fit)) + " sources at once")
+
+        # Return the sources that still need to be fitted
+        return remaining
+
+    # -----------------------------------------------------------------
+
     @property
     def nsources(self):
 
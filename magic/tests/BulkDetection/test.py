@@ -0,0 +1,257 @@
+#!/usr/bin/env python
+# -*- coding: utf8 -*-
+# *****************************************************************
+# **       PTS -- Python Toolkit for working with SKIRT          **
+# **       © Astronomical Observatory, Ghent University          **
+# *****************************************************************
+
+# Ensure Python 3 compatibility
+from __future__ import absolute_import, division, print_function
+
+# Import standard modules
+import copy
+import numpy as np
+
+# Import astronomical modules
+from astropy.io import fits
+
+# Import the relevant PTS classes and modules
+from pts.core.test.implementation import TestImplementation
+from pts.core.basics.log import log
+from pts.core.basics.map import Map
+from pts.magic.core.frame import Frame
+from pts.magic.core.pointsource import PointSource
+from pts.magic.sources.point import PointSourceFinder
+from pts.magic.basics.coordinate import PixelCoordinate
+from pts.magic.basics.coordinatesystem import CoordinateSystem
+
+# -----------------------------------------------------------------
+
+description = "testing the screening of the positions of all point sources at once against the detection of each source separately"
+
+# -----------------------------------------------------------------
+
+class BulkDetectionTest(TestImplementation):
+
+    """
+    This class ...
+    """
+
+    def __init__(self, *args, **kwargs):
+
+        """
+        This function ...
+        :param kwargs:
+        """
+
+        # Call the constructor of the base class
+        super(BulkDetectionTest, self).__init__(*args, **kwargs)
+
+        # The frame
+        self.frame = None
+
+        # The sources: stars, positions in an empty and an invalid part of the frame, and positions outside of the frame
+        self.stars = []
+        self.empty = []
+        self.invalid = []
+        self.outside = []
+
+    # -----------------------------------------------------------------
+
+    def run(self, **kwargs):
+
+        """
+        This function ...
+        :param kwargs:
+        :return:
+        """
+
+        # 1. Call the setup function
+        self.setup(**kwargs)
+
+        # 2. Test the detection of the sources
+        self.test_detection()
+
+        # 3. Test the detection with multiple processes for the screening
+        self.test_processes()
+
+    # -----------------------------------------------------------------
+
+    def setup(self, **kwargs):
+
+        """
+        This function ...
+        :param kwargs:
+        :return:
+        """
+
+        # Call the setup function of the base class
+        super(BulkDetectionTest, self).setup(**kwargs)
+
+        # Create a frame with noise and stars in the left part, the right part is zero at the top and NaN at the bottom
+        random = np.random.RandomState(5)
+        shape = (300, 400)
+        y_values, x_values = np.mgrid[:shape[0], :shape[1]]
+        data = random.normal(0., 0.5, shape) + 2.
+
+        stars = []
+        for y in range(30, 280, 40):
+            for x in range(30, 180, 40):
+                x_star = x + random.uniform(-1., 1.)
+                y_star = y + random.uniform(-1., 1.)
+                data += random.uniform(30., 200.) * np.exp(- ((x_values - x_star)**2 + (y_values - y_star)**2) / (2. * 2.**2))
+                stars.append((x_star, y_star))
+
+        data[150:, 220:] = 0.
+        data[:150, 220:] = np.nan
+
+        # Create the coordinate system
+        header = fits.Header()
+        header["NAXIS"] = 2
+        header["NAXIS1"] = shape[1]
+        header["NAXIS2"] = shape[0]
+        header["CTYPE1"] = "RA---TAN"
+        header["CTYPE2"] = "DEC--TAN"
+        header["CRVAL1"] = 10.
+        header["CRVAL2"] = 20.
+        header["CRPIX1"] = 0.5 * (shape[1] + 1)
+        header["CRPIX2"] = 0.5 * (shape[0] + 1)
+        header["CDELT1"] = -1. / 3600.
+        header["CDELT2"] = 1. / 3600.
+
+        self.frame = Frame(data, wcs=CoordinateSystem(header))
+
+        # Create the sources, mixing the different kinds
+        positions = [(300., 225.), (330., 75.), (-80., 150.), (300., 60.), (310., 250.), (170., 420.)]
+        for index, (x, y) in enumerate(stars + positions):
+
+            # Create the source, at the position of the star rounded to a pixel
+            position = PixelCoordinate(round(x), round(y)).to_sky(self.frame.wcs)
+            source = PointSource(index=index, position=position)
+
+            if index < len(stars): self.stars.append(source)
+            elif x < 0 or y >= shape[0]: self.outside.append(source)
+            elif y >= 150: self.empty.append(source)
+            else: self.invalid.append(source)
+
+    # -----------------------------------------------------------------
+
+    @property
+    def sources(self):
+
+        """
+        This function ...
+        :return:
+        """
+
+        return self.stars + self.empty + self.invalid + self.outside
+
+    # -----------------------------------------------------------------
+
+    def detect(self, bulk, nprocesses=1):
+
+        """
+        This function detects copies of the sources, with or without screening their positions at once
+        :param bulk:
+        :param nprocesses:
+        :return:
+        """
+
+        # Create the point source finder, with the default detection settings
+        finder = PointSourceFinder.__new__(PointSourceFinder)
+        finder.frame = self.frame
+        finder.sources = copy.deepcopy(self.sources)
+        finder.config = Map()
+        finder.config.detection = Map()
+        finder.config.detection.initial_radius = 10.
+        finder.config.detection.detection_method = "peaks"
+        finder.config.detection.minimum_pixels = 5
+        finder.config.detection.background_est_method = "polynomial"
+        finder.config.detection.sigma_clip_background = True
+        finder.config.detection.sigma_level = 2.0
+        finder.config.detection.peak_offset_tolerance = 3.0
+        finder.config.detection.min_level = -2
+        finder.config.detection.max_level = 2
+        finder.config.detection.scale_factor = 2.0
+        finder.config.detection.background_outer_factor = 1.5
+        finder.config.detection.always_subtract_background = False
+        finder.config.detection.bulk = bulk
+        finder.config.detection.nprocesses = nprocesses
+        finder.config.detection.convolution_fwhm = 10.0
+        finder.config.detection.debug = Map()
+        for name in ["zero_peaks_before", "zero_peaks_after", "zero_peaks", "one_peak", "more_peaks", "off_center"]: finder.config.detection.debug[name] = False
+
+        # Detect
+        finder.detect_sources()
+
+        # Return the sources
+        return finder.sources
+
+    # -----------------------------------------------------------------
+
+    def check_same(self, sources, other_sources):
+
+        """
+        This function checks whether the same detections are found for the sources
+        :param sources:
+        :param other_sources:
+        :return:
+        """
+
+        for source, other_source in zip(sources, other_sources):
+
+            assert source.index == other_source.index
+            assert source.has_detection == other_source.has_detection
+            if not source.has_detection: continue
+
+            assert source.detection.peak.x == other_source.detection.peak.x and source.detection.peak.y == other_source.detection.peak.y
+            assert source.detection.cutout.x_min == other_source.detection.cutout.x_min and source.detection.cutout.y_min == other_source.detection.cutout.y_min
+            assert np.array_equal(np.asarray(source.detection.cutout), np.asarray(other_source.detection.cutout), equal_nan=True)
+
+    # -----------------------------------------------------------------
+
+    def test_detection(self):
+
+        """
+        This function ...
+        :return:
+        """
+
+        # Inform the user
+        log.info("Testing the detection of the sources ...")
+
+        # Detect
+        separate = self.detect(False)
+        bulk = self.detect(True)
+
+        # The same detections are found
+        self.check_same(bulk, separate)
+
+        # All stars are detected, none of the other sources
+        nstars = len(self.stars)
+        assert all(source.has_detection for source in bulk[:nstars])
+        assert not any(source.has_detection for source in bulk[nstars:])
+
+    # -----------------------------------------------------------------
+
+    def test_processes(self):
+
+        """
+        This function ...
+        :return:
+        """
+
+        # Inform the user
+        log.info("Testing the detection with multiple processes for the screening ...")
+
+        # Screen in multiple passes and processes
+        from pts.magic.analysis import sources
+        original = sources.max_nscreened_per_pass
+        sources.max_nscreened_per_pass = 4
+        try: parallel = self.detect(True, nprocesses=2)
+        finally: sources.max_nscreened_per_pass = original
+
+        # The same detections are found
+        self.check_same(parallel, self.detect(False))
+
+# -----------------------------------------------------------------
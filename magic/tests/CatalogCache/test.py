@@ -0,0 +1,477 @@
+#!/usr/bin/env python
+# -*- coding: utf8 -*-
+# *****************************************************************
+# **       PTS -- Python Toolkit for working with SKIRT          **
+# **       © Astronomical Observatory, Ghent University          **
+# *****************************************************************
+
+# Ensure Python 3 compatibility
+from __future__ import absolute_import, division, print_function
+
+# Import standard modules
+import math
+import numpy as np
+
+# Import astronomical modules
+from astropy.table import Table, MaskedColumn
+from astropy.coordinates import SkyCoord, Angle
+
+# Import the relevant PTS classes and modules
+from pts.core.test.implementation import TestImplementation
+from pts.core.basics.log import log
+from pts.core.tools import filesystem as fs
+from pts.core.units.parsing import parse_unit as u
+from pts.magic.catalog import cache
+from pts.magic.catalog.point import PointSourceCatalog
+from pts.magic.tools import crossmatch
+
+# -----------------------------------------------------------------
+
+description = "testing the tiling of the sky and the local cache of catalogs, and adding the rows of catalogs at once"
+
+# -----------------------------------------------------------------
+
+class CatalogCacheTest(TestImplementation):
+
+    """
+    This class ...
+    """
+
+    def __init__(self, *args, **kwargs):
+
+        """
+        This function ...
+        :param kwargs:
+        """
+
+        # Call the constructor of the base class
+        super(CatalogCacheTest, self).__init__(*args, **kwargs)
+
+        # The random number generator
+        self.random = None
+
+        # The catalogs of the stand-in source, by code
+        self.catalogs = dict()
+
+        # The positions of the rows of the catalogs, in degrees
+        self.positions = dict()
+
+        # The number of queries on the source
+        self.nqueries = 0
+
+        # The original function that returns the path of the cache
+        self.cache_path = None
+
+    # -----------------------------------------------------------------
+
+    def run(self, **kwargs):
+
+        """
+        This function ...
+        :param kwargs:
+        :return:
+        """
+
+        # 1. Call the setup function
+        self.setup(**kwargs)
+
+        try:
+
+            # 2. Test the tiling
+            self.test_tiling()
+
+            # 3. Test the cache
+            self.test_cache()
+
+            # 4. Test a catalog with the positions in sexagesimal notation
+            self.test_sexagesimal()
+
+            # 5. Test a source without rows
+            self.test_empty()
+
+            # 6. Test a source that fails
+            self.test_failure()
+
+            # 7. Test adding the rows at once
+            self.test_add_rows()
+
+        # Restore the source and the path of the cache
+        finally:
+
+            cache.set_source(None)
+            cache.cache_path = self.cache_path
+            cache.clear()
+
+    # -----------------------------------------------------------------
+
+    def setup(self, **kwargs):
+
+        """
+        This function ...
+        :param kwargs:
+        :return:
+        """
+
+        # Call the setup function of the base class
+        super(CatalogCacheTest, self).setup(**kwargs)
+
+        self.random = np.random.RandomState(3)
+
+        # Create the catalogs, with stars around RA = 0, around the pole and elsewhere
+        ra = []
+        dec = []
+        for center_ra, center_dec in [(0.2, 10.), (150., 89.4), (150., -30.)]:
+            dec_values = self.random.uniform(max(center_dec - 1.5, -90.), min(center_dec + 1.5, 90.), 400)
+            ra_values = np.mod(center_ra + self.random.uniform(-1.5, 1.5, 400) / np.cos(np.radians(min(abs(center_dec) + 1.5, 89.9))), 360.)
+            ra.extend(ra_values)
+            dec.extend(dec_values)
+        ra = np.array(ra)
+        dec = np.array(dec)
+        ids = np.array(["star" + str(index) for index in range(len(ra))])
+        magnitudes = MaskedColumn(self.random.uniform(10., 20., len(ra)), mask=self.random.uniform(size=len(ra)) < 0.2, name="Vmag", unit="mag")
+
+        # In degrees
+        self.catalogs["TEST/DEG"] = Table([ids, MaskedColumn(ra, name="RAJ2000", unit="deg"), MaskedColumn(dec, name="DEJ2000", unit="deg"), magnitudes], names=["ID", "RAJ2000", "DEJ2000", "Vmag"], masked=True)
+        self.positions["TEST/DEG"] = (ra, dec)
+
+        # In sexagesimal notation (as the HYPERLEDA catalog), the positions are those of the rounded values
+        ra_strings = Angle(ra, unit="deg").to_string(unit="hourangle", sep=" ", precision=3, pad=True)
+        dec_strings = Angle(dec, unit="deg").to_string(unit="deg", sep=" ", precision=2, pad=True, alwayssign=True)
+        self.catalogs["TEST/HMS"] = Table([ids, ra_strings, dec_strings], names=["PGC", "RAJ2000", "DEJ2000"], masked=True)
+        self.positions["TEST/HMS"] = (Angle(ra_strings, unit="hourangle").degree, Angle(dec_strings, unit="deg").degree)
+
+        # Use the stand-in source and a cache in the test directory
+        cache.set_source(self.source)
+        self.cache_path = cache.cache_path
+        cache.cache_path = lambda: fs.join(self.path, "catalogs")
+        cache.clear()
+
+    # -----------------------------------------------------------------
+
+    def source(self, code, ra, dec, radius):
+
+        """
+        This function is the stand-in for the Vizier source of the cache
+        :param code:
+        :param ra:
+        :param dec:
+        :param radius:
+        :return:
+        """
+
+        self.nqueries += 1
+
+        # A failure of the service
+        if code == "TEST/FAIL": raise IOError("the service is not available")
+
+        # No rows
+        if code not in self.catalogs: return Table(masked=True)
+
+        # The rows within the circle
+        ra_values, dec_values = self.positions[code]
+        separations = crossmatch.separation(crossmatch.unit_vectors(ra_values, dec_values), crossmatch.unit_vectors(ra, dec))
+        return self.catalogs[code][separations <= radius]
+
+    # -----------------------------------------------------------------
+
+    def tile_of(self, ra, dec):
+
+        """
+        This function returns the tile that contains a position
+        :param ra:
+        :param dec:
+        :return:
+        """
+
+        band = min(int(math.floor((dec + 90.) / cache.tile_size)), cache.nbands - 1)
+        index = int(math.floor(ra / (360. / cache.ntiles_in_band(band))))
+        return band, index
+
+    # -----------------------------------------------------------------
+
+    def in_box(self, ra, dec, center_ra, center_dec, ra_radius, dec_radius):
+
+        """
+        This function returns whether positions lie within a box
+        :param ra:
+        :param dec:
+        :param center_ra:
+        :param center_dec:
+        :param ra_radius:
+        :param dec_radius:
+        :return:
+        """
+
+        ra_offsets = np.mod(ra - center_ra + 180., 360.) - 180.
+        return (np.abs(ra_offsets) * np.cos(np.radians(dec)) <= ra_radius) & (np.abs(dec - center_dec) <= dec_radius)
+
+    # -----------------------------------------------------------------
+
+    def test_tiling(self):
+
+        """
+        This function ...
+        :return:
+        """
+
+        # Inform the user
+        log.info("Testing the tiling ...")
+
+        # Each position lies in the bounds of its tile
+        ra = self.random.uniform(0., 360., 2000)
+        dec = np.degrees(np.arcsin(self.random.uniform(-1., 1., 2000)))
+        for ra_value, dec_value in zip(ra, dec):
+            ra_min, ra_max, dec_min, dec_max = cache.tile_bounds(self.tile_of(ra_value, dec_value))
+            assert ra_min <= ra_value < ra_max and dec_min <= dec_value <= dec_max
+
+        # The tiles of the positions within a box are returned for the box, also around RA = 0 and the poles
+        for center_ra, center_dec, ra_radius, dec_radius in [(0.1, 0., 0.6, 0.3), (359.8, -45., 1.2, 0.8), (150., 89.6, 0.7, 0.5),
+                                                             (10., -89.9, 0.2, 0.2), (200., 30., 2.5, 0.1), (77., 62., 0.05, 0.05)]:
+
+            tiles = set(cache.get_tiles(center_ra, center_dec, ra_radius, dec_radius))
+            assert len(tiles) == len(cache.get_tiles(center_ra, center_dec, ra_radius, dec_radius))
+
+            dec_values = np.clip(center_dec + self.random.uniform(-dec_radius, dec_radius, 5000), -90., 90.)
+            ra_values = np.mod(center_ra + self.random.uniform(-180., 180., 5000), 360.)
+            inside = self.in_box(ra_values, dec_values, center_ra, center_dec, ra_radius, dec_radius)
+            assert np.any(inside)
+            for ra_value, dec_value in zip(ra_values[inside], dec_values[inside]):
+                assert self.tile_of(ra_value, dec_value) in tiles, (center_ra, center_dec)
+
+    # -----------------------------------------------------------------
+
+    def query(self, code, center_ra, center_dec, ra_radius, dec_radius):
+
+        """
+        This function queries the cache and checks the rows against the rows of the catalog within the box
+        :param code:
+        :param center_ra:
+        :param center_dec:
+        :param ra_radius:
+        :param dec_radius:
+        :return:
+        """
+
+        center = SkyCoord(ra=center_ra, dec=center_dec, unit="deg", frame="fk5")
+        table = cache.query_box(code, center, 2. * ra_radius * u("deg"), 2. * dec_radius * u("deg"))
+
+        ra, dec = self.positions[code]
+        inside = self.in_box(ra, dec, center_ra, center_dec, ra_radius, dec_radius)
+        ids = self.catalogs[code].colnames[0]
+        assert len(table) > 0
+        assert sorted(table[ids]) == sorted(self.catalogs[code][ids][inside])
+
+        # Return the table
+        return table
+
+    # -----------------------------------------------------------------
+
+    def test_cache(self):
+
+        """
+        This function ...
+        :return:
+        """
+
+        # Inform the user
+        log.info("Testing the cache ...")
+
+        boxes = [(0.1, 10., 0.8, 0.6), (150., 89.5, 0.6, 0.4), (150.2, -30.3, 0.9, 1.1)]
+
+        # The source is queried once for every tile, which is written to the cache
+        for box in boxes:
+
+            ntiles = len(cache.get_tiles(*box))
+            nqueries = self.nqueries
+            self.query("TEST/DEG", *box)
+            assert self.nqueries - nqueries == ntiles
+            for tile in cache.get_tiles(*box): assert fs.is_file(cache.tile_path("TEST/DEG", tile))
+
+        # From memory and from the cache on disk (as in another process), with the units and the masks
+        for clear in [False, True]:
+
+            if clear: cache.clear()
+            nqueries = self.nqueries
+            for box in boxes:
+
+                table = self.query("TEST/DEG", *box)
+                assert table["Vmag"].unit == "mag"
+                for star_id, magnitude in zip(table["ID"], table["Vmag"]):
+                    index = int(star_id[4:])
+                    assert bool(magnitude is np.ma.masked) == bool(self.catalogs["TEST/DEG"]["Vmag"].mask[index])
+
+            assert self.nqueries == nqueries
+
+        # An overlapping box only queries the new tiles
+        box = (0.1, 10.4, 0.8, 0.6)
+        nqueries = self.nqueries
+        self.query("TEST/DEG", *box)
+        assert self.nqueries - nqueries == len(set(cache.get_tiles(*box)) - set(cache.get_tiles(*boxes[0])))
+
+    # -----------------------------------------------------------------
+
+    def test_sexagesimal(self):
+
+        """
+        This function ...
+        :return:
+        """
+
+        # Inform the user
+        log.info("Testing a catalog with the positions in sexagesimal notation ...")
+
+        for clear in [False, True]:
+
+            if clear: cache.clear()
+            table = self.query("TEST/HMS", 359.9, 10.2, 0.7, 0.5)
+
+            # The positions in degrees
+            ra, dec = cache.positions(table)
+            indices = [int(star_id[4:]) for star_id in table["PGC"]]
+            assert np.allclose(ra, self.positions["TEST/HMS"][0][indices], rtol=0, atol=1e-8)
+            assert np.allclose(dec, self.positions["TEST/HMS"][1][indices], rtol=0, atol=1e-8)
+
+        # The positions computed by Vizier are used if present
+        table = Table([["00 00 00.000", "12 00 00.000"], ["+00 00 00.00", "-10 30 00.00"], [1.5, 180.], [0.5, -10.5]],
+                      names=["RAJ2000", "DEJ2000", "_RAJ2000", "_DEJ2000"], masked=True)
+        table["_RAJ2000"].mask[0] = True
+        ra, dec = cache.positions(table)
+        assert np.allclose(ra, [0., 180.]) and np.allclose(dec, [0., -10.5])
+
+    # -----------------------------------------------------------------
+
+    def test_empty(self):
+
+        """
+        This function ...
+        :return:
+        """
+
+        # Inform the user
+        log.info("Testing a source without rows ...")
+
+        center = SkyCoord(ra=40., dec=20., unit="deg", frame="fk5")
+        tiles = cache.get_tiles(40., 20., 0.3, 0.3)
+
+        # The tiles are written to the cache
+        nqueries = self.nqueries
+        assert len(cache.query_box("TEST/NONE", center, 0.6 * u("deg"), 0.6 * u("deg"))) == 0
+        assert self.nqueries - nqueries == len(tiles)
+        for tile in tiles: assert fs.is_file(cache.tile_path("TEST/NONE", tile))
+
+        # So the source is not queried again (in another process)
+        cache.clear()
+        assert len(cache.query_box("TEST/NONE", center, 0.6 * u("deg"), 0.6 * u("deg"))) == 0
+        assert self.nqueries - nqueries == len(tiles)
+
+        # A tile without rows is written if the source returns rows around it (the stars lie below a declination of 11.5)
+        tile = self.tile_of(0.2, 11.7)
+        nqueries = self.nqueries
+        assert len(cache.get_tile("TEST/DEG", tile)) == 0
+        assert self.nqueries == nqueries + 1
+        assert fs.is_file(cache.tile_path("TEST/DEG", tile))
+        nqueries = self.nqueries
+        cache.clear()
+        cache.get_tile("TEST/DEG", tile)
+        assert self.nqueries == nqueries
+
+    # -----------------------------------------------------------------
+
+    def test_failure(self):
+
+        """
+        This function ...
+        :return:
+        """
+
+        # Inform the user
+        log.info("Testing a source that fails ...")
+
+        center = SkyCoord(ra=40., dec=20., unit="deg", frame="fk5")
+        tiles = cache.get_tiles(40., 20., 0.3, 0.3)
+
+        # Nothing is written to the cache or kept in memory
+        nqueries = self.nqueries
+        assert len(cache.query_box("TEST/FAIL", center, 0.6 * u("deg"), 0.6 * u("deg"))) == 0
+        assert self.nqueries - nqueries == len(tiles)
+        for tile in tiles: assert not fs.is_file(cache.tile_path("TEST/FAIL", tile))
+
+        # So the source is queried again
+        assert len(cache.query_box("TEST/FAIL", center, 0.6 * u("deg"), 0.6 * u("deg"))) == 0
+        assert self.nqueries - nqueries == 2 * len(tiles)
+
+        # The Vizier source returns a table without rows if the query succeeds without rows, and raises an exception
+        # if the query fails
+        from astroquery import vizier
+
+        class Vizier(object):
+            def __init__(self, *args, **kwargs): pass
+            def query_region(self, center, radius=None, catalog=None):
+                if catalog == "TEST/FAIL": raise IOError("the service is not available")
+                return []
+
+        original = vizier.Vizier
+        vizier.Vizier = Vizier
+        try:
+
+            table = cache.vizier_source("TEST/NONE", 40., 20., 0.5)
+            assert table is not None and len(table) == 0
+
+            try: cache.vizier_source("TEST/FAIL", 40., 20., 0.5)
+            except IOError: pass
+            else: raise AssertionError("The failure of the query is not passed on")
+
+        finally: vizier.Vizier = original
+
+    # -----------------------------------------------------------------
+
+    def test_add_rows(self):
+
+        """
+        This function ...
+        :return:
+        """
+
+        # Inform the user
+        log.info("Testing adding the rows at once ...")
+
+        names = ["II/246", "UCAC4", None, "NOMAD-1", "II/246"]
+        ids = ["a", "long identifier", "c", None, "e"]
+        ra = [1. * u("deg"), 3600. * u("arcsec"), 2. * u("deg"), 60. * u("arcmin"), 0.5 * u("deg")]
+        dec = [-1. * u("deg"), 0.5 * u("deg"), None, 1.5 * u("deg"), -7200. * u("arcsec")]
+        ra_errors = [10. * u("mas"), 0.02 * u("arcsec"), None, 5. * u("mas"), 1e-6 * u("deg")]
+        dec_errors = [None, 0.01 * u("arcsec"), 3. * u("mas"), 4. * u("mas"), 2. * u("mas")]
+        confidence = [1, None, 3, 2, 0]
+
+        # Row by row
+        expected = PointSourceCatalog()
+        for values in zip(names, ids, ra, dec, ra_errors, dec_errors, confidence): expected.add_entry(*values)
+
+        # At once, to an empty table and to a table with rows
+        for first in [0, 2]:
+
+            catalog = PointSourceCatalog()
+            for values in list(zip(names, ids, ra, dec, ra_errors, dec_errors, confidence))[:first]: catalog.add_entry(*values)
+            catalog.add_rows([values[first:] for values in [names, ids, ra, dec, ra_errors, dec_errors, confidence]])
+
+            assert catalog.colnames == expected.colnames
+            assert len(catalog) == len(expected)
+            for name in expected.colnames:
+
+                assert catalog[name].unit == expected[name].unit
+                assert np.array_equal(np.ma.getmaskarray(catalog[name]), np.ma.getmaskarray(expected[name])), name
+                data = np.ma.getdata(catalog[name])[~np.ma.getmaskarray(catalog[name])]
+                expected_data = np.ma.getdata(expected[name])[~np.ma.getmaskarray(expected[name])]
+                if data.dtype.kind in "SU": assert list(data) == list(expected_data), name
+                else: assert np.allclose(data, expected_data), name
+
+        # Nothing is added if there are no rows, the number of columns and rows must be consistent
+        catalog.add_rows([[] for _ in catalog.colnames])
+        assert len(catalog) == len(expected)
+        for columns in [[names], [values[:3] if index == 0 else values for index, values in enumerate([names, ids, ra, dec, ra_errors, dec_errors, confidence])]]:
+
+            try: catalog.add_rows(columns)
+            except ValueError: pass
+            else: raise AssertionError("A ValueError was expected")
+
+# -----------------------------------------------------------------
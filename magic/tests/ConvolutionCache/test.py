@@ -0,0 +1,172 @@
+#!/usr/bin/env python
+# -*- coding: utf8 -*-
+# *****************************************************************
+# **       PTS -- Python Toolkit for working with SKIRT          **
+# **       © Astronomical Observatory, Ghent University          **
+# *****************************************************************
+
+# Ensure Python 3 compatibility
+from __future__ import absolute_import, division, print_function
+
+# Import standard modules
+import numpy as np
+
+# Import astronomical modules
+from astropy.convolution import convolve_fft
+
+# Import the relevant PTS classes and modules
+from pts.core.test.implementation import TestImplementation
+from pts.core.basics.log import log
+from pts.magic.core.kernel import ConvolutionKernel
+from pts.magic.convolution import cache
+
+# -----------------------------------------------------------------
+
+description = "testing the FFT convolution with cached kernel transforms against astropy's convolve_fft"
+
+# -----------------------------------------------------------------
+
+class ConvolutionCacheTest(TestImplementation):
+
+    """
+    This class ...
+    """
+
+    def __init__(self, *args, **kwargs):
+
+        """
+        This function ...
+        :param kwargs:
+        """
+
+        # Call the constructor of the base class
+        super(ConvolutionCacheTest, self).__init__(*args, **kwargs)
+
+        # The data and the kernel
+        self.data = None
+        self.kernel = None
+
+    # -----------------------------------------------------------------
+
+    def run(self, **kwargs):
+
+        """
+        This function ...
+        :param kwargs:
+        :return:
+        """
+
+        # 1. Call the setup function
+        self.setup(**kwargs)
+
+        # 2. Compare without NaNs
+        self.test_without_nans()
+
+        # 3. Compare with NaN interpolation
+        self.test_with_nans()
+
+        # 4. Test the cache of kernel transforms
+        self.test_transform_cache()
+
+    # -----------------------------------------------------------------
+
+    def setup(self, **kwargs):
+
+        """
+        This function ...
+        :param kwargs:
+        :return:
+        """
+
+        # Call the setup function of the base class
+        super(ConvolutionCacheTest, self).setup(**kwargs)
+
+        # Clear the cache
+        cache.clear()
+
+        # Create the data (not square, so that the axes can't be mixed up)
+        random = np.random.RandomState(42)
+        self.data = random.uniform(0., 10., size=(70, 95))
+
+        # Create an elongated, normalized Gaussian kernel
+        y, x = np.mgrid[-7:8, -7:8]
+        kernel_data = np.exp(-0.5 * ((x / 2.5)**2 + (y / 1.5)**2))
+        self.kernel = ConvolutionKernel(kernel_data / np.sum(kernel_data))
+
+    # -----------------------------------------------------------------
+
+    def compare(self, data):
+
+        """
+        This function compares the cached FFT convolution with astropy's convolve_fft, outside of the NaN pixels
+        (which are put back after the convolution by Frame.convolve)
+        :param data:
+        :return:
+        """
+
+        result = cache.convolve_fft(data, self.kernel, interpolate_nan=True)
+        reference = convolve_fft(data, self.kernel.data, normalize_kernel=False, interpolate_nan=True)
+
+        valid = np.isfinite(data)
+        assert result.shape == data.shape
+        assert np.allclose(result[valid], reference[valid], rtol=1e-9, atol=1e-9)
+
+    # -----------------------------------------------------------------
+
+    def test_without_nans(self):
+
+        """
+        This function ...
+        :return:
+        """
+
+        # Inform the user
+        log.info("Comparing the convolution of data without NaNs ...")
+
+        self.compare(self.data)
+
+    # -----------------------------------------------------------------
+
+    def test_with_nans(self):
+
+        """
+        This function ...
+        :return:
+        """
+
+        # Inform the user
+        log.info("Comparing the convolution of data with NaNs ...")
+
+        data = self.data.copy()
+
+        # Single NaN pixels, a NaN block and a NaN border
+        random = np.random.RandomState(43)
+        data[random.randint(0, data.shape[0], 50), random.randint(0, data.shape[1], 50)] = np.nan
+        data[20:30, 40:52] = np.nan
+        data[:, :3] = np.nan
+
+        self.compare(data)
+
+    # -----------------------------------------------------------------
+
+    def test_transform_cache(self):
+
+        """
+        This function ...
+        :return:
+        """
+
+        # Inform the user
+        log.info("Testing the cache of kernel transforms ...")
+
+        # One transform for the (one) padded shape
+        assert len(cache.kernel_ffts) == 1
+        transform = cache.kernel_fft(self.kernel, cache.fft_shape(self.data.shape, self.kernel.shape))
+        assert len(cache.kernel_ffts) == 1
+        assert transform is list(cache.kernel_ffts.values())[0]
+
+        # A different shape gives a new transform
+        self.compare(self.data[:50, :60])
+        assert len(cache.kernel_ffts) == 2
+
+# -----------------------------------------------------------------
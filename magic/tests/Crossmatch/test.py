@@ -0,0 +1,194 @@
+#!/usr/bin/env python
+# -*- coding: utf8 -*-
+# *****************************************************************
+# **       PTS -- Python Toolkit for working with SKIRT          **
+# **       © Astronomical Observatory, Ghent University          **
+# *****************************************************************
+
+# Ensure Python 3 compatibility
+from __future__ import absolute_import, division, print_function
+
+# Import standard modules
+import numpy as np
+
+# Import astronomical modules
+from astropy.coordinates import SkyCoord
+from astropy.table import MaskedColumn, Table
+
+# Import the relevant PTS classes and modules
+from pts.core.test.implementation import TestImplementation
+from pts.core.basics.log import log
+from pts.magic.tools import crossmatch
+from pts.magic.catalog.synchronizer import CatalogSynchronizer
+
+# -----------------------------------------------------------------
+
+description = "testing the cross-matching of sky positions with a spatial index, also with missing positions"
+
+# -----------------------------------------------------------------
+
+class CrossmatchTest(TestImplementation):
+
+    """
+    This class ...
+    """
+
+    def __init__(self, *args, **kwargs):
+
+        """
+        This function ...
+        :param kwargs:
+        """
+
+        # Call the constructor of the base class
+        super(CrossmatchTest, self).__init__(*args, **kwargs)
+
+        # The random generator
+        self.random = None
+
+    # -----------------------------------------------------------------
+
+    def run(self, **kwargs):
+
+        """
+        This function ...
+        :param kwargs:
+        :return:
+        """
+
+        # 1. Call the setup function
+        self.setup(**kwargs)
+
+        # 2. Test the neighbours against all separations
+        self.test_neighbours()
+
+        # 3. Test the matching of the stars with the DustPedia catalog
+        self.test_synchronizer()
+
+    # -----------------------------------------------------------------
+
+    def setup(self, **kwargs):
+
+        """
+        This function ...
+        :param kwargs:
+        :return:
+        """
+
+        # Call the setup function of the base class
+        super(CrossmatchTest, self).setup(**kwargs)
+
+        # Create the random generator
+        self.random = np.random.RandomState(48)
+
+    # -----------------------------------------------------------------
+
+    def test_neighbours(self):
+
+        """
+        This function ...
+        :return:
+        """
+
+        # Inform the user
+        log.info("Testing the neighbours against all separations ...")
+
+        # Positions around RA = 0 and close to the pole, some of them missing
+        for center_dec in [10., 89.9]:
+
+            ra = self.random.uniform(-0.5, 0.5, 300) % 360.
+            dec = np.minimum(center_dec + self.random.uniform(-0.1, 0.1, 300), 90.)
+            ra[::17] = np.nan
+            dec[::23] = np.nan
+
+            query_ra = self.random.uniform(-0.5, 0.5, 50) % 360.
+            query_dec = np.minimum(center_dec + self.random.uniform(-0.1, 0.1, 50), 90.)
+            query_ra[::7] = np.nan
+            radius = self.random.uniform(0., 0.05, 50)
+            radius[3] = np.nan
+            radius[5] = 0.
+
+            # The index and the neighbours
+            index = crossmatch.create_index(ra, dec)
+            neighbours = crossmatch.neighbours(index, query_ra, query_dec, radius)
+            assert len(neighbours) == 50
+
+            # Compare with the separations from all positions
+            finite = np.flatnonzero(np.isfinite(ra) & np.isfinite(dec))
+            positions = SkyCoord(ra[finite], dec[finite], unit="deg")
+            for i in range(50):
+
+                if not np.isfinite(query_ra[i]) or not np.isfinite(radius[i]):
+                    assert len(neighbours[i]) == 0
+                    continue
+
+                separations = positions.separation(SkyCoord(query_ra[i], query_dec[i], unit="deg")).deg
+                expected = finite[separations < radius[i]]
+
+                # Leave out the positions at the radius (within the numerical precision)
+                uncertain = finite[np.abs(separations - radius[i]) < 1e-9]
+                assert np.array_equal(np.setdiff1d(neighbours[i], uncertain), np.setdiff1d(expected, uncertain)), i
+
+        # Only missing positions
+        index = crossmatch.create_index([np.nan, 1.], [2., np.nan])
+        assert all(len(indices) == 0 for indices in crossmatch.neighbours(index, [1.], [2.], 1.))
+
+    # -----------------------------------------------------------------
+
+    def create_catalog(self, catalogs, ids, ra, dec, error, original_ids):
+
+        """
+        This function creates a stellar catalog (a missing value is None)
+        :param catalogs:
+        :param ids:
+        :param ra:
+        :param dec:
+        :param error: the error on the right ascension and declination (in mas)
+        :param original_ids:
+        :return:
+        """
+
+        def column(name, values, dtype):
+            mask = [value is None for value in values]
+            filled = [("" if dtype is str else 0.) if value is None else value for value in values]
+            return MaskedColumn(np.array(filled, dtype=object if dtype is str else float).astype(dtype), name=name, mask=mask)
+
+        errors = [error] * len(ids)
+        return Table([column("Catalog", catalogs, str), column("Id", ids, str), column("Right ascension", ra, float),
+                      column("Declination", dec, float), column("Right ascension error", errors, float),
+                      column("Declination error", errors, float), column("Original catalog and id", original_ids, str)], masked=True)
+
+    # -----------------------------------------------------------------
+
+    def test_synchronizer(self):
+
+        """
+        This function ...
+        :return:
+        """
+
+        # Inform the user
+        log.info("Testing the matching of the stars with the DustPedia catalog ...")
+
+        arcsec = 1. / 3600.
+
+        # The DustPedia catalog: a star with an original catalog, stars without, and a star without position
+        old = self.create_catalog(["DustPedia"] * 4, ["NGC0000/0", "NGC0000/1", "NGC0000/2", "NGC0000/3"],
+                                  [10., 10. + 10. * arcsec, None, 10. + 20. * arcsec], [20., 20., None, 20.],
+                                  1000., ["UCAC4//123", None, None, None])
+
+        # The stellar catalog: a DustPedia star, a star with the original catalog, stars close to the DustPedia stars
+        # without original catalog, a star far away, and a star without position
+        new = self.create_catalog(["DustPedia", "UCAC4", None, None, None, None], ["0", "123", "1", "2", "3", "4"],
+                                  [10., 30., 10. + 10.5 * arcsec, 10. + 20.2 * arcsec, 50., None],
+                                  [20., 30., 20., 20., 30., None], 2000., [None] * 6)
+
+        synchronizer = CatalogSynchronizer()
+        synchronizer.stellar_catalog = new
+        assert synchronizer.match_dustpedia_stars(old) == [False, True, True, True, False, False]
+
+        # Every DustPedia star is matched only once
+        synchronizer.stellar_catalog = self.create_catalog([None] * 3, ["1", "2", "3"], [10. + 10. * arcsec] * 3, [20.] * 3, 2000., [None] * 3)
+        assert synchronizer.match_dustpedia_stars(old) == [True, False, False]
+
+# -----------------------------------------------------------------
@@ -0,0 +1,285 @@
+#!/usr/bin/env python
+# -*- coding: utf8 -*-
+# *****************************************************************
+# **       PTS -- Python Toolkit for working with SKIRT          **
+# **       © Astronomical Observatory, Ghent University          **
+# *****************************************************************
+
+# Ensure Python 3 compatibility
+from __future__ import absolute_import, division, print_function
+
+# Import standard modules
+import copy
+import numpy as np
+
+# Import the relevant PTS classes and modules
+from pts.core.test.implementation import TestImplementation
+from pts.core.basics.log import log
+from pts.core.basics.map import Map
+from pts.magic.core.frame import Frame
+from pts.magic.core.detection import Detection
+from pts.magic.core.pointsource import PointSource
+from pts.magic.sources.point import PointSourceFinder
+from pts.magic.basics.coordinate import PixelCoordinate
+from pts.magic.basics.stretch import PixelStretch
+from pts.magic.region.ellipse import PixelEllipseRegion
+from pts.magic.tools import fitting, statistics
+
+# -----------------------------------------------------------------
+
+description = "testing the batched fitting of Gaussian models to point sources against the fitting of each source separately"
+
+# -----------------------------------------------------------------
+
+class GaussianFittingTest(TestImplementation):
+
+    """
+    This class ...
+    """
+
+    def __init__(self, *args, **kwargs):
+
+        """
+        This function ...
+        :param kwargs:
+        """
+
+        # Call the constructor of the base class
+        super(GaussianFittingTest, self).__init__(*args, **kwargs)
+
+        # The frame
+        self.frame = None
+
+        # The positions, amplitudes and standard deviations of the stars
+        self.stars = []
+
+        # The position of a negative source
+        self.negative_position = None
+
+        # The point source finder
+        self.finder = None
+
+    # -----------------------------------------------------------------
+
+    def run(self, **kwargs):
+
+        """
+        This function ...
+        :param kwargs:
+        :return:
+        """
+
+        # 1. Call the setup function
+        self.setup(**kwargs)
+
+        # 2. Test the batched fitting against the fitting of each source separately
+        self.test_equivalence()
+
+        # 3. Test the sources for which the batched fitting fails
+        self.test_failures()
+
+        # 4. Test the fitting of stacks of boxes
+        self.test_stacks()
+
+    # -----------------------------------------------------------------
+
+    def setup(self, **kwargs):
+
+        """
+        This function ...
+        :param kwargs:
+        :return:
+        """
+
+        # Call the setup function of the base class
+        super(GaussianFittingTest, self).setup(**kwargs)
+
+        # Create a frame with noise and stars on a grid, with random subpixel positions, amplitudes and widths
+        random = np.random.RandomState(11)
+        size = 240
+        y_values, x_values = np.mgrid[:size, :size]
+        data = random.normal(0., 0.5, (size, size)) + 2. + 0.01 * x_values
+
+        for y_center in range(20, size - 40, 30):
+            for x_center in range(20, size, 30):
+
+                x = x_center + random.uniform(-0.5, 0.5)
+                y = y_center + random.uniform(-0.5, 0.5)
+                amplitude = random.uniform(20., 200.)
+                stddev = random.uniform(1.2, 3.)
+                data += amplitude * np.exp(- ((x_values - x)**2 + (y_values - y)**2) / (2. * stddev**2))
+                self.stars.append((x, y, amplitude, stddev))
+
+        # Add a negative source in the last row
+        self.negative_position = (110., 220.)
+        data -= 50. * np.exp(- ((x_values - self.negative_position[0])**2 + (y_values - self.negative_position[1])**2) / (2. * 2.**2))
+
+        self.frame = Frame(data)
+
+        # Create the point source finder, with the default fitting settings but starting from the centers of the detections
+        self.finder = PointSourceFinder.__new__(PointSourceFinder)
+        self.finder.config = Map()
+        self.finder.config.fitting = Map()
+        self.finder.config.fitting.use_center_or_peak = "center"
+        self.finder.config.fitting.model_names = ["Gaussian"]
+        self.finder.config.fitting.minimum_pixels = 5
+        self.finder.config.fitting.max_model_offset = 3.0
+        self.finder.config.fitting.zoom_factor = 2.0
+        self.finder.config.fitting.background_est_method = "polynomial"
+        self.finder.config.fitting.sigma_clip_background = True
+        self.finder.config.fitting.nprocesses = 1
+        self.finder.config.fitting.debug = Map()
+        self.finder.config.fitting.debug.model_offset = False
+        self.finder.config.fitting.debug.success = False
+
+    # -----------------------------------------------------------------
+
+    def create_sources(self, positions):
+
+        """
+        This function creates the sources with their detections (the background is estimated) at the given positions,
+        and copies of them
+        :param positions:
+        :return:
+        """
+
+        sources = []
+        for index, (x, y) in enumerate(positions):
+
+            # Create the detection, around a position that is slightly off the star
+            ellipse = PixelEllipseRegion(PixelCoordinate(round(x) + 0.3, round(y) - 0.2), PixelStretch(8., 8.))
+            detection = Detection.from_ellipse(self.frame, ellipse, 1.6)
+            detection.estimate_background("polynomial", True)
+
+            # Set the peak to the brightest pixel (as found by the detection of the sources)
+            if np.any(np.isfinite(detection.cutout)):
+                y_peak, x_peak = np.unravel_index(np.nanargmax(detection.cutout), detection.cutout.shape)
+                detection.peak = PixelCoordinate(x_peak + detection.cutout.x_min, y_peak + detection.cutout.y_min)
+            else: detection.peak = detection.center
+
+            source = PointSource(index=index, position=None)
+            source.detection = detection
+            sources.append(source)
+
+        # Return the sources and the copies
+        return sources, copy.deepcopy(sources)
+
+    # -----------------------------------------------------------------
+
+    def test_equivalence(self):
+
+        """
+        This function ...
+        :return:
+        """
+
+        # Inform the user
+        log.info("Testing the batched fitting against the fitting of each source separately ...")
+
+        # Create the sources
+        sources, separate = self.create_sources([(x, y) for x, y, _, _ in self.stars])
+
+        # Fit all sources at once: a model is found for all of them
+        remaining = self.finder.fit_psf_batched([(source, None) for source in sources])
+        assert len(remaining) == 0
+
+        # Fit the sources separately
+        for source in separate: source.fit_model(self.finder.config.fitting)
+
+        # Compare the centers and FWHMs with the stars, and with the models of the separate fitting where it recovers
+        # the star (the fitting of single sources occasionally ends in a local minimum)
+        nrecovered = 0
+        for source, separate_source, (x, y, _, stddev) in zip(sources, separate, self.stars):
+
+            assert source.psf_model is not None and separate_source.psf_model is not None
+            center = fitting.center(source.psf_model)
+            separate_center = fitting.center(separate_source.psf_model)
+            fwhm = source.psf_model.x_stddev.value * statistics.sigma_to_fwhm
+            separate_fwhm = separate_source.psf_model.x_stddev.value * statistics.sigma_to_fwhm
+
+            assert abs(center.x - x) < 0.05 and abs(center.y - y) < 0.05
+            assert abs(fwhm - stddev * statistics.sigma_to_fwhm) < 0.03 * fwhm
+
+            if abs(separate_center.x - x) > 0.05 or abs(separate_center.y - y) > 0.05: continue
+            nrecovered += 1
+
+            assert abs(center.x - separate_center.x) < 0.001 and abs(center.y - separate_center.y) < 0.001
+            assert abs(fwhm - separate_fwhm) < 0.01 * separate_fwhm
+
+        assert nrecovered >= len(self.stars) - 2
+
+    # -----------------------------------------------------------------
+
+    def test_failures(self):
+
+        """
+        This function ...
+        :return:
+        """
+
+        # Inform the user
+        log.info("Testing the sources for which the batched fitting fails ...")
+
+        # Create the sources, with the negative source and a source that is too far from the star (the fitted model
+        # is further from the initial position than the maximum offset) between the stars
+        x, y, _, _ = self.stars[12]
+        positions = [(x, y) for x, y, _, _ in self.stars[:6]] + [self.negative_position, (x + 5., y)] + [(x, y) for x, y, _, _ in self.stars[6:12]]
+        sources, separate = self.create_sources(positions)
+
+        # The sources without a valid model are left to the separate fitting
+        remaining = self.finder.fit_psf_batched([(source, None) for source in sources])
+        assert sorted(source.index for source, _ in remaining) == [6, 7]
+        for source, detection in remaining: assert source.psf_model is None and detection is None
+
+        # The models of the other sources are the same as without the failing sources
+        alone, _ = self.create_sources([(x, y) for x, y, _, _ in self.stars[:12]])
+        assert len(self.finder.fit_psf_batched([(source, None) for source in alone])) == 0
+        for source, alone_source in zip(sources[:6] + sources[8:], alone):
+            assert np.allclose(source.psf_model.parameters, alone_source.psf_model.parameters, rtol=1e-10, atol=1e-10)
+
+        # Separately, no model is found for the negative source either
+        separate[6].fit_model(self.finder.config.fitting)
+        assert separate[6].psf_model is None
+
+    # -----------------------------------------------------------------
+
+    def test_stacks(self):
+
+        """
+        This function ...
+        :return:
+        """
+
+        # Inform the user
+        log.info("Testing the fitting of stacks of boxes ...")
+
+        # Create the stack, with a box without valid pixels and a box with only three valid pixels
+        sources, _ = self.create_sources([(x, y) for x, y, _, _ in self.stars])
+        sources = [source for source in sources if source.detection.cutout.shape == sources[0].detection.cutout.shape]
+        boxes = np.array([np.asarray(source.detection.subtracted) for source in sources] + [np.full(sources[0].detection.cutout.shape, np.nan)] * 2)
+        boxes[-1, 10, 10:13] = 1.
+        centers = np.array([[source.detection.center.x - source.detection.cutout.x_min, source.detection.center.y - source.detection.cutout.y_min] for source in sources] + [[11., 11.]] * 2)
+        amplitudes, x_means, y_means, stddevs, converged = fitting.fit_2D_Gaussians(boxes, centers)
+
+        # Boxes with too few valid pixels are not converged
+        assert np.all(converged[:-2]) and not np.any(converged[-2:])
+
+        # Fits that stop before convergence are not flagged
+        assert not np.any(fitting.fit_2D_Gaussians(boxes, centers, max_iterations=1)[4])
+
+        # Masked pixels are not used: masking the pixels far from the stars doesn't change the fits much
+        y_values, x_values = np.mgrid[:boxes.shape[1], :boxes.shape[2]]
+        masks = (x_values - centers[:, 0, np.newaxis, np.newaxis])**2 + (y_values - centers[:, 1, np.newaxis, np.newaxis])**2 > 12.**2
+        masked = fitting.fit_2D_Gaussians(boxes[:-2], centers[:-2], masks=masks[:-2])
+        assert np.all(masked[4])
+        assert np.allclose(masked[1], x_means[:-2], atol=0.05) and np.allclose(masked[2], y_means[:-2], atol=0.05)
+
+        # The same result with more processes
+        original = fitting.min_nboxes_per_process
+        fitting.min_nboxes_per_process = 4
+        try: parallel = fitting.fit_2D_Gaussians(boxes, centers, nprocesses=3)
+        finally: fitting.min_nboxes_per_process = original
+        for values, parallel_values in zip((amplitudes, x_means, y_means, stddevs, converged), parallel):
+            assert np.array_equal(values, parallel_values)
+
+# -----------------------------------------------------------------
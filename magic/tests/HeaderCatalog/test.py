@@ -0,0 +1,261 @@
+#!/usr/bin/env python
+# -*- coding: utf8 -*-
+# *****************************************************************
+# **       PTS -- Python Toolkit for working with SKIRT          **
+# **       © Astronomical Observatory, Ghent University          **
+# *****************************************************************
+
+# Ensure Python 3 compatibility
+from __future__ import absolute_import, division, print_function
+
+# Import standard modules
+import os
+import numpy as np
+
+# Import astronomical modules
+from astropy.io import fits
+
+# Import the relevant PTS classes and modules
+from pts.core.test.implementation import TestImplementation
+from pts.core.basics.log import log
+from pts.core.tools import filesystem as fs
+from pts.magic.core import headercatalog
+
+# -----------------------------------------------------------------
+
+description = "testing the persistent catalog of FITS headers and its invalidation"
+
+# -----------------------------------------------------------------
+
+class HeaderCatalogTest(TestImplementation):
+
+    """
+    This class ...
+    """
+
+    def __init__(self, *args, **kwargs):
+
+        """
+        This function ...
+        :param kwargs:
+        """
+
+        # Call the constructor of the base class
+        super(HeaderCatalogTest, self).__init__(*args, **kwargs)
+
+        # The paths of the FITS files
+        self.image_path = None
+        self.other_path = None
+
+        # The number of summaries that are created from the FITS files
+        self.ncreated = 0
+
+        # The original function to create the summaries
+        self.create_summary = None
+
+    # -----------------------------------------------------------------
+
+    def run(self, **kwargs):
+
+        """
+        This function ...
+        :param kwargs:
+        :return:
+        """
+
+        # 1. Call the setup function
+        self.setup(**kwargs)
+
+        try:
+
+            # 2. Test the first request
+            self.test_first()
+
+            # 3. Test the requests from memory and from the catalog
+            self.test_cached()
+
+            # 4. Test the invalidation after the files have changed
+            self.test_changed()
+
+            # 5. Test an unreadable catalog
+            self.test_corrupt()
+
+        # Restore the function to create the summaries
+        finally: headercatalog.create_summary = self.create_summary
+
+    # -----------------------------------------------------------------
+
+    def setup(self, **kwargs):
+
+        """
+        This function ...
+        :param kwargs:
+        :return:
+        """
+
+        # Call the setup function of the base class
+        super(HeaderCatalogTest, self).setup(**kwargs)
+
+        # Set the paths
+        self.image_path = fs.join(self.path, "image.fits")
+        self.other_path = fs.join(self.path, "other.fits")
+
+        # Count the summaries that are created
+        self.create_summary = headercatalog.create_summary
+
+        def create_summary(path, signature):
+            self.ncreated += 1
+            return self.create_summary(path, signature)
+
+        headercatalog.create_summary = create_summary
+
+        # Start without summaries in memory
+        headercatalog.clear()
+
+    # -----------------------------------------------------------------
+
+    def write_image(self, path, shape, crval1, mtime):
+
+        """
+        This function writes a FITS file with a coordinate system and sets its modification time
+        :param path:
+        :param shape:
+        :param crval1:
+        :param mtime:
+        :return:
+        """
+
+        header = fits.Header()
+        header["CTYPE1"] = "RA---TAN"
+        header["CTYPE2"] = "DEC--TAN"
+        header["CRVAL1"] = crval1
+        header["CRVAL2"] = 20.
+        header["CRPIX1"] = 5.
+        header["CRPIX2"] = 5.
+        header["CDELT1"] = -1e-3
+        header["CDELT2"] = 1e-3
+
+        fits.writeto(path, np.zeros(shape), header, overwrite=True)
+        os.utime(path, (mtime, mtime))
+
+    # -----------------------------------------------------------------
+
+    def check(self, path, shape, crval1):
+
+        """
+        This function checks the information from the catalog
+        :param path:
+        :param shape:
+        :param crval1:
+        :return:
+        """
+
+        assert headercatalog.get_shape(path) == shape
+        assert headercatalog.get_header(path)["CRVAL1"] == crval1
+        assert np.isclose(headercatalog.get_wcs(path).wcs.crval[0], crval1)
+        assert len(headercatalog.get_plane_names(path)) == 1
+
+    # -----------------------------------------------------------------
+
+    def test_first(self):
+
+        """
+        This function ...
+        :return:
+        """
+
+        # Inform the user
+        log.info("Testing the first request ...")
+
+        # Write the files
+        self.write_image(self.image_path, (8, 12), 10., 1000000000)
+        self.write_image(self.other_path, (6, 6), 30., 1000000000)
+
+        # Check
+        self.check(self.image_path, (8, 12), 10.)
+        self.check(self.other_path, (6, 6), 30.)
+        assert self.ncreated == 2
+
+        # Both files are in the catalog of the directory
+        catalog = headercatalog.load_catalog(headercatalog.catalog_path_for(self.image_path))
+        assert sorted(catalog.keys()) == ["image.fits", "other.fits"]
+
+    # -----------------------------------------------------------------
+
+    def test_cached(self):
+
+        """
+        This function ...
+        :return:
+        """
+
+        # Inform the user
+        log.info("Testing the requests from memory and from the catalog ...")
+
+        # From memory
+        self.check(self.image_path, (8, 12), 10.)
+        assert self.ncreated == 2
+
+        # From the catalog (as in another process)
+        headercatalog.clear()
+        self.check(self.image_path, (8, 12), 10.)
+        self.check(self.other_path, (6, 6), 30.)
+        assert self.ncreated == 2
+
+    # -----------------------------------------------------------------
+
+    def test_changed(self):
+
+        """
+        This function ...
+        :return:
+        """
+
+        # Inform the user
+        log.info("Testing the invalidation after the files have changed ...")
+
+        # Change the header but not the size of the file, only the modification time differs
+        size = fs.file_signature(self.image_path)[0]
+        self.write_image(self.image_path, (8, 12), 11., 1000000010)
+        assert fs.file_signature(self.image_path)[0] == size
+
+        # The summary and the derived objects in memory are replaced
+        self.check(self.image_path, (8, 12), 11.)
+        assert self.ncreated == 3
+
+        # Change the size of the file (FITS files are written in blocks of 2880 bytes), but not the modification time
+        size = fs.file_signature(self.other_path)[0]
+        self.write_image(self.other_path, (40, 50), 30., 1000000000)
+        assert fs.file_signature(self.other_path)[0] != size
+        self.check(self.other_path, (40, 50), 30.)
+        assert self.ncreated == 4
+
+        # The new versions are in the catalog
+        headercatalog.clear()
+        self.check(self.image_path, (8, 12), 11.)
+        self.check(self.other_path, (40, 50), 30.)
+        assert self.ncreated == 4
+
+    # -----------------------------------------------------------------
+
+    def test_corrupt(self):
+
+        """
+        This function ...
+        :return:
+        """
+
+        # Inform the user
+        log.info("Testing an unreadable catalog ...")
+
+        # Overwrite the catalog
+        catalog_path = headercatalog.catalog_path_for(self.image_path)
+        with open(catalog_path, "w") as catalog_file: catalog_file.write("{not json")
+
+        # The summary is created again and the catalog is rewritten
+        headercatalog.clear()
+        self.check(self.image_path, (8, 12), 11.)
+        assert self.ncreated == 5
+        assert "image.fits" in headercatalog.load_catalog(catalog_path)
+
+# -----------------------------------------------------------------
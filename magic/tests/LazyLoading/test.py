@@ -0,0 +1,262 @@
+#!/usr/bin/env python
+# -*- coding: utf8 -*-
+# *****************************************************************
+# **       PTS -- Python Toolkit for working with SKIRT          **
+# **       © Astronomical Observatory, Ghent University          **
+# *****************************************************************
+
+# Ensure Python 3 compatibility
+from __future__ import absolute_import, division, print_function
+
+# Import standard modules
+import numpy as np
+
+# Import astronomical modules
+from astropy.io import fits
+
+# Import the relevant PTS classes and modules
+from pts.core.test.implementation import TestImplementation
+from pts.core.basics.log import log
+from pts.core.tools import filesystem as fs
+from pts.magic.core.frame import Frame
+from pts.magic.core.image import Image
+from pts.magic.core import fits as pts_fits
+
+# -----------------------------------------------------------------
+
+description = "testing the lazy loading of frames from FITS files against the default loading"
+
+# -----------------------------------------------------------------
+
+class LazyLoadingTest(TestImplementation):
+
+    """
+    This class ...
+    """
+
+    def __init__(self, *args, **kwargs):
+
+        """
+        This function ...
+        :param kwargs:
+        """
+
+        # Call the constructor of the base class
+        super(LazyLoadingTest, self).__init__(*args, **kwargs)
+
+        # The paths of the FITS files, and their number of planes
+        self.paths = dict()
+        self.nplanes = dict()
+
+        # The expected values (with NaN for blank pixels) for each file
+        self.values = dict()
+
+        # The index of the HDU with the data for each file
+        self.hdu_indices = dict()
+
+    # -----------------------------------------------------------------
+
+    def run(self, **kwargs):
+
+        """
+        This function ...
+        :param kwargs:
+        :return:
+        """
+
+        # 1. Call the setup function
+        self.setup(**kwargs)
+
+        # 2. Test the selection of the HDU
+        self.test_hdu()
+
+        # 3. Test loading the planes
+        self.test_planes()
+
+        # 4. Test loading the images
+        self.test_images()
+
+    # -----------------------------------------------------------------
+
+    def setup(self, **kwargs):
+
+        """
+        This function ...
+        :param kwargs:
+        :return:
+        """
+
+        # Call the setup function of the base class
+        super(LazyLoadingTest, self).setup(**kwargs)
+
+        # Inform the user
+        log.info("Creating the FITS files ...")
+
+        np.random.seed(39)
+        shape = (3, 40, 50)
+
+        # Create the header
+        header = fits.Header()
+        header["CTYPE1"] = "RA---TAN"
+        header["CTYPE2"] = "DEC--TAN"
+        header["CRVAL1"] = 10.
+        header["CRVAL2"] = 20.
+        header["CRPIX1"] = 25.5
+        header["CRPIX2"] = 20.5
+        header["CDELT1"] = -1. / 3600.
+        header["CDELT2"] = 1. / 3600.
+        header["BUNIT"] = "Jy"
+        header["PLANE0"] = "primary [frame]"
+        header["PLANE1"] = "errors [frame]"
+        header["PLANE2"] = "other [frame]"
+
+        # Unscaled data
+        values = np.random.uniform(0., 10., size=shape).astype(np.float32)
+        values[0, 5:8, 10:20] = np.nan
+        self.write("unscaled", fits.HDUList([fits.PrimaryHDU(values, header=header)]), values)
+
+        # Unscaled data in an extension (after an empty extension)
+        hdulist = fits.HDUList([fits.PrimaryHDU(), fits.ImageHDU(header=header.copy()), fits.ImageHDU(values, header=header)])
+        self.write("extension", hdulist, values)
+
+        # Scaled data
+        integers = np.random.randint(-30000, 30000, size=shape).astype(np.int16)
+        scaling = {"BSCALE": 0.001, "BZERO": 5.}
+        self.write("scaled", fits.HDUList([fits.PrimaryHDU(integers, header=header)]), integers * 0.001 + 5., scaling=scaling)
+
+        # Scaled data with blank pixels, in an extension
+        integers[1, 10:12, 30:40] = -32768
+        expected = integers * 0.001 + 5.
+        expected[1, 10:12, 30:40] = np.nan
+        scaling = {"BSCALE": 0.001, "BZERO": 5., "BLANK": -32768}
+        self.write("blank", fits.HDUList([fits.PrimaryHDU(), fits.ImageHDU(integers, header=header)]), expected, scaling=scaling)
+
+        # A single plane, scaled
+        single_header = header.copy()
+        for key in ("PLANE0", "PLANE1", "PLANE2"): del single_header[key]
+        scaling = {"BSCALE": 0.001, "BZERO": 5.}
+        self.write("single", fits.HDUList([fits.PrimaryHDU(integers[0], header=single_header)]), integers[0:1] * 0.001 + 5., scaling=scaling)
+
+    # -----------------------------------------------------------------
+
+    def write(self, name, hdulist, values, scaling=None):
+
+        """
+        This function writes a FITS file
+        :param name:
+        :param hdulist:
+        :param values: the expected values of the planes
+        :param scaling: the scaling keywords to add to the header of the last HDU (the data is written as it is)
+        :return:
+        """
+
+        path = fs.join(self.path, name + ".fits")
+        hdulist.writeto(path)
+
+        # Add the scaling keywords
+        if scaling is not None:
+            with fits.open(path, mode="update", do_not_scale_image_data=True) as written:
+                for key in scaling: written[-1].header[key] = scaling[key]
+
+        self.paths[name] = path
+        self.nplanes[name] = len(values)
+        self.values[name] = values
+
+    # -----------------------------------------------------------------
+
+    def test_hdu(self):
+
+        """
+        This function ...
+        :return:
+        """
+
+        # Inform the user
+        log.info("Testing the selection of the HDU ...")
+
+        for name, path in self.paths.items():
+
+            indices = []
+            for lazy in (False, True):
+                hdulist = pts_fits.open_hdulist(path, lazy=lazy)
+                indices.append(pts_fits.first_data_hdu_index(hdulist, lazy=lazy))
+                hdulist.close()
+
+            # The same HDU is selected
+            assert indices[0] == indices[1], name
+            assert indices[0] == (2 if name == "extension" else 1 if name == "blank" else 0), name
+            self.hdu_indices[name] = indices[0]
+
+            # Scaled data
+            hdulist = pts_fits.open_hdulist(path, lazy=True)
+            assert pts_fits.is_scaled(hdulist[indices[1]].header) == (name in ("scaled", "blank", "single")), name
+            hdulist.close()
+
+    # -----------------------------------------------------------------
+
+    def test_planes(self):
+
+        """
+        This function ...
+        :return:
+        """
+
+        # Inform the user
+        log.info("Testing loading the planes ...")
+
+        for name, path in self.paths.items():
+
+            indices = range(self.nplanes[name]) if self.nplanes[name] > 1 else [None]
+            for index in indices:
+
+                eager = Frame.from_file(path, index=index, no_filter=True)
+                lazy = Frame.from_file(path, index=index, no_filter=True, lazy=True)
+
+                # The data
+                expected = self.values[name][index if index is not None else 0]
+                assert lazy.data.shape == eager.data.shape == expected.shape, name
+                assert lazy.dtype == eager.dtype, name
+                assert np.array_equal(np.asarray(lazy.data), np.asarray(eager.data), equal_nan=True), name
+                assert np.allclose(np.asarray(eager.data), expected, rtol=1e-6, atol=1e-6, equal_nan=True), name
+
+                # The properties
+                assert lazy.name == eager.name, name
+                assert lazy.unit == eager.unit, name
+                assert lazy.wcs == eager.wcs, name
+            assert lazy.metadata == eager.metadata, name
+
+            # Select the plane by name
+            if self.nplanes[name] > 1:
+                eager = Frame.from_file(path, plane="errors", no_filter=True)
+                lazy = Frame.from_file(path, plane="errors", no_filter=True, lazy=True)
+                assert np.array_equal(np.asarray(lazy.data), np.asarray(eager.data), equal_nan=True), name
+                assert np.array_equal(np.asarray(lazy.data), np.asarray(Frame.from_file(path, index=1, no_filter=True).data), equal_nan=True), name
+
+    # -----------------------------------------------------------------
+
+    def test_images(self):
+
+        """
+        This function ...
+        :return:
+        """
+
+        # Inform the user
+        log.info("Testing loading the images ...")
+
+        for name, path in self.paths.items():
+
+            eager = Image.from_file(path, hdulist_index=self.hdu_indices[name], no_filter=True)
+            lazy = Image.from_file(path, hdulist_index=self.hdu_indices[name], no_filter=True, lazy=True)
+
+            # The planes
+            assert list(lazy.frames.keys()) == list(eager.frames.keys()), name
+            for index, plane_name in enumerate(eager.frames.keys()):
+                assert lazy.frames[plane_name].dtype == eager.frames[plane_name].dtype, name
+                assert np.array_equal(np.asarray(lazy.frames[plane_name].data), np.asarray(eager.frames[plane_name].data), equal_nan=True), name
+                assert np.allclose(np.asarray(eager.frames[plane_name].data), self.values[name][index], rtol=1e-6, atol=1e-6, equal_nan=True), name
+
+            # The properties
+            assert lazy.metadata == eager.metadata, name
+
+# -----------------------------------------------------------------
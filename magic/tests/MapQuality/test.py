@@ -0,0 +1,413 @@
+#!/usr/bin/env python
+# -*- coding: utf8 -*-
+# *****************************************************************
+# **       PTS -- Python Toolkit for working with SKIRT          **
+# **       © Astronomical Observatory, Ghent University          **
+# *****************************************************************
+
+# Ensure Python 3 compatibility
+from __future__ import absolute_import, division, print_function
+
+# Import standard modules
+import os
+import numpy as np
+
+# Import astronomical modules
+from astropy.io import fits
+from astropy.coordinates import Angle
+
+# Import the relevant PTS classes and modules
+from pts.core.test.implementation import TestImplementation
+from pts.core.basics.log import log
+from pts.core.tools import filesystem as fs
+from pts.core.units.parsing import parse_unit as u
+from pts.magic.core.frame import Frame
+from pts.magic.core import qualitycatalog
+from pts.magic.basics.mask import Mask
+from pts.magic.basics.coordinatesystem import CoordinateSystem
+from pts.magic.basics.coordinate import PixelCoordinate, SkyCoordinate
+from pts.magic.basics.stretch import PixelStretch, SkyStretch
+from pts.magic.region.ellipse import PixelEllipseRegion, SkyEllipseRegion
+
+# -----------------------------------------------------------------
+
+description = "testing the quality statistics of frames against the separate functions, and the catalog of the quality of maps"
+
+# -----------------------------------------------------------------
+
+class MapQualityTest(TestImplementation):
+
+    """
+    This class ...
+    """
+
+    def __init__(self, *args, **kwargs):
+
+        """
+        This function ...
+        :param kwargs:
+        """
+
+        # Call the constructor of the base class
+        super(MapQualityTest, self).__init__(*args, **kwargs)
+
+        # The path of the map
+        self.map_path = None
+
+        # The sky regions
+        self.region = None
+        self.other_region = None
+
+        # The number of times a map is loaded
+        self.nloaded = 0
+
+        # The original frame class of the quality catalog
+        self.frame_class = None
+
+    # -----------------------------------------------------------------
+
+    def run(self, **kwargs):
+
+        """
+        This function ...
+        :param kwargs:
+        :return:
+        """
+
+        # 1. Call the setup function
+        self.setup(**kwargs)
+
+        try:
+
+            # 2. Test the quality statistics
+            self.test_statistics()
+
+            # 3. Test the first request to the catalog
+            self.test_first()
+
+            # 4. Test the requests from memory and from the catalog
+            self.test_cached()
+
+            # 5. Test the invalidation after the map has changed
+            self.test_changed()
+
+            # 6. Test an unreadable catalog
+            self.test_corrupt()
+
+        # Restore the frame class
+        finally: qualitycatalog.Frame = self.frame_class
+
+    # -----------------------------------------------------------------
+
+    def setup(self, **kwargs):
+
+        """
+        This function ...
+        :param kwargs:
+        :return:
+        """
+
+        # Call the setup function of the base class
+        super(MapQualityTest, self).setup(**kwargs)
+
+        # Set the path of the map
+        self.map_path = fs.join(self.path, "map.fits")
+
+        # Set the regions
+        center = SkyCoordinate(ra=10., dec=20., unit="deg", frame="fk5")
+        self.region = SkyEllipseRegion(center, SkyStretch(10. * u("arcsec"), 6. * u("arcsec")), Angle(30., "deg"))
+        self.other_region = SkyEllipseRegion(center, SkyStretch(4. * u("arcsec"), 4. * u("arcsec")), Angle(0., "deg"))
+
+        # Count the maps that are loaded
+        test = self
+        self.frame_class = qualitycatalog.Frame
+
+        class LoadedFrame(Frame):
+
+            @classmethod
+            def from_file(cls, path, *args, **kwargs):
+                test.nloaded += 1
+                return Frame.from_file(path, *args, **kwargs)
+
+        qualitycatalog.Frame = LoadedFrame
+
+        # Start without entries in memory
+        qualitycatalog.clear()
+
+    # -----------------------------------------------------------------
+
+    def old_statistics(self, frame, region_or_mask):
+
+        """
+        This function returns the quality indicators from the separate functions, as filter_invalid used them before
+        :param frame:
+        :param region_or_mask:
+        :return:
+        """
+
+        statistics = dict()
+
+        statistics["all_nans"] = frame.all_nans
+        statistics["all_infs"] = frame.all_infs
+        statistics["all_zeroes"] = frame.all_zeroes
+        statistics["all_negatives"] = frame.all_negatives
+        statistics["constant"] = frame.is_constant
+
+        statistics["npixels_in"] = frame.npixels_in(region_or_mask)
+        statistics["nnans_in"] = frame.nnans_in(region_or_mask)
+        statistics["ninfs_in"] = frame.ninfs_in(region_or_mask)
+        statistics["nzeroes_in"] = frame.nzeroes_in(region_or_mask)
+        statistics["nnegatives_in"] = frame.nnegatives_in(region_or_mask)
+
+        # Not defined for an empty region
+        try: statistics["constant_in"] = frame.is_constant_in(region_or_mask)
+        except ValueError: statistics["constant_in"] = None
+
+        statistics["center_nan"] = np.isnan(frame.center_value)
+        statistics["center_inf"] = np.isinf(frame.center_value)
+
+        # Return the statistics
+        return statistics
+
+    # -----------------------------------------------------------------
+
+    def test_statistics(self):
+
+        """
+        This function ...
+        :return:
+        """
+
+        # Inform the user
+        log.info("Testing the quality statistics ...")
+
+        xsize = 40
+        ysize = 30
+        wcs = CoordinateSystem(self.create_header((ysize, xsize)))
+        center = Frame(np.zeros((ysize, xsize)), wcs=wcs).pixel_center
+
+        # Frames with NaNs, infinities, zeroes and negative values, and special frames
+        random = np.random.RandomState(8)
+        data = random.normal(1., 1., (ysize, xsize))
+        data[random.uniform(size=data.shape) < 0.1] = np.nan
+        data[random.uniform(size=data.shape) < 0.05] = np.inf
+        data[random.uniform(size=data.shape) < 0.05] = -np.inf
+        data[random.uniform(size=data.shape) < 0.1] = 0.
+        constant_in = np.copy(data)
+        constant_in[8:22, 12:28] = 3.
+        constant_in[center.y + 1, center.x] = np.nan
+        nan_center = np.copy(data)
+        nan_center[center.y, center.x] = np.nan
+        inf_center = np.copy(data)
+        inf_center[center.y, center.x] = -np.inf
+        arrays = [data, constant_in, nan_center, inf_center, np.full((ysize, xsize), np.nan), np.full((ysize, xsize), np.inf),
+                  np.zeros((ysize, xsize)), np.full((ysize, xsize), -2.), np.full((ysize, xsize), 5.)]
+
+        # Regions within the frame, partly outside and completely outside of the frame (empty), and a mask
+        regions = [PixelEllipseRegion(PixelCoordinate(20., 15.), PixelStretch(7., 4.), Angle(30., "deg")),
+                   PixelEllipseRegion(PixelCoordinate(2., 27.), PixelStretch(9., 5.), Angle(-60., "deg")),
+                   PixelEllipseRegion(PixelCoordinate(-30., -30.), PixelStretch(3., 2.), Angle(0., "deg")),
+                   Mask(random.uniform(size=(ysize, xsize)) < 0.3)]
+
+        nempty = 0
+        for index, array in enumerate(arrays):
+            for region_or_mask in regions:
+
+                frame = Frame(np.copy(array), wcs=wcs)
+                statistics = frame.quality_statistics(region_or_mask)
+                expected = self.old_statistics(frame, region_or_mask)
+
+                assert sorted(statistics.keys()) == sorted(expected.keys())
+                for key in expected:
+
+                    # An empty region is not constant
+                    if expected[key] is None:
+                        assert key == "constant_in" and statistics["npixels_in"] == 0
+                        assert statistics[key] is False
+                        nempty += 1
+
+                    else: assert statistics[key] == expected[key], (index, key)
+
+                # An empty region gives NaN fractions, so none of the tolerances of filter_invalid is exceeded
+                if statistics["npixels_in"] == 0:
+                    with np.errstate(invalid="ignore"): assert not statistics["nnans_in"] / np.float64(statistics["npixels_in"]) > 0.
+
+        # The empty region was tested for each frame, the center pixel of the frames with a NaN or infinity there
+        assert nempty == len(arrays)
+        assert Frame(nan_center, wcs=wcs).quality_statistics(regions[0])["center_nan"]
+        assert Frame(inf_center, wcs=wcs).quality_statistics(regions[0])["center_inf"]
+
+    # -----------------------------------------------------------------
+
+    def create_header(self, shape):
+
+        """
+        This function creates a header with a coordinate system for a map with the given shape
+        :param shape:
+        :return:
+        """
+
+        header = fits.Header()
+        header["NAXIS"] = 2
+        header["NAXIS1"] = shape[1]
+        header["NAXIS2"] = shape[0]
+        header["CTYPE1"] = "RA---TAN"
+        header["CTYPE2"] = "DEC--TAN"
+        header["CRVAL1"] = 10.
+        header["CRVAL2"] = 20.
+        header["CRPIX1"] = 0.5 * (shape[1] + 1)
+        header["CRPIX2"] = 0.5 * (shape[0] + 1)
+        header["CDELT1"] = -1. / 3600.
+        header["CDELT2"] = 1. / 3600.
+        return header
+
+    # -----------------------------------------------------------------
+
+    def write_map(self, shape, value, mtime):
+
+        """
+        This function writes the map with a coordinate system and sets its modification time
+        :param shape:
+        :param value:
+        :param mtime:
+        :return:
+        """
+
+        data = np.full(shape, value)
+        data[:2, :] = np.nan
+        fits.writeto(self.map_path, data, self.create_header(shape), overwrite=True)
+        os.utime(self.map_path, (mtime, mtime))
+
+    # -----------------------------------------------------------------
+
+    def check(self, region):
+
+        """
+        This function checks the quality from the catalog against the statistics of the map
+        :param region:
+        :return:
+        """
+
+        quality = qualitycatalog.get_quality(self.map_path, region)
+
+        frame = self.frame_class.from_file(self.map_path)
+        expected = frame.quality_statistics(region.to_pixel(frame.wcs))
+        expected["pixelscale"] = frame.average_pixelscale
+        expected["fwhm"] = frame.fwhm
+
+        assert sorted(quality.keys()) == sorted(expected.keys())
+        for key in expected:
+
+            if key == "pixelscale": assert np.isclose(quality[key].to("arcsec").value, expected[key].to("arcsec").value)
+            else: assert quality[key] == expected[key], key
+
+        # Return the quality
+        return quality
+
+    # -----------------------------------------------------------------
+
+    def test_first(self):
+
+        """
+        This function ...
+        :return:
+        """
+
+        # Inform the user
+        log.info("Testing the first request to the catalog ...")
+
+        # Write the map
+        self.write_map((40, 40), 2., 1000000000)
+
+        # Check
+        quality = self.check(self.region)
+        assert self.nloaded == 1
+        assert quality["npixels_in"] > 0 and quality["constant_in"]
+
+        # The map is in the catalog of the directory
+        assert list(qualitycatalog.load_catalog(qualitycatalog.catalog_path_for(self.map_path)).keys()) == ["map.fits"]
+
+    # -----------------------------------------------------------------
+
+    def test_cached(self):
+
+        """
+        This function ...
+        :return:
+        """
+
+        # Inform the user
+        log.info("Testing the requests from memory and from the catalog ...")
+
+        # From memory
+        self.check(self.region)
+        assert self.nloaded == 1
+
+        # Another region: loaded once
+        self.check(self.other_region)
+        self.check(self.other_region)
+        assert self.nloaded == 2
+
+        # From the catalog (as in another process), for both regions
+        qualitycatalog.clear()
+        self.check(self.region)
+        self.check(self.other_region)
+        assert self.nloaded == 2
+
+    # -----------------------------------------------------------------
+
+    def test_changed(self):
+
+        """
+        This function ...
+        :return:
+        """
+
+        # Inform the user
+        log.info("Testing the invalidation after the map has changed ...")
+
+        # Change the values but not the size of the file, only the modification time differs
+        size = fs.file_signature(self.map_path)[0]
+        self.write_map((40, 40), -1., 1000000010)
+        assert fs.file_signature(self.map_path)[0] == size
+
+        # The quality is calculated again, for each region
+        assert self.check(self.region)["nnegatives_in"] > 0
+        assert self.nloaded == 3
+        self.check(self.other_region)
+        assert self.nloaded == 4
+
+        # Change the size of the file, but not the modification time
+        self.write_map((80, 80), 0., 1000000010)
+        assert fs.file_signature(self.map_path)[0] != size
+        assert self.check(self.region)["nzeroes_in"] > 0
+        assert self.nloaded == 5
+
+        # The new version is in the catalog
+        qualitycatalog.clear()
+        self.check(self.region)
+        assert self.nloaded == 5
+
+    # -----------------------------------------------------------------
+
+    def test_corrupt(self):
+
+        """
+        This function ...
+        :return:
+        """
+
+        # Inform the user
+        log.info("Testing an unreadable catalog ...")
+
+        # Overwrite the catalog
+        catalog_path = qualitycatalog.catalog_path_for(self.map_path)
+        with open(catalog_path, "w") as catalog_file: catalog_file.write("{not json")
+
+        # The quality is calculated again and the catalog is rewritten
+        qualitycatalog.clear()
+        self.check(self.region)
+        assert self.nloaded == 6
+        assert "map.fits" in qualitycatalog.load_catalog(catalog_path)
+
+# -----------------------------------------------------------------
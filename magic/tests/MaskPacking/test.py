@@ -0,0 +1,201 @@
+#!/usr/bin/env python
+# -*- coding: utf8 -*-
+# *****************************************************************
+# **       PTS -- Python Toolkit for working with SKIRT          **
+# **       © Astronomical Observatory, Ghent University          **
+# *****************************************************************
+
+# Ensure Python 3 compatibility
+from __future__ import absolute_import, division, print_function
+
+# Import standard modules
+import numpy as np
+
+# Import the relevant PTS classes and modules
+from pts.core.test.implementation import TestImplementation
+from pts.core.basics.log import log
+from pts.magic.core import mask as masks
+from pts.magic.core.mask import Mask
+
+# -----------------------------------------------------------------
+
+description = "testing the packed masks and their union and intersection"
+
+# -----------------------------------------------------------------
+
+class MaskPackingTest(TestImplementation):
+
+    """
+    This class ...
+    """
+
+    def __init__(self, *args, **kwargs):
+
+        """
+        This function ...
+        :param kwargs:
+        """
+
+        # Call the constructor of the base class
+        super(MaskPackingTest, self).__init__(*args, **kwargs)
+
+        # The boolean arrays (the number of pixels is not a multiple of eight)
+        self.arrays = None
+
+    # -----------------------------------------------------------------
+
+    def run(self, **kwargs):
+
+        """
+        This function ...
+        :param kwargs:
+        :return:
+        """
+
+        # 1. Call the setup function
+        self.setup(**kwargs)
+
+        # 2. Test packing and unpacking
+        self.test_packing()
+
+        # 3. Test the union and intersection invoked on a mask
+        self.test_methods()
+
+        # 4. Test the combination of any number of masks
+        self.test_combinations()
+
+        # 5. Test masks with different shapes
+        self.test_shapes()
+
+    # -----------------------------------------------------------------
+
+    def setup(self, **kwargs):
+
+        """
+        This function ...
+        :param kwargs:
+        :return:
+        """
+
+        # Call the setup function of the base class
+        super(MaskPackingTest, self).setup(**kwargs)
+
+        # Create the arrays
+        random = np.random.RandomState(47)
+        self.arrays = [random.uniform(size=(7, 9)) > 0.5 for _ in range(3)]
+
+    # -----------------------------------------------------------------
+
+    def masks(self, packed):
+
+        """
+        This function returns masks for the arrays
+        :param packed:
+        :return:
+        """
+
+        return [Mask(array.copy(), packed=packed) for array in self.arrays]
+
+    # -----------------------------------------------------------------
+
+    def test_packing(self):
+
+        """
+        This function ...
+        :return:
+        """
+
+        # Inform the user
+        log.info("Testing packing and unpacking ...")
+
+        mask = Mask(self.arrays[0].copy(), packed=True)
+        assert mask.packed
+        assert mask.shape == (7, 9)
+        assert mask.nbytes == 8
+        assert mask.packed
+
+        assert np.array_equal(mask.data, self.arrays[0])
+        assert not mask.packed
+
+    # -----------------------------------------------------------------
+
+    def test_methods(self):
+
+        """
+        This function ...
+        :return:
+        """
+
+        # Inform the user
+        log.info("Testing the union and intersection invoked on a mask ...")
+
+        first, second, third = self.arrays
+
+        for packed in [False, True]:
+
+            a, b, c = self.masks(packed)
+            assert np.array_equal(a.union(b, c).data, first | second | third)
+
+            a, b = self.masks(packed)[:2]
+            assert np.array_equal(a.union(b).data, first | second)
+
+            a, b = self.masks(packed)[:2]
+            assert np.array_equal(a.intersection(b).data, first & second)
+
+            # Not changed
+            assert np.array_equal(a.data, first)
+            assert np.array_equal(b.data, second)
+
+    # -----------------------------------------------------------------
+
+    def test_combinations(self):
+
+        """
+        This function ...
+        :return:
+        """
+
+        # Inform the user
+        log.info("Testing the combination of any number of masks ...")
+
+        union = np.logical_or.reduce(self.arrays)
+        intersection = np.logical_and.reduce(self.arrays)
+
+        for packed in [False, True]:
+
+            # Masks
+            for function, expected in [(Mask.union, union), (Mask.intersection, intersection),
+                                       (masks.union, union), (masks.intersection, intersection)]:
+                result = function(*self.masks(packed))
+                assert result.packed
+                assert result.shape == (7, 9)
+                assert np.array_equal(result.data, expected)
+
+            # A mask and arrays
+            mask = self.masks(packed)[0]
+            assert np.array_equal(Mask.union(mask, self.arrays[1], self.arrays[2]).data, union)
+            assert np.array_equal(Mask.intersection(mask, self.arrays[1], self.arrays[2]).data, intersection)
+
+    # -----------------------------------------------------------------
+
+    def test_shapes(self):
+
+        """
+        This function ...
+        :return:
+        """
+
+        # Inform the user
+        log.info("Testing masks with different shapes ...")
+
+        # The same number of pixels and packed bytes
+        square = Mask(np.ones((8, 8), dtype=bool), packed=True)
+        wide = Mask(np.ones((4, 16), dtype=bool), packed=True)
+
+        for function in [Mask.union, Mask.intersection, masks.union, masks.intersection]:
+            for args in [(square, wide), (square, np.ones((4, 16), dtype=bool))]:
+                try: function(*args)
+                except ValueError: pass
+                else: raise AssertionError("Combining masks with different shapes did not raise an error")
+
+# -----------------------------------------------------------------
@@ -0,0 +1,21 @@
+#!/usr/bin/env python
+# -*- coding: utf8 -*-
+# *****************************************************************
+# **       PTS -- Python Toolkit for working with SKIRT          **
+# **       © Astronomical Observatory, Ghent University          **
+# *****************************************************************
+
+# Import the relevant PTS classes and modules
+from pts.core.basics.configuration import ConfigurationDefinition
+
+# -----------------------------------------------------------------
+
+# Create the definition
+definition = ConfigurationDefinition(write_config=False)
+
+# -----------------------------------------------------------------
+
+# Optional settings
+definition.add_optional("nshapes", "positive_integer", "number of random shapes of each kind", 20)
+
+# -----------------------------------------------------------------
@@ -0,0 +1,218 @@
+#!/usr/bin/env python
+# -*- coding: utf8 -*-
+# *****************************************************************
+# **       PTS -- Python Toolkit for working with SKIRT          **
+# **       © Astronomical Observatory, Ghent University          **
+# *****************************************************************
+
+# Ensure Python 3 compatibility
+from __future__ import absolute_import, division, print_function
+
+# Import standard modules
+import numpy as np
+
+# Import astronomical modules
+from photutils.geometry import circular_overlap_grid, elliptical_overlap_grid, rectangular_overlap_grid
+
+# Import the relevant PTS classes and modules
+from pts.core.test.implementation import TestImplementation
+from pts.core.basics.log import log
+from pts.magic.region import rasterization
+
+# -----------------------------------------------------------------
+
+description = "testing the rasterization of regions against the photutils overlap functions on the complete frame"
+
+# -----------------------------------------------------------------
+
+class RasterizationTest(TestImplementation):
+
+    """
+    This class ...
+    """
+
+    def __init__(self, *args, **kwargs):
+
+        """
+        This function ...
+        :param kwargs:
+        """
+
+        # Call the constructor of the base class
+        super(RasterizationTest, self).__init__(*args, **kwargs)
+
+        # The frame dimensions
+        self.x_size = 83
+        self.y_size = 61
+
+        # The shape parameters
+        self.parameters = None
+
+    # -----------------------------------------------------------------
+
+    def run(self, **kwargs):
+
+        """
+        This function ...
+        :param kwargs:
+        :return:
+        """
+
+        # 1. Call the setup function
+        self.setup(**kwargs)
+
+        # 2. Test the center mode
+        self.test_center()
+
+        # 3. Test the center mode with the shapes in different groups
+        self.test_groups()
+
+        # 4. Test the subpixel and exact modes
+        self.test_overlap()
+
+    # -----------------------------------------------------------------
+
+    def setup(self, **kwargs):
+
+        """
+        This function ...
+        :param kwargs:
+        :return:
+        """
+
+        # Call the setup function of the base class
+        super(RasterizationTest, self).setup(**kwargs)
+
+        # Create random shapes, also partly or completely outside of the frame
+        random = np.random.RandomState(5)
+        self.parameters = []
+        for kind in ["circle", "ellipse", "rectangle"]:
+            for _ in range(self.config.nshapes):
+
+                x = random.uniform(-15., self.x_size + 15.)
+                y = random.uniform(-15., self.y_size + 15.)
+                a = random.uniform(0.3, 12.)
+                b = a if kind == "circle" else random.uniform(0.3, 12.)
+                theta = 0.0 if kind == "circle" else random.uniform(-np.pi, np.pi)
+                self.parameters.append((kind, x, y, a, b, theta))
+
+    # -----------------------------------------------------------------
+
+    def full_frame_fraction(self, kind, x, y, a, b, theta, use_exact=0, subpixels=1):
+
+        """
+        This function calculates the overlap of a shape with the complete frame with photutils, as the to_mask
+        functions of the shapes did before
+        :param kind:
+        :param x:
+        :param y:
+        :param a:
+        :param b:
+        :param theta:
+        :param use_exact:
+        :param subpixels:
+        :return:
+        """
+
+        x_min = - x
+        x_max = self.x_size - x
+        y_min = - y
+        y_max = self.y_size - y
+
+        if kind == "circle": return circular_overlap_grid(x_min, x_max, y_min, y_max, self.x_size, self.y_size, a, use_exact, subpixels)
+        elif kind == "ellipse": return elliptical_overlap_grid(x_min, x_max, y_min, y_max, self.x_size, self.y_size, a, b, theta, use_exact, subpixels)
+        else: return rectangular_overlap_grid(x_min, x_max, y_min, y_max, self.x_size, self.y_size, 2. * a, 2. * b, theta, 0, subpixels)
+
+    # -----------------------------------------------------------------
+
+    def check_center(self):
+
+        """
+        This function compares the center mode, for each shape separately and for all shapes at once
+        :return:
+        """
+
+        expected_all = np.zeros((self.y_size, self.x_size), dtype=bool)
+
+        for parameters in self.parameters:
+
+            expected = self.full_frame_fraction(*parameters) > 0
+            expected_all |= expected
+
+            data = np.zeros((self.y_size, self.x_size), dtype=bool)
+            rasterization.add_shapes(data, [parameters])
+            assert np.array_equal(data, expected), parameters
+
+        data = np.zeros((self.y_size, self.x_size), dtype=bool)
+        rasterization.add_shapes(data, self.parameters)
+        assert np.array_equal(data, expected_all)
+
+        # Fractional
+        data = np.zeros((self.y_size, self.x_size))
+        rasterization.add_shapes(data, self.parameters, fractional=True)
+        assert np.array_equal(data, expected_all.astype(float))
+
+    # -----------------------------------------------------------------
+
+    def test_center(self):
+
+        """
+        This function ...
+        :return:
+        """
+
+        # Inform the user
+        log.info("Testing the center mode ...")
+
+        # Compare
+        self.check_center()
+
+    # -----------------------------------------------------------------
+
+    def test_groups(self):
+
+        """
+        This function ...
+        :return:
+        """
+
+        # Inform the user
+        log.info("Testing the center mode with a small number of pixels per pass ...")
+
+        # Compare, with the shapes in many groups
+        original = rasterization.max_npixels_per_pass
+        rasterization.max_npixels_per_pass = 100
+        try: self.check_center()
+        finally: rasterization.max_npixels_per_pass = original
+
+    # -----------------------------------------------------------------
+
+    def test_overlap(self):
+
+        """
+        This function ...
+        :return:
+        """
+
+        # Inform the user
+        log.info("Testing the subpixel and exact modes ...")
+
+        for mode in ["subpixel", "exact"]:
+
+            expected = np.zeros((self.y_size, self.x_size))
+
+            for kind, x, y, a, b, theta in self.parameters:
+                use_exact = 1 if mode == "exact" and kind != "rectangle" else 0
+                np.maximum(expected, self.full_frame_fraction(kind, x, y, a, b, theta, use_exact=use_exact, subpixels=5), out=expected)
+
+            # Fractional
+            data = np.zeros((self.y_size, self.x_size))
+            rasterization.add_shapes(data, self.parameters, mode=mode, subpixels=5, fractional=True)
+            assert np.allclose(data, expected, rtol=0, atol=1e-12), mode
+
+            # Boolean
+            data = np.zeros((self.y_size, self.x_size), dtype=bool)
+            rasterization.add_shapes(data, self.parameters, mode=mode, subpixels=5)
+            assert np.array_equal(data, expected > 0), mode
+
+# -----------------------------------------------------------------
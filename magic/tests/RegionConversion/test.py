@@ -0,0 +1,295 @@
+#!/usr/bin/env python
+# -*- coding: utf8 -*-
+# *****************************************************************
+# **       PTS -- Python Toolkit for working with SKIRT          **
+# **       © Astronomical Observatory, Ghent University          **
+# *****************************************************************
+
+# Ensure Python 3 compatibility
+from __future__ import absolute_import, division, print_function
+
+# Import standard modules
+import numpy as np
+
+# Import astronomical modules
+from astropy.io import fits
+from astropy.coordinates import Angle, SkyCoord, FK5
+
+# Import the relevant PTS classes and modules
+from pts.core.test.implementation import TestImplementation
+from pts.core.basics.log import log
+from pts.core.units.parsing import parse_unit as u
+from pts.magic.basics.coordinatesystem import CoordinateSystem
+from pts.magic.basics.coordinate import PixelCoordinate, SkyCoordinate
+from pts.magic.basics.stretch import PixelStretch, SkyStretch
+from pts.magic.region.point import PixelPointRegion, SkyPointRegion
+from pts.magic.region.circle import PixelCircleRegion, SkyCircleRegion
+from pts.magic.region.ellipse import PixelEllipseRegion, SkyEllipseRegion
+from pts.magic.region.rectangle import SkyRectangleRegion
+from pts.magic.region.polygon import PixelPolygonRegion
+from pts.magic.region.list import PixelRegionList, SkyRegionList
+from pts.magic.tools import coordinates
+
+# -----------------------------------------------------------------
+
+description = "testing the conversion of region lists between sky and pixel coordinates with one transformation against the conversion of each shape"
+
+# -----------------------------------------------------------------
+
+class RegionConversionTest(TestImplementation):
+
+    """
+    This class ...
+    """
+
+    def __init__(self, *args, **kwargs):
+
+        """
+        This function ...
+        :param kwargs:
+        """
+
+        # Call the constructor of the base class
+        super(RegionConversionTest, self).__init__(*args, **kwargs)
+
+        # The coordinate systems, in different celestial frames
+        self.coordinate_systems = dict()
+
+        # The regions
+        self.pixel_regions = None
+        self.sky_regions = None
+
+    # -----------------------------------------------------------------
+
+    def run(self, **kwargs):
+
+        """
+        This function ...
+        :param kwargs:
+        :return:
+        """
+
+        # 1. Call the setup function
+        self.setup(**kwargs)
+
+        # 2. Test the conversion of arrays of coordinates
+        self.test_coordinates()
+
+        # 3. Test the conversion to pixel coordinates
+        self.test_to_pixel()
+
+        # 4. Test the conversion to sky coordinates
+        self.test_to_sky()
+
+    # -----------------------------------------------------------------
+
+    def setup(self, **kwargs):
+
+        """
+        This function ...
+        :param kwargs:
+        :return:
+        """
+
+        # Call the setup function of the base class
+        super(RegionConversionTest, self).setup(**kwargs)
+
+        # Create the coordinate systems
+        self.coordinate_systems["icrs"] = CoordinateSystem(self.create_header("RA---TAN", "DEC--TAN", 150., 2., "ICRS"))
+        self.coordinate_systems["fk5"] = CoordinateSystem(self.create_header("RA---TAN", "DEC--TAN", 150., 2., "FK5"))
+        galactic = SkyCoord(ra=150., dec=2., unit="deg").galactic
+        self.coordinate_systems["galactic"] = CoordinateSystem(self.create_header("GLON-TAN", "GLAT-TAN", galactic.l.deg, galactic.b.deg))
+
+        # Create the pixel regions, with a polygon (that is converted by itself) in between
+        self.pixel_regions = PixelRegionList()
+        self.pixel_regions.append(PixelPointRegion(20.5, 30.25))
+        self.pixel_regions.append(PixelCircleRegion(PixelCoordinate(100., 80.), 12.5))
+        self.pixel_regions.append(PixelPolygonRegion(PixelCoordinate(10., 10.), PixelCoordinate(50., 12.), PixelCoordinate(30., 40.)))
+        self.pixel_regions.append(PixelEllipseRegion(PixelCoordinate(150.3, 20.7), PixelStretch(15., 6.), Angle(30., "deg")))
+        self.pixel_regions.append(PixelPointRegion(-30., 250.))
+
+        # Create the sky regions, with centers in the ICRS and FK5 frames
+        center = SkyCoordinate(ra=150.01, dec=2.005, unit="deg")
+        fk5_center = SkyCoordinate(ra=149.99, dec=1.995, unit="deg", frame="fk5")
+        self.sky_regions = SkyRegionList()
+        self.sky_regions.append(SkyPointRegion(150.02 * u("deg"), 1.99 * u("deg")))
+        self.sky_regions.append(SkyCircleRegion(center, 5. * u("arcsec")))
+        self.sky_regions.append(SkyEllipseRegion(fk5_center, SkyStretch(10. * u("arcsec"), 4. * u("arcsec")), Angle(20., "deg")))
+        self.sky_regions.append(SkyRectangleRegion(center, SkyStretch(8. * u("arcsec"), 3. * u("arcsec")), Angle(-10., "deg")))
+        self.sky_regions.append(SkyCircleRegion(fk5_center, 7. * u("arcsec")))
+
+    # -----------------------------------------------------------------
+
+    def create_header(self, ctype1, ctype2, crval1, crval2, radesys=None):
+
+        """
+        This function creates a header with a coordinate system
+        :param ctype1:
+        :param ctype2:
+        :param crval1:
+        :param crval2:
+        :param radesys:
+        :return:
+        """
+
+        header = fits.Header()
+        header["NAXIS"] = 2
+        header["NAXIS1"] = 200
+        header["NAXIS2"] = 150
+        header["CTYPE1"] = ctype1
+        header["CTYPE2"] = ctype2
+        header["CRVAL1"] = crval1
+        header["CRVAL2"] = crval2
+        header["CRPIX1"] = 100.5
+        header["CRPIX2"] = 75.5
+        header["CD1_1"] = -1. / 3600. * np.cos(np.radians(15.))
+        header["CD1_2"] = 1. / 3600. * np.sin(np.radians(15.))
+        header["CD2_1"] = 1. / 3600. * np.sin(np.radians(15.))
+        header["CD2_2"] = 1. / 3600. * np.cos(np.radians(15.))
+        if radesys is not None:
+            header["RADESYS"] = radesys
+            header["EQUINOX"] = 2000.
+        return header
+
+    # -----------------------------------------------------------------
+
+    def pixel_position(self, coordinate, wcs):
+
+        """
+        This function converts a sky coordinate to pixel coordinates with astropy, in the frame of the coordinate
+        :param coordinate:
+        :param wcs:
+        :return:
+        """
+
+        x, y = SkyCoord(coordinate.spherical.lon, coordinate.spherical.lat, frame=coordinate.frame.replicate_without_data()).to_pixel(wcs, origin=0)
+        return float(x), float(y)
+
+    # -----------------------------------------------------------------
+
+    def sky_position(self, x, y, wcs):
+
+        """
+        This function converts pixel coordinates to ICRS right ascension and declination (in degrees) with astropy
+        :param x:
+        :param y:
+        :param wcs:
+        :return:
+        """
+
+        coordinate = SkyCoord.from_pixel(x, y, wcs, origin=0).icrs
+        return coordinate.ra.deg, coordinate.dec.deg
+
+    # -----------------------------------------------------------------
+
+    def test_coordinates(self):
+
+        """
+        This function ...
+        :return:
+        """
+
+        # Inform the user
+        log.info("Testing the conversion of arrays of coordinates ...")
+
+        x = np.array([0., 20.5, 199., -30.])
+        y = np.array([0., 30.25, 149., 250.])
+
+        for name, wcs in self.coordinate_systems.items():
+
+            # To ICRS, whatever the frame of the coordinate system
+            ra, dec = coordinates.pixel_to_sky(x, y, wcs)
+            for index in range(len(x)): assert np.allclose((ra[index], dec[index]), self.sky_position(x[index], y[index], wcs), rtol=0., atol=1e-10)
+
+            # And back, from ICRS and from another frame
+            assert np.allclose(coordinates.sky_to_pixel(ra, dec, wcs), (x, y), rtol=0., atol=1e-6)
+            fk5 = SkyCoord(ra=ra, dec=dec, unit="deg").transform_to(FK5(equinox="J2010"))
+            assert np.allclose(coordinates.sky_to_pixel(fk5.ra.deg, fk5.dec.deg, wcs, frame=FK5(equinox="J2010")), (x, y), rtol=0., atol=1e-6)
+
+            # The frame of the coordinate system
+            if name != "galactic": continue
+            l, b = coordinates.pixel_to_sky(x, y, wcs, frame="galactic")
+            assert np.allclose((l, b), (wcs.wcs_pix2world(x, y, 0)[0] % 360., wcs.wcs_pix2world(x, y, 0)[1]), rtol=0., atol=1e-10)
+
+    # -----------------------------------------------------------------
+
+    def test_to_pixel(self):
+
+        """
+        This function ...
+        :return:
+        """
+
+        # Inform the user
+        log.info("Testing the conversion to pixel coordinates ...")
+
+        for name, wcs in self.coordinate_systems.items():
+
+            regions = self.sky_regions.to_pixel(wcs)
+            assert len(regions) == len(self.sky_regions)
+
+            for region, sky_region in zip(regions, self.sky_regions):
+
+                # Compare with the conversion of the shape itself
+                separate = sky_region.to_pixel(wcs)
+                assert type(region) == type(separate)
+                center = sky_region if isinstance(sky_region, SkyPointRegion) else sky_region.center
+
+                # The center, in the frame of the sky coordinate
+                position = region if isinstance(region, PixelPointRegion) else region.center
+                assert np.allclose((position.x, position.y), self.pixel_position(center, wcs), rtol=0., atol=1e-8)
+                separate_position = separate if isinstance(separate, PixelPointRegion) else separate.center
+                assert np.allclose((position.x, position.y), (separate_position.x, separate_position.y), rtol=0., atol=1e-8)
+
+                # The other properties
+                if isinstance(region, PixelPointRegion): continue
+                if isinstance(region, PixelCircleRegion): assert region.radius == separate.radius
+                else:
+                    assert region.radius.x == separate.radius.x and region.radius.y == separate.radius.y
+                    assert region.angle == separate.angle
+
+    # -----------------------------------------------------------------
+
+    def test_to_sky(self):
+
+        """
+        This function ...
+        :return:
+        """
+
+        # Inform the user
+        log.info("Testing the conversion to sky coordinates ...")
+
+        for name, wcs in self.coordinate_systems.items():
+
+            regions = self.pixel_regions.to_sky(wcs)
+            assert len(regions) == len(self.pixel_regions)
+
+            for region, pixel_region in zip(regions, self.pixel_regions):
+
+                # The polygon is converted by itself
+                if isinstance(pixel_region, PixelPolygonRegion):
+                    for point, separate_point in zip(region.points, pixel_region.to_sky(wcs).points): assert point.ra == separate_point.ra and point.dec == separate_point.dec
+                    continue
+
+                # The center, as ICRS right ascension and declination
+                position = pixel_region if isinstance(pixel_region, PixelPointRegion) else pixel_region.center
+                center = region if isinstance(region, SkyPointRegion) else region.center
+                assert np.allclose((center.ra.to("deg").value, center.dec.to("deg").value), self.sky_position(position.x, position.y, wcs), rtol=0., atol=1e-10)
+
+                # And back
+                back = (region.to_pixel(wcs) if isinstance(region, SkyPointRegion) else region.center.to_pixel(wcs))
+                assert np.allclose((back.x, back.y), (position.x, position.y), rtol=0., atol=1e-6)
+
+                # Compare with the conversion of the shape itself
+                separate = pixel_region.to_sky(wcs)
+                assert type(region) == type(separate)
+                separate_center = separate if isinstance(separate, SkyPointRegion) else separate.center
+                assert np.allclose((center.ra.to("deg").value, center.dec.to("deg").value), (separate_center.ra.to("deg").value, separate_center.dec.to("deg").value), rtol=0., atol=1e-10)
+                if isinstance(region, SkyPointRegion): continue
+                if isinstance(region, SkyCircleRegion): assert region.radius == separate.radius
+                else:
+                    assert region.radius.x == separate.radius.x and region.radius.y == separate.radius.y
+                    assert region.angle == separate.angle
+
+# -----------------------------------------------------------------
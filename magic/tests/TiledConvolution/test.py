@@ -0,0 +1,160 @@
+#!/usr/bin/env python
+# -*- coding: utf8 -*-
+# *****************************************************************
+# **       PTS -- Python Toolkit for working with SKIRT          **
+# **       © Astronomical Observatory, Ghent University          **
+# *****************************************************************
+
+# Ensure Python 3 compatibility
+from __future__ import absolute_import, division, print_function
+
+# Import standard modules
+import numpy as np
+
+# Import the relevant PTS classes and modules
+from pts.core.test.implementation import TestImplementation
+from pts.core.basics.log import log
+from pts.magic.core.kernel import ConvolutionKernel
+from pts.magic.convolution.cache import convolve_fft
+from pts.magic.convolution.tiled import convolve_tiled, tile_ranges
+
+# -----------------------------------------------------------------
+
+description = "testing the tiled convolution against the convolution of the complete frame"
+
+# -----------------------------------------------------------------
+
+class TiledConvolutionTest(TestImplementation):
+
+    """
+    This class ...
+    """
+
+    def __init__(self, *args, **kwargs):
+
+        """
+        This function ...
+        :param kwargs:
+        """
+
+        # Call the constructor of the base class
+        super(TiledConvolutionTest, self).__init__(*args, **kwargs)
+
+        # The data and the kernel
+        self.data = None
+        self.kernel = None
+
+    # -----------------------------------------------------------------
+
+    def run(self, **kwargs):
+
+        """
+        This function ...
+        :param kwargs:
+        :return:
+        """
+
+        # 1. Call the setup function
+        self.setup(**kwargs)
+
+        # 2. Test the tile ranges
+        self.test_tile_ranges()
+
+        # 3. Compare with the convolution of the complete frame
+        self.test_serial()
+
+        # 4. Compare the parallel tiled convolution
+        self.test_parallel()
+
+    # -----------------------------------------------------------------
+
+    def setup(self, **kwargs):
+
+        """
+        This function ...
+        :param kwargs:
+        :return:
+        """
+
+        # Call the setup function of the base class
+        super(TiledConvolutionTest, self).setup(**kwargs)
+
+        # Create the data, with NaNs (also at the edges and across tile borders)
+        random = np.random.RandomState(7)
+        self.data = random.uniform(0., 10., size=(157, 203))
+        self.data[random.randint(0, 157, 100), random.randint(0, 203, 100)] = np.nan
+        self.data[60:75, 90:110] = np.nan
+        self.data[-2:, :] = np.nan
+
+        # Create an elongated, normalized Gaussian kernel with an odd shape
+        y, x = np.mgrid[-9:10, -6:7]
+        kernel_data = np.exp(-0.5 * ((x / 2.)**2 + (y / 3.5)**2))
+        self.kernel = ConvolutionKernel(kernel_data / np.sum(kernel_data))
+
+    # -----------------------------------------------------------------
+
+    def test_tile_ranges(self):
+
+        """
+        This function ...
+        :return:
+        """
+
+        # Inform the user
+        log.info("Testing the tile ranges ...")
+
+        assert tile_ranges(10, 4) == [(0, 4), (4, 8), (8, 10)]
+        assert tile_ranges(8, 4) == [(0, 4), (4, 8)]
+        assert tile_ranges(3, 4) == [(0, 3)]
+
+    # -----------------------------------------------------------------
+
+    def compare(self, tile_size, nprocesses):
+
+        """
+        This function compares the tiled convolution with the convolution of the complete frame
+        :param tile_size:
+        :param nprocesses:
+        :return:
+        """
+
+        for interpolate_nan in (True, False):
+
+            reference = convolve_fft(self.data, self.kernel, interpolate_nan=interpolate_nan)
+            result = convolve_tiled(self.data, self.kernel, tile_size=tile_size, interpolate_nan=interpolate_nan, nprocesses=nprocesses)
+
+            assert result.shape == reference.shape
+            assert np.array_equal(np.isnan(result), np.isnan(reference))
+            valid = np.isfinite(reference)
+            assert np.allclose(result[valid], reference[valid], rtol=1e-9, atol=1e-9)
+
+    # -----------------------------------------------------------------
+
+    def test_serial(self):
+
+        """
+        This function ...
+        :return:
+        """
+
+        # Inform the user
+        log.info("Comparing the tiled convolution in one process ...")
+
+        # Tiles smaller than the kernel, tiles that don't divide the frame, and one tile
+        for tile_size in (8, 50, 64, 1000): self.compare(tile_size, 1)
+
+    # -----------------------------------------------------------------
+
+    def test_parallel(self):
+
+        """
+        This function ...
+        :return:
+        """
+
+        # Inform the user
+        log.info("Comparing the tiled convolution in " + str(self.config.nprocesses) + " processes ...")
+
+        self.compare(50, self.config.nprocesses)
+
+# -----------------------------------------------------------------
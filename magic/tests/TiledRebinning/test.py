@@ -0,0 +1,217 @@
+#!/usr/bin/env python
+# -*- coding: utf8 -*-
+# *****************************************************************
+# **       PTS -- Python Toolkit for working with SKIRT          **
+# **       © Astronomical Observatory, Ghent University          **
+# *****************************************************************
+
+# Ensure Python 3 compatibility
+from __future__ import absolute_import, division, print_function
+
+# Import standard modules
+import numpy as np
+
+# Import astronomical modules
+from astropy.io import fits
+
+# Import the relevant PTS classes and modules
+from pts.core.test.implementation import TestImplementation
+from pts.core.basics.log import log
+from pts.magic.core.frame import Frame
+from pts.magic.basics.coordinatesystem import CoordinateSystem
+from pts.magic.tools import rebinning
+
+# -----------------------------------------------------------------
+
+description = "testing the rebinning of frames tile by tile against the rebinning with reproject"
+
+# -----------------------------------------------------------------
+
+class TiledRebinningTest(TestImplementation):
+
+    """
+    This class ...
+    """
+
+    def __init__(self, *args, **kwargs):
+
+        """
+        This function ...
+        :param kwargs:
+        """
+
+        # Call the constructor of the base class
+        super(TiledRebinningTest, self).__init__(*args, **kwargs)
+
+        # The frame
+        self.frame = None
+
+        # The coordinate systems to rebin to, and the frames rebinned tile by tile
+        self.coordinate_systems = dict()
+        self.rebinned = dict()
+
+        # The original tile size
+        self.tile_size = None
+
+    # -----------------------------------------------------------------
+
+    def run(self, **kwargs):
+
+        """
+        This function ...
+        :param kwargs:
+        :return:
+        """
+
+        # 1. Call the setup function
+        self.setup(**kwargs)
+
+        try:
+
+            # 2. Test the rebinning
+            self.test_rebinning()
+
+            # 3. Test the rebinning with multiple processes and caching of the mapping
+            self.test_options()
+
+        # Restore the tile size
+        finally:
+
+            rebinning.default_tile_size = self.tile_size
+            rebinning.clear()
+
+    # -----------------------------------------------------------------
+
+    def setup(self, **kwargs):
+
+        """
+        This function ...
+        :param kwargs:
+        :return:
+        """
+
+        # Call the setup function of the base class
+        super(TiledRebinningTest, self).setup(**kwargs)
+
+        # Create a smooth frame with noise, with NaN pixels (single pixels and a block) and a zero block
+        random = np.random.RandomState(7)
+        shape = (230, 250)
+        y_values, x_values = np.mgrid[:shape[0], :shape[1]]
+        data = 10. + 0.05 * x_values - 0.02 * y_values + 5. * np.sin(x_values / 17.) * np.cos(y_values / 23.) + random.normal(0., 0.1, shape)
+        data[random.uniform(size=shape) < 0.002] = np.nan
+        data[100:120, 60:75] = np.nan
+        data[30:50, 180:200] = 0.
+
+        self.frame = Frame(data, wcs=CoordinateSystem(self.create_header(shape, 10., 20., 1., 0.)))
+
+        # The coordinate systems: larger pixels, smaller and rotated pixels, and shifted over the edge of the frame
+        self.coordinate_systems["larger"] = CoordinateSystem(self.create_header((90, 100), 10., 20., 2.7, 0.))
+        self.coordinate_systems["smaller"] = CoordinateSystem(self.create_header((200, 180), 10.005, 19.998, 0.7, 25.))
+        self.coordinate_systems["edge"] = CoordinateSystem(self.create_header((150, 170), 10.02, 20.015, 1.3, 10.))
+
+        # Use small tiles, so that there are many seams between the tiles
+        self.tile_size = rebinning.default_tile_size
+        rebinning.default_tile_size = 37
+
+    # -----------------------------------------------------------------
+
+    def create_header(self, shape, ra, dec, pixelsize, rotation):
+
+        """
+        This function creates a header with a coordinate system
+        :param shape:
+        :param ra: the position of the center, in degrees
+        :param dec:
+        :param pixelsize: in arcseconds
+        :param rotation: in degrees
+        :return:
+        """
+
+        angle = np.radians(rotation)
+        scale = pixelsize / 3600.
+
+        header = fits.Header()
+        header["NAXIS"] = 2
+        header["NAXIS1"] = shape[1]
+        header["NAXIS2"] = shape[0]
+        header["CTYPE1"] = "RA---TAN"
+        header["CTYPE2"] = "DEC--TAN"
+        header["CRVAL1"] = ra
+        header["CRVAL2"] = dec
+        header["CRPIX1"] = 0.5 * (shape[1] + 1)
+        header["CRPIX2"] = 0.5 * (shape[0] + 1)
+        header["CD1_1"] = - scale * np.cos(angle)
+        header["CD1_2"] = scale * np.sin(angle)
+        header["CD2_1"] = scale * np.sin(angle)
+        header["CD2_2"] = scale * np.cos(angle)
+        return header
+
+    # -----------------------------------------------------------------
+
+    def test_rebinning(self):
+
+        """
+        This function ...
+        :return:
+        """
+
+        # Inform the user
+        log.info("Testing the rebinning ...")
+
+        for name, wcs in self.coordinate_systems.items():
+
+            # Rebin with reproject and tile by tile
+            reference = self.frame.copy()
+            reference_footprint = reference.rebin(wcs, tiled=False)
+            tiled = self.frame.copy()
+            tiled_footprint = tiled.rebin(wcs, tiled=True, nprocesses=1)
+
+            # The frames have the new coordinate system
+            assert tiled.wcs == wcs and tiled.data.shape == wcs.shape
+
+            # The same pixels are NaN, around the NaN pixels of the frame and outside of it
+            reference_data = np.asarray(reference.data)
+            tiled_data = np.asarray(tiled.data)
+            invalid = np.isnan(reference_data)
+            assert np.array_equal(np.isnan(tiled_data), invalid)
+            assert np.any(invalid) and not np.all(invalid)
+
+            # The same values, also on both sides of the seams between the tiles (every tile_size pixels) and at the
+            # edge of the frame
+            assert np.allclose(tiled_data[~invalid], reference_data[~invalid], rtol=1e-10, atol=1e-10)
+            assert np.array_equal(np.asarray(tiled_footprint.data), np.asarray(reference_footprint.data))
+
+            # Check that the seams and the edge of the frame are covered
+            seams = np.arange(rebinning.default_tile_size, min(wcs.shape), rebinning.default_tile_size)
+            assert len(seams) > 1
+            assert np.any(np.isfinite(tiled_data[seams - 1])) and np.any(np.isfinite(tiled_data[seams]))
+            assert np.any(np.isfinite(tiled_data[:, seams - 1])) and np.any(np.isfinite(tiled_data[:, seams]))
+            if name == "edge": assert np.sum(invalid) > 0.2 * invalid.size
+
+            self.rebinned[name] = tiled
+
+    # -----------------------------------------------------------------
+
+    def test_options(self):
+
+        """
+        This function ...
+        :return:
+        """
+
+        # Inform the user
+        log.info("Testing the rebinning with multiple processes and caching of the mapping ...")
+
+        for name, wcs in self.coordinate_systems.items():
+
+            # With multiple processes, a memory-mapped output and the cached mapping (twice)
+            for _ in range(2):
+
+                tiled = self.frame.copy()
+                tiled.rebin(wcs, tiled=True, nprocesses=3, memmap=True, cache=True)
+                assert np.array_equal(np.asarray(tiled.data), np.asarray(self.rebinned[name].data), equal_nan=True)
+
+        # The mappings are cached
+        assert len(rebinning.mappings) == min(len(self.coordinate_systems), rebinning.max_nmappings)
+
+# -----------------------------------------------------------------
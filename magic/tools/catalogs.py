@@ -32,7 +32,8 @@ from astropy.units import UnrecognizedUnit
 from ...core.tools import tables
 from ...core.basics.log import log
 from ..basics.coordinate import SkyCoordinate
-from ..basics.vector import Extent
+from . import crossmatch
+from ..catalog import cache
 from ...core.units.parsing import parse_unit as u
 from ...core.tools.stringify import tostr
 
@@ -434,9 +435,9 @@ def create_star_catalog(coordinate_box, pixelscale, catalogs, check_in_box=False
     ra_span = 2.0 * coordinate_box.radius.ra
     dec_span = 2.0 * coordinate_box.radius.dec
 
-    # Create a new Vizier object and set the row limit to -1 (unlimited)
-    viz = Vizier(keywords=["stars", "optical"])
-    viz.ROW_LIMIT = -1
+    # Stars of different catalogs are identified if they lie within 3 pixels of each other
+    radius = (3.0 * pixelscale.average).to("deg").value
+    deg = u("deg")
 
     # Loop over the different catalogs
     for catalog in catalogs:
@@ -451,9 +452,21 @@ def create_star_catalog(coordinate_box, pixelscale, catalogs, check_in_box=False
         # Inform the user
         log.debug("Querying the " + catalog + " catalog ...")
 
-        # Query Vizier and obtain the resulting table
-        result = viz.query_region(center.to_astropy(), width=ra_span, height=dec_span, catalog=code)
-        table = result[0]
+        # Get the stars in the box from the local cache of the catalog (the missing parts are obtained from Vizier)
+        table = cache.query_box(code, center, ra_span, dec_span)
+
+        # No stars from this catalog
+        if len(table) == 0:
+            log.debug("No stars were found in the " + catalog + " catalog")
+            continue
+
+        # Find the stars from the previous catalogs within the matching radius of each star of the current catalog,
+        # with one query on a spatial index of the stars from the previous catalogs
+        ra_values, dec_values = cache.positions(table)
+        if len(encountered) > 0:
+            sky_index = crossmatch.create_index([ra.to("deg").value for ra in ra_column], [dec.to("deg").value for dec in dec_column])
+            candidates = crossmatch.neighbours(sky_index, ra_values, dec_values, radius)
+        else: candidates = [[] for _ in range(len(table))]
 
         number_of_stars = 0
         number_of_stars_in_frame = 0
@@ -491,19 +504,18 @@ def create_star_catalog(coordinate_box, pixelscale, catalogs, check_in_box=False
 
             # -- Positional information --
 
-            # Get the position of the star as a SkyCoord object and as pixel coordinate
-            position = SkyCoordinate(ra=table["RAJ2000"][i], dec=table["DEJ2000"][i], unit="deg", frame="fk5")
-            #pixel_position = position.to_pixel(frame.wcs)
-
             # Get the right ascension and declination for the current star
-            star_ra = table["RAJ2000"][i]
-            star_dec = table["DEJ2000"][i]
+            star_ra = ra_values[i]
+            star_dec = dec_values[i]
 
             number_of_stars += 1
 
             # Optional because this takes a lot of time
             if check_in_box:
 
+                # Get the position of the star as a SkyCoord object
+                position = SkyCoordinate(ra=star_ra, dec=star_dec, unit="deg", frame="fk5")
+
                 # If this star does not lie within the frame, skip it
                 #if not frame.contains(position): continue
                 if not coordinate_box.contains(position): continue
@@ -555,40 +567,20 @@ def create_star_catalog(coordinate_box, pixelscale, catalogs, check_in_box=False
 
             # -- Cross-referencing with previous catalogs --
 
-            # If there are already stars in the list, check for correspondences with the current stars
-            for index in range(len(encountered)):
-
-                # Skip stars that are already encountered as matches with the current catalog (we assume there can only
-                # be one match of a star of one catalog with the star of another catalog, within the radius of 3 pixels)
-                if encountered[index]: continue
-
-                saved_star_position = SkyCoordinate(ra=ra_column[index].value, dec=dec_column[index].value, unit="deg", frame="fk5")
-                #saved_star_pixel_position = saved_star_position.to_pixel(frame.wcs)
-
-                # Calculate the distance between the star already in the list and the new star
-                #difference = saved_star_pixel_position - pixel_position
-
-                difference_ra = saved_star_position.ra - position.ra
-                difference_dec = saved_star_position.dec - position.dec
-                difference = Extent((difference_ra * pixelscale.average).to("").value, (difference_dec * pixelscale.average).to("").value)
-
-                # Check whether the distance is less then 3 pixels
-                if difference.norm < 3.0:
-
-                    # Inform the user
-                    log.debug("Star " + star_id + " could be identified with star " + id_column[index] + " from the " + catalog_column[index] + " catalog")
+            # Look for the first star from the previous catalogs within the matching radius that is not yet
+            # encountered as a match with the current catalog (we assume there can only be one match of a star of one
+            # catalog with the star of another catalog, within the radius of 3 pixels)
+            index = crossmatch.first_unmatched(candidates[i], encountered)
+            if index is not None:
 
-                    # Increment the confidence level for the 'saved' star
-                    confidence_level_column[index] += 1
-
-                    # Set the 'encountered' flag to True for the 'saved' star
-                    encountered[index] = True
+                # Inform the user
+                log.debug("Star " + star_id + " could be identified with star " + id_column[index] + " from the " + catalog_column[index] + " catalog")
 
-                    # Break, because the current star does not have to be saved again (it is already in the lists)
-                    break
+                # Increment the confidence level for the 'saved' star (the 'encountered' flag is set to True)
+                confidence_level_column[index] += 1
 
-            # If no other stars are in the list yet or no corresponding star was found (no break was
-            # encountered), just add all stars of the current catalog
+            # If no other stars are in the list yet or no corresponding star was found, just add all stars of the
+            # current catalog
             else:
 
                 number_of_new_stars += 1
@@ -599,8 +591,8 @@ def create_star_catalog(coordinate_box, pixelscale, catalogs, check_in_box=False
                 # Fill in the column lists
                 catalog_column.append(catalog)
                 id_column.append(star_id)
-                ra_column.append(star_ra * u("deg"))
-                dec_column.append(star_dec * u("deg"))
+                ra_column.append(star_ra * deg)
+                dec_column.append(star_dec * deg)
                 ra_error_column.append(ra_error.value if ra_error is not None else None)
                 dec_error_column.append(dec_error.value if dec_error is not None else None)
                 confidence_level_column.append(1)
@@ -1053,16 +1045,10 @@ def galaxies_in_box(center, ra_span, dec_span):
     #radius = math.sqrt(ra_radius**2 + dec_radius**2)
     #result_table = Ned.query_region(center, radius=radius)
 
-    # Create a new Vizier object and set the row limit to -1 (unlimited)
-    viz = Vizier(keywords=["galaxies", "optical"])
-    viz.ROW_LIMIT = -1
-
     # Debugging
     log.debug("Querying the HYPERLEDA catalog ...")
 
-    # Query Vizier and obtain the resulting table
-    result = viz.query_region(center.to_astropy(), width=ra_span, height=dec_span, catalog=["VII/237"])
-
+    # The Vizier source of the cache retries the query with a slightly larger region if there are no entries:
     # I noticed something strange happening once; where there were no entries in the result,
     # with the following parameters:
     #   center = (149.07614359, 69.24847936)
@@ -1073,17 +1059,17 @@ def galaxies_in_box(center, ra_span, dec_span):
     # Thus, it seems that the query goes wrong with specific values of the width (and/or height), in which
     # case changing the value very slightly resolves the problem...
     # I am baffled by this and I see no reasonable explanation.
-    if result is None or len(result) == 0:
 
-        ra_span *= 1.0 + 1e-5
-        result = viz.query_region(center.to_astropy(), width=ra_span, height=dec_span, catalog=["VII/237"])
-
-    table = result[0]
+    # Get the galaxies in the box from the local cache of the catalog (the missing parts are obtained from Vizier)
+    table = cache.query_box("VII/237", center, ra_span, dec_span)
+    if len(table) == 0: return names
 
     # Loop over the rows in the table
-    for entry in table:
-        name = "PGC " + str(entry["PGC"])
-        coordinate = SkyCoordinate(ra=entry["RAJ2000"], dec=entry["DEJ2000"], unit="deg", frame="fk5")
+    # The positions are in sexagesimal notation in this catalog, use the positions in degrees
+    ra_values, dec_values = cache.positions(table)
+    for pgc, ra, dec in zip(table["PGC"], ra_values, dec_values):
+        name = "PGC " + str(pgc)
+        coordinate = SkyCoordinate(ra=ra, dec=dec, unit="deg", frame="fk5")
         namepluscoordinate = (name, coordinate)
         names.append(namepluscoordinate)
 
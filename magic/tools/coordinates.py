@@ -17,6 +17,8 @@ import numpy as np
 
 # Import astronomical modules
 from astropy.coordinates import SkyCoord
+from astropy.units import Unit
+from astropy.wcs import utils
 
 # -----------------------------------------------------------------
 
@@ -308,3 +310,58 @@ def hms_to_degrees(ra='', dec=''):
     else: return RA or DEC
 
 # -----------------------------------------------------------------
+
+def sky_to_pixel(ra, dec, wcs, mode="wcs", frame="icrs"):
+
+    """
+    This function converts arrays of sky coordinates (in degrees) to pixel coordinates with one WCS transformation
+    :param ra: the longitudes in the given frame
+    :param dec: the latitudes in the given frame
+    :param wcs:
+    :param mode:
+    :param frame: the celestial frame of the coordinates (they are transformed to the frame of the WCS)
+    :return:
+    """
+
+    coordinates = SkyCoord(np.asarray(ra, dtype=float), np.asarray(dec, dtype=float), unit="deg", frame=frame)
+    x, y = coordinates.to_pixel(wcs, origin=0, mode=mode)
+    return np.asarray(x, dtype=float), np.asarray(y, dtype=float)
+
+# -----------------------------------------------------------------
+
+def pixel_to_sky(x, y, wcs, mode="wcs", frame="icrs"):
+
+    """
+    This function converts arrays of pixel coordinates to sky coordinates (in degrees) with one WCS transformation
+    :param x:
+    :param y:
+    :param wcs:
+    :param mode:
+    :param frame: the celestial frame of the returned coordinates (they are transformed from the frame of the WCS)
+    :return: the longitudes and latitudes in the given frame
+    """
+
+    coordinates = SkyCoord.from_pixel(np.asarray(x, dtype=float), np.asarray(y, dtype=float), wcs, origin=0, mode=mode).transform_to(frame)
+    return np.asarray(coordinates.spherical.lon.deg, dtype=float), np.asarray(coordinates.spherical.lat.deg, dtype=float)
+
+# -----------------------------------------------------------------
+
+def pixelscales(wcs):
+
+    """
+    This function returns the pixelscale of the coordinate system in the x and y direction. The (cached) pixelscale of
+    a PTS coordinate system is used, for other (astropy) WCS objects the pixelscale is calculated.
+    :param wcs:
+    :return:
+    """
+
+    # Coordinate system with a (cached) pixelscale
+    if hasattr(wcs, "pixelscale"):
+        pixelscale = wcs.pixelscale
+        return pixelscale.x, pixelscale.y
+
+    # Projection plane increments, in the units of the celestial WCS (degrees)
+    result = utils.proj_plane_pixel_scales(wcs)
+    return result[0] * Unit("deg"), result[1] * Unit("deg")
+
+# -----------------------------------------------------------------
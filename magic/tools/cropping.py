@@ -120,3 +120,35 @@ def crop_check(data, x_min, x_max, y_min, y_max):
     return crop_direct(data, x_min, x_max, y_min, y_max)[0]
 
 # -----------------------------------------------------------------
+
+def crop_stack(data, x_centers, y_centers, x_radius, y_radius, fill_value=np.nan):
+
+    """
+    This function cuts out boxes of equal size around many positions at once (with one indexing operation), and
+    returns them as a 3D array, together with the pixel coordinates of the lower left corners of the boxes
+    :param data:
+    :param x_centers:
+    :param y_centers:
+    :param x_radius: the number of pixels on each side of the central pixel, in the x direction
+    :param y_radius: the number of pixels on each side of the central pixel, in the y direction
+    :param fill_value: the value for the pixels outside of the data
+    :return:
+    """
+
+    # Determine the lower left corners
+    x_mins = np.round(np.asarray(x_centers, dtype=float)).astype(int) - x_radius
+    y_mins = np.round(np.asarray(y_centers, dtype=float)).astype(int) - y_radius
+
+    # Determine the pixel indices of the boxes
+    x_indices = x_mins[:, np.newaxis, np.newaxis] + np.arange(2 * x_radius + 1)[np.newaxis, np.newaxis, :]
+    y_indices = y_mins[:, np.newaxis, np.newaxis] + np.arange(2 * y_radius + 1)[np.newaxis, :, np.newaxis]
+    inside = (x_indices >= 0) & (x_indices < data.shape[1]) & (y_indices >= 0) & (y_indices < data.shape[0])
+
+    # Cut out the boxes
+    boxes = np.asarray(data)[np.clip(y_indices, 0, data.shape[0] - 1), np.clip(x_indices, 0, data.shape[1] - 1)].astype(float)
+    boxes[np.logical_not(inside)] = fill_value
+
+    # Return the boxes and their positions
+    return boxes, x_mins, y_mins
+
+# -----------------------------------------------------------------
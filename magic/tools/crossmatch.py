@@ -0,0 +1,134 @@
+#!/usr/bin/env python
+# -*- coding: utf8 -*-
+# *****************************************************************
+# **       PTS -- Python Toolkit for working with SKIRT          **
+# **       © Astronomical Observatory, Ghent University          **
+# *****************************************************************
+
+## \package pts.magic.tools.crossmatch Contains functions to cross-match sky positions with a spatial index.
+#
+# The positions (right ascension and declination in degrees) are converted to unit vectors on the sphere, which are
+# indexed with a KD-tree. The neighbours of a batch of positions within a given angular radius are then found with one
+# query on the tree, instead of comparing every position with every indexed position. Angular separations follow from
+# the chord length between the unit vectors, so that the matching is also correct near the poles and across RA = 0.
+
+# -----------------------------------------------------------------
+
+# Ensure Python 3 functionality
+from __future__ import absolute_import, division, print_function
+
+# Import standard modules
+import numpy as np
+from scipy.spatial import cKDTree
+
+# -----------------------------------------------------------------
+
+def unit_vectors(ra, dec):
+
+    """
+    This function returns the unit vectors (one row per position) for the given right ascensions and declinations
+    :param ra: in degrees
+    :param dec: in degrees
+    :return:
+    """
+
+    ra = np.radians(np.asarray(ra, dtype=float))
+    dec = np.radians(np.asarray(dec, dtype=float))
+    cos_dec = np.cos(dec)
+    return np.column_stack((cos_dec * np.cos(ra), cos_dec * np.sin(ra), np.sin(dec))).reshape(-1, 3)
+
+# -----------------------------------------------------------------
+
+def chord_length(angle):
+
+    """
+    This function returns the chord length between two unit vectors that are separated by the given angle
+    :param angle: in degrees
+    :return:
+    """
+
+    return 2. * np.sin(0.5 * np.radians(np.minimum(angle, 180.)))
+
+# -----------------------------------------------------------------
+
+def separation(vectors_a, vectors_b):
+
+    """
+    This function returns the angular separations between the given unit vectors (row by row or broadcast)
+    :param vectors_a:
+    :param vectors_b:
+    :return: in degrees
+    """
+
+    chords = np.sqrt(np.sum((vectors_a - vectors_b)**2, axis=-1))
+    return np.degrees(2. * np.arcsin(np.minimum(0.5 * chords, 1.)))
+
+# -----------------------------------------------------------------
+
+def create_index(ra, dec):
+
+    """
+    This function creates the spatial index (a KD-tree of unit vectors) for the given positions.
+    Positions that are not finite (e.g. masked values filled with NaN) are left out of the index.
+    :param ra: in degrees
+    :param dec: in degrees
+    :return: the KD-tree and the indices of the indexed positions
+    """
+
+    vectors = unit_vectors(ra, dec)
+    indexed = np.flatnonzero(np.isfinite(vectors).all(axis=1))
+    return cKDTree(vectors[indexed]), indexed
+
+# -----------------------------------------------------------------
+
+def neighbours(index, ra, dec, radius):
+
+    """
+    This function returns, for each of the given positions, the sorted indices of the indexed positions that lie
+    within the given angular radius (strictly), with one query on the index for all positions
+    :param index: the index created with create_index
+    :param ra: in degrees
+    :param dec: in degrees
+    :param radius: in degrees, a single radius or a radius for each position (a zero or negative radius gives no matches)
+    :return: a list with an array of indices for each position (positions that are not finite have no matches)
+    """
+
+    tree, indexed = index
+    vectors = unit_vectors(ra, dec)
+    radius = np.broadcast_to(np.asarray(radius, dtype=float), (len(vectors),))
+    result = [np.zeros(0, dtype=int) for _ in range(len(vectors))]
+
+    # Only query the finite positions with a positive radius
+    valid = np.isfinite(vectors).all(axis=1) & np.isfinite(radius)
+    valid[valid] = radius[valid] > 0
+    valid = np.flatnonzero(valid)
+    if len(valid) == 0 or tree.n == 0: return result
+
+    # Query the index with the largest radius
+    candidates = tree.query_ball_point(vectors[valid], chord_length(np.max(radius[valid])))
+
+    # Keep the candidates within the radius of each position
+    for i, indices in zip(valid, candidates):
+        indices = np.sort(np.asarray(indices, dtype=int))
+        if len(indices) > 0: indices = indices[separation(tree.data[indices], vectors[i]) < radius[i]]
+        result[i] = indexed[indices]
+    return result
+
+# -----------------------------------------------------------------
+
+def first_unmatched(indices, matched):
+
+    """
+    This function returns the first of the given indices that is not yet matched (and marks it as matched), or None
+    :param indices:
+    :param matched: a list or array of flags
+    :return:
+    """
+
+    for index in indices:
+        if matched[index]: continue
+        matched[index] = True
+        return index
+    return None
+
+# -----------------------------------------------------------------
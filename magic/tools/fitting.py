@@ -15,6 +15,7 @@ from __future__ import absolute_import, division, print_function
 # Import standard modules
 import copy
 import warnings
+import multiprocessing
 import numpy as np
 from scipy import ndimage
 
@@ -25,6 +26,15 @@ from astropy.modeling import models, fitting
 from . import general, statistics
 from ..basics.vector import Position, Extent
 from ..basics.coordinate import PixelCoordinate
+from ...core.tools.parallelization import ParallelTarget
+
+# -----------------------------------------------------------------
+
+# The maximum number of boxes that are fitted together in one vectorized pass (limits the memory of the Jacobians)
+max_nboxes_per_pass = 1024
+
+# The minimum number of boxes for each process when the batched fitting is split over processes
+min_nboxes_per_process = 256
 
 # -----------------------------------------------------------------
 
@@ -332,6 +342,199 @@ def fit_2D_Gaussian(box, center=None, fixed_center=False, max_center_offset=None
 
 # -----------------------------------------------------------------
 
+def initial_gaussian_parameters(boxes, centers, weights):
+
+    """
+    This function calculates the initial parameters for fitting symmetric 2D Gaussians to a stack of boxes in closed
+    form: the standard deviation from the number of pixels above half of the maximum, and the amplitude as the
+    linear least-squares amplitude for that standard deviation and the initial center
+    :param boxes:
+    :param centers:
+    :param weights:
+    :return:
+    """
+
+    nboxes, ysize, xsize = boxes.shape
+    y_values, x_values = np.mgrid[:ysize, :xsize]
+
+    # Estimate the standard deviations from the areas above half of the maxima
+    maxima = np.max(np.where(weights > 0, boxes, -np.inf), axis=(1, 2))
+    nabove = np.sum((boxes > 0.5 * maxima[:, np.newaxis, np.newaxis]) & (weights > 0), axis=(1, 2))
+    fwhms = 2. * np.sqrt(nabove / np.pi)
+    stddevs = fwhms * statistics.fwhm_to_sigma
+    invalid = np.logical_not(np.isfinite(stddevs)) | (stddevs <= 0.)
+    stddevs[invalid] = 0.1 * xsize
+    stddevs = np.clip(stddevs, 0.5, 0.5 * max(xsize, ysize))
+
+    # Calculate the amplitudes
+    r2 = (x_values - centers[:, 0, np.newaxis, np.newaxis])**2 + (y_values - centers[:, 1, np.newaxis, np.newaxis])**2
+    profiles = np.exp(- r2 / (2. * stddevs[:, np.newaxis, np.newaxis]**2)) * weights
+    norms = np.sum(profiles**2, axis=(1, 2))
+    amplitudes = np.where(norms > 0, np.sum(profiles * boxes, axis=(1, 2)) / np.where(norms > 0, norms, 1.), 1.)
+
+    # Return the parameters
+    return np.column_stack((amplitudes, centers[:, 0], centers[:, 1], stddevs))
+
+# -----------------------------------------------------------------
+
+def gaussian_residuals(parameters, boxes, weights, x_values, y_values):
+
+    """
+    This function returns the profiles, the (weighted) residuals and the chi squared values of symmetric 2D Gaussians
+    :param parameters:
+    :param boxes:
+    :param weights:
+    :param x_values:
+    :param y_values:
+    :return:
+    """
+
+    amplitude = parameters[:, 0, np.newaxis, np.newaxis]
+    dx = x_values - parameters[:, 1, np.newaxis, np.newaxis]
+    dy = y_values - parameters[:, 2, np.newaxis, np.newaxis]
+    stddev = parameters[:, 3, np.newaxis, np.newaxis]
+
+    profiles = np.exp(- (dx**2 + dy**2) / (2. * stddev**2))
+    residuals = (boxes - amplitude * profiles) * weights
+    return profiles, residuals, np.sum(residuals**2, axis=(1, 2))
+
+# -----------------------------------------------------------------
+
+def fit_2D_Gaussians_local(boxes, centers, masks=None, max_iterations=50, tolerance=1e-6):
+
+    """
+    This function fits symmetric 2D Gaussians to a stack of boxes with a vectorized Levenberg-Marquardt algorithm
+    :param boxes:
+    :param centers:
+    :param masks:
+    :param max_iterations:
+    :param tolerance:
+    :return: array with the amplitude, x mean, y mean, standard deviation and a convergence flag for each box
+    """
+
+    nboxes, ysize, xsize = boxes.shape
+    result = np.zeros((nboxes, 5))
+
+    # Fit in passes with a limited number of boxes
+    for start in range(0, nboxes, max_nboxes_per_pass):
+
+        end = min(start + max_nboxes_per_pass, nboxes)
+
+        # Set the weights: zero for masked and invalid pixels
+        data = np.array(boxes[start:end], dtype=float)
+        weights = np.isfinite(data).astype(float)
+        if masks is not None: weights[masks[start:end]] = 0.
+        data[weights == 0] = 0.
+
+        y_values, x_values = np.mgrid[:ysize, :xsize]
+
+        # Get the initial parameters
+        parameters = initial_gaussian_parameters(data, np.asarray(centers[start:end], dtype=float), weights)
+        _, _, chi2 = gaussian_residuals(parameters, data, weights, x_values, y_values)
+
+        # Damping factors, and flags for the boxes that are still being fitted
+        # (boxes with fewer valid pixels than parameters are not fitted)
+        damping = np.full(len(data), 1e-3)
+        active = np.sum(weights > 0, axis=(1, 2)) >= 4
+        converged = np.zeros(len(data), dtype=bool)
+
+        # Iterate
+        for iteration in range(max_iterations):
+
+            indices = np.where(active)[0]
+            if len(indices) == 0: break
+
+            current = parameters[indices]
+            profiles, residuals, _ = gaussian_residuals(current, data[indices], weights[indices], x_values, y_values)
+
+            # Calculate the Jacobian (derivatives of the model to the amplitude, x mean, y mean and standard deviation)
+            amplitude = current[:, 0, np.newaxis, np.newaxis]
+            dx = x_values - current[:, 1, np.newaxis, np.newaxis]
+            dy = y_values - current[:, 2, np.newaxis, np.newaxis]
+            stddev = current[:, 3, np.newaxis, np.newaxis]
+            model = amplitude * profiles
+            jacobian = np.stack((profiles, model * dx / stddev**2, model * dy / stddev**2, model * (dx**2 + dy**2) / stddev**3), axis=1)
+            jacobian = (jacobian * weights[indices][:, np.newaxis]).reshape(len(indices), 4, -1)
+
+            # Solve the damped normal equations
+            jtj = np.einsum("kip,kjp->kij", jacobian, jacobian)
+            jtr = np.einsum("kip,kp->ki", jacobian, residuals.reshape(len(indices), -1))
+            diagonal = np.einsum("kii->ki", jtj)
+            system = jtj + (damping[indices, np.newaxis] * diagonal + 1e-12)[:, :, np.newaxis] * np.eye(4)
+            try: steps = np.linalg.solve(system, jtr[:, :, np.newaxis])[:, :, 0]
+            except np.linalg.LinAlgError: steps = np.einsum("kij,kj->ki", np.linalg.pinv(system), jtr)
+
+            # Evaluate the new parameters
+            trial = current + steps
+            trial[:, 3] = np.abs(trial[:, 3])
+            _, _, trial_chi2 = gaussian_residuals(trial, data[indices], weights[indices], x_values, y_values)
+            improved = np.isfinite(trial_chi2) & (trial_chi2 <= chi2[indices]) & (trial[:, 3] > 0)
+
+            # Check the convergence, and stop fitting the boxes for which no improvement can be found (without
+            # flagging them as converged)
+            change = np.abs(chi2[indices] - trial_chi2) / np.maximum(chi2[indices], np.finfo(float).tiny)
+            done = improved & (change < tolerance)
+            stalled = np.logical_not(done) & (damping[indices] > 1e10)
+
+            # Accept the improved parameters, update the damping factors
+            accepted = indices[improved]
+            parameters[accepted] = trial[improved]
+            chi2[accepted] = trial_chi2[improved]
+            damping[accepted] /= 10.
+            damping[indices[np.logical_not(improved)]] *= 10.
+
+            converged[indices[done]] = True
+            active[indices[done | stalled]] = False
+
+        # Set the result
+        result[start:end, :4] = parameters
+        result[start:end, 4] = converged
+
+    # Return the result
+    return result
+
+# -----------------------------------------------------------------
+
+def fit_2D_Gaussians(boxes, centers, masks=None, max_iterations=50, tolerance=1e-6, nprocesses=1):
+
+    """
+    This function fits symmetric 2D Gaussians (with tied x and y standard deviations and no rotation, as in
+    fit_2D_Gaussian) to a stack of equal-size boxes at once
+    :param boxes: 3D array (number of boxes, y size, x size)
+    :param centers: 2D array with the initial x and y position of the center in each box
+    :param masks: 3D array of pixels that are not used for the fit
+    :param max_iterations:
+    :param tolerance:
+    :param nprocesses:
+    :return: the amplitudes, x means, y means and standard deviations, and the flags of the converged fits
+    """
+
+    nboxes = len(boxes)
+
+    # Processes of a pool cannot create processes themselves
+    if nprocesses > 1 and multiprocessing.current_process().daemon: nprocesses = 1
+    nprocesses = max(min(nprocesses, nboxes // min_nboxes_per_process), 1)
+
+    # Fit locally
+    if nprocesses == 1: result = fit_2D_Gaussians_local(boxes, centers, masks, max_iterations=max_iterations, tolerance=tolerance)
+
+    # Divide the boxes over the processes
+    else:
+
+        outputs = []
+        with ParallelTarget(fit_2D_Gaussians_local, nprocesses, reuse=True) as target:
+            for indices in np.array_split(np.arange(nboxes), nprocesses):
+                chunk_masks = masks[indices] if masks is not None else None
+                outputs.append(target(boxes[indices], centers[indices], chunk_masks, max_iterations=max_iterations, tolerance=tolerance))
+
+        for output in outputs: output.request()
+        result = np.concatenate([output.output for output in outputs])
+
+    # Return the parameters
+    return result[:, 0], result[:, 1], result[:, 2], result[:, 3], result[:, 4].astype(bool)
+
+# -----------------------------------------------------------------
+
 def fit_2D_Airy(box, center=None, fixed_center=False, max_center_offset=None, radius=None, zoom_factor=1.0, mask=None, amplitude=None):
 
     """
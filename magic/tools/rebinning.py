@@ -0,0 +1,479 @@
+#!/usr/bin/env python
+# -*- coding: utf8 -*-
+# *****************************************************************
+# **       PTS -- Python Toolkit for working with SKIRT          **
+# **       © Astronomical Observatory, Ghent University          **
+# *****************************************************************
+
+## \package pts.magic.tools.rebinning Contains functions to rebin (reproject) two-dimensional data locally, tile by tile.
+#
+# The output grid is divided into tiles. For each tile, only the cutout of the input data that overlaps with the tile
+# is reprojected, so that large frames can be rebinned with bounded memory and the tiles can be processed in parallel.
+# The results are written into a preallocated (optionally memory-mapped) output array.
+# For interpolation, the mapping from output pixels to input pixel coordinates is calculated for each tile separately.
+# Optionally (cache=True), the mapping of the complete output grid is cached per pair of coordinate systems, so that it is
+# calculated only once for all planes of an image (or other frames on the same grid). The cached mappings have the size
+# of the output grid, so the cache should be cleared (with clear) when the frames on the same grid have been rebinned.
+
+# -----------------------------------------------------------------
+
+# Ensure Python 3 functionality
+from __future__ import absolute_import, division, print_function
+
+# Import standard modules
+import os
+import hashlib
+import tempfile
+import numpy as np
+import multiprocessing
+from collections import OrderedDict
+from scipy.ndimage import map_coordinates
+
+# Import astronomical modules
+from astropy.wcs.utils import pixel_to_skycoord, skycoord_to_pixel
+
+# Import the relevant PTS classes and modules
+from ..convolution.tiled import tile_ranges
+from ...core.basics.log import log
+from ...core.tools import filesystem as fs
+from ...core.tools import introspection
+from ...core.tools.parallelization import ParallelTarget, ncores
+
+# -----------------------------------------------------------------
+
+# Frames with more pixels (input or output) than this are rebinned tile by tile when the mode is chosen automatically
+tiled_threshold = 4096 * 4096
+
+# The default size (number of pixels in x and y) of the output tiles
+default_tile_size = 1024
+
+# The cached pixel coordinate mappings, by the keys of the input and output coordinate systems (only with cache=True)
+mappings = OrderedDict()
+
+# The maximum number of mappings that are kept in memory
+max_nmappings = 2
+
+# -----------------------------------------------------------------
+
+def needs_tiling(shape, output_shape):
+
+    """
+    This function decides whether data with the given shape should be rebinned tile by tile
+    :param shape:
+    :param output_shape:
+    :return:
+    """
+
+    return max(shape[0] * shape[1], output_shape[0] * output_shape[1]) > tiled_threshold
+
+# -----------------------------------------------------------------
+
+def default_nprocesses():
+
+    """
+    This function returns the default number of processes for tiled rebinning
+    :return:
+    """
+
+    try: return max(ncores(), 1)
+    except (TypeError, ValueError): return 1
+
+# -----------------------------------------------------------------
+
+def get_tiles(shape, tile_size):
+
+    """
+    This function returns the (y_min, y_max, x_min, x_max) ranges of the tiles of a grid with the given shape
+    :param shape:
+    :param tile_size:
+    :return:
+    """
+
+    return [(y_min, y_max, x_min, x_max) for y_min, y_max in tile_ranges(shape[0], tile_size) for x_min, x_max in tile_ranges(shape[1], tile_size)]
+
+# -----------------------------------------------------------------
+
+def wcs_key(wcs):
+
+    """
+    This function returns a string that identifies the coordinate system (including the shape of its grid)
+    :param wcs:
+    :return:
+    """
+
+    string = wcs.to_header_string() + "|" + str(wcs.shape)
+    return hashlib.md5(string.encode("utf8")).hexdigest()
+
+# -----------------------------------------------------------------
+
+def subgrid_wcs(wcs, x_min, x_max, y_min, y_max):
+
+    """
+    This function returns the coordinate system of a rectangular part of the grid of the given coordinate system
+    :param wcs:
+    :param x_min:
+    :param x_max:
+    :param y_min:
+    :param y_max:
+    :return:
+    """
+
+    # Copy the WCS
+    new_wcs = wcs.copy()
+
+    # Change the center pixel position
+    new_wcs.wcs.crpix[0] -= x_min
+    new_wcs.wcs.crpix[1] -= y_min
+
+    # Change the number of pixels
+    new_wcs.naxis1 = x_max - x_min
+    new_wcs.naxis2 = y_max - y_min
+
+    new_wcs._naxis1 = new_wcs.naxis1
+    new_wcs._naxis2 = new_wcs.naxis2
+
+    # Return the new WCS
+    return new_wcs
+
+# -----------------------------------------------------------------
+
+def create_output(shape, memmap=False):
+
+    """
+    This function creates the (uninitialized) output array, in memory or mapped to a temporary file
+    :param shape:
+    :param memmap:
+    :return:
+    """
+
+    if not memmap: return np.empty(shape)
+
+    # Create the file in the PTS temporary directory, the data remains accessible after the file is removed
+    handle, path = tempfile.mkstemp(suffix=".npy", prefix="rebin_", dir=introspection.pts_temp_dir)
+    os.close(handle)
+    array = np.lib.format.open_memmap(path, mode="w+", dtype=float, shape=tuple(shape))
+    fs.remove_file(path)
+    return array
+
+# -----------------------------------------------------------------
+
+def calculate_tile_mapping(input_wcs, output_wcs, y_min, y_max, x_min, x_max):
+
+    """
+    This function calculates the pixel coordinates in the input grid of the centers of the pixels of a tile of the
+    output grid
+    :param input_wcs:
+    :param output_wcs:
+    :param y_min:
+    :param y_max:
+    :param x_min:
+    :param x_max:
+    :return:
+    """
+
+    y, x = np.mgrid[y_min:y_max, x_min:x_max]
+
+    # Output pixels to sky (converting between celestial frames if necessary) to input pixels
+    coordinates = pixel_to_skycoord(x, y, output_wcs, origin=0, mode="all")
+    x_in, y_in = skycoord_to_pixel(coordinates, input_wcs, origin=0, mode="all")
+
+    # Return the mapping
+    return np.asarray(y_in, dtype=float), np.asarray(x_in, dtype=float)
+
+# -----------------------------------------------------------------
+
+def calculate_mapping(input_wcs, output_wcs, tile_size=None):
+
+    """
+    This function calculates the pixel coordinates in the input grid of the centers of all pixels of the output grid
+    :param input_wcs:
+    :param output_wcs:
+    :param tile_size:
+    :return:
+    """
+
+    if tile_size is None: tile_size = default_tile_size
+
+    # Initialize
+    ny, nx = output_wcs.shape
+    y_mapping = np.empty((ny, nx))
+    x_mapping = np.empty((ny, nx))
+
+    # Calculate for strips of rows, so that the sky coordinates of only a limited number of pixels are in memory
+    for y_min, y_max in tile_ranges(ny, tile_size):
+        y_mapping[y_min:y_max], x_mapping[y_min:y_max] = calculate_tile_mapping(input_wcs, output_wcs, y_min, y_max, 0, nx)
+
+    # Return the mapping
+    return y_mapping, x_mapping
+
+# -----------------------------------------------------------------
+
+def get_mapping(input_wcs, output_wcs, tile_size=None):
+
+    """
+    This function returns the (cached) mapping from the output grid to input pixel coordinates
+    :param input_wcs:
+    :param output_wcs:
+    :param tile_size:
+    :return:
+    """
+
+    key = (wcs_key(input_wcs), wcs_key(output_wcs))
+
+    # Cached
+    if key in mappings:
+        log.debug("Using the cached pixel coordinate mapping ...")
+        mappings[key] = mappings.pop(key) # most recently used
+        return mappings[key]
+
+    # Debugging
+    log.debug("Calculating the pixel coordinate mapping between the coordinate systems ...")
+
+    # Calculate
+    mapping = calculate_mapping(input_wcs, output_wcs, tile_size=tile_size)
+
+    # Add to the cache, remove the least recently used mapping if necessary
+    mappings[key] = mapping
+    if len(mappings) > max_nmappings: mappings.popitem(last=False)
+
+    # Return the mapping
+    return mapping
+
+# -----------------------------------------------------------------
+
+def get_tile_mapping(input_wcs, output_wcs, y_min, y_max, x_min, x_max, mapping=None):
+
+    """
+    This function returns the mapping from a tile of the output grid to input pixel coordinates
+    :param input_wcs:
+    :param output_wcs:
+    :param y_min:
+    :param y_max:
+    :param x_min:
+    :param x_max:
+    :param mapping: the mapping of the complete output grid (None: calculate the mapping of the tile)
+    :return:
+    """
+
+    if mapping is None: return calculate_tile_mapping(input_wcs, output_wcs, y_min, y_max, x_min, x_max)
+    return mapping[0][y_min:y_max, x_min:x_max], mapping[1][y_min:y_max, x_min:x_max]
+
+# -----------------------------------------------------------------
+
+def clear():
+
+    """
+    This function clears the cached mappings
+    :return:
+    """
+
+    mappings.clear()
+
+# -----------------------------------------------------------------
+
+def input_bounds(y_mapping, x_mapping, shape, margin=1):
+
+    """
+    This function returns the (y_min, y_max, x_min, x_max) bounds of the part of the input grid that is sampled by
+    the given pixel coordinates, or None if no pixel of the input grid is sampled
+    :param y_mapping:
+    :param x_mapping:
+    :param shape:
+    :param margin:
+    :return:
+    """
+
+    valid = np.isfinite(y_mapping) & np.isfinite(x_mapping)
+    if not np.any(valid): return None
+
+    y_min = max(int(np.floor(np.min(y_mapping[valid]))) - margin, 0)
+    y_max = min(int(np.ceil(np.max(y_mapping[valid]))) + margin + 1, shape[0])
+    x_min = max(int(np.floor(np.min(x_mapping[valid]))) - margin, 0)
+    x_max = min(int(np.ceil(np.max(x_mapping[valid]))) + margin + 1, shape[1])
+
+    if y_min >= y_max or x_min >= x_max: return None
+    return y_min, y_max, x_min, x_max
+
+# -----------------------------------------------------------------
+
+def interpolate_tile(cutout, y_mapping, x_mapping, y_offset, x_offset, shape):
+
+    """
+    This function interpolates (bilinearly) the input cutout at the given input pixel coordinates.
+    Coordinates outside the full input grid (with the given shape) give NaN.
+    :param cutout:
+    :param y_mapping:
+    :param x_mapping:
+    :param y_offset: the position of the cutout in the full input grid
+    :param x_offset:
+    :param shape: the shape of the full input grid
+    :return: the interpolated values and the footprint
+    """
+
+    # Determine which coordinates fall within the input grid (pixel centers are at integer coordinates)
+    inside = (y_mapping >= -0.5) & (y_mapping <= shape[0] - 0.5) & (x_mapping >= -0.5) & (x_mapping <= shape[1] - 0.5)
+
+    # Pad the cutout with its edge values, so that the outer half of the outer pixels is treated correctly
+    padded = np.pad(cutout, 1, mode="edge")
+
+    # Interpolate
+    y = np.where(inside, y_mapping - y_offset + 1, 0.0)
+    x = np.where(inside, x_mapping - x_offset + 1, 0.0)
+    values = map_coordinates(padded, [y.ravel(), x.ravel()], order=1, mode="nearest").reshape(y_mapping.shape)
+    values[~inside] = np.nan
+
+    # Return the values and the footprint
+    footprint = np.isfinite(values).astype(float)
+    return values, footprint
+
+# -----------------------------------------------------------------
+
+def reproject_exact_tile(cutout, cutout_wcs, tile_wcs, shape):
+
+    """
+    This function reprojects the input cutout onto the grid of the tile, conserving flux
+    :param cutout:
+    :param cutout_wcs:
+    :param tile_wcs:
+    :param shape:
+    :return: the reprojected values and the footprint
+    """
+
+    from reproject import reproject_exact
+    return reproject_exact((cutout, cutout_wcs), tile_wcs, shape_out=shape, parallel=False)
+
+# -----------------------------------------------------------------
+
+def rebin(data, input_wcs, output_wcs, exact=False, tile_size=None, nprocesses=1, memmap=False, cache=False):
+
+    """
+    This function rebins the data from the input grid to the output grid, tile by tile
+    :param data:
+    :param input_wcs:
+    :param output_wcs:
+    :param exact: use the flux-conserving exact algorithm instead of bilinear interpolation
+    :param tile_size:
+    :param nprocesses:
+    :param memmap: map the output arrays to temporary files
+    :param cache: cache the pixel coordinate mapping of the complete output grid, for other frames on the same grids
+    :return: the rebinned data and the footprint
+    """
+
+    if tile_size is None: tile_size = default_tile_size
+
+    # Processes of a pool cannot create processes themselves
+    if nprocesses > 1 and multiprocessing.current_process().daemon: nprocesses = 1
+
+    # Get the cached pixel coordinate mapping (otherwise, it is calculated for each tile)
+    mapping = get_mapping(input_wcs, output_wcs, tile_size=tile_size) if cache else None
+
+    # Create the output arrays
+    shape = output_wcs.shape
+    new_data = create_output(shape, memmap=memmap)
+    footprint = create_output(shape, memmap=memmap)
+
+    # Determine the tiles
+    tiles = get_tiles(shape, tile_size)
+
+    # Debugging
+    log.debug("Rebinning data of " + str(data.shape[1]) + " x " + str(data.shape[0]) + " pixels to " + str(shape[1]) + " x " + str(shape[0]) + " pixels in " + str(len(tiles)) + " tiles with " + str(nprocesses) + " process(es) ...")
+
+    # Process the tiles in batches of nprocesses, so that only a limited number of cutouts is in memory
+    for batch_start in range(0, len(tiles), nprocesses):
+
+        outputs = []
+
+        with ParallelTarget(reproject_exact_tile if exact else interpolate_tile, nprocesses, shared=True, reuse=True) as target:
+
+            for y_min, y_max, x_min, x_max in tiles[batch_start:batch_start + nprocesses]:
+
+                tile_y_mapping, tile_x_mapping = get_tile_mapping(input_wcs, output_wcs, y_min, y_max, x_min, x_max, mapping=mapping)
+
+                # Determine the part of the input that overlaps with the tile
+                bounds = input_bounds(tile_y_mapping, tile_x_mapping, data.shape, margin=2 if exact else 1)
+
+                # No overlap
+                if bounds is None:
+                    new_data[y_min:y_max, x_min:x_max] = np.nan
+                    footprint[y_min:y_max, x_min:x_max] = 0.0
+                    continue
+
+                # Get the input cutout
+                in_y_min, in_y_max, in_x_min, in_x_max = bounds
+                cutout = np.ascontiguousarray(data[in_y_min:in_y_max, in_x_min:in_x_max])
+
+                # Reproject
+                if exact:
+                    cutout_wcs = subgrid_wcs(input_wcs, in_x_min, in_x_max, in_y_min, in_y_max)
+                    tile_wcs = subgrid_wcs(output_wcs, x_min, x_max, y_min, y_max)
+                    output = target(cutout, cutout_wcs, tile_wcs, (y_max - y_min, x_max - x_min))
+                else: output = target(cutout, np.ascontiguousarray(tile_y_mapping), np.ascontiguousarray(tile_x_mapping), in_y_min, in_x_min, data.shape)
+                outputs.append(((y_min, y_max, x_min, x_max), output))
+
+        # Put the tiles in the output
+        for (y_min, y_max, x_min, x_max), output in outputs:
+            output.request()
+            new_data[y_min:y_max, x_min:x_max] = output.output[0]
+            footprint[y_min:y_max, x_min:x_max] = output.output[1]
+
+    # Return the rebinned data and the footprint
+    return new_data, footprint
+
+# -----------------------------------------------------------------
+
+def rebin_mask(data, input_wcs, output_wcs, threshold=0.5, tile_size=None, cache=False):
+
+    """
+    This function rebins a boolean mask from the input grid to the output grid. The mask is interpolated bilinearly
+    (as by the interpolate_tile function) and thresholded, but only the four neighbouring input pixels of each output
+    pixel are looked up, so that the mask is never converted to a floating-point array as a whole.
+    Output pixels outside the input grid are masked.
+    :param data:
+    :param input_wcs:
+    :param output_wcs:
+    :param threshold:
+    :param tile_size:
+    :param cache: cache the pixel coordinate mapping of the complete output grid, for other frames on the same grids
+    :return: the rebinned mask and the footprint
+    """
+
+    if tile_size is None: tile_size = default_tile_size
+
+    # Get the cached pixel coordinate mapping (otherwise, it is calculated for each strip)
+    mapping = get_mapping(input_wcs, output_wcs, tile_size=tile_size) if cache else None
+
+    # Create the output arrays
+    shape = output_wcs.shape
+    new_data = np.empty(shape, dtype=bool)
+    footprint = np.empty(shape)
+
+    # Process strips of rows, so that the interpolation weights of only a limited number of pixels are in memory
+    ny_in, nx_in = data.shape
+    for y_min, y_max in tile_ranges(shape[0], tile_size):
+
+        y, x = get_tile_mapping(input_wcs, output_wcs, y_min, y_max, 0, shape[1], mapping=mapping)
+
+        # Determine which coordinates fall within the input grid (pixel centers are at integer coordinates)
+        inside = (y >= -0.5) & (y <= ny_in - 0.5) & (x >= -0.5) & (x <= nx_in - 0.5)
+        y = np.where(inside, y, 0.0)
+        x = np.where(inside, x, 0.0)
+
+        # Determine the neighbouring pixels (clipped to the grid, as for edge padding) and the interpolation weights
+        y_floor = np.floor(y)
+        x_floor = np.floor(x)
+        wy = y - y_floor
+        wx = x - x_floor
+        y0 = np.clip(y_floor.astype(int), 0, ny_in - 1)
+        y1 = np.clip(y_floor.astype(int) + 1, 0, ny_in - 1)
+        x0 = np.clip(x_floor.astype(int), 0, nx_in - 1)
+        x1 = np.clip(x_floor.astype(int) + 1, 0, nx_in - 1)
+
+        # Interpolate and threshold
+        values = (1 - wy) * ((1 - wx) * data[y0, x0] + wx * data[y0, x1]) + wy * ((1 - wx) * data[y1, x0] + wx * data[y1, x1])
+        new_data[y_min:y_max] = (values > threshold) | ~inside
+        footprint[y_min:y_max] = inside
+
+    # Return the rebinned mask and the footprint
+    return new_data, footprint
+
+# -----------------------------------------------------------------
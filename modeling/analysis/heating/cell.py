@@ -24,6 +24,7 @@ from ....core.tools import filesystem as fs
 from ....core.basics.log import log
 from ....core.tools import tables, introspection
 from ....core.simulation.table import SkirtTable
+from ....core.simulation import sidecar
 from ....core.basics.distribution import Distribution, Distribution2D
 from ....core.simulation.wavelengthgrid import WavelengthGrid
 
@@ -59,15 +60,33 @@ class CellDustHeatingAnalyser(DustHeatingAnalysisComponent):
         # The table with the cell properties
         self.cell_properties = None
 
-        # The table with the absorbed luminosities
+        # The coordinates of the dust cell centers
+        self.x_coordinates = None
+        self.y_coordinates = None
+        self.z_coordinates = None
+
+        # The absorbed luminosities (contributions x cells)
         self.absorptions = None
 
+        # The contributions that correspond to the rows of the absorptions array
+        self.absorption_contributions = None
+
         # The mask of cells for which the total absorbed luminosity is zero
         self.zero_absorption = None
 
         # The heating fraction of the unevolved stellar population for each dust cell
         self.heating_fractions = None
 
+        # The mask of cells with an invalid heating fraction
+        self.mask = None
+
+        # The valid heating fractions and the corresponding mass fractions
+        self.heating_fractions_compressed = None
+        self.weights_compressed = None
+
+        # The bolometric luminosities obtained from the ISRF for each contribution
+        self.isrf_luminosities = dict()
+
         # The distribution of heating fractions
         self.distribution = None
 
@@ -190,13 +209,11 @@ class CellDustHeatingAnalyser(DustHeatingAnalysisComponent):
         # column 3: z coordinate of cell center (pc)
         # column 4: Absorbed bolometric luminosity (W)
 
-        contribution_tables = dict()
+        # The contributions for which there is an absorption table
+        self.absorption_contributions = [contribution for contribution in contributions if contribution != "unevolved"]
 
         # Loop over the different contributions
-        for contribution in contributions:
-
-            # Skip the simulation of the total unevolved (young + ionizing) stellar population
-            if contribution == "unevolved": continue
+        for index, contribution in enumerate(self.absorption_contributions):
 
             # Debugging
             log.debug("Loading the SKIRT absorption table for the simulation of the " + contribution + " stellar population ...")
@@ -207,67 +224,72 @@ class CellDustHeatingAnalyser(DustHeatingAnalysisComponent):
             # Determine the path to the absorption data file
             absorption_path = fs.join(output_path, self.galaxy_name + "_ds_abs.dat")
 
-            # Load the absorption table for this contribution
-            table = SkirtTable.from_file(absorption_path)
+            # Load the absorption columns for this contribution (memory-mapped from the binary sidecar)
+            columns = sidecar.load_columns(absorption_path)
+            ncells = columns.shape[1]
 
-            # Add the table
-            contribution_tables[contribution] = table
+            # First contribution: set the cell coordinates and allocate the contiguous absorption array
+            if index == 0:
 
-        do_checks = False
-        if do_checks:
+                self.x_coordinates = np.array(columns[0])
+                self.y_coordinates = np.array(columns[1])
+                self.z_coordinates = np.array(columns[2])
+                self.absorptions = np.empty((len(self.absorption_contributions), ncells))
 
-            # Debugging
-            log.debug("Checking whether the tables are consistent ...")
+            # Check the number of cells
+            elif ncells != self.absorptions.shape[1]: raise ValueError("Absorption tables have different sizes")
 
-            # Check whether the table lengths match
-            table_lengths = [len(table) for table in contribution_tables.values()]
-            if not all(table_lengths[0] == length for length in table_lengths): raise ValueError("Absorption tables have different sizes")
+            # Check whether the coordinates of the cells match
+            elif self.config.check_coordinates:
 
-            # Check whether the X coordinates of the cells match
-            if not tables.equal_columns([table["X coordinate of cell center"] for table in contribution_tables.values()]):
-                raise ValueError("Columns of X coordinates of cell centers do not match between the different contributions")
+                # Debugging
+                log.debug("Checking whether the cell coordinates are consistent ...")
 
-            # Check whether the Y coordinates of the cells match
-            if not tables.equal_columns([table["Y coordinate of cell center"] for table in contribution_tables.values()]):
-                raise ValueError("Columns of Y coordinates of cell centers do not match between the different contributions")
+                for coordinates, column in zip((self.x_coordinates, self.y_coordinates, self.z_coordinates), columns[0:3]):
+                    for start, stop in self.chunks:
+                        if not np.array_equal(coordinates[start:stop], column[start:stop]): raise ValueError("Cell coordinates do not match between the different contributions")
 
-            # Check whether the Z coordinates of the cells match
-            if not tables.equal_columns([table["Z coordinate of cell center"] for table in contribution_tables.values()]):
-                raise ValueError("Columns of Z coordinates of cell centers do not match between the different contributions")
+            # Set the absorbed bolometric luminosities
+            self.absorptions[index] = columns[3]
 
-        # Debugging
-        log.debug("Creating the absorption table ...")
+        # Create a mask of cells with zero absorption
+        self.zero_absorption = self.absorptions_for("total") == 0.
+
+    # -----------------------------------------------------------------
+
+    @property
+    def ncells(self):
+
+        """
+        This function ...
+        :return:
+        """
 
-        # Create the columns for the absorption table
-        #names = ["X coordinate of cell center", "Y coordinate of cell center", "Z coordinate of cell center"]
-        #data = []
-        #data.append(contribution_tables[contribution_tables.keys()[0]]["X coordinate of cell center"])
-        #data.append(contribution_tables[contribution_tables.keys()[0]]["Y coordinate of cell center"])
-        #data.append(contribution_tables[contribution_tables.keys()[0]]["Z coordinate of cell center"])
+        return self.absorptions.shape[1]
 
-        # Loop over the tables of the different contributions, add the absorption luminosity columns
-        #for contribution in contribution_tables:
+    # -----------------------------------------------------------------
 
-            #names.append("Absorbed bolometric luminosity of the " + contribution + " stellar population")
-            #data.append(contribution_tables[contribution]["Absorbed bolometric luminosity"])
+    @property
+    def chunks(self):
 
-        # Create the absorption table
-        #self.absorptions = tables.new(data, names, copy=False)
+        """
+        This function returns the (start, stop) index ranges of the chunks of dust cells that are processed at once
+        :return:
+        """
 
-        self.absorptions = tables.new()
+        for start in range(0, self.ncells, self.config.chunk_size): yield start, min(start + self.config.chunk_size, self.ncells)
 
-        x_coords = contribution_tables[contribution_tables.keys()[0]]["X coordinate of cell center"]
-        y_coords = contribution_tables[contribution_tables.keys()[0]]["Y coordinate of cell center"]
-        z_coords = contribution_tables[contribution_tables.keys()[0]]["Z coordinate of cell center"]
-        self.absorptions.add_columns([x_coords, y_coords, z_coords], copy=False)
+    # -----------------------------------------------------------------
 
-        for contribution in contribution_tables:
+    def absorptions_for(self, contribution):
 
-            self.absorptions.add_columns([contribution_tables[contribution]["Absorbed bolometric luminosity"]], copy=False)
-            self.absorptions.rename_column("Absorbed bolometric luminosity", "Absorbed bolometric luminosity of the " + contribution + " stellar population")
+        """
+        This function returns the absorbed luminosities of all dust cells for the specified contribution
+        :param contribution:
+        :return:
+        """
 
-        # Create a mask of cells with zero absorption
-        self.zero_absorption = self.absorptions["Absorbed bolometric luminosity of the total stellar population"] == 0.
+        return self.absorptions[self.absorption_contributions.index(contribution)]
 
     # -----------------------------------------------------------------
 
@@ -307,27 +329,38 @@ class CellDustHeatingAnalyser(DustHeatingAnalysisComponent):
         #energy_new = volume * density_new * Lnew
         #F_abs_yng = (yng + new + energy_new) / (old + yng + new + energy_new)
 
-        absorptions_unevolved_diffuse = self.absorptions["Absorbed bolometric luminosity of the young stellar population"] + self.absorptions["Absorbed bolometric luminosity of the ionizing stellar population"]
-        #absorptions_ionizing_internal = None # TODO !!
-
-        absorptions_total = self.absorptions["Absorbed bolometric luminosity of the total stellar population"]
+        absorptions_young = self.absorptions_for("young")
+        absorptions_ionizing = self.absorptions_for("ionizing")
+        absorptions_total = self.absorptions_for("total")
         #absorptions_total = absorptions_unevolved_diffuse + absorptions_ionizing_internal + absorptions_evolved # TODO !!
 
-        # Calculate the heating fraction of the unevolved stellar population in each dust cell
-        self.heating_fractions = absorptions_unevolved_diffuse / absorptions_total
+        # Initialize the arrays
+        self.heating_fractions = np.empty(self.ncells)
+        self.mask = np.empty(self.ncells, dtype=bool)
+        ngreater_than_one = 0
+
+        # Calculate the heating fraction of the unevolved stellar population in each dust cell, per chunk of cells
+        for start, stop in self.chunks:
 
+            absorptions_unevolved_diffuse = absorptions_young[start:stop] + absorptions_ionizing[start:stop]
+            #absorptions_ionizing_internal = None # TODO !!
 
+            # Cells with zero absorption give invalid values
+            with np.errstate(divide="ignore", invalid="ignore"): fractions = absorptions_unevolved_diffuse / absorptions_total[start:stop]
+            greater_than_one = fractions > 1.0
+            ngreater_than_one += np.count_nonzero(greater_than_one)
 
-        self.mask = self.heating_fractions.mask  # is basically the same mask as self.zero_absorption because during the division (see calculate_heating_unevolved) Astropy sets invalid values as masked
-        # nan_inf_mask = np.isnan(self.heating_fractions) + np.isinf(self.heating_fractions) # no nans or infs because Astropy sets them as MaskedConstants during the division
-        greater_than_one_mask = self.heating_fractions > 1.0
+            # Set the fractions and the mask
+            self.heating_fractions[start:stop] = fractions
+            self.mask[start:stop] = self.zero_absorption[start:stop] | ~np.isfinite(fractions) | greater_than_one
 
         # Debugging
-        log.debug(str(np.sum(greater_than_one_mask)) + " pixels have a heating fraction greater than unity")
+        log.debug(str(ngreater_than_one) + " pixels have a heating fraction greater than unity")
 
-        self.mask += greater_than_one_mask
-        self.heating_fractions_compressed = np.ma.MaskedArray(self.heating_fractions, self.mask).compressed()
-        self.weights_compressed = np.ma.MaskedArray(self.cell_properties["Mass fraction"], self.mask).compressed()
+        # Get the valid heating fractions and the corresponding mass fractions
+        valid = ~self.mask
+        self.heating_fractions_compressed = self.heating_fractions[valid]
+        self.weights_compressed = np.asarray(self.cell_properties["Mass fraction"])[valid]
 
     # -----------------------------------------------------------------
 
@@ -356,12 +389,9 @@ class CellDustHeatingAnalyser(DustHeatingAnalysisComponent):
         # Inform the user
         log.info("Calculating the radial distribution of heating fractions of the unevolved stellar population ...")
 
-        # Calculate the radius for each dust cell
-        x_coords = self.absorptions["X coordinate of cell center"]
-        y_coords = self.absorptions["Y coordinate of cell center"]
-        radii = np.sqrt(x_coords**2 + y_coords**2)
-
-        radii_compressed = np.ma.MaskedArray(radii, self.mask).compressed()
+        # Calculate the radius for each valid dust cell
+        valid = ~self.mask
+        radii_compressed = np.hypot(self.x_coordinates[valid], self.y_coordinates[valid])
 
         # Generate the radial distribution
         self.radial_distribution = Distribution2D.from_values(radii_compressed, self.heating_fractions_compressed, weights=self.weights_compressed, x_name="radius (pc)", y_name="Heating fraction of unevolved stars")
@@ -494,8 +524,8 @@ class CellDustHeatingAnalyser(DustHeatingAnalysisComponent):
 
         plt.figure()
 
-        x = np.ma.MaskedArray(self.absorptions["X coordinate of cell center"], mask=self.mask).compressed()
-        y = np.ma.MaskedArray(self.absorptions["Y coordinate of cell center"], mask=self.mask).compressed()
+        x = self.x_coordinates[~self.mask]
+        y = self.y_coordinates[~self.mask]
         z = self.heating_fractions_compressed
 
         #plt.pcolormesh(x, y, z, cmap='RdBu', vmin=0.0, vmax=1.0)
@@ -722,21 +752,20 @@ class CellDustHeatingAnalyser(DustHeatingAnalysisComponent):
         # column 28: J_lambda (W/m3/sr) for lambda = 8.25404 micron
         # column 29: J_lambda (W/m3/sr) for lambda = 10 micron
 
-        # Determine the indices of the columns that have to be imported
-        column_indices = [0,1,2,3]
-        for i in range(4, 4 + self.number_of_wavelengths): column_indices.append(i)
-
         # Loop over the different contributions
         for contribution in contributions:
 
+            # Skip the simulation of the total unevolved (young + ionizing) stellar population
+            if contribution == "unevolved": continue
+
             # Determine the path to the output directory of the simulation
             output_path = self.analysis_run.heating_output_path_for_contribution(contribution)
 
             # Determine the path to the ISFR data file
             isrf_path = fs.join(output_path, self.galaxy_name + "_ds_isrf.dat")
 
-            # Load the ISRF file
-            columns = np.loadtxt(isrf_path, usecols=column_indices, unpack=True)
+            # Load the ISRF file (memory-mapped from the binary sidecar, one row per column)
+            columns = sidecar.load_columns(isrf_path)
 
             # columns[0]: dust cell index
             # columns[1]: x coordinate of cell center
@@ -745,7 +774,7 @@ class CellDustHeatingAnalyser(DustHeatingAnalysisComponent):
             # columns[4 -> 4 + (nwavelengths - 1)]: J_lambda
 
             # Integrate over the J_lambda values to get the total bolometric absorbed luminosity per cell
-            luminosities = self.integrate_over_wavelengths(columns[4:4+self.number_of_wavelengths])
+            self.isrf_luminosities[contribution] = self.integrate_over_wavelengths(columns[4:4+self.number_of_wavelengths])
 
             #IDtot, x, y, z, Ltot = np.loadtxt(totISRFfile, usecols=(0, 1, 2, 3, 4,), unpack=True)
             #IDold, Lold = np.loadtxt(oldISRFfile, usecols=(0, 4,), unpack=True)
@@ -764,32 +793,29 @@ class CellDustHeatingAnalyser(DustHeatingAnalysisComponent):
 
         """
         This function ...
-        :param jlambdas:
+        :param jlambdas: 2D array with the J_lambda values (wavelengths x cells)
         :return:
         """
 
-        lum_cells = []
-
         # L = sum_lambda (j_lambda * d_lambda)
 
         # Get the wavelength deltas
         deltas = self.wavelength_grid.deltas(asarray=True, unit="m") # deltas in meter
 
-        # Loop over all dust cells
-        for i in range(jlambdas[0].size):
+        # Initialize the luminosities
+        ncells = jlambdas.shape[1]
+        lum_cells = np.empty(ncells)
 
-            # Put the Jlambda values for this cell in an array
-            jlambdas_cell = np.array([jlambdas[k][i] for k in range(len(jlambdas))])
+        # Integrate chunk per chunk of dust cells, so that only a (wavelengths x chunk) block is in memory at once
+        for start in range(0, ncells, self.config.chunk_size):
 
-            # Calculate the luminosity
-            #lum = np.sum(jlambdas_cell * MjySr_to_LsunMicron * deltas)
-            lum = np.sum(jlambdas_cell * deltas) # if deltas are in meter, this is in W/m3/sr * m -> W/m2/sr
-            #lum = np.sum(jlambdas_cell * deltas * ...)
+            stop = min(start + self.config.chunk_size, ncells)
 
-            # Add the luminosity to the list
-            lum_cells.append(lum)
+            # Calculate the luminosities as a matrix-vector product
+            #lum = np.sum(jlambdas_cell * MjySr_to_LsunMicron * deltas)
+            lum_cells[start:stop] = np.dot(deltas, jlambdas[:, start:stop]) # if deltas are in meter, this is in W/m3/sr * m -> W/m2/sr
 
-        # Return the list of luminosities
+        # Return the luminosities
         return lum_cells
 
 # -----------------------------------------------------------------
@@ -17,8 +17,6 @@ import math
 import numpy as np
 from abc import ABCMeta, abstractmethod, abstractproperty
 from scipy.special import gammaincinv
-from scipy import ndimage
-import itertools
 
 # Import astronomical modules
 from astropy.coordinates import Angle
@@ -2157,6 +2155,49 @@ class DeprojectionModel3D(Model3D):
 
     # -----------------------------------------------------------------
 
+    def map_values(self, i, j):
+
+        """
+        This function returns the values of the map for arrays of pixel indices (zero for pixels outside of the map)
+        :param i:
+        :param j:
+        :return:
+        """
+
+        i, j = np.broadcast_arrays(i, j)
+
+        # Get the values of the pixels on the map
+        inside = (i >= 0) & (i < self.xsize) & (j >= 0) & (j < self.ysize)
+        values = np.zeros(i.shape)
+        values[inside] = self.map.data[j[inside], i[inside]]
+
+        # Return the values
+        return values
+
+    # -----------------------------------------------------------------
+
+    def surface_density_array(self, x, y):
+
+        """
+        This function is the array version of surface_density
+        :param x:
+        :param y:
+        :return:
+        """
+
+        # Project and rotate the x and y coordinates
+        x = self.project(x)
+        x, y = self.rotate(x, y)
+
+        # Find the corresponding pixels in the image
+        i = np.floor(((x - self.map_xmin) / self.deltay).to("").value).astype(int)
+        j = np.floor(((y - self.map_ymin) / self.deltay).to("").value).astype(int)
+
+        # Return the densities
+        return self.map_values(i, j)
+
+    # -----------------------------------------------------------------
+
     @property
     def density_normalization(self):
 
@@ -2185,6 +2226,22 @@ class DeprojectionModel3D(Model3D):
 
     # -----------------------------------------------------------------
 
+    def density_array(self, x, y, z):
+
+        """
+        This function is the array version of density
+        :param x:
+        :param y:
+        :param z:
+        :return:
+        """
+
+        # Return the densities
+        z = np.abs(z)
+        return self.surface_density_array(x, y) * np.exp(- z / self.scale_height) * self.density_normalization
+
+    # -----------------------------------------------------------------
+
     @property
     def shape(self):
 
@@ -2235,29 +2292,8 @@ class DeprojectionModel3D(Model3D):
             x_mapping = ((x - xmin_scalar) / deltay_scalar - 0.5).astype(int)
             y_mapping = ((y - ymin_scalar) / deltay_scalar - 0.5).astype(int)
 
-            xy = x_mapping + self.xsize * y_mapping
-
-            nx = xy.shape[0]
-            ny = xy.shape[1]
-
-            #xy = xy[:, :, 0]
-
-            arrangement_x = range(self.xsize) * self.ysize
-            lists = [[value] * self.xsize for value in range(self.ysize)]
-
-            arrangement_y = list(itertools.chain.from_iterable(lists))
-
-            xy_flattened = xy.flatten()
-
-            x_mapping = [arrangement_x[k] if 0 <= k < self.npixels else -1 for k in xy_flattened]
-            y_mapping = [arrangement_y[k] if 0 <= k < self.npixels else -1 for k in xy_flattened]
-            mapping = [y_mapping, x_mapping]
-
-            cval = 0.0
-            data = ndimage.map_coordinates(self.map.data, mapping, mode='constant', cval=cval)
-
-            # Reshape into the
-            deprojected = data.reshape((ny, nx))
+            # Get the map values, with y along the first axis
+            deprojected = self.map_values(x_mapping, y_mapping).T
 
             # Normalize?
             if normalize: deprojected /= np.sum(deprojected)
@@ -2299,92 +2335,12 @@ class DeprojectionModel3D(Model3D):
             x = self.project_array(x)
             x, y = self.rotate_arrays(x, y)
 
-            #i_array = numbers.round_down_to_int((x - xmin_scalar) / deltay_scalar)
-            #j_array = numbers.round_down_to_int((y - ymin_scalar) / deltay_scalar)
-
-            # grid = mapping
-            #grid = np.array([yy1.reshape(outshape), xx1.reshape(outshape)])
-            # Use Scipy to create the new image
-            #data = scipy.ndimage.map_coordinates(frame, mapping, **kwargs)
-
-            # Determine the coordinate mapping
-            #x_mapping = (x - xmin_scalar) / deltay_scalar - 0.5
-            #y_mapping = (y - ymin_scalar) / deltay_scalar - 0.5
-            x_mapping = ((x - xmin_scalar) / deltay_scalar - 0.5).astype(int)
-            y_mapping = ((y - ymin_scalar) / deltay_scalar - 0.5).astype(int)
-
-            #x_mapping = x_mapping.flatten()
-            #y_mapping = y_mapping.flatten()
-
-            xy = x_mapping + self.xsize * y_mapping
-
-            #print("xy", xy)
-
-            #print("x_mapping", x_mapping)
-            #print("y_mapping", y_mapping)
-
-            #mapping = np.array([np.array([xi, yi]) for xi, yi in zip(x_mapping.flat, y_mapping.flat)])
-            #mapping = np.array([x_mapping, y_mapping])
-            #mapping = np.vstack((x_mapping,y_mapping))
-
-            #print("mapping", mapping)
-            #print(mapping.shape)
-
-            #print("output shape", mapping.shape[1:])
-            #print("input.ndim", self.map.data.ndim)
-
-            # output_shape = coordinates.shape[1:]
-            # input.ndim < 1 or len(output_shape) < 1:
-
-            #print(xy)
-            #print(xy.shape)
-
-            nx = xy.shape[0]
-            ny = xy.shape[1]
-            #nz = xy.shape[2]
-
-            #print(xy[:,:,0])
-            xy = xy[:, :, 0]
-            #print(xy)
-
-            arrangement_x = range(self.xsize) * self.ysize
-            lists = [[value] * self.xsize for value in range(self.ysize)]
-            #print(lists)
-            #arrangement_y = itertools.chain(*lists)
-            arrangement_y = list(itertools.chain.from_iterable(lists))
-
-            #print(xy.shape)
-
-            #print("output shape", xy.shape[1:])
-            #print("input.ndim", self.map.data.flatten().ndim)
-
-            # Create mapping
-            #mapping = [[arrangement_y[yi], arrangement_x[xi]] for xi, yi in xy]
-            #print("mapping", mapping)
-
-            #print([k for k in xy])
-
-            xy_flattened = xy.flatten()
-            #print(arrangement_x)
-            #print(arrangement_y.shape)
-            x_mapping = [arrangement_x[k] if 0<=k<self.npixels else -1 for k in xy_flattened]
-            y_mapping = [arrangement_y[k] if 0<=k<self.npixels else -1 for k in xy_flattened]
-            #mapping = [x_mapping, y_mapping]
-            mapping = [y_mapping, x_mapping]
-
-            #cval = float('nan')
-            cval = 0.0
-            data = ndimage.map_coordinates(self.map.data, mapping, mode='constant', cval=cval)
-            #data = ndimage.map_coordinates(self.map.data.flatten(), xy, mode="constant", cval=cval)
-
-            #nx = x.shape[2]
-            #ny = y.shape[1]
-
-            #print("nx", nx)
-            #print("")
+            # Determine the coordinate mapping (in the plane: the first z index)
+            x_mapping = ((x - xmin_scalar) / deltay_scalar - 0.5).astype(int)[:, :, 0]
+            y_mapping = ((y - ymin_scalar) / deltay_scalar - 0.5).astype(int)[:, :, 0]
 
-            # Reshape into the
-            deprojected = data.reshape((ny, nx, 1))
+            # Get the map values, indexed as the coordinate grid (x, y, z)
+            deprojected = self.map_values(x_mapping, y_mapping)[:, :, np.newaxis]
 
             # Return
             z = abs(z)
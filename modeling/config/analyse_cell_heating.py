@@ -28,3 +28,9 @@ elif runs.has_single: definition.add_fixed("run", "name of the analysis run", ru
 else: definition.add_positional_optional("run", "string", "name of the analysis run for which to launch the heating simulations", runs.last_name, runs.names)
 
 # -----------------------------------------------------------------
+
+# Processing
+definition.add_optional("chunk_size", "positive_integer", "number of dust cells to process at once", 100000)
+definition.add_flag("check_coordinates", "check whether the cell coordinates of the absorption tables of the different contributions match", False)
+
+# -----------------------------------------------------------------
@@ -51,6 +51,9 @@ ndust_maps = len(dust_map_names)
 # Steps
 definition.add_flag("steps", "save the results of intermediate steps", True)
 
+# Parallel processing
+definition.add_optional("nprocesses", "positive_integer", "number of maps to process in parallel (requires saving the intermediate results)", 1)
+
 # Remote
 definition.add_optional("remote", "string", "remote host to use for creating the clip masks", choices=find_host_ids(schedulers=False))
 
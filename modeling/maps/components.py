@@ -12,6 +12,11 @@
 # Ensure Python 3 compatibility
 from __future__ import absolute_import, division, print_function
 
+# Import standard modules
+import json
+import time
+import multiprocessing
+
 # Import astronomical modules
 from astropy.units import dimensionless_angles
 
@@ -59,6 +64,15 @@ softening_suffix = "softening"
 
 # -----------------------------------------------------------------
 
+# The name of the file in the steps directory of a component with the signatures (size and modification time) of
+# the input maps for which the intermediate results were made
+inputs_filename = ".inputs.json"
+
+# The components
+component_names = ["old", "young", "ionizing", "dust"]
+
+# -----------------------------------------------------------------
+
 def steps_before(step):
 
     """
@@ -229,6 +243,9 @@ class ComponentMapsMaker(MapsSelectionComponent):
         # 6. Remove other
         if self.remove: self.remove_other()
 
+        # Remove the results for maps of which the input has changed
+        if self.config.steps: self.check_inputs()
+
         # 7. Load the maps
         self.load_maps()
 
@@ -2075,6 +2092,74 @@ class ComponentMapsMaker(MapsSelectionComponent):
 
     # -----------------------------------------------------------------
 
+    def check_inputs(self):
+
+        """
+        This function removes the intermediate results, masks, deprojected and edge-on maps of the maps of which the
+        input map has changed since the intermediate results were made, so that only these maps are processed again
+        :return:
+        """
+
+        # Inform the user
+        log.info("Checking the input maps for changes ...")
+
+        # Loop over the components
+        for component in component_names:
+
+            steps_path = getattr(self, component + "_steps_path")
+            map_paths = getattr(self, component + "_map_paths")
+
+            # Load the signatures of the input maps
+            inputs_path = fs.join(steps_path, inputs_filename)
+            if fs.is_file(inputs_path):
+                with open(inputs_path, "r") as inputs_file: signatures = json.load(inputs_file)
+            else: signatures = dict()
+
+            # Loop over the selected maps
+            for name in getattr(self, component + "_selection"):
+
+                signature = list(fs.file_signature(map_paths[name]))
+
+                # Check whether the input map has changed
+                if name in signatures and signatures[name] != signature:
+                    log.warning("The input of the '" + name + "' " + component + " map has changed: removing the previous results ...")
+                    self.remove_results(component, name)
+
+                # Set the signature
+                signatures[name] = signature
+
+            # Write the signatures
+            with open(inputs_path, "w") as inputs_file: json.dump(signatures, inputs_file)
+
+    # -----------------------------------------------------------------
+
+    def remove_results(self, component, name):
+
+        """
+        This function removes the intermediate results, masks, deprojected and edge-on maps of a map
+        :param component:
+        :param name:
+        :return:
+        """
+
+        # Remove the intermediate results
+        map_steps_path = fs.join(getattr(self, component + "_steps_path"), name)
+        if fs.is_directory(map_steps_path): fs.remove_directory(map_steps_path)
+
+        # Remove the masks
+        masks_path = getattr(self, component + "_masks_path")
+        for suffix in (clip_suffix, softening_suffix):
+            path = fs.join(masks_path, name + "_" + suffix + ".fits")
+            if fs.is_file(path): fs.remove_file(path)
+
+        # Remove the map, the deprojected maps and the edge-on map
+        for directory_path in (getattr(self, component + "_component_maps_path"), getattr(self, component + "_deprojection_path"),
+                               getattr(self, component + "_deprojection_skirt_path"), getattr(self, component + "_edgeon_path")):
+            path = fs.join(directory_path, name + ".fits")
+            if fs.is_file(path): fs.remove_file(path)
+
+    # -----------------------------------------------------------------
+
     def load_maps(self):
 
         """
@@ -2633,6 +2718,9 @@ class ComponentMapsMaker(MapsSelectionComponent):
         # Inform the user
         log.info("Processing the maps ...")
 
+        # Process the maps in parallel, up to the last step
+        if self.config.nprocesses > 1: self.process_maps_parallel()
+
         # 1. Correct
         self.correct_maps()
 
@@ -2653,6 +2741,93 @@ class ComponentMapsMaker(MapsSelectionComponent):
 
     # -----------------------------------------------------------------
 
+    def is_processed(self, component, name):
+
+        """
+        This function ...
+        :param component:
+        :param name:
+        :return:
+        """
+
+        return getattr(self, component + "_maps")[name].metadata[softened_step]
+
+    # -----------------------------------------------------------------
+
+    def process_maps_parallel(self):
+
+        """
+        This function processes the maps in parallel processes, each map in its own process. The processes save the
+        results of every step, which are then loaded as for a rerun. A map for which the process failed is
+        processed again (from its last step) afterwards, in this process.
+        :return:
+        """
+
+        # Checks
+        if not self.config.steps:
+            log.warning("The intermediate results are not saved: processing the maps in serial")
+            return
+        if self.config.remote is not None:
+            log.warning("A remote host is used for the clip masks: processing the maps in serial")
+            return
+
+        # Determine the maps that still have to be processed
+        tasks = [(component, name) for component in component_names for name in getattr(self, component + "_maps") if not self.is_processed(component, name)]
+        if len(tasks) == 0: return
+
+        # Inform the user
+        log.info("Processing " + str(len(tasks)) + " maps with " + str(self.config.nprocesses) + " parallel processes ...")
+
+        # Start the processes, keeping at most nprocesses running
+        running = []
+        failed = []
+        while len(tasks) > 0 or len(running) > 0:
+
+            # Start new processes
+            while len(tasks) > 0 and len(running) < self.config.nprocesses:
+                component, name = tasks.pop(0)
+                process = multiprocessing.Process(target=self.process_map, args=(component, name))
+                process.start()
+                running.append((component, name, process))
+
+            # Check for finished processes
+            time.sleep(1)
+            for component, name, process in running[:]:
+                if process.is_alive(): continue
+                process.join()
+                running.remove((component, name, process))
+                if process.exitcode != 0: failed.append((component, name))
+                else: log.success("Processed the '" + name + "' " + component + " map")
+
+        # Show the failed maps
+        for component, name in failed: log.error("Processing the '" + name + "' " + component + " map failed: continuing from its last step")
+
+        # Load the results
+        self.load_maps()
+        self.load_masks()
+
+    # -----------------------------------------------------------------
+
+    def process_map(self, component, name):
+
+        """
+        This function processes one map, in a separate process
+        :param component:
+        :param name:
+        :return:
+        """
+
+        # Remove all other maps (from this copy)
+        for other in component_names:
+            maps = getattr(self, other + "_maps")
+            setattr(self, other + "_maps", {name: maps[name]} if other == component else dict())
+
+        # Process the map
+        self.config.nprocesses = 1
+        self.process_maps()
+
+    # -----------------------------------------------------------------
+
     def correct_maps(self):
 
         """
@@ -2849,7 +3024,7 @@ class ComponentMapsMaker(MapsSelectionComponent):
             self.dust_maps[name].metadata[correct_step] = True
 
             # Save intermediate result
-            if self.config.step: self.dust_maps[name].saveto(self.dust_step_path_for_map(name, correct_step))
+            if self.config.steps: self.dust_maps[name].saveto(self.dust_step_path_for_map(name, correct_step))
 
     # -----------------------------------------------------------------
 
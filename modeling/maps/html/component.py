@@ -32,7 +32,7 @@ from ....magic.view.html import javascripts, css_scripts
 from ....core.tools.html import HTMLPage, SimpleTable, updated_footing, make_page_width
 from ....core.tools import browser
 from ....core.tools.stringify import tostr
-from ....magic.core.frame import Frame
+from ....magic.core.qualitycatalog import get_quality
 from ....core.tools import strings
 from ....core.tools import numbers
 from ....core.tools.parsing import real
@@ -268,73 +268,69 @@ class ComponentMapsPageGenerator(MapsSelectionComponent):
             # Get the path
             path = self.map_paths[name]
 
-            # Load the map
-            the_map = Frame.from_file(path)
-
-            # Get the FWHM and pixelscale
-            fwhm = the_map.fwhm
-            pixelscale = the_map.average_pixelscale
+            # Get the quality indicators of the map, calculated in one pass (from the quality catalog if the map
+            # has not changed since the previous run)
+            quality = get_quality(path, self.central_ellipse)
 
             # Set FWHM and pixelscale
-            self.fwhms[name] = fwhm
-            self.pixelscales[name] = pixelscale
+            self.fwhms[name] = quality["fwhm"]
+            self.pixelscales[name] = quality["pixelscale"]
 
             # Check complete map for NaNS
-            if the_map.all_nans:
+            if quality["all_nans"]:
                 log.warning("The '" + name + "' map contains only NaN values")
                 self.invalid.add(name)
 
             # Check complete map for infs
-            if the_map.all_infs:
+            if quality["all_infs"]:
                 log.warning("The '" + name + "' map contains only infinities")
                 self.invalid.add(name)
 
             # Check complete map for zeros
-            if the_map.all_zeroes:
+            if quality["all_zeroes"]:
                 log.warning("The '" + name + "' map contains only zeros")
                 #self.invalid.add(name)
                 self.zero.add(name)
 
             # Check whether complete map is constant
-            if the_map.is_constant:
+            if quality["constant"]:
                 log.warning("The '" + name + "' map is constant everywhere")
                 #self.invalid.add(name)
                 self.constant.add(name)
 
             # Check whether complete map is negative
-            if the_map.all_negatives:
+            if quality["all_negatives"]:
                 log.warning("The '" + name + "' map contains only negative values")
                 #self.invalid.add(name)
                 self.negative.add(name)
 
-            # Get center ellipse in pixel coordinates
-            center_ellipse = self.central_ellipse.to_pixel(the_map.wcs)
-            npixels_in_ellipse = the_map.npixels_in(center_ellipse)
+            # Get the number of pixels within the center ellipse (as a float, so that an empty ellipse gives NaN fractions)
+            npixels_in_ellipse = np.float64(quality["npixels_in"])
 
             # Check NaNs within center ellipse
-            if the_map.nnans_in(center_ellipse) / npixels_in_ellipse > self.config.ninvalid_pixels_tolerance:
+            if quality["nnans_in"] / npixels_in_ellipse > self.config.ninvalid_pixels_tolerance:
                 log.warning("The '" + name + "' map contains too many NaN values within the central ellipse")
                 self.invalid.add(name)
 
             # Check infinities within center ellipse
-            if the_map.ninfs_in(center_ellipse) / npixels_in_ellipse > self.config.ninvalid_pixels_tolerance:
+            if quality["ninfs_in"] / npixels_in_ellipse > self.config.ninvalid_pixels_tolerance:
                 log.warning("The '" + name + "' map contains too many infinities within the central ellipse")
                 self.invalid.add(name)
 
             # Check zeros within center ellipse
-            if the_map.nzeroes_in(center_ellipse) / npixels_in_ellipse > self.config.nzero_pixels_tolerance:
+            if quality["nzeroes_in"] / npixels_in_ellipse > self.config.nzero_pixels_tolerance:
                 log.warning("The '" + name + "' map contains too many zero values within the central ellipse")
                 #self.invalid.add(name)
                 self.zero.add(name)
 
             # Check whether constant within center ellipse
-            if the_map.is_constant_in(center_ellipse):
+            if quality["constant_in"]:
                 log.warning("The '" + name + "' map is constant within the central ellipse")
                 #self.invalid.add(name)
                 self.constant.add(name)
 
             # Check negatives within central ellipse
-            relative_nnegatives = the_map.nnegatives_in(center_ellipse) / npixels_in_ellipse
+            relative_nnegatives = quality["nnegatives_in"] / npixels_in_ellipse
             if relative_nnegatives > self.config.nnegative_pixels_tolerance:
                 log.warning("The '" + name + "' map contains too many negative values within the central ellipse")
                 #self.invalid.add(name)
@@ -344,12 +340,12 @@ class ComponentMapsPageGenerator(MapsSelectionComponent):
             self.nnegatives[name] = relative_nnegatives
 
             # Check central pixel
-            if np.isnan(the_map.center_value):
+            if quality["center_nan"]:
                 log.warning("The '" + name + "' map has NaN at the center pixel")
                 self.invalid.add(name)
 
             # Check central pixel
-            if np.isinf(the_map.center_value):
+            if quality["center_inf"]:
                 log.warning("The '" + name + "' map has infinity at the center pixel")
                 self.invalid.add(name)
 
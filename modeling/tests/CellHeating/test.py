@@ -0,0 +1,302 @@
+#!/usr/bin/env python
+# -*- coding: utf8 -*-
+# *****************************************************************
+# **       PTS -- Python Toolkit for working with SKIRT          **
+# **       © Astronomical Observatory, Ghent University          **
+# *****************************************************************
+
+# Ensure Python 3 compatibility
+from __future__ import absolute_import, division, print_function
+
+# Import standard modules
+import numpy as np
+
+# Import the relevant PTS classes and modules
+from pts.core.test.implementation import TestImplementation
+from pts.core.basics.log import log
+from pts.core.basics.map import Map
+from pts.core.tools import filesystem as fs
+from pts.modeling.analysis.heating.component import contributions
+from pts.modeling.analysis.heating.cell import CellDustHeatingAnalyser
+
+# -----------------------------------------------------------------
+
+description = "testing the vectorized dust heating analysis of the dust cells against the per-cell calculation"
+
+# -----------------------------------------------------------------
+
+class CellHeatingTest(TestImplementation):
+
+    """
+    This class ...
+    """
+
+    class Analyser(CellDustHeatingAnalyser):
+
+        """
+        This class is a cell dust heating analyser of which the galaxy name and the simulation output paths are set
+        by the test (instead of by the modeling environment)
+        """
+
+        galaxy_name = "Test"
+
+        def heating_output_path_for_contribution(self, contribution): return self.output_paths[contribution]
+
+    # -----------------------------------------------------------------
+
+    def __init__(self, *args, **kwargs):
+
+        """
+        This function ...
+        :param kwargs:
+        """
+
+        # Call the constructor of the base class
+        super(CellHeatingTest, self).__init__(*args, **kwargs)
+
+        # The number of dust cells
+        self.ncells = 1000
+
+        # The cell coordinates and the absorbed luminosities for each contribution
+        self.coordinates = None
+        self.absorptions = dict()
+
+        # The mass fractions
+        self.mass_fractions = None
+
+        # The wavelengths, the wavelength bin widths (in micron) and the mean intensities for each contribution
+        # (wavelengths x cells)
+        self.wavelengths = None
+        self.deltas = None
+        self.jlambdas = dict()
+
+        # The simulation output paths for each contribution
+        self.output_paths = dict()
+
+    # -----------------------------------------------------------------
+
+    def run(self, **kwargs):
+
+        """
+        This function ...
+        :param kwargs:
+        :return:
+        """
+
+        # 1. Call the setup function
+        self.setup(**kwargs)
+
+        # 2. Test loading the absorptions
+        self.test_absorptions()
+
+        # 3. Test the heating fractions
+        self.test_heating()
+
+        # 4. Test the integration of the mean intensities
+        self.test_isrf()
+
+    # -----------------------------------------------------------------
+
+    def setup(self, **kwargs):
+
+        """
+        This function ...
+        :param kwargs:
+        :return:
+        """
+
+        # Call the setup function of the base class
+        super(CellHeatingTest, self).setup(**kwargs)
+
+        # Inform the user
+        log.info("Creating the simulation output ...")
+
+        np.random.seed(27)
+
+        # Create the cell coordinates and the mass fractions
+        self.coordinates = np.random.uniform(-1e4, 1e4, size=(3, self.ncells))
+        self.mass_fractions = np.random.uniform(0., 1., size=self.ncells)
+        self.mass_fractions /= np.sum(self.mass_fractions)
+
+        # Create the absorbed luminosities: cells without absorption, and cells where the absorption of the unevolved
+        # populations exceeds the total
+        self.absorptions["old"] = np.random.uniform(0., 1e30, size=self.ncells)
+        self.absorptions["young"] = np.random.uniform(0., 1e30, size=self.ncells)
+        self.absorptions["ionizing"] = np.random.uniform(0., 1e29, size=self.ncells)
+        self.absorptions["total"] = self.absorptions["old"] + self.absorptions["young"] + self.absorptions["ionizing"]
+        self.absorptions["total"][::97] = 0.
+        self.absorptions["total"][5::89] *= 0.1
+
+        # Create the wavelength grid
+        self.wavelengths = np.logspace(-1, 1, 12)
+        self.deltas = np.gradient(self.wavelengths)
+
+        # Write the absorption and ISRF tables for each contribution
+        for contribution in contributions:
+
+            if contribution == "unevolved": continue
+            self.output_paths[contribution] = fs.create_directory_in(self.path, contribution)
+
+            self.jlambdas[contribution] = np.random.uniform(0., 1e-5, size=(len(self.wavelengths), self.ncells))
+
+            descriptions = ["x coordinate of cell center (pc)", "y coordinate of cell center (pc)", "z coordinate of cell center (pc)", "Absorbed bolometric luminosity (W)"]
+            self.write_table(fs.join(self.output_paths[contribution], "Test_ds_abs.dat"), descriptions, np.vstack([self.coordinates, self.absorptions[contribution]]))
+
+            descriptions = ["dust cell index", "x coordinate of cell center (pc)", "y coordinate of cell center (pc)", "z coordinate of cell center (pc)"]
+            descriptions += ["J_lambda (W/m3/sr) for lambda = " + repr(wavelength) + " micron" for wavelength in self.wavelengths]
+            self.write_table(fs.join(self.output_paths[contribution], "Test_ds_isrf.dat"), descriptions, np.vstack([np.arange(self.ncells), self.coordinates, self.jlambdas[contribution]]))
+
+        # Write the wavelengths file
+        self.write_table(fs.join(self.output_paths["total"], "Test_wavelengths.dat"), ["wavelength (micron)", "bin width (micron)"], np.vstack([self.wavelengths, self.deltas]))
+
+    # -----------------------------------------------------------------
+
+    def write_table(self, path, descriptions, columns):
+
+        """
+        This function writes a table in the format of the SKIRT text output
+        :param path:
+        :param descriptions:
+        :param columns:
+        :return:
+        """
+
+        with open(path, 'w') as fh:
+            for index, description in enumerate(descriptions): fh.write("# column " + str(index + 1) + ": " + description + "\n")
+            for row in columns.T: fh.write(" ".join(repr(value) for value in row) + "\n")
+
+    # -----------------------------------------------------------------
+
+    def create_analyser(self, chunk_size, check_coordinates=False):
+
+        """
+        This function creates the analyser, with the absorptions loaded
+        :param chunk_size:
+        :param check_coordinates:
+        :return:
+        """
+
+        analyser = self.Analyser.__new__(self.Analyser)
+        analyser.config = Map()
+        analyser.config.chunk_size = chunk_size
+        analyser.config.check_coordinates = check_coordinates
+        analyser.output_paths = self.output_paths
+        analyser.analysis_run = analyser
+        analyser.total_output_path = self.output_paths["total"]
+        analyser.cell_properties = {"Mass fraction": self.mass_fractions}
+        analyser.isrf_luminosities = dict()
+
+        # Load the wavelength grid and the absorptions
+        analyser.load_wavelength_grid()
+        analyser.load_absorption()
+
+        # Return the analyser
+        return analyser
+
+    # -----------------------------------------------------------------
+
+    def test_absorptions(self):
+
+        """
+        This function ...
+        :return:
+        """
+
+        # Inform the user
+        log.info("Testing loading the absorptions ...")
+
+        # Load, with the coordinate check
+        analyser = self.create_analyser(64, check_coordinates=True)
+
+        # Check the wavelengths and the cells
+        assert analyser.number_of_wavelengths == len(self.wavelengths)
+        assert analyser.ncells == self.ncells
+        assert list(analyser.chunks)[-1] == (960, 1000)
+        for coordinates, expected in zip((analyser.x_coordinates, analyser.y_coordinates, analyser.z_coordinates), self.coordinates): assert np.array_equal(coordinates, expected)
+
+        # Check the absorptions
+        for contribution in analyser.absorption_contributions: assert np.array_equal(analyser.absorptions_for(contribution), self.absorptions[contribution])
+        assert np.array_equal(analyser.zero_absorption, self.absorptions["total"] == 0.)
+
+        # Different coordinates
+        path = fs.join(self.output_paths["old"], "Test_ds_abs.dat")
+        coordinates = self.coordinates.copy()
+        coordinates[2, 500] += 1.
+        self.write_table(path, ["x coordinate of cell center (pc)", "y coordinate of cell center (pc)", "z coordinate of cell center (pc)", "Absorbed bolometric luminosity (W)"], np.vstack([coordinates, self.absorptions["old"]]))
+        try: self.create_analyser(64, check_coordinates=True)
+        except ValueError: pass
+        else: raise AssertionError("Different cell coordinates are not detected")
+
+        # Not checked
+        analyser = self.create_analyser(64)
+        assert np.array_equal(analyser.absorptions_for("old"), self.absorptions["old"])
+
+    # -----------------------------------------------------------------
+
+    def test_heating(self):
+
+        """
+        This function ...
+        :return:
+        """
+
+        # Inform the user
+        log.info("Testing the heating fractions ...")
+
+        # Calculate the heating fractions for each cell separately (as before the vectorization)
+        fractions = []
+        mask = []
+        for index in range(self.ncells):
+
+            unevolved = self.absorptions["young"][index] + self.absorptions["ionizing"][index]
+            total = self.absorptions["total"][index]
+
+            if total == 0.:
+                fractions.append(None)
+                mask.append(True)
+            else:
+                fractions.append(unevolved / total)
+                mask.append(fractions[-1] > 1.0)
+
+        fractions_compressed = np.array([fraction for fraction, masked in zip(fractions, mask) if not masked])
+        weights_compressed = np.array([weight for weight, masked in zip(self.mass_fractions, mask) if not masked])
+        assert 0 < np.sum(mask) < self.ncells
+
+        # Calculate, with chunks of different sizes
+        for chunk_size in (1, 64, 1000, 5000):
+
+            analyser = self.create_analyser(chunk_size)
+            analyser.calculate_heating_unevolved()
+
+            assert np.array_equal(analyser.mask, np.array(mask))
+            assert np.allclose(analyser.heating_fractions_compressed, fractions_compressed, rtol=1e-14, atol=0.)
+            assert np.array_equal(analyser.weights_compressed, weights_compressed)
+            assert np.array_equal(analyser.x_coordinates[~analyser.mask], self.coordinates[0][~np.array(mask)])
+
+    # -----------------------------------------------------------------
+
+    def test_isrf(self):
+
+        """
+        This function ...
+        :return:
+        """
+
+        # Inform the user
+        log.info("Testing the integration of the mean intensities ...")
+
+        deltas = self.deltas * 1e-6
+
+        # Calculate, with chunks of different sizes
+        for chunk_size in (1, 64, 5000):
+
+            analyser = self.create_analyser(chunk_size)
+            analyser.load_isrf()
+
+            for contribution in analyser.absorption_contributions:
+
+                # Integrate for each cell separately (as before the vectorization)
+                luminosities = [np.sum(self.jlambdas[contribution][:, index] * deltas) for index in range(self.ncells)]
+                assert np.allclose(analyser.isrf_luminosities[contribution], luminosities, rtol=1e-12, atol=0.)
+
+# -----------------------------------------------------------------
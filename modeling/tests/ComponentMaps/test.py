@@ -0,0 +1,370 @@
+#!/usr/bin/env python
+# -*- coding: utf8 -*-
+# *****************************************************************
+# **       PTS -- Python Toolkit for working with SKIRT          **
+# **       © Astronomical Observatory, Ghent University          **
+# *****************************************************************
+
+# Ensure Python 3 compatibility
+from __future__ import absolute_import, division, print_function
+
+# Import standard modules
+import os
+import numpy as np
+import multiprocessing
+from astropy.io import fits
+
+# Import the relevant PTS classes and modules
+from pts.core.test.implementation import TestImplementation
+from pts.core.basics.log import log
+from pts.core.basics.map import Map
+from pts.core.tools import filesystem as fs
+from pts.magic.core.frame import Frame
+from pts.magic.core.mask import Mask
+from pts.magic.basics.coordinatesystem import CoordinateSystem
+from pts.modeling.maps import components
+from pts.modeling.maps.components import ComponentMapsMaker
+
+# -----------------------------------------------------------------
+
+description = "testing the parallel processing of the component maps and the invalidation of the results of changed input maps"
+
+# -----------------------------------------------------------------
+
+class ComponentMapsTest(TestImplementation):
+
+    """
+    This class ...
+    """
+
+    class Maker(ComponentMapsMaker):
+
+        """
+        This class is a component maps maker of which the processing steps only add one to the maps, and of which
+        the paths are set by the test (instead of by the modeling environment)
+        """
+
+        old_component_maps_path = property(lambda self: self.component_maps_paths["old"])
+        young_component_maps_path = property(lambda self: self.component_maps_paths["young"])
+        ionizing_component_maps_path = property(lambda self: self.component_maps_paths["ionizing"])
+        dust_component_maps_path = property(lambda self: self.component_maps_paths["dust"])
+
+        def correct_maps(self): self.apply(components.correct_step)
+        def interpolate_maps(self): self.apply(components.interpolate_step)
+        def truncate_maps(self): self.apply(components.truncate_step)
+        def crop_maps(self): self.apply(components.crop_step)
+        def clip_maps(self): self.apply(components.clip_step)
+        def soften_edges(self): self.apply(components.softened_step)
+
+        def apply(self, step):
+
+            """
+            This function applies a step to the maps for which it has not been applied yet, and saves the result
+            (failing for the failing map when it is processed in another process)
+            :param step:
+            :return:
+            """
+
+            for component in components.component_names:
+                for name, frame in getattr(self, component + "_maps").items():
+
+                    if frame.metadata[step]: continue
+                    if name == self.failing and step == components.truncate_step and multiprocessing.current_process().name != "MainProcess": raise RuntimeError("Processing failed")
+
+                    frame.data[:] += 1.
+                    frame.metadata[step] = True
+                    self.napplied += 1
+
+                    frame.saveto(getattr(self, component + "_step_path_for_map")(name, step))
+                    if step not in (components.clip_step, components.softened_step): continue
+
+                    mask = Mask(np.zeros(frame.shape, dtype=bool), wcs=frame.wcs)
+                    getattr(self, component + ("_clip_masks" if step == components.clip_step else "_softening_masks"))[name] = mask
+                    mask.saveto(getattr(self, component + "_step_path_for_mask")(name, step))
+
+    # -----------------------------------------------------------------
+
+    def __init__(self, *args, **kwargs):
+
+        """
+        This function ...
+        :param kwargs:
+        """
+
+        # Call the constructor of the base class
+        super(ComponentMapsTest, self).__init__(*args, **kwargs)
+
+        # The values of the input maps, by component and name
+        self.values = {"old": {"IRAC": 1.}, "young": {"FUV": 2.}, "ionizing": {"Halpha": 3.}, "dust": {"MIPS": 4., "Herschel": 5.}}
+
+        # The coordinate system of the maps
+        self.wcs = None
+
+        # The paths of the input maps and the component maps directories
+        self.map_paths = dict()
+        self.component_maps_paths = dict()
+
+    # -----------------------------------------------------------------
+
+    def run(self, **kwargs):
+
+        """
+        This function ...
+        :param kwargs:
+        :return:
+        """
+
+        # 1. Call the setup function
+        self.setup(**kwargs)
+
+        # 2. Test the parallel processing, with a failing process
+        self.test_processing()
+
+        # 3. Test processing again, with unchanged input maps
+        self.test_unchanged()
+
+        # 4. Test processing again, with a changed input map
+        self.test_changed()
+
+    # -----------------------------------------------------------------
+
+    def setup(self, **kwargs):
+
+        """
+        This function ...
+        :param kwargs:
+        :return:
+        """
+
+        # Call the setup function of the base class
+        super(ComponentMapsTest, self).setup(**kwargs)
+
+        # Create the coordinate system
+        header = fits.Header()
+        header["NAXIS"] = 2
+        header["NAXIS1"] = 12
+        header["NAXIS2"] = 10
+        header["CTYPE1"] = "RA---TAN"
+        header["CTYPE2"] = "DEC--TAN"
+        header["CRVAL1"] = 10.
+        header["CRVAL2"] = 20.
+        header["CRPIX1"] = 6.5
+        header["CRPIX2"] = 5.5
+        header["CDELT1"] = -1. / 3600.
+        header["CDELT2"] = 1. / 3600.
+        self.wcs = CoordinateSystem(header)
+
+        # Write the input maps
+        maps_path = fs.create_directory_in(self.path, "maps")
+        for component in components.component_names:
+            self.map_paths[component] = dict()
+            for name, value in self.values[component].items():
+                self.map_paths[component][name] = fs.join(maps_path, name + ".fits")
+                self.create_frame(value).saveto(self.map_paths[component][name])
+
+        # Create the component maps directories
+        components_path = fs.create_directory_in(self.path, "components")
+        for component in components.component_names: self.component_maps_paths[component] = fs.create_directory_in(components_path, component)
+
+    # -----------------------------------------------------------------
+
+    def create_frame(self, value):
+
+        """
+        This function creates a map with a constant value
+        :param value:
+        :return:
+        """
+
+        return Frame(np.full((10, 12), value), wcs=self.wcs)
+
+    # -----------------------------------------------------------------
+
+    def create_maker(self, failing=None):
+
+        """
+        This function creates a component maps maker (as it is set up for the selected maps)
+        :param failing: the name of the map for which the processing in another process fails
+        :return:
+        """
+
+        maker = self.Maker.__new__(self.Maker)
+        maker.config = Map()
+        maker.config.steps = True
+        maker.config.remote = None
+        maker.config.nprocesses = 2
+        maker.component_maps_paths = self.component_maps_paths
+        maker.failing = failing
+        maker.napplied = 0
+
+        for component in components.component_names:
+
+            path = self.component_maps_paths[component]
+            setattr(maker, component + "_selection", sorted(self.values[component].keys()))
+            setattr(maker, component + "_map_paths", self.map_paths[component])
+            setattr(maker, component + "_maps", dict())
+            setattr(maker, component + "_clip_masks", dict())
+            setattr(maker, component + "_softening_masks", dict())
+            setattr(maker, component + "_steps_path", fs.join(path, components.steps_name))
+            setattr(maker, component + "_masks_path", fs.create_directory_in(path, components.masks_name))
+            setattr(maker, component + "_deprojection_path", fs.create_directory_in(path, components.deprojected_name))
+            setattr(maker, component + "_deprojection_skirt_path", fs.create_directory_in(path, components.deprojected_skirt_name))
+            setattr(maker, component + "_edgeon_path", fs.create_directory_in(path, components.edgeon_name))
+            if not fs.is_directory(getattr(maker, component + "_steps_path")): fs.create_directory(getattr(maker, component + "_steps_path"))
+
+        # Return the maker
+        return maker
+
+    # -----------------------------------------------------------------
+
+    def process(self, maker):
+
+        """
+        This function checks the inputs, loads the maps and masks and processes the maps, as the component maps maker does
+        :param maker:
+        :return:
+        """
+
+        maker.check_inputs()
+        maker.load_maps()
+        maker.load_masks()
+        maker.process_maps()
+
+    # -----------------------------------------------------------------
+
+    def check_processed(self, maker):
+
+        """
+        This function checks that all maps are processed, in memory and on disk
+        :param maker:
+        :return:
+        """
+
+        nsteps = len(components.steps)
+        for component in components.component_names:
+            for name, value in self.values[component].items():
+
+                frame = getattr(maker, component + "_maps")[name]
+                assert np.all(np.asarray(frame.data) == value + nsteps)
+                assert all(frame.metadata[step] for step in components.steps)
+                assert name in getattr(maker, component + "_clip_masks") and name in getattr(maker, component + "_softening_masks")
+
+                for step in components.steps: assert getattr(maker, "has_" + component + "_step")(name, step)
+
+    # -----------------------------------------------------------------
+
+    def step_signatures(self, maker):
+
+        """
+        This function returns the signatures of the files with the intermediate results
+        :param maker:
+        :return:
+        """
+
+        signatures = dict()
+        for component in components.component_names:
+            for name in self.values[component]:
+                for step in components.steps:
+                    path = getattr(maker, component + "_step_path_for_map")(name, step)
+                    signatures[path] = fs.file_signature(path)
+        return signatures
+
+    # -----------------------------------------------------------------
+
+    def test_processing(self):
+
+        """
+        This function ...
+        :return:
+        """
+
+        # Inform the user
+        log.info("Testing the parallel processing, with a failing process ...")
+
+        # Process
+        maker = self.create_maker(failing="Herschel")
+        self.process(maker)
+
+        # All maps are processed
+        self.check_processed(maker)
+
+        # The maps are processed by the other processes, except for the steps of the failing map after its last
+        # saved step
+        assert maker.napplied == len(components.steps_after(components.interpolate_step))
+
+    # -----------------------------------------------------------------
+
+    def test_unchanged(self):
+
+        """
+        This function ...
+        :return:
+        """
+
+        # Inform the user
+        log.info("Testing processing again, with unchanged input maps ...")
+
+        # Process again
+        maker = self.create_maker()
+        signatures = self.step_signatures(maker)
+        self.process(maker)
+
+        # Nothing is processed again, the intermediate results are loaded
+        assert maker.napplied == 0
+        self.check_processed(maker)
+        assert self.step_signatures(maker) == signatures
+
+    # -----------------------------------------------------------------
+
+    def test_changed(self):
+
+        """
+        This function ...
+        :return:
+        """
+
+        # Inform the user
+        log.info("Testing processing again, with a changed input map ...")
+
+        # Create the other results for the maps of the dust component
+        maker = self.create_maker()
+        results = dict()
+        for name in self.values["dust"]:
+            results[name] = [fs.join(maker.dust_component_maps_path, name + ".fits"), fs.join(maker.dust_deprojection_path, name + ".fits"),
+                             fs.join(maker.dust_deprojection_skirt_path, name + ".fits"), fs.join(maker.dust_edgeon_path, name + ".fits"),
+                             fs.join(maker.dust_masks_path, name + "_" + components.clip_suffix + ".fits")]
+            for path in results[name]: self.create_frame(0.).saveto(path)
+        signatures = self.step_signatures(maker)
+
+        # Change the MIPS map (with a later modification time)
+        self.values["dust"]["MIPS"] = 10.
+        path = self.map_paths["dust"]["MIPS"]
+        modification_time = os.stat(path).st_mtime + 10.
+        self.create_frame(10.).saveto(path)
+        os.utime(path, (modification_time, modification_time))
+
+        # The results of the changed map are removed, the results of the other maps are kept
+        maker.check_inputs()
+        assert not fs.is_directory(fs.join(maker.dust_steps_path, "MIPS"))
+        for path in results["MIPS"]: assert not fs.is_file(path)
+        for path in results["Herschel"]: assert fs.is_file(path)
+        for path in signatures:
+            if fs.join(maker.dust_steps_path, "MIPS") in path: continue
+            assert fs.file_signature(path) == signatures[path]
+
+        # Only the changed map is processed again (by another process), from its new input
+        maker = self.create_maker()
+        self.process(maker)
+        self.check_processed(maker)
+        assert maker.napplied == 0
+        for path in signatures:
+            if fs.join(maker.dust_steps_path, "MIPS") in path: continue
+            assert fs.file_signature(path) == signatures[path]
+
+        # Processing again doesn't remove anything
+        maker = self.create_maker()
+        signatures = self.step_signatures(maker)
+        self.process(maker)
+        assert self.step_signatures(maker) == signatures
+
+# -----------------------------------------------------------------
@@ -0,0 +1,174 @@
+#!/usr/bin/env python
+# -*- coding: utf8 -*-
+# *****************************************************************
+# **       PTS -- Python Toolkit for working with SKIRT          **
+# **       © Astronomical Observatory, Ghent University          **
+# *****************************************************************
+
+# Ensure Python 3 compatibility
+from __future__ import absolute_import, division, print_function
+
+# Import standard modules
+import numpy as np
+
+# Import astronomical modules
+from astropy.coordinates import Angle
+
+# Import the relevant PTS classes and modules
+from pts.core.test.implementation import TestImplementation
+from pts.core.basics.log import log
+from pts.core.units.parsing import parse_unit as u
+from pts.magic.core.frame import Frame
+from pts.modeling.basics.models import DeprojectionModel3D
+
+# -----------------------------------------------------------------
+
+description = "testing the surface density and density functions of the deprojection model on a non-square map"
+
+# -----------------------------------------------------------------
+
+class DeprojectionTest(TestImplementation):
+
+    """
+    This class ...
+    """
+
+    def __init__(self, *args, **kwargs):
+
+        """
+        This function ...
+        :param kwargs:
+        """
+
+        # Call the constructor of the base class
+        super(DeprojectionTest, self).__init__(*args, **kwargs)
+
+        # The map dimensions and the pixelscale (in pc)
+        self.xsize = 8
+        self.ysize = 5
+        self.pixelscale = 10.
+
+        # The scale height (in pc)
+        self.scale_height = 50.
+
+        # The deprojection model
+        self.model = None
+
+    # -----------------------------------------------------------------
+
+    def run(self, **kwargs):
+
+        """
+        This function ...
+        :param kwargs:
+        :return:
+        """
+
+        # 1. Call the setup function
+        self.setup(**kwargs)
+
+        # 2. Test the surface density function
+        self.test_surface_density()
+
+        # 3. Test the density function
+        self.test_density()
+
+    # -----------------------------------------------------------------
+
+    def setup(self, **kwargs):
+
+        """
+        This function ...
+        :param kwargs:
+        :return:
+        """
+
+        # Call the setup function of the base class
+        super(DeprojectionTest, self).setup(**kwargs)
+
+        # Create the model: a position angle of 90 degrees aligns the major axis with the x axis of the map
+        self.model = DeprojectionModel3D(filename="map.fits", pixelscale=self.pixelscale * u("pc"),
+                                         position_angle=Angle(90., "deg"), inclination=Angle(60., "deg"),
+                                         x_size=self.xsize, y_size=self.ysize, x_center=3.5, y_center=2.5,
+                                         scale_height=self.scale_height * u("pc"))
+
+        # Set a map with a different value in each pixel
+        self.model.map = Frame(np.arange(self.xsize * self.ysize, dtype=float).reshape(self.ysize, self.xsize) + 1.)
+
+    # -----------------------------------------------------------------
+
+    def plane_coordinates(self):
+
+        """
+        This function returns the coordinates (in the galactic plane) that project within the pixels of the map
+        :return:
+        """
+
+        cosi = np.cos(np.radians(60.))
+        x = (self.model.map_xmin.to("pc").value + (np.arange(self.xsize) + 0.75) * self.pixelscale) / cosi
+        y = self.model.map_ymin.to("pc").value + (np.arange(self.ysize) + 0.75) * self.pixelscale
+        return x, y
+
+    # -----------------------------------------------------------------
+
+    def test_surface_density(self):
+
+        """
+        This function ...
+        :return:
+        """
+
+        # Inform the user
+        log.info("Testing the surface density function ...")
+
+        x, y = self.plane_coordinates()
+        function = self.model.surface_density_function()
+
+        # The result is indexed [y, x], as the map
+        density = function(x[:, np.newaxis], y[np.newaxis, :])
+        assert density.shape == (self.ysize, self.xsize)
+        assert np.allclose(density, self.model.map.data)
+
+        # Also with the full coordinate grid
+        x_grid, y_grid = np.meshgrid(x, y, indexing="ij")
+        assert np.allclose(function(x_grid, y_grid), self.model.map.data)
+
+        # Normalized
+        density = self.model.surface_density_function(normalize=True)(x[:, np.newaxis], y[np.newaxis, :])
+        assert np.isclose(np.sum(density), 1.)
+
+    # -----------------------------------------------------------------
+
+    def test_density(self):
+
+        """
+        This function ...
+        :return:
+        """
+
+        # Inform the user
+        log.info("Testing the density function ...")
+
+        x, y = self.plane_coordinates()
+        z = np.array([-30., 0., 10., 100.])
+        function = self.model.density_function()
+
+        # The expected densities, indexed [x, y, z] as the coordinate grid
+        deltax = self.pixelscale / np.cos(np.radians(60.))
+        vertical = np.exp(- np.abs(z) / self.scale_height) / (2. * self.scale_height) / (deltax * self.pixelscale)
+        expected = self.model.map.data.T[:, :, np.newaxis] * vertical[np.newaxis, np.newaxis, :]
+
+        # Sparse grid
+        density = function(x[:, np.newaxis, np.newaxis], y[np.newaxis, :, np.newaxis], z[np.newaxis, np.newaxis, :])
+        assert density.shape == (self.xsize, self.ysize, len(z))
+        assert np.allclose(density, expected)
+
+        # Full grid
+        x_grid, y_grid, z_grid = np.meshgrid(x, y, z, indexing="ij")
+        assert np.allclose(function(x_grid, y_grid, z_grid), expected)
+
+        # Normalized
+        density = self.model.density_function(normalize=True)(x_grid, y_grid, z_grid)
+        assert np.isclose(np.sum(density), 1.)
+
+# -----------------------------------------------------------------